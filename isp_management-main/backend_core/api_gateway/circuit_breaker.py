@@ -50,10 +50,16 @@ class CircuitBreaker:
     calls to failing services, allowing them time to recover.
     """
     
-    def __init__(self):
-        """Initialize the circuit breaker."""
+    def __init__(self, use_redis: bool = True):
+        """
+        Initialize the circuit breaker.
+        
+        Args:
+            use_redis: Share circuit states through Redis rather than keep
+                them in this process only
+        """
         self.logger = logging.getLogger("circuit_breaker")
-        self.redis = redis_client
+        self.redis = redis_client if use_redis else None
         self.configs: Dict[str, CircuitBreakerConfig] = {}
         
         # In-memory storage for when Redis is not available
@@ -145,6 +151,9 @@ class CircuitBreaker:
             self._set_circuit_state(path, CircuitState.CLOSED)
             self._reset_failure_count(path)
             self.logger.info(f"Circuit for {path} closed after successful request in HALF_OPEN state")
+        elif state == CircuitState.CLOSED and self._get_failure_count(path):
+            # Only consecutive failures open the circuit
+            self._reset_failure_count(path)
         
         # Increment success count for metrics
         self._increment_success_count(path)
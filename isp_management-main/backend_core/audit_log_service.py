@@ -2,31 +2,14 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 import json
 import logging
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, desc
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
-from backend_core.database import Base
+from backend_core.models import AuditLog
+from backend_core.audit_log_sink import get_audit_log_sink
 
 logger = logging.getLogger(__name__)
 
-class AuditLog(Base):
-    """Model for storing audit logs of user activities."""
-    __tablename__ = "audit_logs"
-
-    id = Column(Integer, primary_key=True, index=True)
-    event_type = Column(String(50), index=True, nullable=False)
-    user_id = Column(Integer, index=True, nullable=True)
-    username = Column(String(100), index=True, nullable=True)
-    ip_address = Column(String(50), nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
-    status = Column(String(20), nullable=False)
-    details = Column(Text, nullable=True)
-    severity = Column(String(20), default="info")
-    resource_type = Column(String(50), nullable=True)
-    resource_id = Column(String(50), nullable=True)
-
-
 class AuditLogService:
     """Service for handling audit logging operations."""
 
@@ -45,6 +28,9 @@ class AuditLogService:
         """
         Log an audit event to the database and optionally to Elasticsearch.
         
+        Events are buffered and written in batches by the audit log sink; this
+        method never commits the caller's session.
+        
         Args:
             event_type: Type of event (e.g., login, logout, data_access)
             status: Status of the event (e.g., success, failed, pending)
@@ -55,15 +41,18 @@ class AuditLogService:
             severity: Severity level (info, warning, error, critical)
             resource_type: Type of resource being accessed/modified
             resource_id: ID of the resource being accessed/modified
-            db: Database session (if None, logs to console only)
+            db: Database session whose bind the event is persisted to
+                (if None, logs to console only)
         """
+        timestamp = datetime.utcnow()
+        
         # Create log entry
         log_entry = {
             "event_type": event_type,
             "user_id": user_id,
             "username": username,
             "ip_address": ip_address,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp.isoformat(),
             "status": status,
             "details": json.dumps(details) if details else None,
             "severity": severity,
@@ -82,28 +71,21 @@ class AuditLogService:
         else:
             logger.info(log_message)
             
-        # Store in database if session provided
+        # Hand off to the write-behind sink if a session was provided. The sink
+        # persists on its own connection, so the caller's transaction is untouched.
         if db:
-            try:
-                audit_log = AuditLog(
-                    event_type=event_type,
-                    user_id=user_id,
-                    username=username,
-                    ip_address=ip_address,
-                    status=status,
-                    details=json.dumps(details) if details else None,
-                    severity=severity,
-                    resource_type=resource_type,
-                    resource_id=resource_id
-                )
-                db.add(audit_log)
-                db.commit()
-            except Exception as e:
-                logger.error(f"Failed to store audit log in database: {str(e)}")
-                db.rollback()
-                
-        # TODO: Add Elasticsearch logging integration here
-        # This would send the log_entry to Elasticsearch for advanced search and analytics
+            get_audit_log_sink(db.get_bind()).enqueue({
+                "event_type": event_type,
+                "user_id": user_id,
+                "username": username,
+                "ip_address": ip_address,
+                "timestamp": timestamp,
+                "status": status,
+                "details": log_entry["details"],
+                "severity": severity,
+                "resource_type": resource_type,
+                "resource_id": resource_id
+            })
         
     @classmethod
     def get_logs(cls,
@@ -138,6 +120,9 @@ class AuditLogService:
         if not db:
             logger.error("Database session is required to retrieve audit logs")
             return [], 0
+        
+        # Make buffered events visible to the query
+        get_audit_log_sink(db.get_bind()).flush()
             
         query = db.query(AuditLog)
         
@@ -0,0 +1,370 @@
+"""
+Write-behind sink for audit log events.
+
+Audit events are pushed onto an in-process ring buffer and persisted by a
+background flusher thread, which bulk-inserts them on its own database
+connection and ships them to Elasticsearch in bulk. Callers never pay for a
+commit and never have their own pending work committed as a side effect.
+
+When the buffer is full, producers wait briefly for the flusher to catch up
+(backpressure); events that still do not fit, or batches that cannot be
+written to the database, are spilled to a JSON-lines file on disk and
+replayed on the next successful flush.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from core.metrics import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+# Environment configuration
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.05"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "/tmp/isp_audit_spill.jsonl")
+AUDIT_LOG_INDEX = os.getenv("AUDIT_LOG_INDEX", "isp_audit_logs")
+ELASTICSEARCH_URL = os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")
+ENABLE_ELASTICSEARCH = os.getenv("ENABLE_ELASTICSEARCH", "false").lower() == "true"
+
+metrics = MetricsCollector("audit_log")
+
+
+class AuditLogSink:
+    """Bounded, write-behind buffer that persists audit events in batches."""
+
+    def __init__(self,
+                 engine: Engine,
+                 es_client: Any = None,
+                 capacity: int = AUDIT_BUFFER_SIZE,
+                 batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT,
+                 spill_path: Optional[str] = AUDIT_SPILL_PATH,
+                 es_index: str = AUDIT_LOG_INDEX):
+        """
+        Initialize the sink.
+
+        Args:
+            engine: Engine used for the flusher's own connection
+            es_client: Optional Elasticsearch client for bulk shipping
+            capacity: Maximum number of events held in memory
+            batch_size: Maximum number of events written per flush
+            flush_interval: Seconds between periodic flushes
+            enqueue_timeout: Seconds a producer waits for room before spilling
+            spill_path: JSON-lines file used when the buffer or database is unavailable
+            es_index: Elasticsearch index for audit events
+        """
+        self.engine = engine
+        self.es_client = es_client
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.spill_path = spill_path
+        self.es_index = es_index
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "es_shipped": 0,
+            "flushes": 0,
+            "last_flush_latency": 0.0,
+        }
+
+    def start(self) -> None:
+        """Start the background flusher thread if it is not already running."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="audit-log-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher thread and write out anything still buffered."""
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        """
+        Add an event to the buffer.
+
+        Blocks for at most ``enqueue_timeout`` seconds when the buffer is full.
+        If there is still no room the event is spilled to disk.
+
+        Args:
+            event: Audit log row as a dictionary of column values
+
+        Returns:
+            True if the event was buffered, False if it was spilled
+        """
+        with self._cond:
+            if len(self._buffer) >= self.capacity:
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: len(self._buffer) < self.capacity, timeout=self.enqueue_timeout)
+            if len(self._buffer) < self.capacity:
+                self._buffer.append(event)
+                self.stats["enqueued"] += 1
+                if len(self._buffer) >= self.batch_size:
+                    self._cond.notify_all()
+                return True
+
+        metrics.increment("events_backpressure_spilled")
+        self._spill([event])
+        return False
+
+    def pending(self) -> int:
+        """Return the number of events waiting in memory."""
+        with self._cond:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """
+        Write every buffered event synchronously.
+
+        Returns:
+            Number of events written to the database
+        """
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                break
+            written += self._write_batch(batch)
+        return written
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            if batch:
+                self._cond.notify_all()
+            return batch
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopped.is_set() or len(self._buffer) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+            try:
+                self.flush()
+                self._replay_spill()
+            except Exception as e:
+                logger.error(f"Audit log flusher error: {str(e)}")
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        from backend_core.models import AuditLog
+
+        with self._flush_lock:
+            start_time = time.time()
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), batch)
+            except Exception as e:
+                logger.error(f"Failed to bulk insert {len(batch)} audit logs: {str(e)}")
+                metrics.increment("flush_errors")
+                self._spill(batch)
+                return 0
+
+            self._ship_to_elasticsearch(batch)
+
+            latency = time.time() - start_time
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+            self.stats["last_flush_latency"] = latency
+            metrics.record("flush_latency_seconds", latency)
+            metrics.record("flush_batch_size", len(batch))
+            metrics.gauge("buffer_depth", self.pending())
+            return len(batch)
+
+    def _ship_to_elasticsearch(self, batch: List[Dict[str, Any]]) -> None:
+        if not self.es_client:
+            return
+        try:
+            from elasticsearch import helpers
+
+            actions = [
+                {"_index": self.es_index, "_source": _to_document(event)}
+                for event in batch
+            ]
+            success, _ = helpers.bulk(self.es_client, actions, raise_on_error=False)
+            self.stats["es_shipped"] += success
+        except Exception as e:
+            logger.error(f"Failed to ship audit logs to Elasticsearch: {str(e)}")
+            metrics.increment("es_errors")
+
+    def _spill(self, events: List[Dict[str, Any]]) -> None:
+        if not self.spill_path:
+            logger.error(f"Dropping {len(events)} audit logs: no spill path configured")
+            metrics.increment("events_dropped", len(events))
+            return
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(_to_document(event)) + "\n")
+            self.stats["spilled"] += len(events)
+            metrics.increment("events_spilled", len(events))
+        except OSError as e:
+            logger.error(f"Failed to spill {len(events)} audit logs to disk: {str(e)}")
+            metrics.increment("events_dropped", len(events))
+
+    def _replay_spill(self) -> int:
+        """
+        Re-insert events from the spill file once the database is reachable.
+
+        The spill file is moved aside and replayed from there, so events
+        spilled meanwhile go to a new spill file. A replay interrupted by
+        the process dying is resumed from its last checkpoint before the
+        spill file is moved aside again.
+        """
+        if not self.spill_path:
+            return 0
+
+        replay_path = f"{self.spill_path}.replay"
+        checkpoint_path = f"{replay_path}.offset"
+        replayed = 0
+        if os.path.exists(replay_path):
+            replayed += self._replay_file(replay_path, checkpoint_path)
+
+        if os.path.exists(self.spill_path):
+            with self._spill_lock:
+                try:
+                    # A checkpoint without its replay file belongs to a finished replay
+                    if os.path.exists(checkpoint_path):
+                        os.remove(checkpoint_path)
+                    os.replace(self.spill_path, replay_path)
+                except OSError:
+                    replay_path = None
+            if replay_path:
+                replayed += self._replay_file(replay_path, checkpoint_path)
+
+        self.stats["replayed"] += replayed
+        return replayed
+
+    def _replay_file(self, replay_path: str, checkpoint_path: str) -> int:
+        """
+        Insert the events of a replay file, starting at its checkpoint.
+
+        The checkpoint records the offset of the first event not yet
+        written and is advanced after every batch, so at most one batch
+        is inserted twice if the process dies during the replay.
+        """
+        offset = 0
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                offset = int(f.read() or 0)
+
+        replayed = 0
+        with open(replay_path, "rb") as f:
+            f.seek(offset)
+            batch = []
+            for line in f:
+                if line.strip():
+                    batch.append(_from_document(json.loads(line)))
+                if len(batch) >= self.batch_size:
+                    replayed += self._write_batch(batch)
+                    batch = []
+                    _write_checkpoint(checkpoint_path, f.tell())
+            if batch:
+                replayed += self._write_batch(batch)
+        os.remove(replay_path)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return replayed
+
+
+def _write_checkpoint(path: str, offset: int) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(str(offset))
+    os.replace(temp_path, path)
+
+
+def _to_document(event: Dict[str, Any]) -> Dict[str, Any]:
+    document = dict(event)
+    if isinstance(document.get("timestamp"), datetime):
+        document["timestamp"] = document["timestamp"].isoformat()
+    return document
+
+
+def _from_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    event = dict(document)
+    if isinstance(event.get("timestamp"), str):
+        event["timestamp"] = datetime.fromisoformat(event["timestamp"])
+    return event
+
+
+_sinks: Dict[int, AuditLogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def _create_es_client() -> Any:
+    if not ENABLE_ELASTICSEARCH:
+        return None
+    try:
+        from elasticsearch import Elasticsearch
+        return Elasticsearch(ELASTICSEARCH_URL)
+    except Exception as e:
+        logger.error(f"Failed to connect to Elasticsearch: {e}")
+        return None
+
+
+def get_audit_log_sink(engine: Optional[Engine] = None) -> AuditLogSink:
+    """
+    Get the running audit log sink for an engine, creating it on first use.
+
+    Args:
+        engine: Engine to persist to (defaults to the application engine)
+
+    Returns:
+        AuditLogSink: The started sink
+    """
+    if engine is None:
+        from backend_core.database import engine as default_engine
+        engine = default_engine
+
+    with _sinks_lock:
+        sink = _sinks.get(id(engine))
+        if sink is None:
+            sink = AuditLogSink(engine, es_client=_create_es_client())
+            sink.start()
+            _sinks[id(engine)] = sink
+        return sink
+
+
+@atexit.register
+def shutdown_audit_log_sinks() -> None:
+    """Flush and stop every audit log sink."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.stop()
@@ -13,8 +13,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import ValidationError
 
-from isp_management.backend_core.database import get_session
-from isp_management.backend_core.exceptions import AuthenticationException
+from backend_core.database import get_session
+from backend_core.exceptions import AuthenticationException
 
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "development_secret_key")
@@ -17,6 +17,7 @@ from backend_core.auth_models import Token, TokenData, UserSession, User, MFADev
 # Import the new modules
 from backend_core.mfa import MFAManager
 from backend_core.user_session import SessionManager
+from backend_core.token_validation import revocation_filter, token_validator
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-stored-in-env")
@@ -141,6 +142,8 @@ class AuthService:
         Args:
             token: JWT token
         """
+        revocation_filter.add(token)
+        token_validator.invalidate(token)
         try:
             # Add to Redis with expiration
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -157,12 +160,17 @@ class AuthService:
         """
         Check if a token is blacklisted.
         
+        Redis is only consulted when the in-memory revocation filter reports
+        a possible hit.
+        
         Args:
             token: JWT token
             
         Returns:
             True if token is blacklisted, False otherwise
         """
+        if not cls._might_be_revoked(token):
+            return token in cls._token_blacklist
         try:
             # Check in Redis
             return bool(redis_client.exists(f"blacklist:{token}"))
@@ -170,6 +178,24 @@ class AuthService:
             # Fallback to in-memory if Redis is unavailable
             return token in cls._token_blacklist
     
+    @classmethod
+    def _might_be_revoked(cls, token: str) -> bool:
+        """
+        Screen a token against the revocation filter.
+        
+        When the filter is due, it is rebuilt from Redis in a background
+        thread; until then the current filter keeps screening tokens.
+        
+        Args:
+            token: JWT or refresh token
+            
+        Returns:
+            False if the token is definitely not revoked, True otherwise
+        """
+        if revocation_filter.sync_due():
+            revocation_filter.sync_in_background(redis_client)
+        return revocation_filter.might_contain(token)
+    
     # MFA methods delegated to MFAManager
     @classmethod
     def setup_mfa(cls, db: Session, user_id: int) -> Dict[str, str]:
@@ -361,6 +387,7 @@ class AuthService:
         Returns:
             True if token was blacklisted, False otherwise
         """
+        revocation_filter.add(token)
         return SessionManager.blacklist_refresh_token(token, expires_delta)
     
     @classmethod
@@ -374,6 +401,8 @@ class AuthService:
         Returns:
             True if token is blacklisted, False otherwise
         """
+        if not cls._might_be_revoked(token):
+            return False
         return SessionManager.is_refresh_token_blacklisted(token)
     
     @classmethod
@@ -381,6 +410,9 @@ class AuthService:
         """
         Decode a JWT token.
         
+        Recently verified tokens are served from the token validator cache
+        instead of re-verifying the signature.
+        
         Args:
             token: JWT token
             
@@ -392,7 +424,7 @@ class AuthService:
             if token in cls._token_blacklist:
                 raise JWTError("Token has been revoked")
                 
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = token_validator.decode(token, SECRET_KEY, [ALGORITHM])
             return payload
         except JWTError:
             raise HTTPException(
@@ -563,7 +595,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_validator.decode(token, SECRET_KEY, [ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -58,6 +58,7 @@ CACHE_EXPIRY = {
     "payment_history": 600,  # 10 minutes
     "billing_statistics": 1800,  # 30 minutes
     "user_payment_methods": 1800,  # 30 minutes
+    "financial_exports": 3600 * 24,  # 24 hours
 }
 
 # Cache metrics keys
@@ -372,6 +373,16 @@ def invalidate_user_payment_methods_cache(user_id: int) -> bool:
     key = f"user_payment_methods:{user_id}"
     return cache_delete(key)
 
+def cache_financial_export(export_id: str, export_status: Dict) -> bool:
+    """Cache the status and progress of a financial data export job."""
+    key = f"financial_export:{export_id}"
+    return cache_set(key, export_status, CACHE_EXPIRY["financial_exports"])
+
+def get_cached_financial_export(export_id: str) -> Optional[Dict]:
+    """Get the cached status and progress of a financial data export job."""
+    key = f"financial_export:{export_id}"
+    return cache_get(key)
+
 def warm_up_cache(db_session) -> Dict[str, int]:
     """
     Warm up the cache with frequently accessed data.
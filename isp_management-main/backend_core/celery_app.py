@@ -14,7 +14,7 @@ app = Celery('isp_management')
 app.config_from_envvar('ISP_CELERY', silent=True)
 
 # Load task modules from all registered apps
-app.autodiscover_tasks(['isp_management.modules.billing', 'modules.config_management'])
+app.autodiscover_tasks(['isp_management.modules.billing', 'modules.billing', 'modules.config_management', 'modules.communications', 'modules.crm_ticketing', 'modules.integration_management'])
 
 # Configure the scheduled tasks
 app.conf.beat_schedule = {
@@ -43,6 +43,46 @@ app.conf.beat_schedule = {
         'schedule': crontab(day_of_month=1, hour=3, minute=0),  # Run on the 1st of each month at 3:00 AM
         'args': (90,),  # Keep 90 days of history
     },
+    'dispatch-webhook-outbox': {
+        'task': 'dispatch_webhook_outbox',
+        'schedule': 30.0,  # Retry due webhook deliveries every 30 seconds
+        'args': (),
+    },
+    'refresh-sla-summary': {
+        'task': 'refresh_sla_summary',
+        'schedule': crontab(minute='*/15'),  # Fold closed days and changed tickets into the SLA summary
+        'args': (),
+    },
+    'backfill-ticket-search-index': {
+        'task': 'rebuild_ticket_search_index',
+        'schedule': crontab(minute=5),  # Index tickets that have no search document yet
+        'args': (),
+    },
+    'process-pending-webhook-events': {
+        'task': 'integration_management.process_pending_webhook_events',
+        'schedule': 30.0,  # Drain received webhook events, reclaiming expired leases
+        'args': (),
+    },
+    'run-recurring-billing': {
+        'task': 'billing.run_recurring_billing',
+        'schedule': crontab(hour=0, minute=30),  # Start the daily billing run, re-dispatching unfinished runs first
+        'args': (),
+    },
+    'rebuild-ar-aging-snapshot': {
+        'task': 'billing.rebuild_ar_aging_snapshot',
+        'schedule': crontab(hour=2, minute=0),  # Correct drift in the accounts receivable aging snapshot nightly
+        'args': (),
+    },
+    'release-expired-exports': {
+        'task': 'billing.release_expired_exports',
+        'schedule': crontab(minute=20),  # Release the stored content of expired financial exports hourly
+        'args': (),
+    },
+    'test-active-integrations': {
+        'task': 'integration_management.test_all_active_integrations',
+        'schedule': crontab(minute='*/5'),  # Probe partner APIs concurrently every 5 minutes
+        'args': (),
+    },
 }
 
 # Configure Celery to use Redis as the broker and result backend
@@ -62,6 +102,7 @@ app.conf.task_ignore_result = True  # Don't store task results
 # Configure task routing
 app.conf.task_routes = {
     'isp_management.modules.billing.*': {'queue': 'billing'},
+    'billing.*': {'queue': 'billing'},
 }
 
 if __name__ == '__main__':
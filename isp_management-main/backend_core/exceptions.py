@@ -115,3 +115,9 @@ class ServiceException(BaseISPException):
         self.operation = operation
         self.details = details or {}
         super().__init__(message)
+
+
+class WorkflowException(ServiceException):
+    """Exception raised when a workflow definition or execution is invalid."""
+    def __init__(self, message: str = "Workflow execution failed"):
+        super().__init__(message, service_name="workflow")
@@ -0,0 +1,302 @@
+"""
+Token validation cache for the ISP Management Platform.
+
+This module keeps JWT verification off the hot path of authenticated
+requests. Verified tokens are remembered in a small LRU keyed by the token
+digest, and revocations are screened against an in-memory bloom filter that
+is periodically rebuilt from the Redis blacklist. Redis only has to be asked
+when the bloom filter reports a possible hit.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Tuple
+
+from jose import jwt
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000"))
+REVOCATION_FILTER_ERROR_RATE = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001"))
+REVOCATION_SYNC_INTERVAL_SECONDS = int(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "30"))
+
+# Redis key prefixes holding revoked tokens
+REVOCATION_KEY_PREFIXES = ("blacklist:", "refresh_blacklist:")
+
+
+def token_digest(token: str) -> str:
+    """
+    Get the digest used to identify a token in caches.
+
+    Args:
+        token: JWT token
+
+    Returns:
+        Hex SHA-256 digest of the token
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over token digests."""
+
+    def __init__(self, capacity: int = REVOCATION_FILTER_CAPACITY,
+                 error_rate: float = REVOCATION_FILTER_ERROR_RATE):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false positive rate at capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: str) -> Iterable[int]:
+        # Double hashing over the two halves of the SHA-256 digest
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest: str) -> None:
+        """Add a token digest to the filter."""
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class TokenRevocationFilter:
+    """
+    In-memory screen for revoked tokens.
+
+    The filter is rebuilt from the Redis blacklist every ``sync_interval``
+    seconds and updated immediately for revocations made in this process.
+    Until the first successful sync every token is treated as a possible hit,
+    so callers fall back to asking Redis.
+    """
+
+    def __init__(self, sync_interval: int = REVOCATION_SYNC_INTERVAL_SECONDS,
+                 capacity: int = REVOCATION_FILTER_CAPACITY):
+        """
+        Initialize the revocation filter.
+
+        Args:
+            sync_interval: Seconds between rebuilds from Redis
+            capacity: Expected number of revoked tokens
+        """
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self._filter = BloomFilter(capacity)
+        self._local_digests = set()
+        self._lock = threading.Lock()
+        self._last_sync_attempt = 0.0
+        self._syncing = False
+        self.ready = False
+
+    def sync_due(self) -> bool:
+        """Return True if the filter should be rebuilt from Redis."""
+        return time.time() - self._last_sync_attempt >= self.sync_interval
+
+    def sync_in_background(self, redis_client: Any) -> bool:
+        """
+        Rebuild the filter from Redis in a background thread.
+
+        Scanning the blacklist keys blocks, so request handlers start the
+        rebuild here and keep screening tokens with the current filter.
+
+        Args:
+            redis_client: Redis client holding the blacklist keys
+
+        Returns:
+            True if a rebuild was started, False if one is already running
+        """
+        with self._lock:
+            if self._syncing:
+                return False
+            self._syncing = True
+            self._last_sync_attempt = time.time()
+
+        thread = threading.Thread(
+            target=self._sync_and_release, args=(redis_client,),
+            name="revocation-filter-sync", daemon=True
+        )
+        thread.start()
+        return True
+
+    def _sync_and_release(self, redis_client: Any) -> None:
+        try:
+            self.sync(redis_client)
+        finally:
+            with self._lock:
+                self._syncing = False
+
+    def sync(self, redis_client: Any) -> bool:
+        """
+        Rebuild the filter from the revocation keys stored in Redis.
+
+        Args:
+            redis_client: Redis client holding the blacklist keys
+
+        Returns:
+            True if the filter was rebuilt, False if Redis was unavailable
+        """
+        self._last_sync_attempt = time.time()
+        try:
+            new_filter = BloomFilter(self.capacity)
+            for prefix in REVOCATION_KEY_PREFIXES:
+                for key in redis_client.scan_iter(match=f"{prefix}*", count=1000):
+                    if isinstance(key, bytes):
+                        key = key.decode("utf-8")
+                    new_filter.add(token_digest(key[len(prefix):]))
+        except Exception as e:
+            logger.warning(f"Failed to sync token revocation filter: {str(e)}")
+            return False
+
+        with self._lock:
+            for digest in self._local_digests:
+                new_filter.add(digest)
+            self._local_digests.clear()
+            self._filter = new_filter
+            self.ready = True
+        return True
+
+    def add(self, token: str) -> None:
+        """
+        Record a revocation made in this process.
+
+        Args:
+            token: Revoked token
+        """
+        digest = token_digest(token)
+        with self._lock:
+            self._filter.add(digest)
+            self._local_digests.add(digest)
+
+    def might_contain(self, token: str) -> bool:
+        """
+        Check whether a token may have been revoked.
+
+        Args:
+            token: JWT token
+
+        Returns:
+            False if the token is definitely not revoked, True otherwise
+        """
+        if not self.ready:
+            return True
+        return token_digest(token) in self._filter
+
+
+def verification_key_id(secret_key: str, algorithms: list) -> str:
+    """
+    Get the digest identifying the key and algorithms a token was verified with.
+
+    Args:
+        secret_key: Key used to verify the signature
+        algorithms: Accepted signing algorithms
+
+    Returns:
+        Hex SHA-256 digest of the key and algorithms
+    """
+    material = "\0".join([secret_key, *sorted(algorithms)])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TokenValidator:
+    """
+    LRU cache of verified token claims keyed by token digest.
+
+    Claims are only reused for verifications with the same key and
+    algorithms, so rotating the secret key or changing the accepted
+    algorithms takes effect immediately.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: int = TOKEN_CACHE_TTL_SECONDS):
+        """
+        Initialize the validator.
+
+        Args:
+            max_size: Maximum number of cached tokens
+            ttl: Maximum number of seconds a verification result is reused
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str, secret_key: str, algorithms: list) -> Dict[str, Any]:
+        """
+        Verify a token, reusing a recent verification of the same token.
+
+        Args:
+            token: JWT token
+            secret_key: Key used to verify the signature
+            algorithms: Accepted signing algorithms
+
+        Returns:
+            Decoded token payload
+
+        Raises:
+            JWTError: If the token is invalid or expired
+        """
+        digest = token_digest(token)
+        key_id = verification_key_id(secret_key, algorithms)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry and entry[0] > now and entry[1] == key_id:
+                self._cache.move_to_end(digest)
+                self.hits += 1
+                return dict(entry[2])
+            if entry:
+                del self._cache[digest]
+
+        payload = jwt.decode(token, secret_key, algorithms=algorithms)
+        self.misses += 1
+
+        valid_until = now + self.ttl
+        if isinstance(payload.get("exp"), (int, float)):
+            valid_until = min(valid_until, payload["exp"])
+
+        with self._lock:
+            self._cache[digest] = (valid_until, key_id, dict(payload))
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return payload
+
+    def invalidate(self, token: str) -> None:
+        """
+        Drop a token from the cache.
+
+        Args:
+            token: JWT token
+        """
+        with self._lock:
+            self._cache.pop(token_digest(token), None)
+
+    def clear(self) -> None:
+        """Drop every cached token."""
+        with self._lock:
+            self._cache.clear()
+
+
+# Process-wide instances
+revocation_filter = TokenRevocationFilter()
+token_validator = TokenValidator()
@@ -4,17 +4,24 @@ User Session Manager.
 This module contains functions for managing user sessions.
 """
 
+import atexit
+import logging
 import os
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from fastapi import Request
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
 import redis
 
 # Import shared models
 from backend_core.auth_models import UserSession
 
+logger = logging.getLogger(__name__)
+
 # Redis client for token blacklist and session management
 redis_host = os.getenv("REDIS_HOST", "localhost")
 redis_port = int(os.getenv("REDIS_PORT", "6379"))
@@ -22,6 +29,73 @@ redis_client = redis.Redis(host=redis_host, port=redis_port, db=0, decode_respon
 
 # Session configuration
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+SESSION_ACTIVITY_FLUSH_SECONDS = int(os.getenv("SESSION_ACTIVITY_FLUSH_SECONDS", "30"))
+SESSION_ACTIVITY_MAX_PENDING = int(os.getenv("SESSION_ACTIVITY_MAX_PENDING", "1000"))
+
+
+class SessionActivityBuffer:
+    """
+    Coalesces session activity timestamps so they can be written in batches.
+    
+    With a flush callback, a timer calls it flush_interval seconds after
+    activity is first buffered, so timestamps are written even when no
+    further requests arrive.
+    """
+    
+    def __init__(self, flush_interval: int = SESSION_ACTIVITY_FLUSH_SECONDS,
+                 max_pending: int = SESSION_ACTIVITY_MAX_PENDING,
+                 flush: Optional[Callable[[], int]] = None):
+        """
+        Initialize the buffer.
+        
+        Args:
+            flush_interval: Seconds between batched writes
+            max_pending: Number of distinct sessions that forces an early write
+            flush: Writes the pending timestamps when the timer fires
+        """
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flush = flush
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._timer: Optional[threading.Timer] = None
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def touch(self, session_id: str) -> None:
+        """Record activity for a session, keeping only the latest timestamp."""
+        with self._lock:
+            self._pending[session_id] = datetime.utcnow()
+            if self.flush is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+    
+    def due(self) -> bool:
+        """Return True if the pending timestamps should be written now."""
+        with self._lock:
+            return bool(self._pending) and (
+                len(self._pending) >= self.max_pending
+                or time.time() - self._last_flush >= self.flush_interval
+            )
+    
+    def drain(self) -> Dict[str, datetime]:
+        """Remove and return every pending timestamp."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+            return pending
+
+
+session_activity_buffer = SessionActivityBuffer()
 
 class SessionManager:
     """Manager for user session operations."""
@@ -186,6 +260,11 @@ class SessionManager:
         """
         Update the last activity timestamp for a session.
         
+        The timestamp is buffered and written together with other sessions'
+        activity once the buffer is due, rather than committed per request.
+        The write uses a database session of its own, so it never commits
+        the caller's transaction.
+        
         Args:
             db: Database session
             session_id: Session ID
@@ -201,11 +280,42 @@ class SessionManager:
         if not session:
             return False
         
-        session.last_active = datetime.utcnow()
-        db.commit()
+        session_activity_buffer.touch(session_id)
+        if session_activity_buffer.due():
+            flush_pending_session_activity()
         
         return True
     
+    @classmethod
+    def flush_session_activity(cls, db: Session) -> int:
+        """
+        Write all buffered session activity timestamps in one batched update.
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            Number of sessions updated
+        """
+        from backend_core.models import UserSession as UserSessionModel
+        
+        pending = session_activity_buffer.drain()
+        if not pending:
+            return 0
+        
+        table = UserSessionModel.__table__
+        stmt = update(table).where(
+            table.c.session_id == bindparam("b_session_id")
+        ).values(last_active_at=bindparam("b_last_active_at"))
+        
+        db.execute(stmt, [
+            {"b_session_id": session_id, "b_last_active_at": last_active}
+            for session_id, last_active in pending.items()
+        ])
+        db.commit()
+        
+        return len(pending)
+    
     @classmethod
     def get_session_by_id(cls, db: Session, session_id: str, user_id: Optional[int] = None) -> Optional[UserSession]:
         """
@@ -297,3 +407,33 @@ class SessionManager:
         except Exception:
             # Fallback to in-memory if Redis is unavailable
             return False
+
+
+def flush_pending_session_activity() -> int:
+    """
+    Write the buffered session activity using a database session of its own.
+    
+    Called by the buffer's timer and at interpreter exit, so timestamps
+    buffered by the last requests of a process are not lost.
+    
+    Returns:
+        Number of sessions updated
+    """
+    if not len(session_activity_buffer):
+        return 0
+    
+    from backend_core.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        return SessionManager.flush_session_activity(db)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Failed to write buffered session activity: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+
+session_activity_buffer.flush = flush_pending_session_activity
+atexit.register(flush_pending_session_activity)
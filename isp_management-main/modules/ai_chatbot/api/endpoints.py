@@ -6,6 +6,7 @@ import logging
 from typing import List, Optional, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from core.database import get_db
@@ -16,7 +17,9 @@ from ..schemas.chatbot import (
     ChatbotFeedbackCreate, FeedbackResponse, AIServiceConfigCreate,
     AIServiceConfig
 )
+from ..services.ai_service_client import ai_client_registry
 from ..services.chatbot_service import ChatbotService
+from ..utils.cache import chatbot_cache
 
 # Initialize router
 router = APIRouter(
@@ -25,6 +28,9 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
+# Close the shared AI service clients with the application
+router.add_event_handler("shutdown", ai_client_registry.aclose)
+
 # Initialize logger
 logger = logging.getLogger(__name__)
 
@@ -79,6 +85,56 @@ async def process_query(
         )
 
 
+@router.post("/query/stream")
+async def stream_query(
+    query: ChatbotQueryCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant_id),
+    service_name: Optional[str] = None
+):
+    """
+    Process a natural language query to the chatbot, streaming the response text.
+    
+    Args:
+        query: The query to process
+        db: Database session
+        current_user: The current authenticated user
+        tenant_id: The current tenant ID
+        service_name: Optional name of the AI service to use
+        
+    Returns:
+        StreamingResponse: The response text as it is generated
+    """
+    chatbot_service = ChatbotService(db)
+    stream = chatbot_service.stream_query(query, current_user.id, tenant_id, service_name)
+    
+    # Fail before the response starts if the AI service cannot be reached
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        first_chunk = ""
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error streaming query: {str(e)}",
+            extra={"user_id": current_user.id, "tenant_id": tenant_id, "query": query.query},
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing query: {str(e)}"
+        )
+    
+    async def body():
+        yield first_chunk
+        async for chunk in stream:
+            yield chunk
+    
+    return StreamingResponse(body(), media_type="text/plain")
+
+
 @router.post("/feedback", response_model=FeedbackResponse)
 async def submit_feedback(
     feedback: ChatbotFeedbackCreate,
@@ -202,6 +258,7 @@ async def create_ai_service_config(
     db.add(db_config)
     db.commit()
     db.refresh(db_config)
+    chatbot_cache.invalidate_tenant(tenant_id)
     
     return db_config
 
@@ -250,6 +307,7 @@ async def update_ai_service_config(
     
     db.commit()
     db.refresh(db_config)
+    chatbot_cache.invalidate_tenant(tenant_id)
     
     return db_config
 
@@ -285,5 +343,6 @@ async def delete_ai_service_config(
     # Delete the configuration
     db.delete(db_config)
     db.commit()
+    chatbot_cache.invalidate_tenant(tenant_id)
     
     return None
@@ -67,6 +67,23 @@ class ChatbotSettings(BaseSettings):
         3600,
         description="Time-to-live for cached responses in seconds"
     )
+    RESPONSE_CACHE_MIN_CONFIDENCE: float = Field(
+        0.8,
+        description="Minimum intent confidence for a response to be cached"
+    )
+    RESPONSE_CACHE_INTENT_TTLS: Dict[str, int] = Field(
+        {"unknown": 0, "fallback": 0},
+        description="Time-to-live per intent, or per intent prefix ending with '_', "
+                    "overriding CACHE_TTL_SECONDS; 0 disables caching"
+    )
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(
+        10000,
+        description="Maximum number of responses cached in memory when Redis is unavailable"
+    )
+    CONFIG_CACHE_TTL_SECONDS: int = Field(
+        300,
+        description="Time-to-live for cached AI service configurations in seconds"
+    )
     
     # Logging settings
     LOG_QUERIES: bool = Field(
@@ -89,7 +106,23 @@ class ChatbotSettings(BaseSettings):
     )
     MAX_CONCURRENT_REQUESTS: int = Field(
         10,
-        description="Maximum number of concurrent requests"
+        description="Maximum number of concurrent AI service requests per tenant"
+    )
+    AI_MAX_CONNECTIONS: int = Field(
+        50,
+        description="Maximum number of open connections per AI service endpoint"
+    )
+    AI_HTTP2: bool = Field(
+        True,
+        description="Whether to use HTTP/2 for AI services when the h2 package is installed"
+    )
+    CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        5,
+        description="Number of consecutive AI service failures that open its circuit"
+    )
+    CIRCUIT_RECOVERY_SECONDS: int = Field(
+        30,
+        description="Time an open AI service circuit rejects requests before a trial request"
     )
     
     # Feature flags
@@ -3,25 +3,40 @@ AI Service Client for the AI Chatbot Integration Module.
 
 This service handles communication with external AI services for natural language
 processing, intent recognition, and response generation.
+
+Requests share application-lifetime HTTP clients, one per AI service
+endpoint, so chat turns reuse open (HTTP/2 when available) connections
+instead of paying a new TLS handshake. Each tenant may only have a
+limited number of requests in flight, and a circuit breaker stops
+requests to an endpoint that keeps failing until it has had time to
+recover.
 """
 
 import os
 import json
+import asyncio
 import logging
+import threading
 import time
-from typing import Dict, List, Optional, Any, Tuple
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator
 from datetime import datetime
+from urllib.parse import urlsplit
 
 import httpx
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from backend_core.api_gateway.circuit_breaker import CircuitBreaker
 from core.config import settings
 from core.database import get_db
 from core.security import get_api_key_hash
 from core.metrics import MetricsCollector
+from ..config.settings import chatbot_settings
 from ..models.chatbot import AIServiceConfig
 from ..schemas.chatbot import AIModelRequest, AIModelResponse, Entity
+from ..utils.cache import chatbot_cache
 
 # Initialize metrics collector
 metrics = MetricsCollector("ai_chatbot.ai_service_client")
@@ -30,6 +45,187 @@ metrics = MetricsCollector("ai_chatbot.ai_service_client")
 logger = logging.getLogger(__name__)
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Check whether an error counts against the AI service's circuit."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.RequestError)
+
+
+class AIClientRegistry:
+    """
+    Shared HTTP clients, tenant concurrency limits and circuit breakers of
+    AI service endpoints.
+
+    HTTP clients and semaphores are bound to an event loop, so they are
+    kept per loop in weak maps and never handed to another loop; those of
+    loops that have been closed are dropped. Circuit states are kept in this
+    process, so checking them never blocks the event loop on Redis.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = chatbot_settings.AI_MAX_CONNECTIONS,
+        tenant_concurrency: int = chatbot_settings.MAX_CONCURRENT_REQUESTS,
+        timeout: float = chatbot_settings.REQUEST_TIMEOUT_SECONDS,
+        http2: bool = chatbot_settings.AI_HTTP2,
+        failure_threshold: int = chatbot_settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_time: int = chatbot_settings.CIRCUIT_RECOVERY_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            max_connections: Maximum open connections per endpoint
+            tenant_concurrency: Maximum requests in flight per tenant
+            timeout: Request timeout in seconds
+            http2: Use HTTP/2 when the h2 package is installed
+            failure_threshold: Consecutive failures that open an endpoint's circuit
+            recovery_time: Seconds an open circuit rejects requests
+            transport: Custom transport, e.g. for tests
+        """
+        self.max_connections = max_connections
+        self.tenant_concurrency = max(1, tenant_concurrency)
+        self.timeout = timeout
+        self.http2 = http2 and _http2_available()
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.transport = transport
+        self.circuit_breaker = CircuitBreaker(use_redis=False)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._tenant_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_endpoint_key(service_url: str) -> str:
+        """
+        Get the key of the endpoint serving a URL.
+
+        Args:
+            service_url: URL of the AI service
+
+        Returns:
+            The endpoint key, without colons so it can be used in circuit breaker keys
+        """
+        parts = urlsplit(service_url)
+        return f"/ai_service/{parts.scheme}/{parts.netloc.replace(':', '_')}"
+
+    def get_client(self, service_url: str) -> httpx.AsyncClient:
+        """
+        Get the HTTP client of an endpoint for the running event loop.
+
+        Args:
+            service_url: URL of the AI service
+
+        Returns:
+            Pooled HTTP client
+        """
+        endpoint = self.get_endpoint_key(service_url)
+        with self._lock:
+            clients = self._loop_entries(self._clients)
+            client = clients.get(endpoint)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    transport=self.transport
+                )
+                clients[endpoint] = client
+            return client
+
+    def get_tenant_limit(self, tenant_id: int) -> asyncio.Semaphore:
+        """
+        Get the semaphore limiting a tenant's requests in the running event loop.
+
+        Args:
+            tenant_id: The ID of the tenant
+
+        Returns:
+            The tenant's semaphore
+        """
+        with self._lock:
+            limits = self._loop_entries(self._tenant_limits)
+            semaphore = limits.get(tenant_id)
+            if semaphore is None:
+                semaphore = limits[tenant_id] = asyncio.Semaphore(self.tenant_concurrency)
+            return semaphore
+
+    @staticmethod
+    def _loop_entries(entries: weakref.WeakKeyDictionary) -> Dict[Any, Any]:
+        """Get the entries of the running event loop, dropping those of closed loops."""
+        for finished in [loop for loop in entries.keys() if loop.is_closed()]:
+            del entries[finished]
+        return entries.setdefault(asyncio.get_running_loop(), {})
+
+    @asynccontextmanager
+    async def request(self, service_url: str, tenant_id: int) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Run a request to an AI service within its circuit and the tenant's limit.
+
+        Server errors, rate limiting and transport errors raised inside the
+        block count as failures of the endpoint; anything else as success.
+
+        Args:
+            service_url: URL of the AI service
+            tenant_id: The ID of the tenant
+
+        Yields:
+            The endpoint's HTTP client
+
+        Raises:
+            HTTPException: If the endpoint's circuit is open
+        """
+        endpoint = self.get_endpoint_key(service_url)
+        if endpoint not in self.circuit_breaker.configs:
+            self.circuit_breaker.configure(endpoint, self.failure_threshold, self.recovery_time)
+
+        if not self.circuit_breaker.is_service_available(endpoint):
+            metrics.increment("ai_service_circuit_open", tags={"tenant_id": str(tenant_id)})
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="AI service is temporarily unavailable"
+            )
+
+        async with self.get_tenant_limit(tenant_id):
+            try:
+                yield self.get_client(service_url)
+            except Exception as e:
+                if _is_provider_failure(e):
+                    self.circuit_breaker.record_failure(endpoint)
+                raise
+            self.circuit_breaker.record_success(endpoint)
+
+    async def aclose(self) -> None:
+        """Close the clients created in the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.pop(loop, {})
+            self._tenant_limits.pop(loop, None)
+        for client in clients.values():
+            await client.aclose()
+
+
+# Process-wide registry shared by all AI service clients
+ai_client_registry = AIClientRegistry()
+
+
 class AIServiceClient:
     """
     Client for communicating with external AI services.
@@ -41,22 +237,32 @@ class AIServiceClient:
     - Error handling and retries
     """
     
-    def __init__(self, db: Session):
-        """Initialize the AI Service Client."""
+    def __init__(self, db: Session, registry: Optional[AIClientRegistry] = None):
+        """
+        Initialize the AI Service Client.
+        
+        Args:
+            db: Database session
+            registry: Registry of shared HTTP clients, defaults to the process-wide one
+        """
         self.db = db
-        self.http_client = httpx.AsyncClient(
-            timeout=30.0,
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        )
+        self.registry = registry or ai_client_registry
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.http_client.aclose()
+        """
+        Release the client.
+        
+        The HTTP clients are shared by all AI service clients and stay open;
+        they are closed with the registry on application shutdown.
+        """
+        pass
     
     async def get_service_config(self, tenant_id: int, service_name: Optional[str] = None) -> AIServiceConfig:
         """
         Get the AI service configuration for a tenant.
         
+        Configurations are served from the tenant's cache when possible.
+        
         Args:
             tenant_id: The ID of the tenant
             service_name: Optional name of the service to use
@@ -67,6 +273,10 @@ class AIServiceClient:
         Raises:
             HTTPException: If no active service configuration is found
         """
+        cached_config = chatbot_cache.get_service_config(tenant_id, service_name)
+        if cached_config:
+            return cached_config
+        
         query = self.db.query(AIServiceConfig).filter(
             AIServiceConfig.tenant_id == tenant_id,
             AIServiceConfig.is_active == True
@@ -83,19 +293,24 @@ class AIServiceClient:
                 detail=f"No active AI service configuration found for tenant {tenant_id}"
             )
         
-        return service_config
+        return chatbot_cache.set_service_config(tenant_id, service_name, service_config)
     
     async def process_query(
         self, 
         request: AIModelRequest,
-        service_name: Optional[str] = None
+        service_name: Optional[str] = None,
+        service_config: Optional[AIServiceConfig] = None
     ) -> Tuple[AIModelResponse, float]:
         """
         Process a natural language query using an AI service.
         
+        Cacheable responses to the same normalized query are served from
+        the tenant's response cache without calling the AI service.
+        
         Args:
             request: The request to process
             service_name: Optional name of the service to use
+            service_config: The service configuration, looked up if not given
             
         Returns:
             Tuple[AIModelResponse, float]: The AI model response and processing time
@@ -107,45 +322,24 @@ class AIServiceClient:
         
         try:
             # Get the service configuration
-            service_config = await self.get_service_config(request.tenant_id, service_name)
-            
-            # Prepare the request
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {service_config.api_key}"
-            }
-            
-            # Add custom headers from config if available
-            if service_config.config_params and "headers" in service_config.config_params:
-                headers.update(service_config.config_params["headers"])
+            if service_config is None:
+                service_config = await self.get_service_config(request.tenant_id, service_name)
             
-            # Prepare the payload
-            payload = {
-                "query": request.query,
-                "context": request.context or {},
-                "tenant_id": request.tenant_id,
-                "user_id": request.user_id,
-                "language": request.language,
-                "session_id": request.session_id
-            }
+            # Serve repeated queries from the cache
+            cached_response = chatbot_cache.get_response(request, service_config.service_name)
+            if cached_response:
+                return cached_response, (time.time() - start_time) * 1000
             
-            # Add model name if specified
-            if service_config.model_name:
-                payload["model"] = service_config.model_name
-            
-            # Add any additional parameters from config
-            if service_config.config_params and "parameters" in service_config.config_params:
-                payload.update(service_config.config_params["parameters"])
+            headers, payload = self._prepare_request(request, service_config)
             
             # Send the request to the AI service
-            response = await self.http_client.post(
-                service_config.service_url,
-                headers=headers,
-                json=payload
-            )
-            
-            # Check for errors
-            response.raise_for_status()
+            async with self.registry.request(service_config.service_url, request.tenant_id) as client:
+                response = await client.post(
+                    service_config.service_url,
+                    headers=headers,
+                    json=payload
+                )
+                response.raise_for_status()
             
             # Parse the response
             response_data = response.json()
@@ -162,6 +356,8 @@ class AIServiceClient:
                 metadata=response_data.get("metadata", {})
             )
             
+            chatbot_cache.set_response(request, service_config.service_name, ai_response)
+            
             # Calculate processing time
             processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
             
@@ -174,7 +370,7 @@ class AIServiceClient:
                     "intent": ai_response.intent
                 }
             )
-            metrics.timing(
+            metrics.record(
                 "ai_service_request_time",
                 processing_time,
                 tags={
@@ -185,6 +381,9 @@ class AIServiceClient:
             
             return ai_response, processing_time
             
+        except HTTPException:
+            raise
+            
         except httpx.HTTPStatusError as e:
             # Record metrics
             metrics.increment(
@@ -260,3 +459,137 @@ class AIServiceClient:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Unexpected error processing AI service request: {str(e)}"
             )
+    
+    async def stream_query(
+        self,
+        request: AIModelRequest,
+        service_name: Optional[str] = None,
+        service_config: Optional[AIServiceConfig] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a query with a streamed AI service response.
+        
+        The request is sent with "stream": true, and the service is expected
+        to answer with newline-delimited JSON objects, optionally as
+        server-sent events. Objects carry a piece of the response text in
+        "response"; the last one may carry the intent, confidence and
+        entities.
+        
+        Args:
+            request: The request to process
+            service_name: Optional name of the service to use
+            service_config: The service configuration, looked up if not given
+            
+        Yields:
+            Dict[str, Any]: The objects sent by the AI service
+            
+        Raises:
+            HTTPException: If the request fails
+        """
+        if service_config is None:
+            service_config = await self.get_service_config(request.tenant_id, service_name)
+        
+        headers, payload = self._prepare_request(request, service_config)
+        payload["stream"] = True
+        tags = {"tenant_id": str(request.tenant_id), "service": service_config.service_name}
+        start_time = time.time()
+        first_chunk = True
+        
+        try:
+            async with self.registry.request(service_config.service_url, request.tenant_id) as client:
+                async with client.stream(
+                    "POST", service_config.service_url, headers=headers, json=payload
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        chunk = self._parse_stream_line(line)
+                        if chunk is None:
+                            continue
+                        if first_chunk:
+                            first_chunk = False
+                            metrics.record(
+                                "ai_service_first_chunk_time", (time.time() - start_time) * 1000, tags=tags
+                            )
+                        yield chunk
+            
+            metrics.increment("ai_service_stream_success", tags=tags)
+            
+        except httpx.HTTPStatusError as e:
+            metrics.increment("ai_service_request_error", tags={**tags, "status_code": str(e.response.status_code)})
+            logger.error(
+                f"AI service stream failed: {e.response.status_code}",
+                extra={"tenant_id": request.tenant_id, "service": service_config.service_name}
+            )
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"AI service request failed: {e.response.status_code}"
+            )
+            
+        except httpx.RequestError as e:
+            metrics.increment("ai_service_request_error", tags={**tags, "error_type": "request_error"})
+            logger.error(
+                f"AI service stream error: {str(e)}",
+                extra={"tenant_id": request.tenant_id, "service": service_config.service_name}
+            )
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"AI service request error: {str(e)}"
+            )
+    
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[Dict[str, Any]]:
+        """Parse a line of a streamed response, None for lines without data."""
+        line = line.strip()
+        if line.startswith("data:"):
+            line = line[len("data:"):].strip()
+        if not line or line == "[DONE]" or line.startswith(":"):
+            return None
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            return {"response": line}
+        return chunk if isinstance(chunk, dict) else {"response": str(chunk)}
+    
+    def _prepare_request(
+        self,
+        request: AIModelRequest,
+        service_config: AIServiceConfig
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Build the headers and payload of a request to an AI service.
+        
+        Args:
+            request: The request to send
+            service_config: The service configuration
+            
+        Returns:
+            Tuple[Dict[str, str], Dict[str, Any]]: The headers and the payload
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {service_config.api_key}"
+        }
+        
+        # Add custom headers from config if available
+        if service_config.config_params and "headers" in service_config.config_params:
+            headers.update(service_config.config_params["headers"])
+        
+        # Prepare the payload
+        payload = {
+            "query": request.query,
+            "context": request.context or {},
+            "tenant_id": request.tenant_id,
+            "user_id": request.user_id,
+            "language": request.language,
+            "session_id": request.session_id
+        }
+        
+        # Add model name if specified
+        if service_config.model_name:
+            payload["model"] = service_config.model_name
+        
+        # Add any additional parameters from config
+        if service_config.config_params and "parameters" in service_config.config_params:
+            payload.update(service_config.config_params["parameters"])
+        
+        return headers, payload
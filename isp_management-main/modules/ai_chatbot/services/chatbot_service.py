@@ -7,7 +7,7 @@ to handle chatbot queries and responses.
 
 import logging
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, AsyncIterator
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
@@ -81,16 +81,16 @@ class ChatbotService:
                 session_id=None  # TODO: Implement session tracking
             )
             
-            # Process the query with the AI service
-            ai_response, ai_processing_time = await self.ai_service_client.process_query(
-                ai_request, service_name
-            )
-            
             # Get the AI service configuration
             service_config = await self.ai_service_client.get_service_config(
                 tenant_id, service_name
             )
             
+            # Process the query with the AI service
+            ai_response, ai_processing_time = await self.ai_service_client.process_query(
+                ai_request, service_name, service_config
+            )
+            
             # Process the intent with the business logic processor
             response, db_query = await self.business_logic_processor.process_intent(
                 ai_response,
@@ -114,7 +114,7 @@ class ChatbotService:
                     "service": service_config.service_name
                 }
             )
-            metrics.timing(
+            metrics.record(
                 "query_processing_time",
                 total_processing_time,
                 tags={
@@ -161,6 +161,82 @@ class ChatbotService:
             # Re-raise the exception
             raise
     
+    async def stream_query(
+        self,
+        query: ChatbotQueryCreate,
+        user_id: int,
+        tenant_id: int,
+        service_name: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a chatbot query, streaming the response text as it is generated.
+        
+        The query is stored once the stream has ended. Streamed answers carry
+        no structured data or suggested actions.
+        
+        Args:
+            query: The query to process
+            user_id: The ID of the user making the query
+            tenant_id: The ID of the tenant
+            service_name: Optional name of the AI service to use
+            
+        Yields:
+            str: Pieces of the response text
+        """
+        start_time = time.time()
+        
+        ai_request = AIModelRequest(
+            query=query.query,
+            context=query.context,
+            tenant_id=tenant_id,
+            user_id=user_id,
+            language=query.language,
+            session_id=None
+        )
+        service_config = await self.ai_service_client.get_service_config(tenant_id, service_name)
+        
+        response_text = []
+        result: Dict[str, Any] = {}
+        error = None
+        try:
+            async for chunk in self.ai_service_client.stream_query(ai_request, service_name, service_config):
+                text = chunk.get("response")
+                if text:
+                    response_text.append(text)
+                    yield text
+                result.update({key: value for key, value in chunk.items() if key != "response"})
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            processing_time = (time.time() - start_time) * 1000
+            self.db.add(ChatbotQuery(
+                user_id=user_id,
+                tenant_id=tenant_id,
+                query_text=query.query,
+                response_text="".join(response_text) if not error else f"Error: {str(error)}",
+                context_data=query.context,
+                intent=result.get("intent"),
+                confidence_score=result.get("confidence"),
+                entities=result.get("entities"),
+                processing_time_ms=int(processing_time),
+                ai_service_name=service_config.service_name,
+                ai_model_version=service_config.model_name,
+                is_successful=error is None,
+                error_message=str(error) if error else None
+            ))
+            self.db.commit()
+            
+            metrics.increment(
+                "query_streamed" if error is None else "query_processing_error",
+                tags={"tenant_id": str(tenant_id), "service": service_config.service_name}
+            )
+            metrics.record(
+                "query_processing_time",
+                processing_time,
+                tags={"tenant_id": str(tenant_id), "service": service_config.service_name}
+            )
+    
     async def submit_feedback(
         self,
         feedback: ChatbotFeedbackCreate,
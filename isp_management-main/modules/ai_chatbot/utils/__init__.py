@@ -7,3 +7,4 @@ from .security import (
     generate_api_key, encrypt_api_key, verify_api_key, sanitize_user_input
 )
 from .context import ContextManager
+from .cache import ChatbotCache, chatbot_cache, normalize_query
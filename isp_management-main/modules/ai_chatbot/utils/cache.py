@@ -0,0 +1,269 @@
+"""
+Caching utilities for the AI Chatbot Integration Module.
+
+This module caches the two lookups on the hot conversational path, scoped
+per tenant:
+- AI service configurations, kept in process memory so API keys never
+  leave the worker, and dropped when the tenant changes a configuration
+- AI model responses keyed by the normalized query, so repeated FAQ-style
+  questions do not go out to the external model again. Responses are
+  stored in Redis when available so all workers share them, and in a
+  bounded in-memory store otherwise.
+"""
+
+import re
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from core.metrics import MetricsCollector
+from ..config.settings import chatbot_settings
+from ..models.chatbot import AIServiceConfig
+from ..schemas.chatbot import AIModelRequest, AIModelResponse
+from .context import redis_client
+
+# Initialize metrics collector
+metrics = MetricsCollector("ai_chatbot.cache")
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+
+    Case, punctuation and repeated whitespace are ignored, so
+    "What is my balance due date?" and "what is my  balance due date"
+    share a cache entry.
+
+    Args:
+        query: The query text
+
+    Returns:
+        The normalized query
+    """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+def _detached_copy(service_config: AIServiceConfig) -> AIServiceConfig:
+    """Copy a service configuration, so the cached copy outlives the session."""
+    return AIServiceConfig(**{
+        column.key: copy.deepcopy(getattr(service_config, column.key))
+        for column in AIServiceConfig.__table__.columns
+    })
+
+
+class ChatbotCache:
+    """
+    Tenant-scoped cache of AI service configurations and AI model responses.
+    """
+
+    def __init__(self, redis=redis_client):
+        """
+        Initialize the cache.
+
+        Args:
+            redis: Redis client for responses, None to keep them in memory
+        """
+        self.redis = redis
+        self._configs: Dict[Tuple[int, Optional[str]], Tuple[AIServiceConfig, float]] = {}
+        self._responses: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_service_config(self, tenant_id: int, service_name: Optional[str] = None) -> Optional[AIServiceConfig]:
+        """
+        Get a cached service configuration.
+
+        Args:
+            tenant_id: The ID of the tenant
+            service_name: Optional name of the service
+
+        Returns:
+            The cached configuration, or None if it is not cached
+        """
+        with self._lock:
+            entry = self._configs.get((tenant_id, service_name))
+        if entry and entry[1] > time.monotonic():
+            metrics.increment("config_cache_hit", tags={"tenant_id": str(tenant_id)})
+            return entry[0]
+        metrics.increment("config_cache_miss", tags={"tenant_id": str(tenant_id)})
+        return None
+
+    def set_service_config(
+        self,
+        tenant_id: int,
+        service_name: Optional[str],
+        service_config: AIServiceConfig
+    ) -> AIServiceConfig:
+        """
+        Cache a service configuration.
+
+        Args:
+            tenant_id: The ID of the tenant
+            service_name: Name of the service it was looked up by, or None
+            service_config: The configuration
+
+        Returns:
+            The cached, session-independent copy of the configuration
+        """
+        cached = _detached_copy(service_config)
+        expires_at = time.monotonic() + chatbot_settings.CONFIG_CACHE_TTL_SECONDS
+        with self._lock:
+            self._configs[(tenant_id, service_name)] = (cached, expires_at)
+        return cached
+
+    def get_response_ttl(self, intent: str) -> int:
+        """
+        Get how long responses with an intent may be cached.
+
+        An exact entry in RESPONSE_CACHE_INTENT_TTLS wins over the longest
+        matching prefix entry, which wins over CACHE_TTL_SECONDS.
+
+        Args:
+            intent: The intent of the response
+
+        Returns:
+            Time-to-live in seconds, 0 if the response must not be cached
+        """
+        rules = chatbot_settings.RESPONSE_CACHE_INTENT_TTLS
+        if intent in rules:
+            return rules[intent]
+        prefixes = [key for key in rules if key.endswith("_") and intent.startswith(key)]
+        if prefixes:
+            return rules[max(prefixes, key=len)]
+        return chatbot_settings.CACHE_TTL_SECONDS
+
+    def get_response(self, request: AIModelRequest, service_name: str) -> Optional[AIModelResponse]:
+        """
+        Get the cached response to a query.
+
+        Args:
+            request: The request to the AI service
+            service_name: Name of the service answering the request
+
+        Returns:
+            The cached response, or None if it is not cached
+        """
+        if not chatbot_settings.ENABLE_RESPONSE_CACHE or request.context:
+            return None
+
+        key = self._get_response_key(request, service_name)
+        data = self._read(key)
+        tags = {"tenant_id": str(request.tenant_id), "service": service_name}
+        if data is None:
+            metrics.increment("response_cache_miss", tags=tags)
+            return None
+
+        metrics.increment("response_cache_hit", tags=tags)
+        return AIModelResponse.parse_raw(data)
+
+    def set_response(self, request: AIModelRequest, service_name: str, response: AIModelResponse) -> bool:
+        """
+        Cache the response to a query if its intent allows it.
+
+        Responses to queries with conversation context, and responses whose
+        intent confidence is below RESPONSE_CACHE_MIN_CONFIDENCE, are not
+        cached.
+
+        Args:
+            request: The request to the AI service
+            service_name: Name of the service that answered the request
+            response: The response of the AI service
+
+        Returns:
+            bool: True if the response was cached
+        """
+        if not chatbot_settings.ENABLE_RESPONSE_CACHE or request.context:
+            return False
+        if response.confidence < chatbot_settings.RESPONSE_CACHE_MIN_CONFIDENCE:
+            return False
+        ttl = self.get_response_ttl(response.intent)
+        if ttl <= 0:
+            return False
+
+        self._write(self._get_response_key(request, service_name), response.json(), ttl)
+        return True
+
+    def invalidate_tenant(self, tenant_id: int) -> None:
+        """
+        Drop the cached configurations and responses of a tenant.
+
+        Called when the tenant's AI service configurations change.
+
+        Args:
+            tenant_id: The ID of the tenant
+        """
+        prefix = self._get_tenant_prefix(tenant_id)
+        with self._lock:
+            for key in [key for key in self._configs if key[0] == tenant_id]:
+                del self._configs[key]
+            for key in [key for key in self._responses if key.startswith(prefix)]:
+                del self._responses[key]
+
+        if self.redis is not None:
+            try:
+                keys = list(self.redis.scan_iter(match=f"{prefix}*", count=500))
+                if keys:
+                    self.redis.delete(*keys)
+            except Exception as e:
+                logger.error(f"Error invalidating cached responses: {str(e)}", extra={"tenant_id": tenant_id})
+
+        metrics.increment("cache_invalidated", tags={"tenant_id": str(tenant_id)})
+
+    def clear(self) -> None:
+        """Drop everything cached in memory."""
+        with self._lock:
+            self._configs.clear()
+            self._responses.clear()
+
+    @staticmethod
+    def _get_tenant_prefix(tenant_id: int) -> str:
+        return f"chatbot:response:{tenant_id}:"
+
+    def _get_response_key(self, request: AIModelRequest, service_name: str) -> str:
+        digest = hashlib.sha256(normalize_query(request.query).encode()).hexdigest()
+        return f"{self._get_tenant_prefix(request.tenant_id)}{service_name}:{request.language or 'en'}:{digest}"
+
+    def _read(self, key: str) -> Optional[str]:
+        if self.redis is not None:
+            try:
+                return self.redis.get(key)
+            except Exception as e:
+                logger.error(f"Error reading cached response: {str(e)}")
+                return None
+
+        with self._lock:
+            entry = self._responses.get(key)
+            if not entry:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._responses[key]
+                return None
+            self._responses.move_to_end(key)
+            return entry[0]
+
+    def _write(self, key: str, data: str, ttl: int) -> None:
+        if self.redis is not None:
+            try:
+                self.redis.setex(key, ttl, data)
+            except Exception as e:
+                logger.error(f"Error caching response: {str(e)}")
+            return
+
+        with self._lock:
+            self._responses[key] = (data, time.monotonic() + ttl)
+            self._responses.move_to_end(key)
+            while len(self._responses) > chatbot_settings.RESPONSE_CACHE_MAX_ENTRIES:
+                self._responses.popitem(last=False)
+
+
+# Process-wide cache shared by the chatbot services
+chatbot_cache = ChatbotCache()
@@ -3,12 +3,16 @@ from decimal import Decimal
 from typing import List, Optional, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Query, Path, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from backend_core.database import get_db
 from backend_core.auth_service import get_current_user, get_current_admin_user
 from backend_core.models import User, Invoice, InvoiceDiscount, InvoiceTax
-from backend_core.cache import get_cached_invoice_details, cache_invoice_details
+from backend_core.cache import (
+    get_cached_invoice_details, cache_invoice_details, get_cached_financial_export, cache_financial_export
+)
+from backend_core.celery_app import app as celery_app
 from .schemas import (
     DiscountCreate,
     DiscountResponse,
@@ -73,7 +77,9 @@ from .schemas.reporting import (
     CustomerLifetimeValueRequest,
     CustomerLifetimeValueResponse,
     ExportFinancialDataRequest,
-    ExportFinancialDataResponse
+    ExportFinancialDataResponse,
+    FinancialExportRequest,
+    FinancialExportJobResponse
 )
 from .services import (
     BillingService, 
@@ -84,6 +90,9 @@ from .services import (
     DiscountService, 
     ReportingService
 )
+from .services.export_service import (
+    FinancialExportService, EXPORT_MEDIA_TYPES, get_export_filename, new_export_id, validate_export
+)
 
 router = APIRouter(
     prefix="/api/billing",
@@ -638,6 +647,59 @@ async def export_financial_data(
         request.report_type
     )
 
+@router.post("/reports/export/stream")
+async def stream_financial_data_export(
+    request: FinancialExportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Stream a financial data export as CSV or JSON, without holding it in memory."""
+    validate_export(request.report_type, request.format)
+    export_service = FinancialExportService(db)
+    filename = get_export_filename(request.report_type, request.start_date, request.end_date, request.format)
+    return StreamingResponse(
+        export_service.iter_export(request.start_date, request.end_date, request.report_type, request.format),
+        media_type=EXPORT_MEDIA_TYPES[request.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/reports/export/jobs", response_model=FinancialExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_financial_data_export_job(
+    request: FinancialExportRequest,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Export financial data to file storage in the background."""
+    validate_export(request.report_type, request.format)
+    job = {
+        "export_id": new_export_id(),
+        "report_type": request.report_type,
+        "format": request.format,
+        "status": "pending"
+    }
+    cache_financial_export(job["export_id"], job)
+    celery_app.send_task(
+        "billing.export_financial_data",
+        args=[
+            job["export_id"],
+            request.start_date.isoformat(),
+            request.end_date.isoformat(),
+            request.report_type,
+            request.format
+        ]
+    )
+    return job
+
+@router.get("/reports/export/jobs/{export_id}", response_model=FinancialExportJobResponse)
+async def get_financial_data_export_job(
+    export_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get the status and progress of a financial data export job."""
+    job = get_cached_financial_export(export_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
 @router.get("/invoices/{invoice_id}/details", response_model=InvoiceDetailsResponse)
 async def get_invoice_details(
     invoice_id: int,
@@ -12,7 +12,8 @@ from modules.billing.models.enums import (
     InvoiceStatus,
     SubscriptionStatus,
     DiscountType,
-    DiscountStatus
+    DiscountStatus,
+    BillingRunStatus
 )
 
 # Import model classes from individual modules
@@ -31,6 +32,9 @@ from modules.billing.models.payment_reminder import PaymentReminder
 from modules.billing.models.payment_gateway import PaymentGatewayConfig
 from modules.billing.models.tariff import TariffPlan, TariffFeature, TariffOverage, TieredPricing
 from modules.billing.models.financial_transaction import FinancialTransaction, AccountingIntegration
+from modules.billing.models.billing_run import BillingRun, BillingRunChunk, RecurringBillingCharge
+from modules.billing.models.ar_aging import ARAgingBalance
+from modules.billing.models.financial_export import FinancialExport
 
 # Expose all model classes at the package level
 __all__ = [
@@ -42,6 +46,7 @@ __all__ = [
     "SubscriptionStatus",
     "DiscountType",
     "DiscountStatus",
+    "BillingRunStatus",
     
     # Invoice models
     "Invoice",
@@ -63,6 +68,15 @@ __all__ = [
     "RecurringBillingProfile",
     "UsageRecord",
     
+    # Billing run models
+    "BillingRun",
+    "BillingRunChunk",
+    "RecurringBillingCharge",
+    
+    # Reporting models
+    "ARAgingBalance",
+    "FinancialExport",
+    
     # Tax models
     "TaxRate",
     "TaxExemption",
@@ -0,0 +1,31 @@
+"""
+Accounts receivable aging models for the billing module.
+
+This module defines the snapshot table the accounts receivable aging
+report reads instead of scanning the open invoices.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime
+
+from backend_core.database import Base
+
+
+class ARAgingBalance(Base):
+    """
+    Model for the outstanding balance of the open invoices due on one day.
+
+    Rows are kept up to date as invoices change, so the aging report
+    aggregates one row per due date into its buckets rather than every
+    open invoice.
+    """
+    __tablename__ = "ar_aging_balances"
+
+    due_date = Column(Date, primary_key=True)
+    outstanding_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ARAgingBalance {self.due_date}: {self.outstanding_amount} in {self.invoice_count} invoices>"
@@ -0,0 +1,107 @@
+"""
+Billing run models for the billing module.
+
+This module defines the database models used to process recurring billing
+in resumable chunks: runs, their chunks of due billing profiles, and the
+charges made per profile and billing period.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+
+from backend_core.database import Base
+from modules.billing.models.enums import BillingRunStatus
+
+
+class BillingRun(Base):
+    """
+    Model for recurring billing runs.
+    
+    A run bills every profile due at its run date. The due profiles are
+    partitioned into chunks when the run starts, and the run keeps count of
+    the chunks and profiles processed so far.
+    """
+    __tablename__ = "billing_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(DateTime, nullable=False)  # Profiles due at this time are billed
+    status = Column(String(20), nullable=False, default=BillingRunStatus.PENDING, index=True)
+    chunk_size = Column(Integer, nullable=False)
+    total_profiles = Column(Integer, nullable=False, default=0)
+    total_chunks = Column(Integer, nullable=False, default=0)
+    completed_chunks = Column(Integer, nullable=False, default=0)
+    invoiced_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relationships
+    chunks = relationship("BillingRunChunk", back_populates="run", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<BillingRun {self.id}: {self.status} {self.completed_chunks}/{self.total_chunks}>"
+
+
+class BillingRunChunk(Base):
+    """
+    Model for a chunk of a billing run.
+    
+    A chunk covers the due profiles with IDs from first_profile_id to
+    last_profile_id and is billed in one transaction, so completed chunks
+    are the checkpoints a failed run resumes from.
+    """
+    __tablename__ = "billing_run_chunks"
+    __table_args__ = (
+        UniqueConstraint("run_id", "chunk_index", name="uq_billing_run_chunk_index"),
+        Index("ix_billing_run_chunks_run_status", "run_id", "status"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("billing_runs.id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    first_profile_id = Column(Integer, nullable=False)
+    last_profile_id = Column(Integer, nullable=False)
+    profile_count = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default=BillingRunStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_expires_at = Column(DateTime, nullable=True)  # A worker holds the chunk until then
+    invoiced_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    run = relationship("BillingRun", back_populates="chunks")
+    
+    def __repr__(self):
+        return f"<BillingRunChunk {self.run_id}/{self.chunk_index}: {self.status}>"
+
+
+class RecurringBillingCharge(Base):
+    """
+    Model for the charge of a billing profile for one billing period.
+    
+    The idempotency key identifies the profile and period and is unique, so
+    a retried chunk, or two runs overlapping, can never invoice a profile
+    twice for the same period. The charge is written in the same
+    transaction as its invoice.
+    """
+    __tablename__ = "recurring_billing_charges"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(64), nullable=False, unique=True)
+    profile_id = Column(Integer, ForeignKey("recurring_billing_profiles.id"), nullable=False, index=True)
+    period_start = Column(DateTime, nullable=False)
+    run_id = Column(Integer, ForeignKey("billing_runs.id"), nullable=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<RecurringBillingCharge {self.idempotency_key}: invoice {self.invoice_id}>"
@@ -75,3 +75,11 @@ class DiscountStatus(StrEnum):
     EXPIRED = "expired"
     SCHEDULED = "scheduled"
     CANCELLED = "cancelled"
+
+
+class BillingRunStatus(StrEnum):
+    """Status options of recurring billing runs and their chunks"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
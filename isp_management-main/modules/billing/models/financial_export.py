@@ -0,0 +1,37 @@
+"""
+Financial export models for the billing module.
+
+This module defines the table recording the financial data exports
+written to the file manager's storage, so their content can be released
+once their download links expire.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+
+from backend_core.database import Base
+
+
+class FinancialExport(Base):
+    """
+    Model for a financial data export held in file storage.
+
+    Each export holds one reference to the file blob with its content. The
+    reference is released when the export expires, after which the blob
+    is garbage collected unless other files share its content.
+    """
+    __tablename__ = "financial_exports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)
+    report_type = Column(String(32), nullable=False)
+    export_format = Column(String(16), nullable=False)
+    storage_backend = Column(String(16), nullable=False)  # File manager StorageBackend value
+    storage_path = Column(String(1024), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<FinancialExport {self.filename} until {self.expires_at}>"
@@ -178,3 +178,21 @@ class ExportFinancialDataResponse(BaseModel):
     end_date: str
     generated_at: str
     data: List[Dict[str, Any]]
+
+
+class FinancialExportRequest(ExportFinancialDataRequest):
+    """Request model for streaming or scheduling a financial data export."""
+    format: str = Field("csv", description="Export format: csv, json")
+
+
+class FinancialExportJobResponse(BaseModel):
+    """Response model for the status of a financial data export job."""
+    export_id: str
+    status: str
+    report_type: str
+    format: str
+    total: Optional[int] = None
+    rows: Optional[int] = None
+    percent: Optional[float] = None
+    file_url: Optional[str] = None
+    error: Optional[str] = None
@@ -0,0 +1,388 @@
+"""
+Accounts receivable aging for the billing module.
+
+The aging report puts the outstanding amount of open invoices into buckets
+by how long ago the invoices fell due. Each bucket is a branch of one CASE
+expression, so the report is computed by a single grouped query. The paid
+amount of an invoice is the sum of its completed payments.
+
+With AR_AGING_SNAPSHOT_ENABLED, the outstanding balance per due date is
+also kept in ar_aging_balances. Sessions apply the change of every invoice
+they flush, or whose payments they flush, to the balance of its due date,
+in the same transaction, so the report aggregates one row per due date
+rather than every open invoice. Changes made without the ORM are not seen;
+rebuild_snapshot() recomputes the balances from the invoices and is
+scheduled to run nightly.
+"""
+
+import os
+import logging
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend_core.models import Invoice, Payment
+from modules.billing.models import ARAgingBalance
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+AR_AGING_SNAPSHOT_ENABLED = os.getenv("AR_AGING_SNAPSHOT_ENABLED", "false").lower() == "true"
+
+# Aging buckets with the number of days overdue they end at, oldest last
+AGING_BUCKETS = (
+    ("current", 30),
+    ("30_60_days", 60),
+    ("60_90_days", 90),
+    ("over_90_days", None),
+)
+
+# Invoice statuses whose unpaid amount is not outstanding
+CLOSED_INVOICE_STATUSES = ("paid", "cancelled", "draft")
+
+# Payment status whose amount counts as paid
+PAID_PAYMENT_STATUS = "completed"
+
+invoice_table = Invoice.__table__
+payment_table = Payment.__table__
+balance_table = ARAgingBalance.__table__
+
+_BALANCES_KEY = "ar_aging_balances"
+
+
+def aging_bucket(due_date_column, now):
+    """
+    Builds the CASE expression naming the aging bucket of a due date.
+
+    Args:
+        due_date_column: Column or expression holding the due date
+        now: Time the ages are computed at, a date for date columns
+
+    Returns:
+        The CASE expression
+    """
+    whens = [
+        (due_date_column >= now - timedelta(days=days), name)
+        for name, days in AGING_BUCKETS if days is not None
+    ]
+    return case(*whens, else_=AGING_BUCKETS[-1][0])
+
+
+def paid_amounts():
+    """Subquery with the paid amount of every invoice with completed payments."""
+    return select(
+        payment_table.c.invoice_id,
+        func.sum(payment_table.c.amount).label("amount_paid")
+    ).where(
+        payment_table.c.status == PAID_PAYMENT_STATUS
+    ).group_by(payment_table.c.invoice_id).subquery("paid")
+
+
+def outstanding_invoices():
+    """
+    Select the ID, due date and outstanding amount of the open invoices.
+
+    Returns:
+        Select statement with ``id``, ``due_date`` and ``outstanding`` columns
+    """
+    paid = paid_amounts()
+    outstanding = invoice_table.c.amount - func.coalesce(paid.c.amount_paid, 0)
+    return select(
+        invoice_table.c.id,
+        invoice_table.c.due_date,
+        outstanding.label("outstanding")
+    ).select_from(
+        invoice_table.outerjoin(paid, paid.c.invoice_id == invoice_table.c.id)
+    ).where(open_invoices_filter(paid))
+
+
+def open_invoices_filter(paid):
+    """
+    Condition matching the invoices with an outstanding balance.
+
+    Args:
+        paid: Subquery from paid_amounts(), joined to the invoices
+    """
+    return and_(
+        invoice_table.c.status.notin_(CLOSED_INVOICE_STATUSES),
+        func.coalesce(paid.c.amount_paid, 0) < invoice_table.c.amount
+    )
+
+
+class ARAgingService:
+    """Service for the accounts receivable aging report and its snapshot"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_aging(self, use_snapshot: Optional[bool] = None, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Gets the outstanding amount and invoice count per aging bucket.
+
+        Invoices that are not due yet are not included. The snapshot ages
+        invoices by due date rather than due time.
+
+        Args:
+            use_snapshot: Read the snapshot rather than the invoices,
+                defaults to AR_AGING_SNAPSHOT_ENABLED
+            as_of: Time the invoices are aged at, defaults to now
+
+        Returns:
+            Dict with the total outstanding amount and the buckets
+        """
+        if use_snapshot is None:
+            use_snapshot = AR_AGING_SNAPSHOT_ENABLED
+
+        now = as_of or datetime.utcnow()
+        if use_snapshot:
+            bucket = aging_bucket(balance_table.c.due_date, now.date()).label("bucket")
+            stmt = select(
+                bucket,
+                func.sum(balance_table.c.outstanding_amount),
+                func.sum(balance_table.c.invoice_count)
+            ).where(
+                balance_table.c.due_date <= now.date(),
+                balance_table.c.invoice_count > 0
+            ).group_by(bucket)
+        else:
+            invoices = outstanding_invoices().where(invoice_table.c.due_date <= now).subquery()
+            bucket = aging_bucket(invoices.c.due_date, now).label("bucket")
+            stmt = select(
+                bucket,
+                func.sum(invoices.c.outstanding),
+                func.count(invoices.c.id)
+            ).group_by(bucket)
+        rows = self.db.execute(stmt).all()
+
+        totals = {name: (amount, count) for name, amount, count in rows}
+        results = {
+            "total_outstanding": 0,
+            "buckets": {}
+        }
+        for bucket_name, _ in AGING_BUCKETS:
+            amount, count = totals.get(bucket_name, (None, None))
+            results["buckets"][bucket_name] = {
+                "amount": float(amount or Decimal('0.00')),
+                "count": int(count or 0)
+            }
+            results["total_outstanding"] += float(amount or Decimal('0.00'))
+
+        return results
+
+    def rebuild_snapshot(self) -> int:
+        """
+        Recomputes the snapshot from the open invoices.
+
+        Returns:
+            int: Number of due dates with an outstanding balance
+        """
+        invoices = outstanding_invoices().subquery()
+        due_date = func.date(invoices.c.due_date)
+        balances = select(
+            due_date,
+            func.sum(invoices.c.outstanding),
+            func.count(invoices.c.id),
+            literal(datetime.utcnow())
+        ).group_by(due_date)
+
+        self.db.execute(delete(balance_table))
+        self.db.execute(
+            insert(balance_table).from_select(
+                ["due_date", "outstanding_amount", "invoice_count", "updated_at"], balances
+            )
+        )
+        self.db.commit()
+
+        count = self.db.execute(select(func.count()).select_from(balance_table)).scalar() or 0
+        logger.info(f"Rebuilt accounts receivable aging snapshot with {count} due dates")
+        return count
+
+
+def invoice_balances(connection, invoice_ids: Iterable[int]) -> Dict[int, Tuple[date, Decimal]]:
+    """
+    Reads the due date and outstanding amount of invoices.
+
+    Args:
+        connection: Connection of the transaction to read in
+        invoice_ids: IDs of the invoices
+
+    Returns:
+        Due date and outstanding amount per invoice, for the open invoices only
+    """
+    invoice_ids = sorted(invoice_ids)
+    if not invoice_ids:
+        return {}
+    rows = connection.execute(outstanding_invoices().where(invoice_table.c.id.in_(invoice_ids)))
+    return {
+        row.id: (row.due_date.date() if isinstance(row.due_date, datetime) else row.due_date, Decimal(row.outstanding))
+        for row in rows
+    }
+
+
+def _table_name(obj) -> Optional[str]:
+    table = getattr(obj, "__table__", None)
+    return table.name if table is not None else None
+
+
+def _payment_invoice_ids(obj) -> Set[int]:
+    """Returns the IDs of the invoices a payment belongs or belonged to."""
+    state = inspect(obj)
+    history = state.attrs.invoice_id.history
+    invoice_ids = {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
+    invoice = state.dict.get("invoice")
+    if invoice is not None and inspect(invoice).identity:
+        invoice_ids.add(inspect(invoice).identity[0])
+    return invoice_ids
+
+
+class ARAgingSnapshot:
+    """
+    Session listener keeping the aging snapshot in step with the invoices.
+
+    Before a flush, the invoices the flush changes, directly or through
+    their payments, are collected and their outstanding balances read from
+    the database. After the flush their balances are read again in the
+    same transaction, and the differences are added to the balances of
+    their due dates, so concurrent transactions never overwrite each
+    other's changes.
+    """
+
+    def before_flush(self, session, flush_context, instances) -> None:
+        session.info.pop(_BALANCES_KEY, None)
+        invoice_ids: Set[int] = set()
+        new_objects = []
+
+        for obj in session.new:
+            name = _table_name(obj)
+            if name == invoice_table.name:
+                new_objects.append(obj)
+            elif name == payment_table.name:
+                new_objects.append(obj)
+                invoice_ids |= _payment_invoice_ids(obj)
+        for obj in session.dirty:
+            name = _table_name(obj)
+            if name not in (invoice_table.name, payment_table.name) or not session.is_modified(obj):
+                continue
+            if name == invoice_table.name:
+                invoice_ids.add(inspect(obj).identity[0])
+            else:
+                new_objects.append(obj)
+                invoice_ids |= _payment_invoice_ids(obj)
+        for obj in session.deleted:
+            name = _table_name(obj)
+            if name == invoice_table.name:
+                invoice_ids.add(inspect(obj).identity[0])
+            elif name == payment_table.name:
+                invoice_ids |= _payment_invoice_ids(obj)
+
+        if not (invoice_ids or new_objects):
+            return
+        before = invoice_balances(session.connection(), invoice_ids)
+        session.info[_BALANCES_KEY] = (invoice_ids, new_objects, before)
+
+    def after_flush(self, session, flush_context) -> None:
+        tracked = session.info.pop(_BALANCES_KEY, None)
+        if not tracked:
+            return
+        invoice_ids, new_objects, before = tracked
+        invoice_ids = set(invoice_ids)
+        # Primary and foreign keys are populated by now
+        for obj in new_objects:
+            key = "id" if _table_name(obj) == invoice_table.name else "invoice_id"
+            if getattr(obj, key, None) is not None:
+                invoice_ids.add(getattr(obj, key))
+
+        after = invoice_balances(session.connection(), invoice_ids)
+        deltas: Dict[date, List] = {}
+        for invoice_id in invoice_ids:
+            old, new = before.get(invoice_id), after.get(invoice_id)
+            if old == new:
+                continue
+            if old:
+                delta = deltas.setdefault(old[0], [Decimal('0.00'), 0])
+                delta[0] -= old[1]
+                delta[1] -= 1
+            if new:
+                delta = deltas.setdefault(new[0], [Decimal('0.00'), 0])
+                delta[0] += new[1]
+                delta[1] += 1
+        if deltas:
+            apply_balance_deltas(session.connection(), deltas)
+
+
+def apply_balance_deltas(connection, deltas: Dict[date, List]) -> None:
+    """
+    Adds changes in outstanding balance to the snapshot.
+
+    Args:
+        connection: Connection of the transaction the invoices changed in
+        deltas: Change in outstanding amount and invoice count per due date
+    """
+    table = balance_table
+    now = datetime.utcnow()
+    for due_date, (amount, count) in sorted(deltas.items()):
+        if not amount and not count:
+            continue
+        if connection.dialect.name == "postgresql":
+            stmt = pg_insert(table).values(
+                due_date=due_date, outstanding_amount=amount, invoice_count=count, updated_at=now
+            )
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.due_date],
+                set_={
+                    "outstanding_amount": table.c.outstanding_amount + stmt.excluded.outstanding_amount,
+                    "invoice_count": table.c.invoice_count + stmt.excluded.invoice_count,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            ))
+            continue
+
+        updated = connection.execute(
+            update(table)
+            .where(table.c.due_date == due_date)
+            .values(
+                outstanding_amount=table.c.outstanding_amount + amount,
+                invoice_count=table.c.invoice_count + count,
+                updated_at=now
+            )
+        )
+        if updated.rowcount == 0:
+            connection.execute(
+                insert(table).values(
+                    due_date=due_date, outstanding_amount=amount, invoice_count=count, updated_at=now
+                )
+            )
+
+
+# Process-wide snapshot listener
+ar_aging_snapshot = ARAgingSnapshot()
+
+
+def setup_ar_aging_snapshot(session_class=Session) -> None:
+    """
+    Set up maintenance of the aging snapshot by the sessions of a class.
+
+    Sessions of a class already set up, or of one of its subclasses, are
+    not listened to twice.
+
+    Args:
+        session_class: Session class or sessionmaker to listen to
+    """
+    # A sessionmaker's listeners are attached to the session class it creates.
+    # The class is flagged rather than checked with event.contains, whose
+    # registry is keyed by id() and can match a collected sessionmaker.
+    target = getattr(session_class, "class_", session_class)
+    if getattr(target, "_ar_aging_snapshot", False):
+        return
+    event.listen(target, "before_flush", ar_aging_snapshot.before_flush)
+    event.listen(target, "after_flush", ar_aging_snapshot.after_flush)
+    target._ar_aging_snapshot = True
+    logger.info("Accounts receivable aging snapshot set up")
+
+
+if AR_AGING_SNAPSHOT_ENABLED:
+    setup_ar_aging_snapshot()
@@ -0,0 +1,452 @@
+"""
+Billing run service for the billing module.
+
+Recurring billing is processed as billing runs. A run partitions the
+profiles due at its run date into chunks of consecutive profile IDs, and
+each chunk is billed in its own transaction, typically by a Celery task
+per chunk. Completed chunks are checkpoints: a run that was interrupted
+continues with the chunks that did not complete, and a run that failed
+can be resumed. Every charge is recorded under an idempotency key per
+profile and billing period in the same transaction as its invoice, so a
+chunk that is retried after committing, or two overlapping runs, never
+invoice a profile twice.
+
+Runs read and write their tables with Core statements, so a chunk costs
+a few statements regardless of its size.
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import and_, or_, select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from modules.billing.models import (
+    RecurringBillingProfile, Subscription, BillingRun, BillingRunChunk, RecurringBillingCharge,
+    BillingRunStatus, SubscriptionStatus
+)
+from modules.billing.services.subscription_service import SubscriptionService
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BILLING_RUN_CHUNK_SIZE = int(os.getenv("BILLING_RUN_CHUNK_SIZE", "200"))
+# A chunk whose worker has not finished it by then can be claimed again
+BILLING_RUN_LEASE_SECONDS = int(os.getenv("BILLING_RUN_LEASE_SECONDS", "900"))
+BILLING_RUN_MAX_ATTEMPTS = int(os.getenv("BILLING_RUN_MAX_ATTEMPTS", "3"))
+
+runs_table = BillingRun.__table__
+chunks_table = BillingRunChunk.__table__
+charges_table = RecurringBillingCharge.__table__
+profiles_table = RecurringBillingProfile.__table__
+subscriptions_table = Subscription.__table__
+
+
+def get_idempotency_key(profile_id: int, period_start: datetime) -> str:
+    """Returns the idempotency key of a profile's charge for the period starting at period_start."""
+    return f"recurring:{profile_id}:{period_start.isoformat()}"
+
+
+class _NothingToBill(Exception):
+    """Raised to roll back a profile that had nothing to invoice."""
+
+
+class BillingRunService:
+    """Service for processing recurring billing in resumable, chunked runs"""
+
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: int = BILLING_RUN_CHUNK_SIZE,
+        lease_seconds: int = BILLING_RUN_LEASE_SECONDS,
+        max_attempts: int = BILLING_RUN_MAX_ATTEMPTS
+    ):
+        self.db = db
+        self.chunk_size = max(1, chunk_size)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.subscription_service = SubscriptionService(db)
+
+    def start_run(self, run_date: Optional[datetime] = None) -> int:
+        """
+        Starts a billing run for the profiles due at run_date.
+
+        Earlier runs are left as they are: profiles they did not bill are
+        still due and are included in the new run, and their idempotency
+        keys keep the runs from billing a profile twice. Failed runs are
+        resumed with resume_run().
+
+        Returns:
+            The ID of the run
+        """
+        run_date = run_date or datetime.utcnow()
+        now = datetime.utcnow()
+        run_id = self.db.execute(
+            insert(runs_table)
+            .values(
+                run_date=run_date,
+                status=BillingRunStatus.RUNNING,
+                chunk_size=self.chunk_size,
+                total_profiles=0,
+                total_chunks=0,
+                completed_chunks=0,
+                invoiced_count=0,
+                skipped_count=0,
+                failed_count=0,
+                started_at=now,
+                created_at=now
+            )
+            .returning(runs_table.c.id)
+        ).scalar()
+
+        # Partition the due profiles into chunks of consecutive IDs
+        profile_ids = self.db.execute(
+            select(profiles_table.c.id)
+            .select_from(self._profiles_with_subscriptions())
+            .where(self._due_profiles(run_date))
+            .order_by(profiles_table.c.id)
+        ).scalars().all()
+        chunks = [
+            profile_ids[start:start + self.chunk_size]
+            for start in range(0, len(profile_ids), self.chunk_size)
+        ]
+        if chunks:
+            self.db.execute(insert(chunks_table), [
+                {
+                    "run_id": run_id,
+                    "chunk_index": index,
+                    "first_profile_id": chunk[0],
+                    "last_profile_id": chunk[-1],
+                    "profile_count": len(chunk),
+                    "status": BillingRunStatus.PENDING,
+                    "attempts": 0,
+                    "invoiced_count": 0,
+                    "skipped_count": 0,
+                    "failed_count": 0
+                }
+                for index, chunk in enumerate(chunks)
+            ])
+
+        values = {"total_profiles": len(profile_ids), "total_chunks": len(chunks)}
+        if not chunks:
+            values.update(status=BillingRunStatus.COMPLETED, completed_at=datetime.utcnow())
+        self.db.execute(update(runs_table).where(runs_table.c.id == run_id).values(**values))
+        self.db.commit()
+
+        logger.info(f"Started billing run {run_id}: {len(profile_ids)} profiles in {len(chunks)} chunks")
+        return run_id
+
+    def resume_run(self, run_id: int) -> int:
+        """
+        Returns the failed chunks of a run to the queue with fresh attempts.
+
+        Returns:
+            The ID of the run
+        """
+        status = self.db.execute(
+            select(runs_table.c.status).where(runs_table.c.id == run_id)
+        ).scalar()
+        if status is None:
+            raise ValueError(f"Billing run {run_id} not found")
+
+        self.db.execute(
+            update(chunks_table)
+            .where(chunks_table.c.run_id == run_id, chunks_table.c.status == BillingRunStatus.FAILED)
+            .values(status=BillingRunStatus.PENDING, attempts=0, error_message=None, lease_expires_at=None)
+        )
+        if status != BillingRunStatus.COMPLETED:
+            self.db.execute(
+                update(runs_table)
+                .where(runs_table.c.id == run_id)
+                .values(status=BillingRunStatus.RUNNING, error_message=None)
+            )
+        self.db.commit()
+        return run_id
+
+    def get_unfinished_run_ids(self) -> List[int]:
+        """Returns the IDs of the runs that are still running, oldest first."""
+        return self.db.execute(
+            select(runs_table.c.id)
+            .where(runs_table.c.status == BillingRunStatus.RUNNING)
+            .order_by(runs_table.c.id)
+        ).scalars().all()
+
+    def get_pending_chunk_ids(self, run_id: int) -> List[int]:
+        """Returns the IDs of the chunks of a run that still have to be billed."""
+        now = datetime.utcnow()
+        return self.db.execute(
+            select(chunks_table.c.id)
+            .where(chunks_table.c.run_id == run_id, self._claimable(now))
+            .order_by(chunks_table.c.chunk_index)
+        ).scalars().all()
+
+    def claim_chunk(self, chunk_id: int) -> Optional[int]:
+        """
+        Claims a chunk for this worker.
+
+        Pending and failed chunks with attempts left can be claimed, as can
+        chunks with attempts left whose previous worker's lease has expired.
+        The attempt number fences off a previous worker that finishes after
+        losing its lease.
+
+        Returns:
+            The attempt number, or None if the chunk could not be claimed
+        """
+        now = datetime.utcnow()
+        attempt = self.db.execute(
+            update(chunks_table)
+            .where(chunks_table.c.id == chunk_id, self._claimable(now))
+            .values(
+                status=BillingRunStatus.RUNNING,
+                attempts=chunks_table.c.attempts + 1,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                started_at=now,
+                error_message=None
+            )
+            .returning(chunks_table.c.attempts)
+        ).scalar()
+        self.db.commit()
+        return attempt
+
+    def process_chunk(self, chunk_id: int) -> Dict[str, Any]:
+        """
+        Bills the due profiles of a chunk in one transaction.
+
+        Profiles that fail are reported and left due for the next run
+        without failing the chunk; errors outside a single profile fail the
+        chunk and are raised so it can be retried.
+        """
+        attempt = self.claim_chunk(chunk_id)
+        if attempt is None:
+            return {"chunk_id": chunk_id, "status": "skipped", "results": []}
+
+        chunk = self.db.execute(
+            select(
+                chunks_table.c.run_id, chunks_table.c.chunk_index,
+                chunks_table.c.first_profile_id, chunks_table.c.last_profile_id,
+                runs_table.c.run_date
+            )
+            .select_from(chunks_table.join(runs_table, runs_table.c.id == chunks_table.c.run_id))
+            .where(chunks_table.c.id == chunk_id)
+        ).one()
+
+        try:
+            profiles = self.db.execute(
+                select(profiles_table.c.id, profiles_table.c.next_billing_date)
+                .select_from(self._profiles_with_subscriptions())
+                .where(
+                    self._due_profiles(chunk.run_date),
+                    profiles_table.c.id.between(chunk.first_profile_id, chunk.last_profile_id)
+                )
+                .order_by(profiles_table.c.id)
+            ).all()
+
+            results = [
+                self._bill_profile(chunk.run_id, chunk.run_date, profile.id, profile.next_billing_date)
+                for profile in profiles
+            ]
+            counts = {
+                status: sum(1 for result in results if result["status"] == status)
+                for status in ("invoiced", "skipped", "failed")
+            }
+
+            completed = self.db.execute(
+                update(chunks_table)
+                .where(
+                    chunks_table.c.id == chunk_id,
+                    chunks_table.c.attempts == attempt,
+                    chunks_table.c.status == BillingRunStatus.RUNNING
+                )
+                .values(
+                    status=BillingRunStatus.COMPLETED,
+                    invoiced_count=counts["invoiced"],
+                    skipped_count=counts["skipped"],
+                    failed_count=counts["failed"],
+                    lease_expires_at=None,
+                    completed_at=datetime.utcnow()
+                )
+            ).rowcount == 1
+            if not completed:
+                # Another worker has taken the chunk over; its billing counts
+                self.db.rollback()
+                logger.warning(f"Lost the lease of billing run chunk {chunk_id}")
+                return {"chunk_id": chunk_id, "status": "lost", "results": []}
+
+            # Checkpoint the run in the chunk's transaction
+            self.db.execute(
+                update(runs_table)
+                .where(runs_table.c.id == chunk.run_id)
+                .values(
+                    completed_chunks=runs_table.c.completed_chunks + 1,
+                    invoiced_count=runs_table.c.invoiced_count + counts["invoiced"],
+                    skipped_count=runs_table.c.skipped_count + counts["skipped"],
+                    failed_count=runs_table.c.failed_count + counts["failed"]
+                )
+            )
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error processing billing run chunk {chunk_id}: {str(e)}")
+            self._fail_chunk(chunk_id, attempt, str(e))
+            raise
+
+        self._finish_run(chunk.run_id)
+        logger.info(
+            f"Billed chunk {chunk.chunk_index} of run {chunk.run_id}: {counts['invoiced']} invoiced, "
+            f"{counts['skipped']} skipped, {counts['failed']} failed"
+        )
+        return {"chunk_id": chunk_id, "status": "completed", **counts, "results": results}
+
+    def fail_abandoned_chunks(self, run_id: int) -> int:
+        """
+        Fails the chunks of a run whose last worker lost its lease with no attempts left.
+
+        Such chunks can no longer be claimed, so the run is failed and can be
+        resumed with resume_run().
+
+        Returns:
+            Number of chunks failed
+        """
+        abandoned = self.db.execute(
+            update(chunks_table)
+            .where(
+                chunks_table.c.run_id == run_id,
+                chunks_table.c.status == BillingRunStatus.RUNNING,
+                chunks_table.c.lease_expires_at < datetime.utcnow(),
+                chunks_table.c.attempts >= self.max_attempts
+            )
+            .values(status=BillingRunStatus.FAILED, error_message="Lease expired", lease_expires_at=None)
+            .returning(chunks_table.c.chunk_index)
+        ).scalars().all()
+        if abandoned:
+            self.db.execute(
+                update(runs_table)
+                .where(runs_table.c.id == run_id)
+                .values(
+                    status=BillingRunStatus.FAILED,
+                    error_message=f"Chunk {abandoned[0]} lost its lease after {self.max_attempts} attempts"
+                )
+            )
+        self.db.commit()
+        return len(abandoned)
+
+    def get_run_progress(self, run_id: int) -> Dict[str, Any]:
+        """Returns the progress of a billing run."""
+        run = self.db.execute(select(runs_table).where(runs_table.c.id == run_id)).first()
+        if not run:
+            raise ValueError(f"Billing run {run_id} not found")
+
+        return {
+            "run_id": run.id,
+            "status": run.status,
+            "run_date": run.run_date.isoformat(),
+            "total_profiles": run.total_profiles,
+            "total_chunks": run.total_chunks,
+            "completed_chunks": run.completed_chunks,
+            "invoiced": run.invoiced_count,
+            "skipped": run.skipped_count,
+            "failed": run.failed_count,
+            "error_message": run.error_message
+        }
+
+    def _bill_profile(self, run_id: int, run_date: datetime, profile_id: int, period_start: datetime) -> Dict[str, Any]:
+        """Bills one profile in a savepoint, under its idempotency key."""
+        key = get_idempotency_key(profile_id, period_start)
+        if self._is_charged(key):
+            return {"profile_id": profile_id, "status": "skipped", "reason": "already billed"}
+
+        try:
+            with self.db.begin_nested():
+                charge_id = self.db.execute(
+                    insert(charges_table)
+                    .values(
+                        idempotency_key=key,
+                        profile_id=profile_id,
+                        period_start=period_start,
+                        run_id=run_id,
+                        created_at=datetime.utcnow()
+                    )
+                    .returning(charges_table.c.id)
+                ).scalar()
+
+                result = self.subscription_service.bill_profile(profile_id, run_date, commit=False)
+                if result is None:
+                    raise _NothingToBill()
+                self.db.execute(
+                    update(charges_table)
+                    .where(charges_table.c.id == charge_id)
+                    .values(invoice_id=result["invoice_id"])
+                )
+            return {**result, "status": "invoiced"}
+        except _NothingToBill:
+            return {"profile_id": profile_id, "status": "skipped", "reason": "nothing to invoice"}
+        except Exception as e:
+            # The key was taken by a concurrent run after the check above
+            if isinstance(e, IntegrityError) and self._is_charged(key):
+                return {"profile_id": profile_id, "status": "skipped", "reason": "already billed"}
+            logger.error(f"Error billing profile {profile_id}: {str(e)}")
+            return {"profile_id": profile_id, "error": str(e), "status": "failed"}
+
+    def _is_charged(self, idempotency_key: str) -> bool:
+        return self.db.execute(
+            select(charges_table.c.id).where(charges_table.c.idempotency_key == idempotency_key)
+        ).first() is not None
+
+    def _fail_chunk(self, chunk_id: int, attempt: int, error: str) -> None:
+        """Marks a chunk as failed, and its run once the chunk has no attempts left."""
+        failed = self.db.execute(
+            update(chunks_table)
+            .where(chunks_table.c.id == chunk_id, chunks_table.c.attempts == attempt)
+            .values(status=BillingRunStatus.FAILED, error_message=error, lease_expires_at=None)
+            .returning(chunks_table.c.run_id, chunks_table.c.chunk_index)
+        ).first()
+        if failed and attempt >= self.max_attempts:
+            self.db.execute(
+                update(runs_table)
+                .where(runs_table.c.id == failed.run_id)
+                .values(
+                    status=BillingRunStatus.FAILED,
+                    error_message=f"Chunk {failed.chunk_index} failed after {attempt} attempts: {error}"
+                )
+            )
+        self.db.commit()
+
+    def _finish_run(self, run_id: int) -> None:
+        """Completes a run once all its chunks have completed."""
+        self.db.execute(
+            update(runs_table)
+            .where(
+                runs_table.c.id == run_id,
+                runs_table.c.status == BillingRunStatus.RUNNING,
+                runs_table.c.completed_chunks >= runs_table.c.total_chunks
+            )
+            .values(status=BillingRunStatus.COMPLETED, completed_at=datetime.utcnow())
+        )
+        self.db.commit()
+
+    def _claimable(self, now: datetime):
+        """Condition matching the chunks a worker may claim."""
+        return and_(
+            chunks_table.c.attempts < self.max_attempts,
+            or_(
+                chunks_table.c.status.in_([BillingRunStatus.PENDING, BillingRunStatus.FAILED]),
+                and_(chunks_table.c.status == BillingRunStatus.RUNNING, chunks_table.c.lease_expires_at < now)
+            )
+        )
+
+    @staticmethod
+    def _profiles_with_subscriptions():
+        return profiles_table.join(subscriptions_table, subscriptions_table.c.id == profiles_table.c.subscription_id)
+
+    @staticmethod
+    def _due_profiles(run_date: datetime):
+        """Condition matching the profiles due for billing at run_date, joined with their subscriptions."""
+        return and_(
+            profiles_table.c.is_active == True,
+            profiles_table.c.next_billing_date <= run_date,
+            subscriptions_table.c.status == SubscriptionStatus.ACTIVE,
+            subscriptions_table.c.auto_renew == True
+        )
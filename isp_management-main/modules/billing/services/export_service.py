@@ -0,0 +1,413 @@
+"""
+Financial data export for the billing module.
+
+Exports of row-level data such as payments may cover a year of activity
+for large tenants. Rows are read with a server-side cursor in batches of
+FINANCIAL_EXPORT_BATCH_SIZE and written out as CSV or JSON as they are
+read, so memory use does not grow with the size of the export. Exports
+are streamed to the client, or written to the file manager's storage by
+a Celery task that reports its progress as it goes. Stored exports are
+recorded with an expiry, after which their content is released.
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import asyncio
+import logging
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from backend_core.cache import DecimalEncoder
+from backend_core.models import Invoice, Payment
+from modules.billing.models import FinancialExport
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+FINANCIAL_EXPORT_BATCH_SIZE = int(os.getenv("FINANCIAL_EXPORT_BATCH_SIZE", "1000"))
+# Output is written in chunks of about this many bytes
+FINANCIAL_EXPORT_CHUNK_BYTES = int(os.getenv("FINANCIAL_EXPORT_CHUNK_BYTES", str(64 * 1024)))
+# Export jobs report their progress every this many rows
+FINANCIAL_EXPORT_PROGRESS_ROWS = int(os.getenv("FINANCIAL_EXPORT_PROGRESS_ROWS", "10000"))
+# Stored exports are kept this long before their content is released
+FINANCIAL_EXPORT_RETENTION_HOURS = int(os.getenv("FINANCIAL_EXPORT_RETENTION_HOURS", "168"))
+
+EXPORT_REPORT_TYPES = ("revenue", "subscriptions", "payments")
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+# CSV columns of the row-level reports
+EXPORT_COLUMNS = {
+    "payments": ["id", "user_id", "invoice_id", "amount", "payment_method", "status", "created_at"],
+}
+
+payment_table = Payment.__table__
+invoice_table = Invoice.__table__
+export_table = FinancialExport.__table__
+
+
+def validate_export(report_type: str, export_format: str) -> None:
+    """
+    Check that a report type and format can be exported.
+
+    Args:
+        report_type: Report type: revenue, subscriptions, payments
+        export_format: Export format: csv, json
+
+    Raises:
+        HTTPException: If the report type or format is not supported
+    """
+    if report_type not in EXPORT_REPORT_TYPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid report type")
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format: {export_format}"
+        )
+
+
+def get_export_filename(report_type: str, start_date: datetime, end_date: datetime, export_format: str) -> str:
+    """Get the file name of an export."""
+    return f"{report_type}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{export_format}"
+
+
+def new_export_id() -> str:
+    """Get a new ID for an export job."""
+    return uuid.uuid4().hex
+
+
+class ExportProgress:
+    """Progress and throughput of a financial data export."""
+
+    def __init__(self, total: int):
+        """
+        Initialize the progress.
+
+        Args:
+            total: Number of rows to export
+        """
+        self.total = total
+        self.rows = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the export started."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the progress as a dictionary."""
+        elapsed = self.elapsed
+        return {
+            "total": self.total,
+            "rows": self.rows,
+            "percent": round(100.0 * self.rows / self.total, 1) if self.total else 100.0,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class FinancialExportService:
+    """Service for exporting financial data without holding it in memory"""
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = FINANCIAL_EXPORT_BATCH_SIZE,
+        on_progress: Optional[Callable[[ExportProgress], None]] = None
+    ):
+        """
+        Initialize the export service.
+
+        Args:
+            db: Database session
+            batch_size: Number of rows fetched from the cursor at a time
+            on_progress: Called with the progress every FINANCIAL_EXPORT_PROGRESS_ROWS rows
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+
+    def count_rows(self, start_date: datetime, end_date: datetime, report_type: str) -> int:
+        """Count the rows of an export."""
+        if report_type == "payments":
+            return self.db.execute(
+                select(func.count()).select_from(payment_table)
+                .where(payment_table.c.created_at.between(start_date, end_date))
+            ).scalar() or 0
+        return len(self._get_report_rows(start_date, end_date, report_type))
+
+    def iter_rows(self, start_date: datetime, end_date: datetime, report_type: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the rows of an export.
+
+        Payments are read with a server-side cursor, a batch at a time.
+        Revenue and subscription reports are aggregated per month and
+        small, so they are computed up front.
+
+        Args:
+            start_date: Start of the period
+            end_date: End of the period
+            report_type: Report type: revenue, subscriptions, payments
+
+        Returns:
+            Iterator over the rows
+        """
+        if report_type != "payments":
+            yield from self._get_report_rows(start_date, end_date, report_type)
+            return
+
+        stmt = select(
+            payment_table.c.id,
+            invoice_table.c.user_id,
+            payment_table.c.invoice_id,
+            payment_table.c.amount,
+            payment_table.c.payment_method,
+            payment_table.c.status,
+            payment_table.c.created_at
+        ).select_from(
+            payment_table.outerjoin(invoice_table, invoice_table.c.id == payment_table.c.invoice_id)
+        ).where(
+            payment_table.c.created_at.between(start_date, end_date)
+        ).order_by(payment_table.c.id)
+
+        result = self.db.execute(stmt, execution_options={"yield_per": self.batch_size})
+        try:
+            for row in result:
+                yield {
+                    "id": row.id,
+                    "user_id": row.user_id,
+                    "invoice_id": row.invoice_id,
+                    "amount": float(row.amount),
+                    "payment_method": row.payment_method,
+                    "status": row.status,
+                    "created_at": row.created_at.isoformat() if row.created_at else None
+                }
+        finally:
+            result.close()
+
+    def iter_export(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        report_type: str,
+        export_format: str = "csv"
+    ) -> Iterator[str]:
+        """
+        Iterate over the content of an export, in chunks.
+
+        The JSON format has the same fields as the in-memory export.
+
+        Args:
+            start_date: Start of the period
+            end_date: End of the period
+            report_type: Report type: revenue, subscriptions, payments
+            export_format: Export format: csv, json
+
+        Returns:
+            Iterator over chunks of the exported content
+        """
+        validate_export(report_type, export_format)
+
+        progress = ExportProgress(self.count_rows(start_date, end_date, report_type) if self.on_progress else 0)
+        rows = self._track_progress(self.iter_rows(start_date, end_date, report_type), progress)
+        if export_format == "csv":
+            chunks = self._iter_csv(rows, EXPORT_COLUMNS.get(report_type))
+        else:
+            chunks = self._iter_json(rows, {
+                "report_type": report_type,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "generated_at": datetime.utcnow().isoformat()
+            })
+        yield from chunks
+
+        progress.finished_at = time.monotonic()
+        if self.on_progress:
+            self.on_progress(progress)
+        logger.info(f"Exported {report_type} as {export_format}: {progress.as_dict()}")
+
+    def export_to_storage(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        report_type: str,
+        export_format: str = "csv",
+        storage_service: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Write an export to the file manager's storage.
+
+        The export is spooled to a temporary file as it is generated and then
+        stored as a file blob. The export is recorded with an expiry and holds
+        a reference to the blob until then, so its content is not garbage
+        collected while the download URL is in use.
+
+        Args:
+            start_date: Start of the period
+            end_date: End of the period
+            report_type: Report type: revenue, subscriptions, payments
+            export_format: Export format: csv, json
+            storage_service: Storage service to use instead of a default one
+
+        Returns:
+            Dict with the storage location, download URL and expiry of the export
+        """
+        validate_export(report_type, export_format)
+        if storage_service is None:
+            from modules.file_manager.services.storage_service import StorageService
+            storage_service = StorageService()
+        storage_backend = storage_service.get_preferred_storage_backend()
+        filename = get_export_filename(report_type, start_date, end_date, export_format)
+
+        with tempfile.TemporaryFile() as buffer:
+            for chunk in self.iter_export(start_date, end_date, report_type, export_format):
+                buffer.write(chunk.encode("utf-8"))
+            size_bytes = buffer.tell()
+            buffer.seek(0)
+
+            storage_path = asyncio.run(self._store(storage_service, storage_backend, buffer, filename))
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(hours=FINANCIAL_EXPORT_RETENTION_HOURS)
+        self.db.execute(insert(export_table).values(
+            filename=filename,
+            report_type=report_type,
+            export_format=export_format,
+            storage_backend=storage_backend.value,
+            storage_path=storage_path,
+            size_bytes=size_bytes,
+            created_at=now,
+            expires_at=expires_at
+        ))
+        self.db.commit()
+
+        return {
+            "filename": filename,
+            "storage_backend": storage_backend.value,
+            "storage_path": storage_path,
+            "size_bytes": size_bytes,
+            "file_url": storage_service.get_download_url(storage_backend, storage_path, filename),
+            "expires_at": expires_at.isoformat()
+        }
+
+    def release_expired_exports(self, storage_service: Optional[Any] = None) -> int:
+        """
+        Release the content of stored exports that have expired.
+
+        Each expired export gives up its reference to the file blob with
+        its content and its record is deleted. Blobs left without
+        references are removed by the file manager's garbage collection.
+
+        Args:
+            storage_service: Storage service to use instead of a default one
+
+        Returns:
+            Number of exports released
+        """
+        from modules.file_manager.models.file import StorageBackend
+        from modules.file_manager.services.blob_service import BlobService
+
+        expired = self.db.execute(
+            select(export_table.c.id, export_table.c.storage_backend, export_table.c.storage_path)
+            .where(export_table.c.expires_at <= datetime.utcnow())
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not expired:
+            return 0
+
+        paths = defaultdict(list)
+        for export in expired:
+            paths[export.storage_backend].append(export.storage_path)
+
+        blob_service = BlobService(self.db, storage_service)
+        for storage_backend, storage_paths in paths.items():
+            unmanaged = blob_service.release_references(StorageBackend(storage_backend), storage_paths)
+            if unmanaged:
+                logger.warning(f"{len(unmanaged)} expired exports are not stored as file blobs; left in storage")
+
+        self.db.execute(delete(export_table).where(export_table.c.id.in_([export.id for export in expired])))
+        self.db.commit()
+
+        logger.info(f"Released {len(expired)} expired financial exports")
+        return len(expired)
+
+    async def _store(self, storage_service, storage_backend, buffer, filename: str) -> str:
+        """Store an export file as a blob, reusing a stored blob with the same content."""
+        from modules.file_manager.services.blob_service import BlobService
+
+        upload = UploadFile(file=buffer, filename=filename)
+        stored = await BlobService(self.db, storage_service).store(upload, storage_backend)
+        return stored.storage_path
+
+    def _get_report_rows(self, start_date: datetime, end_date: datetime, report_type: str) -> List[Dict[str, Any]]:
+        """Get the rows of the aggregated reports."""
+        from modules.billing.services.reporting_service import ReportingService
+
+        reporting_service = ReportingService(self.db)
+        if report_type == "revenue":
+            return reporting_service.get_revenue_by_period(start_date, end_date, 'month')
+        return reporting_service.get_subscription_growth(start_date, end_date, 'month')
+
+    def _track_progress(self, rows: Iterator[Dict[str, Any]], progress: ExportProgress) -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            yield row
+            progress.rows += 1
+            if self.on_progress and progress.rows % FINANCIAL_EXPORT_PROGRESS_ROWS == 0:
+                self.on_progress(progress)
+
+    @staticmethod
+    def _iter_csv(rows: Iterator[Dict[str, Any]], columns: Optional[List[str]]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = None
+        if columns:
+            writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row.keys()), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+            if buffer.tell() >= FINANCIAL_EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _iter_json(rows: Iterator[Dict[str, Any]], envelope: Dict[str, Any]) -> Iterator[str]:
+        header = json.dumps({**envelope, "data": []}, cls=DecimalEncoder)
+        # Rows go between the brackets of the empty data list
+        opening, closing = header[:-2], header[-2:]
+
+        parts = [opening]
+        size = len(opening)
+        separator = ""
+        for row in rows:
+            part = separator + json.dumps(row, cls=DecimalEncoder)
+            separator = ", "
+            parts.append(part)
+            size += len(part)
+            if size >= FINANCIAL_EXPORT_CHUNK_BYTES:
+                yield "".join(parts)
+                parts, size = [], 0
+
+        parts.append(closing)
+        yield "".join(parts)
@@ -33,8 +33,13 @@ class InvoiceService:
         self.discount_service = DiscountService(db)
         self.credit_service = CreditService(db)
     
-    def create_invoice(self, invoice_data: InvoiceCreate) -> Invoice:
-        """Creates a new invoice for a user with detailed line items."""
+    def create_invoice(self, invoice_data: InvoiceCreate, commit: bool = True) -> Invoice:
+        """
+        Creates a new invoice for a user with detailed line items.
+        
+        With commit=False the invoice is only flushed, so callers can create
+        it as part of a larger transaction.
+        """
         user = self.db.query(User).filter(User.id == invoice_data.user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -101,8 +106,11 @@ class InvoiceService:
         # Create payment reminders
         self._create_payment_reminders(invoice)
         
-        self.db.commit()
-        self.db.refresh(invoice)
+        if commit:
+            self.db.commit()
+            self.db.refresh(invoice)
+        else:
+            self.db.flush()
         
         # Log the action
         log_billing_action(
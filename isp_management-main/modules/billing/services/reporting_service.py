@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, or_, extract, case
+from sqlalchemy import func, desc, and_, or_, extract, case, select
 from fastapi import HTTPException
 import calendar
 import json
@@ -12,6 +12,8 @@ from modules.billing.models import (
     InvoiceItem, PaymentTransaction, Subscription, 
     SubscriptionStatus, FinancialTransaction, BillingCycle
 )
+from modules.billing.services.ar_aging_service import ARAgingService, outstanding_invoices
+from modules.billing.services.export_service import FinancialExportService, EXPORT_REPORT_TYPES
 
 
 class ReportingService:
@@ -34,9 +36,9 @@ class ReportingService:
         ).scalar() or Decimal('0.00')
         
         # Get total outstanding amount
-        outstanding_amount = self.db.query(func.sum(Invoice.amount - Invoice.amount_paid)).filter(
-            Invoice.created_at.between(start_date, end_date),
-            Invoice.status.in_(['pending', 'overdue'])
+        outstanding = outstanding_invoices().where(Invoice.created_at.between(start_date, end_date)).subquery()
+        outstanding_amount = self.db.execute(
+            select(func.sum(outstanding.c.outstanding))
         ).scalar() or Decimal('0.00')
         
         # Get invoice count
@@ -380,47 +382,9 @@ class ReportingService:
         
         return results
     
-    def get_accounts_receivable_aging(self) -> Dict[str, Any]:
-        """Gets accounts receivable aging report."""
-        now = datetime.utcnow()
-        
-        # Define aging buckets
-        buckets = {
-            "current": (0, 30),
-            "30_60_days": (30, 60),
-            "60_90_days": (60, 90),
-            "over_90_days": (90, float('inf'))
-        }
-        
-        results = {
-            "total_outstanding": 0,
-            "buckets": {}
-        }
-        
-        for bucket_name, (min_days, max_days) in buckets.items():
-            min_date = now - timedelta(days=max_days)
-            max_date = now - timedelta(days=min_days)
-            
-            amount = self.db.query(func.sum(Invoice.amount - Invoice.amount_paid)).filter(
-                Invoice.due_date.between(min_date, max_date),
-                Invoice.status.in_(['pending', 'overdue']),
-                Invoice.amount_paid < Invoice.amount
-            ).scalar() or Decimal('0.00')
-            
-            count = self.db.query(func.count(Invoice.id)).filter(
-                Invoice.due_date.between(min_date, max_date),
-                Invoice.status.in_(['pending', 'overdue']),
-                Invoice.amount_paid < Invoice.amount
-            ).scalar() or 0
-            
-            results["buckets"][bucket_name] = {
-                "amount": float(amount),
-                "count": count
-            }
-            
-            results["total_outstanding"] += float(amount)
-        
-        return results
+    def get_accounts_receivable_aging(self, use_snapshot: Optional[bool] = None) -> Dict[str, Any]:
+        """Gets accounts receivable aging report, in a single grouped query."""
+        return ARAgingService(self.db).get_aging(use_snapshot=use_snapshot)
     
     def get_financial_statement(self, start_date: datetime, end_date: datetime, statement_type: str = 'income') -> Dict[str, Any]:
         """Generates a financial statement (income statement or balance sheet)."""
@@ -478,9 +442,9 @@ class ReportingService:
             # Balance Sheet (simplified)
             
             # Assets
-            accounts_receivable = self.db.query(func.sum(Invoice.amount - Invoice.amount_paid)).filter(
-                Invoice.status.in_(['pending', 'overdue']),
-                Invoice.amount_paid < Invoice.amount
+            outstanding = outstanding_invoices().subquery()
+            accounts_receivable = self.db.execute(
+                select(func.sum(outstanding.c.outstanding))
             ).scalar() or Decimal('0.00')
             
             # Liabilities
@@ -566,29 +530,16 @@ class ReportingService:
             }
     
     def export_financial_data(self, start_date: datetime, end_date: datetime, report_type: str) -> Dict[str, Any]:
-        """Exports financial data for external use."""
-        if report_type == 'revenue':
-            data = self.get_revenue_by_period(start_date, end_date, 'month')
-        elif report_type == 'subscriptions':
-            data = self.get_subscription_growth(start_date, end_date, 'month')
-        elif report_type == 'payments':
-            # Get all payments in date range
-            payments = self.db.query(Payment).filter(
-                Payment.created_at.between(start_date, end_date)
-            ).all()
-            
-            data = [{
-                "id": payment.id,
-                "user_id": payment.user_id,
-                "invoice_id": payment.invoice_id,
-                "amount": float(payment.amount),
-                "payment_method": payment.payment_method,
-                "status": payment.status,
-                "created_at": payment.created_at.isoformat()
-            } for payment in payments]
-        else:
+        """Exports financial data for external use.
+        
+        The data is returned in memory; large exports should be streamed with
+        FinancialExportService instead.
+        """
+        if report_type not in EXPORT_REPORT_TYPES:
             return {"error": "Invalid report type"}
         
+        data = list(FinancialExportService(self.db).iter_rows(start_date, end_date, report_type))
+        
         return {
             "report_type": report_type,
             "start_date": start_date.isoformat(),
@@ -1,3 +1,4 @@
+import dataclasses
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional, Dict, Any, Tuple
@@ -18,6 +19,28 @@ from modules.billing.services.invoice_service import InvoiceService
 from modules.billing.utils.audit import log_billing_action
 
 
+@dataclasses.dataclass
+class RenewalInvoiceItem:
+    """Line item of a subscription renewal invoice."""
+    description: str
+    unit_price: Decimal
+    quantity: int = 1
+
+
+@dataclasses.dataclass
+class RenewalInvoiceData:
+    """Invoice data of a subscription renewal, as read by InvoiceService.create_invoice."""
+    user_id: int
+    subscription_id: int
+    due_date: datetime
+    items: List[RenewalInvoiceItem]
+    billing_country: str = "US"  # Should be retrieved from user profile
+    currency: str = "USD"  # Should be retrieved from user profile
+    tax_exempt: bool = False
+    discount_ids: List[int] = dataclasses.field(default_factory=list)
+    apply_credit: bool = True
+
+
 class SubscriptionService:
     """Service for managing subscriptions and usage-based billing"""
     
@@ -554,124 +577,103 @@ class SubscriptionService:
         }
     
     def process_recurring_billing(self) -> List[Dict[str, Any]]:
-        """Processes recurring billing for all active subscriptions."""
-        now = datetime.utcnow()
-        results = []
+        """
+        Processes recurring billing for all active subscriptions.
         
-        # Get all active billing profiles due for billing
-        due_profiles = self.db.query(RecurringBillingProfile).filter(
-            RecurringBillingProfile.is_active == True,
-            RecurringBillingProfile.auto_renew == True,
-            RecurringBillingProfile.next_billing_date <= now
-        ).all()
+        The due profiles are billed as a billing run, chunk by chunk in this
+        process; use the run_recurring_billing task to bill the chunks in
+        parallel on the Celery workers instead.
+        """
+        from modules.billing.services.billing_run_service import BillingRunService
         
-        for profile in due_profiles:
-            try:
-                # Get all active subscriptions for this profile
-                subscriptions = self.db.query(Subscription).filter(
-                    Subscription.billing_profile_id == profile.id,
-                    Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.PAST_DUE])
-                ).all()
-                
-                if not subscriptions:
-                    continue
-                
-                # Create invoice for subscription renewal
-                from modules.billing.schemas.invoice import InvoiceCreate, InvoiceItemCreate
-                
-                invoice_items = []
-                
-                for subscription in subscriptions:
-                    # Get plan details
-                    plan = self.db.query(TariffPlan).filter(TariffPlan.id == subscription.plan_id).first()
-                    if not plan:
-                        continue
-                    
-                    # Add base subscription fee
-                    invoice_items.append(
-                        InvoiceItemCreate(
-                            description=f"{plan.name} Subscription - {profile.billing_cycle}",
-                            quantity=1,
-                            unit_price=plan.monthly_fee
-                        )
-                    )
-                    
-                    # Add usage-based charges if applicable
-                    if subscription.current_period_start and subscription.current_period_end:
-                        usage_charges = self.calculate_usage_charges(
-                            subscription.id,
-                            subscription.current_period_start,
-                            subscription.current_period_end
-                        )
-                        
-                        if usage_charges["charges"] > 0:
-                            invoice_items.append(
-                                InvoiceItemCreate(
-                                    description=f"Usage charges - {usage_charges['total_usage']} {usage_charges.get('unit', 'units')}",
-                                    quantity=1,
-                                    unit_price=usage_charges["charges"]
-                                )
-                            )
-                    
-                    # Update subscription periods
-                    if profile.billing_cycle == BillingCycle.MONTHLY:
-                        next_period = timedelta(days=30)
-                    elif profile.billing_cycle == BillingCycle.QUARTERLY:
-                        next_period = timedelta(days=90)
-                    elif profile.billing_cycle == BillingCycle.SEMI_ANNUAL:
-                        next_period = timedelta(days=180)
-                    elif profile.billing_cycle == BillingCycle.ANNUAL:
-                        next_period = timedelta(days=365)
-                    else:
-                        next_period = timedelta(days=30)
-                    
-                    subscription.current_period_start = now
-                    subscription.current_period_end = now + next_period
-                
-                # Create the invoice if there are items
-                if invoice_items:
-                    invoice_data = InvoiceCreate(
-                        user_id=profile.user_id,
-                        due_date=now + timedelta(days=7),
-                        billing_country="US",  # Should be retrieved from user profile
-                        currency=profile.currency,
-                        items=invoice_items
-                    )
-                    
-                    invoice = self.invoice_service.create_invoice(invoice_data)
-                    
-                    # Update billing profile next billing date
-                    if profile.billing_cycle == BillingCycle.MONTHLY:
-                        profile.next_billing_date = now + timedelta(days=30)
-                    elif profile.billing_cycle == BillingCycle.QUARTERLY:
-                        profile.next_billing_date = now + timedelta(days=90)
-                    elif profile.billing_cycle == BillingCycle.SEMI_ANNUAL:
-                        profile.next_billing_date = now + timedelta(days=180)
-                    elif profile.billing_cycle == BillingCycle.ANNUAL:
-                        profile.next_billing_date = now + timedelta(days=365)
-                    else:
-                        profile.next_billing_date = now + timedelta(days=30)
-                    
-                    results.append({
-                        "profile_id": profile.id,
-                        "user_id": profile.user_id,
-                        "invoice_id": invoice.id,
-                        "amount": str(invoice.amount),
-                        "next_billing_date": profile.next_billing_date.isoformat(),
-                        "subscriptions": len(subscriptions)
-                    })
-            except Exception as e:
-                # Log error but continue processing other profiles
-                results.append({
-                    "profile_id": profile.id,
-                    "user_id": profile.user_id,
-                    "error": str(e),
-                    "status": "failed"
-                })
+        billing_run_service = BillingRunService(self.db)
+        run_id = billing_run_service.start_run()
         
-        self.db.commit()
+        results = []
+        for chunk_id in billing_run_service.get_pending_chunk_ids(run_id):
+            results.extend(billing_run_service.process_chunk(chunk_id)["results"])
         return results
     
+    def bill_profile(self, profile_id: int, now: datetime, commit: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Invoices the subscription of a due billing profile for its next period and advances its billing date.
+        
+        The billing date advances by one subscription period from the date
+        the profile was due, so a profile that fell behind is billed one
+        period per run until it has caught up.
+        
+        Args:
+            profile_id: ID of the due billing profile
+            now: Time of billing
+            commit: Whether to commit, False to leave the changes in the caller's transaction
+            
+        Returns:
+            The billing result, or None if the profile had nothing to invoice
+        """
+        profile = self.db.query(RecurringBillingProfile).filter(
+            RecurringBillingProfile.id == profile_id
+        ).first()
+        if not profile:
+            raise HTTPException(status_code=404, detail="Billing profile not found")
+        
+        subscription = profile.subscription
+        if not subscription or subscription.status != SubscriptionStatus.ACTIVE or not subscription.auto_renew:
+            return None
+        
+        period_start = profile.next_billing_date
+        next_period = self._get_billing_period(subscription.subscription_period)
+        items = [
+            RenewalInvoiceItem(
+                description=f"Subscription {subscription.id} - {subscription.subscription_period}",
+                unit_price=subscription.price
+            )
+        ]
+        
+        # Add the usage of the period that ended
+        usage_charges = self.calculate_usage_charges(subscription.id, period_start - next_period, period_start)
+        if usage_charges["charges"] > 0:
+            items.append(
+                RenewalInvoiceItem(
+                    description=f"Usage charges - {usage_charges['total_usage']} units",
+                    unit_price=usage_charges["charges"]
+                )
+            )
+        
+        invoice_data = RenewalInvoiceData(
+            user_id=subscription.user_id,
+            subscription_id=subscription.id,
+            due_date=now + timedelta(days=7),
+            items=items
+        )
+        invoice = self.invoice_service.create_invoice(invoice_data, commit=False)
+        
+        profile.next_billing_date = period_start + next_period
+        profile.last_successful_charge = now
+        profile.billing_failures = 0
+        
+        if commit:
+            self.db.commit()
+        
+        return {
+            "profile_id": profile.id,
+            "subscription_id": subscription.id,
+            "user_id": subscription.user_id,
+            "invoice_id": invoice.id,
+            "amount": str(invoice.amount),
+            "next_billing_date": profile.next_billing_date.isoformat()
+        }
+    
+    @staticmethod
+    def _get_billing_period(billing_cycle: BillingCycle) -> timedelta:
+        """Returns the length of a billing cycle."""
+        if billing_cycle == BillingCycle.QUARTERLY:
+            return timedelta(days=90)
+        elif billing_cycle == BillingCycle.SEMI_ANNUAL:
+            return timedelta(days=180)
+        elif billing_cycle == BillingCycle.ANNUAL:
+            return timedelta(days=365)
+        return timedelta(days=30)
+    
     def check_trial_expirations(self) -> List[Dict[str, Any]]:
         """Checks for trial subscriptions that have expired and updates their status."""
         now = datetime.utcnow()
@@ -11,7 +11,11 @@ from sqlalchemy.orm import Session
 from backend_core.database import SessionLocal
 from backend_core.models import Invoice, User
 from backend_core.email_service import send_email
+from backend_core.cache import cache_financial_export
 from .services import BillingService
+from .services.billing_run_service import BillingRunService, BILLING_RUN_MAX_ATTEMPTS
+from .services.ar_aging_service import ARAgingService, AR_AGING_SNAPSHOT_ENABLED
+from .services.export_service import FinancialExportService
 
 logger = logging.getLogger(__name__)
 
@@ -132,3 +136,140 @@ def clear_template_cache():
         logger.info("Template cache cleared successfully")
     except Exception as e:
         logger.error(f"Error in clear_template_cache task: {str(e)}")
+
+@shared_task(name="billing.run_recurring_billing")
+def run_recurring_billing():
+    """
+    Task to start a recurring billing run and fan its chunks out to the workers.
+    Chunks of earlier runs that are still running and were never billed, for
+    example because their worker died, are dispatched again; failed runs are
+    resumed with the resume_billing_run task.
+    This task should be scheduled to run daily.
+    """
+    logger.info("Starting task: run_recurring_billing")
+    
+    db = SessionLocal()
+    try:
+        billing_run_service = BillingRunService(db)
+        for run_id in billing_run_service.get_unfinished_run_ids():
+            _dispatch_billing_run(billing_run_service, run_id)
+        run_id = billing_run_service.start_run()
+        return _dispatch_billing_run(billing_run_service, run_id)
+    finally:
+        db.close()
+
+@shared_task(name="billing.resume_billing_run")
+def resume_billing_run(run_id: int):
+    """
+    Task to resume a failed billing run with the chunks that did not complete.
+    """
+    logger.info(f"Starting task: resume_billing_run for run {run_id}")
+    
+    db = SessionLocal()
+    try:
+        billing_run_service = BillingRunService(db)
+        billing_run_service.resume_run(run_id)
+        return _dispatch_billing_run(billing_run_service, run_id)
+    finally:
+        db.close()
+
+@shared_task(bind=True, name="billing.process_billing_run_chunk", max_retries=BILLING_RUN_MAX_ATTEMPTS - 1)
+def process_billing_run_chunk(self, chunk_id: int):
+    """
+    Task to bill one chunk of a billing run in a single transaction.
+    Failed chunks are retried with a growing delay until they run out of attempts.
+    """
+    db = SessionLocal()
+    try:
+        stats = BillingRunService(db).process_chunk(chunk_id)
+        return {key: value for key, value in stats.items() if key != "results"}
+    except Exception as e:
+        logger.error(f"Error in process_billing_run_chunk task for chunk {chunk_id}: {str(e)}")
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+    finally:
+        db.close()
+
+@shared_task(name="billing.rebuild_ar_aging_snapshot")
+def rebuild_ar_aging_snapshot():
+    """
+    Task to recompute the accounts receivable aging snapshot from the invoices.
+    Corrects the snapshot for invoice changes made without the ORM.
+    This task should be scheduled to run daily.
+    """
+    if not AR_AGING_SNAPSHOT_ENABLED:
+        return {"due_dates": 0}
+    
+    logger.info("Starting task: rebuild_ar_aging_snapshot")
+    
+    db = SessionLocal()
+    try:
+        due_dates = ARAgingService(db).rebuild_snapshot()
+        return {"due_dates": due_dates}
+    except Exception as e:
+        logger.error(f"Error in rebuild_ar_aging_snapshot task: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@shared_task(name="billing.export_financial_data")
+def export_financial_data(export_id: str, start_date: str, end_date: str, report_type: str, export_format: str = "csv"):
+    """
+    Task to write a financial data export to file storage.
+    The status and progress of the export are cached under its export ID.
+    """
+    logger.info(f"Starting task: export_financial_data {export_id}")
+    
+    job = {"export_id": export_id, "report_type": report_type, "format": export_format, "status": "running"}
+    
+    def report_progress(progress):
+        job.update(progress.as_dict())
+        cache_financial_export(export_id, job)
+    
+    db = SessionLocal()
+    try:
+        cache_financial_export(export_id, job)
+        export_service = FinancialExportService(db, on_progress=report_progress)
+        result = export_service.export_to_storage(
+            datetime.fromisoformat(start_date),
+            datetime.fromisoformat(end_date),
+            report_type,
+            export_format
+        )
+        job.update(result, status="completed")
+        cache_financial_export(export_id, job)
+        return job
+    except Exception as e:
+        logger.error(f"Error in export_financial_data task {export_id}: {str(e)}")
+        job.update(status="failed", error=str(e))
+        cache_financial_export(export_id, job)
+        raise
+    finally:
+        db.close()
+
+@shared_task(name="billing.release_expired_exports")
+def release_expired_exports():
+    """
+    Task to release the stored content of expired financial exports.
+    This task should be scheduled to run hourly.
+    """
+    logger.info("Starting task: release_expired_exports")
+    
+    db = SessionLocal()
+    try:
+        released = FinancialExportService(db).release_expired_exports()
+        return {"released": released}
+    except Exception as e:
+        logger.error(f"Error in release_expired_exports task: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+def _dispatch_billing_run(billing_run_service: BillingRunService, run_id: int) -> Dict[str, Any]:
+    """Queue a task for every chunk of a run that still has to be billed."""
+    billing_run_service.fail_abandoned_chunks(run_id)
+    chunk_ids = billing_run_service.get_pending_chunk_ids(run_id)
+    for chunk_id in chunk_ids:
+        process_billing_run_chunk.delay(chunk_id)
+    
+    logger.info(f"Dispatched {len(chunk_ids)} chunks of billing run {run_id}")
+    return {"run_id": run_id, "chunks": len(chunk_ids)}
@@ -23,6 +23,7 @@ from ..schemas.report import (
 from ..services.report_service import ReportService
 from ..services.report_scheduling_service import ReportSchedulingService
 from ..services.report_execution_service import ReportExecutionService
+from ..utils.connection_registry import connection_registry
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,9 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+# Close the shared data source connections with the application
+router.add_event_handler("shutdown", connection_registry.close)
+
 # Initialize services
 report_service = ReportService()
 report_scheduling_service = ReportSchedulingService(report_service)
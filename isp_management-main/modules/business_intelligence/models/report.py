@@ -37,6 +37,7 @@ class ReportFormat(str, enum.Enum):
     EXCEL = "excel"
     HTML = "html"
     JSON = "json"
+    JSONL = "jsonl"
 
 
 class ReportFrequency(str, enum.Enum):
@@ -148,6 +149,7 @@ class ReportExecution(Base):
     formats = Column(JSON, nullable=False)  # List of output formats generated
     error_message = Column(Text, nullable=True)
     execution_time_ms = Column(Integer, nullable=True)  # Time taken to generate the report
+    source_timings = Column(JSON, nullable=True)  # Per-query fetch timings keyed by query ID
     started_at = Column(DateTime, nullable=False, default=func.now())
     completed_at = Column(DateTime, nullable=True)
     requested_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -175,6 +175,7 @@ class ReportExecutionResponse(ReportExecutionBase):
     status: ReportStatus
     error_message: Optional[str] = None
     execution_time_ms: Optional[int] = None
+    source_timings: Optional[Dict[str, Any]] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
     requested_by_id: int
@@ -9,6 +9,7 @@ import logging
 import json
 import os
 import tempfile
+import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple, Union
 import asyncio
@@ -37,9 +38,12 @@ from .report_service import ReportService
 from .report_scheduling_service import ReportSchedulingService
 from ..utils.report_generators import (
     PDFReportGenerator, CSVReportGenerator, 
-    ExcelReportGenerator, HTMLReportGenerator, JSONReportGenerator
+    ExcelReportGenerator, HTMLReportGenerator, JSONReportGenerator,
+    JSONLReportGenerator
 )
 from ..utils.data_fetchers import DataFetcher
+from ..utils.connection_registry import connection_registry
+from ..utils.stream_writers import STREAM_CHUNK_SIZE, StreamingReportPipeline, supports_streaming
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +63,8 @@ class ReportExecutionService:
             ReportFormat.CSV: CSVReportGenerator(),
             ReportFormat.EXCEL: ExcelReportGenerator(),
             ReportFormat.HTML: HTMLReportGenerator(),
-            ReportFormat.JSON: JSONReportGenerator()
+            ReportFormat.JSON: JSONReportGenerator(),
+            ReportFormat.JSONL: JSONLReportGenerator()
         }
 
     async def execute_report(
@@ -186,31 +191,27 @@ class ReportExecutionService:
                     DataSource.is_active == True
                 ).all()
                 
-                # Fetch data
                 start_time = datetime.utcnow()
                 data_fetcher = DataFetcher()
-                report_data = await data_fetcher.fetch_data(
-                    template.query_definition,
-                    execution.parameters,
-                    data_sources
-                )
                 
-                # Generate reports in each requested format
-                output_files = []
-                for format in execution.formats:
-                    generator = self.format_generators.get(format)
-                    if not generator:
-                        logger.warning(f"No generator found for format {format}")
-                        continue
-                    
-                    # Generate report
-                    output_file = await generator.generate(
-                        template.template_data,
-                        report_data,
-                        execution.parameters
+                # Large tabular exports are streamed straight into the output
+                # files instead of being materialized in memory first
+                source_timings = {}
+                if template.template_data.get('streaming') and supports_streaming(execution.formats):
+                    output_files = await connection_registry.run_blocking(
+                        self._stream_report,
+                        data_fetcher,
+                        template,
+                        execution.parameters,
+                        execution.formats,
+                        data_sources,
+                        source_timings
                     )
-                    
-                    output_files.append((format, output_file))
+                else:
+                    output_files = await self._render_report(
+                        data_fetcher, template, execution, data_sources, source_timings
+                    )
+                execution.source_timings = source_timings
                 
                 # Save outputs to database and file storage
                 for format, file_path in output_files:
@@ -253,6 +254,101 @@ class ReportExecutionService:
                     
                     db.commit()
 
+    async def _render_report(
+        self,
+        data_fetcher: DataFetcher,
+        template: ReportTemplate,
+        execution: ReportExecution,
+        data_sources: List[DataSource],
+        source_timings: Dict[str, Any]
+    ) -> List[Tuple[ReportFormat, str]]:
+        """
+        Fetch the full report data and render each requested format.
+        
+        Args:
+            data_fetcher: Data fetcher to use
+            template: Report template
+            execution: Report execution
+            data_sources: Data sources of the template
+            source_timings: Dictionary filled with per-query fetch timings
+            
+        Returns:
+            List of (format, file path) tuples
+        """
+        report_data = await data_fetcher.fetch_data(
+            template.query_definition,
+            execution.parameters,
+            data_sources,
+            timings=source_timings
+        )
+        
+        # Generate reports in each requested format
+        output_files = []
+        for format in execution.formats:
+            generator = self.format_generators.get(format)
+            if not generator:
+                logger.warning(f"No generator found for format {format}")
+                continue
+            
+            # Generate report
+            output_file = await generator.generate(
+                template.template_data,
+                report_data,
+                execution.parameters
+            )
+            
+            output_files.append((format, output_file))
+        
+        return output_files
+
+    def _stream_report(
+        self,
+        data_fetcher: DataFetcher,
+        template: ReportTemplate,
+        parameters: Optional[Dict[str, Any]],
+        formats: List[str],
+        data_sources: List[DataSource],
+        source_timings: Dict[str, Any]
+    ) -> List[Tuple[ReportFormat, str]]:
+        """
+        Stream a report query into every requested format in a single pass.
+        
+        The query named by the template's ``data_source`` is read from a
+        server-side cursor in chunks, and each chunk is written to all output
+        files before the next one is fetched. This runs in a worker thread.
+        
+        Args:
+            data_fetcher: Data fetcher to use
+            template: Report template
+            parameters: Parameters of the execution
+            formats: Requested report formats
+            data_sources: Data sources of the template
+            source_timings: Dictionary filled with the timing of the streamed query
+            
+        Returns:
+            List of (format, file path) tuples
+        """
+        template_data = template.template_data
+        query_id = template_data.get('data_source')
+        pipeline = StreamingReportPipeline(formats, template_data)
+        
+        started = time.perf_counter()
+        with data_fetcher.stream_query(
+            template.query_definition,
+            query_id,
+            parameters,
+            data_sources,
+            chunk_size=template_data.get('chunk_size', STREAM_CHUNK_SIZE)
+        ) as (columns, chunks):
+            output_files = pipeline.run(columns, chunks)
+        source_timings[query_id] = {
+            'fetch_ms': int((time.perf_counter() - started) * 1000),
+            'rows': pipeline.rows_written,
+        }
+        
+        logger.info(f"Streamed {pipeline.rows_written} rows into {len(output_files)} report outputs")
+        return output_files
+
     async def _deliver_scheduled_report(self, execution_id: int) -> None:
         """
         Deliver a scheduled report to its recipients.
@@ -0,0 +1,452 @@
+"""
+Columnar transformation engine for the Business Intelligence and Reporting module.
+
+This module executes report transformations (filter, sort, group, aggregate,
+join, map, limit, flatten) on pandas DataFrames instead of lists of
+dictionaries. Filter conditions are compiled once into vectorized masks, and
+for SQL sources the leading filter/sort/limit steps can be pushed down into
+the query itself.
+"""
+
+import logging
+import operator
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, column, literal_column, select, text
+from sqlalchemy.sql import Executable, Subquery
+
+logger = logging.getLogger(__name__)
+
+# Aggregate function names accepted in aggregate transformations
+AGGREGATE_FUNCTIONS = {
+    'sum': 'sum',
+    'avg': 'mean',
+    'mean': 'mean',
+    'min': 'min',
+    'max': 'max',
+    'count': 'count',
+    'count_distinct': 'nunique',
+    'first': 'first',
+    'last': 'last',
+}
+
+# SQL operators for conditions that can be pushed down
+_SQL_OPERATORS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'lt': operator.lt,
+    'gte': operator.ge,
+    'lte': operator.le,
+}
+
+
+def _resolve_value(value: Any, parameters: Optional[Dict[str, Any]]) -> Any:
+    """Resolve a ``:name`` parameter reference in a condition value."""
+    if isinstance(value, str) and value.startswith(':') and parameters:
+        param_name = value[1:]
+        if param_name in parameters:
+            return parameters[param_name]
+    return value
+
+
+def _python_scalar(value: Any) -> Any:
+    """Convert numpy scalars and NaN to plain Python values."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _string_mask(series: pd.Series, predicate: Callable[[str], bool]) -> pd.Series:
+    """
+    Apply a string predicate, treating non-string values as non-matching.
+
+    Report columns such as plan or status names have few distinct values, so
+    the predicate is evaluated once per distinct value and broadcast back.
+    """
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return pd.Series(False, index=series.index)
+    codes, uniques = pd.factorize(series)
+    matches = np.fromiter(
+        (isinstance(value, str) and predicate(value) for value in uniques),
+        dtype=bool,
+        count=len(uniques)
+    )
+    result = np.zeros(len(series), dtype=bool)
+    present = codes >= 0
+    result[present] = matches[codes[present]]
+    return pd.Series(result, index=series.index)
+
+
+_MASK_BUILDERS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    'eq': lambda s, v: s == v,
+    'ne': lambda s, v: s != v,
+    'gt': lambda s, v: s > v,
+    'lt': lambda s, v: s < v,
+    'gte': lambda s, v: s >= v,
+    'lte': lambda s, v: s <= v,
+    'in': lambda s, v: s.isin(list(v)),
+    'nin': lambda s, v: ~s.isin(list(v)),
+    'contains': lambda s, v: _string_mask(s, lambda x: v in x),
+    'starts_with': lambda s, v: _string_mask(s, lambda x: x.startswith(v)),
+    'ends_with': lambda s, v: _string_mask(s, lambda x: x.endswith(v)),
+}
+
+
+class CompiledConditions:
+    """Filter conditions compiled once into a vectorized mask function."""
+
+    def __init__(self, conditions: List[Dict[str, Any]], parameters: Optional[Dict[str, Any]] = None):
+        """
+        Compile a list of filter conditions.
+
+        Args:
+            conditions: Conditions with ``field``, ``operator`` and ``value`` keys
+            parameters: Parameters referenced by condition values
+        """
+        self.predicates = []
+        for condition in conditions:
+            operator = condition.get('operator')
+            builder = _MASK_BUILDERS.get(operator)
+            if builder is None:
+                # Unknown operators never excluded rows in the row-wise evaluator
+                logger.warning(f"Unsupported filter operator: {operator}")
+                continue
+            value = _resolve_value(condition.get('value'), parameters)
+            self.predicates.append((condition.get('field'), builder, value))
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Evaluate the conditions against a DataFrame.
+
+        Args:
+            df: Data to evaluate
+
+        Returns:
+            Boolean array selecting the rows that meet every condition
+        """
+        result = np.ones(len(df), dtype=bool)
+        for field, builder, value in self.predicates:
+            column = df[field] if field in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object)
+            result &= builder(column, value).to_numpy(dtype=bool)
+        return result
+
+
+class _Grouped:
+    """Lazily materialized result of a group transformation."""
+
+    def __init__(self, df: pd.DataFrame, group_by: str):
+        self.df = df
+        self.group_by = group_by
+
+
+class ColumnarTransformEngine:
+    """Executes report transformations on pandas DataFrames."""
+
+    def apply(
+        self,
+        data: Any,
+        transformations: List[Dict[str, Any]],
+        parameters: Optional[Dict[str, Any]] = None,
+        datasets: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Apply transformations to data.
+
+        Args:
+            data: List of row dictionaries or a DataFrame
+            transformations: List of transformations to apply
+            parameters: Parameters for transformations
+            datasets: Results of other queries, used by join transformations
+
+        Returns:
+            Transformed data as a list of row dictionaries, or a dictionary of
+            lists when the final step is a group transformation
+        """
+        if isinstance(data, pd.DataFrame):
+            state: Any = data
+        elif isinstance(data, list) and all(isinstance(item, dict) for item in data):
+            state = pd.DataFrame.from_records(data)
+        else:
+            return data
+
+        for transformation in transformations:
+            transform_type = transformation.get('type')
+            handler = getattr(self, f"_apply_{transform_type}", None)
+            if handler is None:
+                logger.warning(f"Unsupported transformation type: {transform_type}")
+                continue
+            if transform_type == 'filter':
+                state = handler(state, transformation, parameters)
+            elif transform_type == 'join':
+                state = handler(state, transformation, datasets or {})
+            else:
+                state = handler(state, transformation)
+
+        return self.to_records(state)
+
+    def to_records(self, state: Any) -> Any:
+        """
+        Convert the engine state back to plain Python structures.
+
+        Args:
+            state: DataFrame or grouped state
+
+        Returns:
+            List of row dictionaries, or a dictionary of lists for grouped state
+        """
+        if isinstance(state, _Grouped):
+            return {
+                _python_scalar(key): self.to_records(group)
+                for key, group in state.df.groupby(state.group_by, sort=False, dropna=False)
+            }
+        if isinstance(state, pd.DataFrame):
+            return state.astype(object).where(state.notna(), None).to_dict(orient='records')
+        return state
+
+    def _frame(self, state: Any) -> pd.DataFrame:
+        return state.df if isinstance(state, _Grouped) else state
+
+    def _apply_filter(self, state: Any, transformation: Dict[str, Any], parameters: Optional[Dict[str, Any]]) -> Any:
+        conditions = transformation.get('conditions', [])
+        if not conditions or isinstance(state, _Grouped):
+            return state
+        compiled = CompiledConditions(conditions, parameters)
+        return state[compiled.mask(state)]
+
+    def _apply_sort(self, state: Any, transformation: Dict[str, Any]) -> Any:
+        sort_by = transformation.get('sort_by')
+        if not sort_by or isinstance(state, _Grouped) or sort_by not in state.columns:
+            return state
+        return state.sort_values(
+            sort_by,
+            ascending=not transformation.get('reverse', False),
+            kind='stable',
+            na_position='last'
+        )
+
+    def _apply_group(self, state: Any, transformation: Dict[str, Any]) -> Any:
+        group_by = transformation.get('group_by')
+        if not group_by or isinstance(state, _Grouped):
+            return state
+        df = state if group_by in state.columns else state.assign(**{group_by: None})
+        return _Grouped(df, group_by)
+
+    def _apply_aggregate(self, state: Any, transformation: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Aggregate rows, optionally per group.
+
+        The transformation takes ``group_by`` (a column or list of columns,
+        defaulting to the key of a preceding group step) and ``aggregations``,
+        a list of ``{"field", "function", "alias"}`` entries.
+        """
+        group_by = transformation.get('group_by')
+        if group_by is None and isinstance(state, _Grouped):
+            group_by = state.group_by
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        df = self._frame(state)
+
+        named = {}
+        for aggregation in transformation.get('aggregations', []):
+            function = aggregation.get('function', 'count')
+            pandas_function = AGGREGATE_FUNCTIONS.get(function)
+            if pandas_function is None:
+                logger.warning(f"Unsupported aggregate function: {function}")
+                continue
+            field = aggregation.get('field')
+            alias = aggregation.get('alias') or f"{function}_{field or 'rows'}"
+            if field is None:
+                field, pandas_function = (group_by[0] if group_by else df.columns[0]), 'size'
+            if field not in df.columns:
+                df = df.assign(**{field: None})
+            named[alias] = pd.NamedAgg(column=field, aggfunc=pandas_function)
+
+        if not named:
+            return df
+
+        if group_by:
+            return df.groupby(group_by, sort=False, dropna=False).agg(**named).reset_index()
+
+        row = {}
+        for alias, spec in named.items():
+            column = df[spec.column]
+            row[alias] = len(column) if spec.aggfunc == 'size' else column.agg(spec.aggfunc)
+        return pd.DataFrame([row])
+
+    def _apply_limit(self, state: Any, transformation: Dict[str, Any]) -> Any:
+        limit = transformation.get('limit')
+        if not limit or isinstance(state, _Grouped):
+            return state
+        return state.head(limit)
+
+    def _apply_map(self, state: Any, transformation: Dict[str, Any]) -> Any:
+        mappings = transformation.get('mappings', {})
+        if not mappings or isinstance(state, _Grouped):
+            return state
+        present = {new_key: old_key for new_key, old_key in mappings.items() if old_key in state.columns}
+        return pd.DataFrame({new_key: state[old_key] for new_key, old_key in present.items()}, index=state.index)
+
+    def _apply_flatten(self, state: Any, transformation: Dict[str, Any]) -> Any:
+        if not isinstance(state, _Grouped):
+            return state
+        return state.df.assign(_group=state.df[state.group_by])
+
+    def _apply_join(self, state: Any, transformation: Dict[str, Any], datasets: Dict[str, Any]) -> Any:
+        """
+        Join with another query's result.
+
+        The transformation takes ``source`` (a query id) or inline ``data``,
+        ``on`` (a column name or ``{"left", "right"}`` pair), ``how``
+        (inner, left, right or outer) and optional ``suffix`` for clashing
+        right-hand columns.
+        """
+        if isinstance(state, _Grouped):
+            return state
+        right = transformation.get('data')
+        if right is None:
+            right = datasets.get(transformation.get('source'))
+        if isinstance(right, list):
+            right = pd.DataFrame.from_records(right)
+        if not isinstance(right, pd.DataFrame):
+            logger.warning(f"Join source {transformation.get('source')} is not tabular data")
+            return state
+
+        on = transformation.get('on')
+        if isinstance(on, dict):
+            left_on, right_on = on.get('left'), on.get('right')
+        else:
+            left_on = right_on = on
+        if left_on not in state.columns or right_on not in right.columns:
+            logger.warning(f"Join key {on} not present in both datasets")
+            return state
+
+        return state.merge(
+            right,
+            how=transformation.get('how', 'inner'),
+            left_on=left_on,
+            right_on=right_on,
+            suffixes=('', transformation.get('suffix', '_right'))
+        )
+
+
+def sql_subquery(sql_query: str, columns: Collection[str] = ()) -> Subquery:
+    """
+    Wrap a SQL query as a subquery that statements can select from.
+
+    Args:
+        sql_query: SQL query
+        columns: Columns of the query to make referable, quoted as the
+            database dialect requires
+
+    Returns:
+        Subquery named ``_bi_source``
+    """
+    inner = sql_query.strip().rstrip(';')
+    return text(inner).columns(*(column(name) for name in dict.fromkeys(columns))).subquery('_bi_source')
+
+
+def push_down_sql(
+    sql_query: str,
+    transformations: List[Dict[str, Any]],
+    parameters: Optional[Dict[str, Any]] = None,
+    columns: Optional[Collection[str]] = None
+) -> Tuple[Executable, List[Dict[str, Any]]]:
+    """
+    Push leading filter, sort and limit transformations into a SQL query.
+
+    Transformations are consumed in order for as long as they can be expressed
+    in a single wrapping ``SELECT`` with the same result as the engine; the
+    first one that cannot (an unsupported operator, a column the query is not
+    known to return, or a filter or sort after a limit) stops the push-down.
+    The engine ignores missing columns where SQL would fail, so filters and
+    sorts are only pushed down when ``columns`` is given.
+
+    The wrapper is built from SQLAlchemy constructs, so identifiers, LIMIT
+    and parameters are rendered for the dialect of the connection executing
+    it, and NULLs are sorted last with a portable CASE key. String matching
+    (contains, starts_with, ends_with) is left to the engine: LIKE is
+    case-insensitive on some databases and fails on non-text columns on
+    others, where the engine matches case-sensitively and skips non-strings.
+
+    Args:
+        sql_query: Original SQL query, with its parameters applied
+        transformations: Transformations defined for the query
+        parameters: Parameters referenced by filter conditions
+        columns: Columns returned by the query, if known
+
+    Returns:
+        Tuple of (statement to execute, remaining transformations)
+    """
+    source = sql_subquery(sql_query, columns or ())
+    where = []
+    # Sort keys as (column, descending), primary key first
+    order_by: List[Tuple[str, bool]] = []
+    limit: Optional[int] = None
+    consumed = 0
+
+    for transformation in transformations:
+        transform_type = transformation.get('type')
+
+        if transform_type == 'filter' and limit is None:
+            clauses = []
+            for condition in transformation.get('conditions', []):
+                field = condition.get('field')
+                operator_name = condition.get('operator')
+                value = _resolve_value(condition.get('value'), parameters)
+                if not isinstance(field, str) or field not in source.c:
+                    break
+                if value is None:
+                    # NULL comparisons do not match the engine's semantics
+                    break
+                if operator_name in _SQL_OPERATORS:
+                    clauses.append(_SQL_OPERATORS[operator_name](source.c[field], value))
+                elif operator_name == 'in' and isinstance(value, (list, tuple)) and value:
+                    clauses.append(source.c[field].in_(list(value)))
+                else:
+                    break
+            else:
+                where.extend(clauses)
+                consumed += 1
+                continue
+            break
+
+        elif transform_type == 'sort' and limit is None:
+            sort_by = transformation.get('sort_by')
+            if not isinstance(sort_by, str) or sort_by not in source.c:
+                break
+            # A later stable sort becomes the primary key
+            order_by = [(sort_by, bool(transformation.get('reverse', False)))] + [
+                key for key in order_by if key[0] != sort_by
+            ]
+            consumed += 1
+
+        elif transform_type == 'limit' and not transformation.get('limit'):
+            # The engine ignores an empty limit
+            consumed += 1
+
+        elif transform_type == 'limit' and isinstance(transformation.get('limit'), int) and transformation['limit'] > 0:
+            new_limit = transformation['limit']
+            limit = new_limit if limit is None else min(limit, new_limit)
+            consumed += 1
+
+        else:
+            break
+
+    if not consumed:
+        return text(sql_query), transformations
+
+    statement = select(literal_column('*')).select_from(source)
+    if where:
+        statement = statement.where(*where)
+    for name, descending in order_by:
+        sort_column = source.c[name]
+        statement = statement.order_by(
+            case((sort_column.is_(None), 1), else_=0),
+            sort_column.desc() if descending else sort_column.asc()
+        )
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return statement, transformations[consumed:]
@@ -0,0 +1,291 @@
+"""
+Data source connection registry for the Business Intelligence and Reporting module.
+
+This module keeps one pooled SQLAlchemy engine, one aiohttp session and one
+client per data source for the lifetime of the process, so report runs reuse
+connections instead of opening new ones for every query. Entries are keyed by
+the data source and a fingerprint of its connection details, so editing a
+data source transparently replaces its pools.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+import sqlalchemy
+from sqlalchemy.engine import Engine, make_url
+
+from ..models.report import DataSource
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BI_SQL_POOL_SIZE = int(os.getenv("BI_SQL_POOL_SIZE", "5"))
+BI_SQL_MAX_OVERFLOW = int(os.getenv("BI_SQL_MAX_OVERFLOW", "5"))
+BI_SQL_POOL_TIMEOUT = int(os.getenv("BI_SQL_POOL_TIMEOUT", "30"))
+BI_SQL_POOL_RECYCLE = int(os.getenv("BI_SQL_POOL_RECYCLE", "1800"))
+BI_HTTP_POOL_SIZE = int(os.getenv("BI_HTTP_POOL_SIZE", "20"))
+BI_HTTP_POOL_SIZE_PER_HOST = int(os.getenv("BI_HTTP_POOL_SIZE_PER_HOST", "5"))
+BI_HTTP_TIMEOUT = float(os.getenv("BI_HTTP_TIMEOUT", "60"))
+BI_MAX_CACHED_SOURCES = int(os.getenv("BI_MAX_CACHED_SOURCES", "64"))
+BI_FETCH_WORKERS = int(os.getenv("BI_FETCH_WORKERS", "8"))
+
+
+def _close_client(client: Any) -> None:
+    """Close a client that is no longer cached, if it can be closed."""
+    close = getattr(client, "close", None)
+    if not callable(close):
+        return
+    try:
+        result = close()
+        if inspect.isawaitable(result):
+            try:
+                asyncio.get_running_loop().create_task(result)
+            except RuntimeError:
+                asyncio.run(result)
+    except Exception as e:
+        logger.warning(f"Failed to close data source client: {str(e)}")
+
+
+def connection_fingerprint(data_source: DataSource) -> str:
+    """
+    Get a fingerprint of a data source's connection details.
+
+    Args:
+        data_source: Data source
+
+    Returns:
+        Hex digest that changes whenever the connection details change
+    """
+    details = json.dumps(data_source.connection_details or {}, sort_keys=True, default=str)
+    return hashlib.sha256(details.encode("utf-8")).hexdigest()
+
+
+class DataSourceConnectionRegistry:
+    """
+    Process-wide cache of pooled connections per data source.
+
+    Engines and clients are kept in bounded LRU maps; the least recently
+    used entry is disposed or closed when the limit is reached. HTTP
+    sessions are bound to an event loop, so they are kept per loop in a
+    weak map and never handed to another loop. The sessions of loops that
+    have been closed are dropped, so their connections are released once
+    the loop is collected. Code running report sources in a short-lived
+    loop closes that loop's sessions with close_loop_sessions() before the
+    loop ends.
+    """
+
+    def __init__(self, max_sources: int = BI_MAX_CACHED_SOURCES, fetch_workers: int = BI_FETCH_WORKERS):
+        """
+        Initialize the registry.
+
+        Args:
+            max_sources: Maximum number of data sources with cached connections
+            fetch_workers: Threads available for blocking data source drivers
+        """
+        self.max_sources = max_sources
+        self.fetch_workers = fetch_workers
+        self._engines: "OrderedDict[int, Tuple[str, Engine]]" = OrderedDict()
+        self._clients: "OrderedDict[Tuple[str, int], Tuple[str, Any]]" = OrderedDict()
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, Tuple[str, aiohttp.ClientSession]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool used to run blocking drivers off the event loop."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.fetch_workers, thread_name_prefix="bi-fetch"
+                )
+            return self._executor
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking call in the fetch thread pool.
+
+        Args:
+            func: Callable to run
+            *args: Positional arguments for the callable
+
+        Returns:
+            Result of the callable
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def get_engine(self, data_source: DataSource) -> Engine:
+        """
+        Get the pooled engine for a SQL data source.
+
+        Args:
+            data_source: Data source with a ``connection_string``
+
+        Returns:
+            SQLAlchemy engine shared by all report runs
+        """
+        fingerprint = connection_fingerprint(data_source)
+        with self._lock:
+            entry = self._engines.get(data_source.id)
+            if entry and entry[0] == fingerprint:
+                self._engines.move_to_end(data_source.id)
+                return entry[1]
+            if entry:
+                entry[1].dispose()
+
+            engine = self._create_engine(data_source.connection_details or {})
+            self._engines[data_source.id] = (fingerprint, engine)
+            while len(self._engines) > self.max_sources:
+                _, (_, evicted) = self._engines.popitem(last=False)
+                evicted.dispose()
+            return engine
+
+    def _create_engine(self, connection_details: Dict[str, Any]) -> Engine:
+        connection_string = connection_details.get('connection_string')
+        if not connection_string:
+            raise ValueError("Connection string not defined")
+
+        options: Dict[str, Any] = {'pool_pre_ping': True}
+        url = make_url(connection_string)
+        # SQLite file/memory databases use their own single-connection pools
+        if url.get_backend_name() != 'sqlite':
+            options.update(
+                pool_size=connection_details.get('pool_size', BI_SQL_POOL_SIZE),
+                max_overflow=connection_details.get('max_overflow', BI_SQL_MAX_OVERFLOW),
+                pool_timeout=BI_SQL_POOL_TIMEOUT,
+                pool_recycle=BI_SQL_POOL_RECYCLE,
+            )
+        return sqlalchemy.create_engine(url, **options)
+
+    def get_client(self, kind: str, data_source: DataSource, factory: Callable[[], Any]) -> Any:
+        """
+        Get a cached client for a data source, creating it on first use.
+
+        Args:
+            kind: Client kind, e.g. ``"redis"`` or ``"elasticsearch"``
+            data_source: Data source
+            factory: Callable creating the client
+
+        Returns:
+            Client shared by all report runs
+        """
+        key = (kind, data_source.id)
+        fingerprint = connection_fingerprint(data_source)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[0] == fingerprint:
+                self._clients.move_to_end(key)
+                return entry[1]
+            if entry:
+                _close_client(entry[1])
+
+            client = factory()
+            self._clients[key] = (fingerprint, client)
+            while len(self._clients) > self.max_sources:
+                _, (_, evicted) = self._clients.popitem(last=False)
+                _close_client(evicted)
+            return client
+
+    def get_http_session(self, data_source: DataSource) -> aiohttp.ClientSession:
+        """
+        Get the pooled HTTP session for an API data source.
+
+        Must be called from a running event loop.
+
+        Args:
+            data_source: Data source
+
+        Returns:
+            aiohttp session with a bounded connector
+        """
+        loop = asyncio.get_running_loop()
+        fingerprint = connection_fingerprint(data_source)
+        with self._lock:
+            for finished in [other for other in self._sessions.keys() if other.is_closed()]:
+                del self._sessions[finished]
+            sessions = self._sessions.setdefault(loop, {})
+            entry = sessions.get(data_source.id)
+            if entry and entry[0] == fingerprint and not entry[1].closed:
+                return entry[1]
+            if entry and not entry[1].closed:
+                loop.create_task(entry[1].close())
+
+            connection_details = data_source.connection_details or {}
+            connector = aiohttp.TCPConnector(
+                limit=connection_details.get('pool_size', BI_HTTP_POOL_SIZE),
+                limit_per_host=connection_details.get('pool_size_per_host', BI_HTTP_POOL_SIZE_PER_HOST),
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=connection_details.get('timeout', BI_HTTP_TIMEOUT)),
+            )
+            sessions[data_source.id] = (fingerprint, session)
+            return session
+
+    def invalidate(self, data_source_id: int) -> None:
+        """
+        Drop the cached connections of a data source.
+
+        Args:
+            data_source_id: ID of the data source
+        """
+        with self._lock:
+            entry = self._engines.pop(data_source_id, None)
+            if entry:
+                entry[1].dispose()
+            for key in [key for key in self._clients if key[1] == data_source_id]:
+                _, client = self._clients.pop(key)
+                _close_client(client)
+            for loop, sessions in list(self._sessions.items()):
+                entry = sessions.pop(data_source_id, None)
+                if entry and not entry[1].closed and not loop.is_closed():
+                    loop.call_soon_threadsafe(loop.create_task, entry[1].close())
+
+    async def close_loop_sessions(self) -> None:
+        """Close the HTTP sessions of the running event loop."""
+        with self._lock:
+            sessions = self._sessions.pop(asyncio.get_running_loop(), {})
+        for _, session in sessions.values():
+            if not session.closed:
+                await session.close()
+
+    async def close(self) -> None:
+        """
+        Dispose every engine, close every client and stop the thread pool.
+
+        The HTTP sessions of the running event loop are closed; those of
+        other loops are dropped and closed with their loops' connectors.
+        """
+        with self._lock:
+            engines = [engine for _, engine in self._engines.values()]
+            clients = [client for _, client in self._clients.values()]
+            executor = self._executor
+            self._engines.clear()
+            self._clients.clear()
+            self._executor = None
+
+        await self.close_loop_sessions()
+        with self._lock:
+            self._sessions.clear()
+        for engine in engines:
+            engine.dispose()
+        for client in clients:
+            _close_client(client)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+# Process-wide registry
+connection_registry = DataSourceConnectionRegistry()
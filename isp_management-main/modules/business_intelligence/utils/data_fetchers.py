@@ -6,17 +6,21 @@ This module provides classes for fetching data from different sources for report
 
 import logging
 import json
-from typing import Dict, Any, List, Optional, Union
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
 import asyncio
 from datetime import datetime, timedelta
-import aiohttp
-import sqlalchemy
-from sqlalchemy import text
+import pandas as pd
+from sqlalchemy import false, literal_column, select, text
 
 from backend_core.database import get_db_session
 from backend_core.services.redis_client import RedisClient
 from backend_core.services.elasticsearch_client import ElasticsearchClient
 from ..models.report import DataSource
+from .connection_registry import connection_registry
+from .columnar import ColumnarTransformEngine, CompiledConditions, push_down_sql, sql_subquery
+from .stream_writers import STREAM_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -24,68 +28,133 @@ logger = logging.getLogger(__name__)
 class DataFetcher:
     """Class for fetching data from various sources."""
     
+    columnar_engine = ColumnarTransformEngine()
+    
     async def fetch_data(
         self, 
         query_definition: Dict[str, Any],
         parameters: Optional[Dict[str, Any]],
-        data_sources: List[DataSource]
+        data_sources: List[DataSource],
+        timings: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Fetch data for a report based on the query definition.
         
+        Queries are fetched concurrently; transformations are then applied in
+        definition order so joins can use the results of earlier queries.
+        
         Args:
             query_definition: Definition of the queries to execute
             parameters: Parameters to apply to the queries
             data_sources: Available data sources
+            timings: Optional dictionary filled with per-query fetch timings
             
         Returns:
             Dictionary containing the fetched data
         """
         result = {}
         
-        # Process each query defined in the query definition
-        queries = query_definition.get('queries', [])
-        for query in queries:
+        # Resolve the data source of each query
+        queries = []
+        for query in query_definition.get('queries', []):
             query_id = query.get('id')
-            query_type = query.get('type')
             data_source_id = query.get('data_source_id')
-            
-            # Find the data source
             data_source = next((ds for ds in data_sources if ds.id == data_source_id), None)
             if not data_source:
                 logger.warning(f"Data source {data_source_id} not found for query {query_id}")
                 continue
+            queries.append((query, data_source))
+        
+        fetched = await asyncio.gather(*[
+            self._timed_fetch(query, parameters, data_source)
+            for query, data_source in queries
+        ])
+        
+        for (query, data_source), (data, transformations, error, duration_ms) in zip(queries, fetched):
+            query_id = query.get('id')
+            if timings is not None:
+                timings[query_id] = {
+                    'data_source_id': data_source.id,
+                    'fetch_ms': duration_ms,
+                    'error': str(error) if error else None,
+                }
+            if error is not None:
+                if not isinstance(error, NotImplementedError):
+                    result[query_id] = {'error': str(error)}
+                continue
             
-            # Fetch data based on query type
             try:
-                if query_type == 'sql':
-                    data = await self._fetch_sql_data(query, parameters, data_source)
-                elif query_type == 'elasticsearch':
-                    data = await self._fetch_elasticsearch_data(query, parameters, data_source)
-                elif query_type == 'redis':
-                    data = await self._fetch_redis_data(query, parameters, data_source)
-                elif query_type == 'api':
-                    data = await self._fetch_api_data(query, parameters, data_source)
-                elif query_type == 'file':
-                    data = await self._fetch_file_data(query, parameters, data_source)
-                else:
-                    logger.warning(f"Unsupported query type: {query_type}")
-                    continue
-                
                 # Apply transformations if defined
-                transformations = query.get('transformations', [])
                 if transformations:
-                    data = self._apply_transformations(data, transformations, parameters)
+                    data = self._apply_transformations(data, transformations, parameters, result)
                 
                 # Add to result
                 result[query_id] = data
             
             except Exception as e:
-                logger.exception(f"Error fetching data for query {query_id}: {str(e)}")
+                logger.exception(f"Error transforming data for query {query_id}: {str(e)}")
                 result[query_id] = {'error': str(e)}
         
         return result
 
+    async def _timed_fetch(
+        self,
+        query: Dict[str, Any],
+        parameters: Optional[Dict[str, Any]],
+        data_source: DataSource
+    ) -> Tuple[Any, List[Dict[str, Any]], Optional[Exception], int]:
+        """
+        Fetch the raw data of a single query and time it.
+        
+        Args:
+            query: Query definition
+            parameters: Parameters to apply to the query
+            data_source: Data source of the query
+            
+        Returns:
+            Tuple of the data, the transformations still to apply, the error
+            raised (if any) and the fetch duration in milliseconds
+        """
+        query_id = query.get('id')
+        query_type = query.get('type')
+        transformations = query.get('transformations', [])
+        started = time.perf_counter()
+        
+        def elapsed_ms() -> int:
+            return int((time.perf_counter() - started) * 1000)
+        
+        try:
+            if query_type == 'sql':
+                # Let the database do the leading filter/sort/limit steps
+                if query.get('sql'):
+                    sql_query = self._apply_parameters_to_sql(query['sql'], parameters or {})
+                    columns = None
+                    if transformations and transformations[0].get('type') in ('filter', 'sort'):
+                        columns = await connection_registry.run_blocking(
+                            self._query_columns, sql_query, data_source
+                        )
+                    statement, transformations = push_down_sql(sql_query, transformations, parameters, columns)
+                    # Remaining steps run in the columnar engine, so skip building row dicts
+                    query = {**query, 'statement': statement, 'as_frame': bool(transformations)}
+                data = await self._fetch_sql_data(query, parameters, data_source)
+            elif query_type == 'elasticsearch':
+                data = await self._fetch_elasticsearch_data(query, parameters, data_source)
+            elif query_type == 'redis':
+                data = await self._fetch_redis_data(query, parameters, data_source)
+            elif query_type == 'api':
+                data = await self._fetch_api_data(query, parameters, data_source)
+            elif query_type == 'file':
+                data = await self._fetch_file_data(query, parameters, data_source)
+            else:
+                logger.warning(f"Unsupported query type: {query_type}")
+                return None, [], NotImplementedError(f"Unsupported query type: {query_type}"), 0
+        
+        except Exception as e:
+            logger.exception(f"Error fetching data for query {query_id}: {str(e)}")
+            return None, [], e, elapsed_ms()
+        
+        return data, transformations, None, elapsed_ms()
+
     async def _fetch_sql_data(
         self, 
         query: Dict[str, Any],
@@ -101,33 +170,181 @@ class DataFetcher:
             data_source: Data source configuration
             
         Returns:
-            List of dictionaries containing the query results
+            List of dictionaries containing the query results, or a DataFrame
+            if the query definition sets ``as_frame``
         """
-        sql_query = query.get('sql')
-        if not sql_query:
-            raise ValueError("SQL query not defined")
+        # Statement with pushed-down transformations, if already built
+        statement = query.get('statement')
+        if statement is None:
+            sql_query = query.get('sql')
+            if not sql_query:
+                raise ValueError("SQL query not defined")
+            
+            # Apply parameters to the query
+            if parameters:
+                sql_query = self._apply_parameters_to_sql(sql_query, parameters)
+            statement = text(sql_query)
+        
+        as_frame = query.get('as_frame', False)
+        
+        # Database drivers are blocking, so keep them off the event loop
+        return await connection_registry.run_blocking(
+            self._execute_sql, statement, data_source,
+            lambda result: self._rows_from_result(result, as_frame)
+        )
+
+    def _execute_sql(
+        self,
+        statement: Any,
+        data_source: DataSource,
+        read: Callable[[Any], Any]
+    ) -> Any:
+        """
+        Execute a SQL statement on a data source and read its result.
         
-        # Apply parameters to the query
-        if parameters:
-            sql_query = self._apply_parameters_to_sql(sql_query, parameters)
+        Args:
+            statement: SQLAlchemy statement to execute
+            data_source: Data source configuration
+            read: Called with the result while the connection is open
+            
+        Returns:
+            Value returned by ``read``
+        """
+        # For internal database, use the existing session
+        if data_source.connection_details.get('internal', False):
+            with get_db_session() as db:
+                return read(db.execute(statement))
+        
+        # For external database, borrow a connection from the pooled engine
+        engine = connection_registry.get_engine(data_source)
+        with engine.connect() as connection:
+            return read(connection.execute(statement))
+
+    def _query_columns(self, sql_query: str, data_source: DataSource) -> List[str]:
+        """
+        Get the columns a SQL query returns, without fetching any rows.
+        
+        Args:
+            sql_query: SQL query, with its parameters applied
+            data_source: Data source configuration
+            
+        Returns:
+            Column names of the query result
+        """
+        statement = select(literal_column('*')).select_from(sql_subquery(sql_query)).where(false())
+        return self._execute_sql(statement, data_source, lambda result: list(result.keys()))
+
+    def _rows_from_result(self, result: Any, as_frame: bool) -> Union[List[Dict[str, Any]], pd.DataFrame]:
+        """
+        Convert a SQL result into rows.
+        
+        A DataFrame is built a partition of rows at a time, so the row tuples
+        of the whole result are never held at once.
+        
+        Args:
+            result: SQLAlchemy result
+            as_frame: Return a DataFrame built directly from the row tuples
+            
+        Returns:
+            List of row dictionaries or a DataFrame
+        """
+        columns = list(result.keys())
+        if as_frame:
+            frames = [
+                pd.DataFrame.from_records(partition, columns=columns)
+                for partition in result.partitions(STREAM_CHUNK_SIZE)
+            ]
+            if not frames:
+                return pd.DataFrame(columns=columns)
+            return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return [dict(zip(columns, row)) for row in result]
+
+    @contextmanager
+    def stream_query(
+        self,
+        query_definition: Dict[str, Any],
+        query_id: str,
+        parameters: Optional[Dict[str, Any]],
+        data_sources: List[DataSource],
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[Tuple[List[str], Iterator[Sequence[Sequence[Any]]]]]:
+        """
+        Stream the rows of a SQL query in chunks from a server-side cursor.
+        
+        Leading filter/sort/limit steps are pushed into the query; any further
+        filter steps are applied chunk by chunk. Other transformations need the
+        whole result set and cannot be streamed.
+        
+        Args:
+            query_definition: Definition of the queries of the report
+            query_id: ID of the query to stream
+            parameters: Parameters to apply to the query
+            data_sources: Available data sources
+            chunk_size: Number of rows fetched per chunk
+            
+        Yields:
+            Tuple of the column names and an iterator over row chunks
+            
+        Raises:
+            ValueError: If the query cannot be streamed
+        """
+        query = next((q for q in query_definition.get('queries', []) if q.get('id') == query_id), None)
+        if not query or query.get('type') != 'sql' or not query.get('sql'):
+            raise ValueError(f"Query {query_id} is not a streamable SQL query")
+        
+        data_source = next((ds for ds in data_sources if ds.id == query.get('data_source_id')), None)
+        if not data_source:
+            raise ValueError(f"Data source {query.get('data_source_id')} not found for query {query_id}")
+        
+        sql_query = self._apply_parameters_to_sql(query['sql'], parameters or {})
+        transformations = query.get('transformations', [])
+        columns = self._query_columns(sql_query, data_source) if transformations else None
+        statement, remaining = push_down_sql(sql_query, transformations, parameters, columns)
+        if any(t.get('type') != 'filter' for t in remaining):
+            raise ValueError(f"Transformations of query {query_id} cannot be applied to a stream")
+        chunk_filters = [CompiledConditions(t.get('conditions', []), parameters) for t in remaining]
         
-        # Get connection details
         connection_details = data_source.connection_details
+        stream_options = {'stream_results': True, 'yield_per': chunk_size}
         
-        # For internal database, use the existing session
         if connection_details.get('internal', False):
             with get_db_session() as db:
-                result = db.execute(text(sql_query))
-                columns = result.keys()
-                return [dict(zip(columns, row)) for row in result]
-        
-        # For external database, create a new connection
+                result = db.execute(statement, execution_options=stream_options)
+                yield self._stream_chunks(result, chunk_size, chunk_filters)
         else:
-            engine = sqlalchemy.create_engine(connection_details.get('connection_string'))
+            engine = connection_registry.get_engine(data_source)
             with engine.connect() as connection:
-                result = connection.execute(text(sql_query))
-                columns = result.keys()
-                return [dict(zip(columns, row)) for row in result]
+                result = connection.execution_options(**stream_options).execute(statement)
+                yield self._stream_chunks(result, chunk_size, chunk_filters)
+
+    def _stream_chunks(
+        self, result: Any, chunk_size: int, chunk_filters: List[CompiledConditions]
+    ) -> Tuple[List[str], Iterator[Sequence[Sequence[Any]]]]:
+        """
+        Split a streaming SQL result into filtered row chunks.
+        
+        Args:
+            result: SQLAlchemy result backed by a server-side cursor
+            chunk_size: Number of rows per chunk
+            chunk_filters: Filters to apply to every chunk
+            
+        Returns:
+            Tuple of the column names and an iterator over row chunks
+        """
+        columns = list(result.keys())
+        
+        def chunks() -> Iterator[Sequence[Sequence[Any]]]:
+            for partition in result.partitions(chunk_size):
+                if chunk_filters:
+                    frame = pd.DataFrame.from_records(partition, columns=columns)
+                    for conditions in chunk_filters:
+                        frame = frame[conditions.mask(frame)]
+                    frame = frame.astype(object).where(frame.notna(), None)
+                    partition = list(frame.itertuples(index=False, name=None))
+                if partition:
+                    yield partition
+        
+        return columns, chunks()
 
     async def _fetch_elasticsearch_data(
         self, 
@@ -161,11 +378,15 @@ class DataFetcher:
         if connection_details.get('internal', False):
             es_client = ElasticsearchClient()
         else:
-            # Create a new client with custom configuration
-            es_client = ElasticsearchClient(
-                hosts=connection_details.get('hosts'),
-                username=connection_details.get('username'),
-                password=connection_details.get('password')
+            # Reuse the client configured for this data source
+            es_client = connection_registry.get_client(
+                'elasticsearch',
+                data_source,
+                lambda: ElasticsearchClient(
+                    hosts=connection_details.get('hosts'),
+                    username=connection_details.get('username'),
+                    password=connection_details.get('password')
+                )
             )
         
         # Execute query
@@ -206,12 +427,16 @@ class DataFetcher:
         if connection_details.get('internal', False):
             redis_client = RedisClient()
         else:
-            # Create a new client with custom configuration
-            redis_client = RedisClient(
-                host=connection_details.get('host'),
-                port=connection_details.get('port'),
-                password=connection_details.get('password'),
-                db=connection_details.get('db', 0)
+            # Reuse the client configured for this data source
+            redis_client = connection_registry.get_client(
+                'redis',
+                data_source,
+                lambda: RedisClient(
+                    host=connection_details.get('host'),
+                    port=connection_details.get('port'),
+                    password=connection_details.get('password'),
+                    db=connection_details.get('db', 0)
+                )
             )
         
         # Get data from Redis
@@ -255,7 +480,7 @@ class DataFetcher:
         connection_details = data_source.connection_details
         
         # Prepare headers
-        headers = connection_details.get('headers', {})
+        headers = dict(connection_details.get('headers', {}))
         if 'authorization' in connection_details:
             headers['Authorization'] = connection_details['authorization']
         
@@ -267,20 +492,20 @@ class DataFetcher:
         if parameters and request_data:
             request_data = self._apply_parameters_to_json(request_data, parameters)
         
-        # Execute request
-        async with aiohttp.ClientSession() as session:
-            if method.upper() == 'GET':
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        raise ValueError(f"API request failed with status {response.status}")
-                    return await response.json()
-            elif method.upper() == 'POST':
-                async with session.post(url, headers=headers, json=request_data) as response:
-                    if response.status != 200:
-                        raise ValueError(f"API request failed with status {response.status}")
-                    return await response.json()
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        # Execute request on the pooled session of this data source
+        session = connection_registry.get_http_session(data_source)
+        if method.upper() == 'GET':
+            async with session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    raise ValueError(f"API request failed with status {response.status}")
+                return await response.json()
+        elif method.upper() == 'POST':
+            async with session.post(url, headers=headers, json=request_data) as response:
+                if response.status != 200:
+                    raise ValueError(f"API request failed with status {response.status}")
+                return await response.json()
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
 
     async def _fetch_file_data(
         self, 
@@ -394,21 +619,29 @@ class DataFetcher:
         self, 
         data: Any, 
         transformations: List[Dict[str, Any]],
-        parameters: Optional[Dict[str, Any]]
+        parameters: Optional[Dict[str, Any]],
+        datasets: Optional[Dict[str, Any]] = None
     ) -> Any:
         """
         Apply transformations to data.
         
+        Tabular data (lists of rows) is handed to the columnar engine; other
+        shapes are processed step by step until they become tabular.
+        
         Args:
             data: Data to transform
             transformations: List of transformations to apply
             parameters: Parameters for transformations
+            datasets: Results of previously fetched queries, used by joins
             
         Returns:
             Transformed data
         """
         # Process each transformation in order
-        for transformation in transformations:
+        for index, transformation in enumerate(transformations):
+            if isinstance(data, (list, pd.DataFrame)):
+                return self.columnar_engine.apply(data, transformations[index:], parameters, datasets)
+            
             transform_type = transformation.get('type')
             
             if transform_type == 'filter':
@@ -426,7 +659,7 @@ class DataFetcher:
             elif transform_type == 'flatten':
                 data = self._apply_flatten_transformation(data, transformation)
             elif transform_type == 'join':
-                data = self._apply_join_transformation(data, transformation)
+                data = self._apply_join_transformation(data, transformation, datasets)
             else:
                 logger.warning(f"Unsupported transformation type: {transform_type}")
         
@@ -498,8 +731,10 @@ class DataFetcher:
         transformation: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Apply aggregate transformation."""
-        # Implementation omitted for brevity
-        return data
+        if not isinstance(data, list):
+            return data
+        
+        return self.columnar_engine.apply(data, [transformation])
 
     def _apply_limit_transformation(
         self, 
@@ -562,11 +797,14 @@ class DataFetcher:
     def _apply_join_transformation(
         self, 
         data: List[Dict[str, Any]], 
-        transformation: Dict[str, Any]
+        transformation: Dict[str, Any],
+        datasets: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Apply join transformation."""
-        # Implementation omitted for brevity
-        return data
+        if not isinstance(data, list):
+            return data
+        
+        return self.columnar_engine.apply(data, [transformation], datasets=datasets)
 
     def _evaluate_conditions(
         self, 
@@ -492,3 +492,46 @@ class JSONReportGenerator(BaseReportGenerator):
                 return None
         
         return current
+
+
+class JSONLReportGenerator(CSVReportGenerator):
+    """Generator for JSON Lines reports."""
+    
+    async def generate(
+        self, 
+        template_data: Dict[str, Any], 
+        report_data: Dict[str, Any],
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Generate a JSON Lines report with one object per row.
+        
+        Args:
+            template_data: Template data defining the report structure
+            report_data: Data to include in the report
+            parameters: Parameters used to generate the report
+            
+        Returns:
+            Path to the generated JSON Lines file
+        """
+        # Create a temporary file for the JSON Lines
+        fd, output_path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        
+        # Get the data source from template
+        data_source = template_data.get('data_source', '')
+        
+        # Extract the data
+        data = self._extract_data(report_data, data_source)
+        
+        # Apply column mappings if defined
+        column_mappings = template_data.get('column_mappings', {})
+        
+        # Write one JSON object per line
+        with open(output_path, 'w') as f:
+            for row in data:
+                if column_mappings:
+                    row = {column_mappings.get(key, key): value for key, value in row.items()}
+                f.write(json.dumps(row, default=str) + '\n')
+        
+        return output_path
@@ -0,0 +1,263 @@
+"""
+Streaming report writers for the Business Intelligence and Reporting module.
+
+This module provides writers that build CSV, JSON Lines and Excel reports
+incrementally from chunks of rows, so large exports never hold the full
+result set in memory. A ``StreamingReportPipeline`` fans every chunk out to
+all requested writers, producing every format in a single pass over the data.
+"""
+
+import csv
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+
+from ..models.report import ReportFormat
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per chunk
+STREAM_CHUNK_SIZE = int(os.getenv("BI_STREAM_CHUNK_SIZE", "5000"))
+
+# Excel hard limit, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values the json module does not handle natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class BaseStreamWriter:
+    """Base class for incremental report writers."""
+
+    suffix = ''
+
+    def __init__(self, template_data: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            template_data: Template data defining the report structure
+        """
+        self.template_data = template_data or {}
+        self.output_path: Optional[str] = None
+        self.rows_written = 0
+
+    def _create_output_file(self) -> str:
+        fd, self.output_path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        return self.output_path
+
+    def _header(self, columns: Sequence[str]) -> List[str]:
+        """Apply the template's column mappings to the result columns."""
+        column_mappings = self.template_data.get('column_mappings', {})
+        return [column_mappings.get(column, column) for column in columns]
+
+    def open(self, columns: Sequence[str]) -> None:
+        """
+        Start a new output file.
+
+        Args:
+            columns: Column names of the streamed rows
+        """
+        raise NotImplementedError("Subclasses must implement open()")
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        """
+        Append a chunk of rows.
+
+        Args:
+            rows: Row tuples in column order
+        """
+        raise NotImplementedError("Subclasses must implement write_rows()")
+
+    def close(self) -> str:
+        """
+        Finish the output file.
+
+        Returns:
+            Path to the generated file
+        """
+        raise NotImplementedError("Subclasses must implement close()")
+
+    def abort(self) -> None:
+        """Discard a partially written output file."""
+        try:
+            self.close()
+        except Exception:
+            pass
+        if self.output_path and os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+class CSVStreamWriter(BaseStreamWriter):
+    """Incremental CSV writer."""
+
+    suffix = '.csv'
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._file = open(self._create_output_file(), 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self._header(columns))
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+
+    def close(self) -> str:
+        if not self._file.closed:
+            self._file.close()
+        return self.output_path
+
+
+class JSONLStreamWriter(BaseStreamWriter):
+    """Incremental JSON Lines writer, one object per row."""
+
+    suffix = '.jsonl'
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._file = open(self._create_output_file(), 'w', encoding='utf-8')
+        self._keys = self._header(columns)
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        keys = self._keys
+        self._file.write(''.join(
+            json.dumps(dict(zip(keys, row)), default=_json_default) + '\n' for row in rows
+        ))
+        self.rows_written += len(rows)
+
+    def close(self) -> str:
+        if not self._file.closed:
+            self._file.close()
+        return self.output_path
+
+
+class ExcelStreamWriter(BaseStreamWriter):
+    """
+    Incremental Excel writer using openpyxl's write-only mode.
+
+    Rows are serialized as they are appended, and a new sheet is started
+    whenever the Excel row limit is reached.
+    """
+
+    suffix = '.xlsx'
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._create_output_file()
+        sheets = self.template_data.get('sheets') or [{}]
+        sheet_definition = sheets[0]
+        self.template_data = {**self.template_data, **sheet_definition}
+        self._sheet_name = sheet_definition.get('name', 'Sheet1')
+        self._header_row = self._header(columns)
+        self._workbook = Workbook(write_only=True)
+        self._sheet_count = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        self._sheet_count += 1
+        title = self._sheet_name if self._sheet_count == 1 else f"{self._sheet_name} ({self._sheet_count})"
+        self._sheet = self._workbook.create_sheet(title=title[:31])
+        self._sheet.append(self._header_row)
+        self._sheet_rows = 1
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        for row in rows:
+            if self._sheet_rows >= EXCEL_MAX_ROWS:
+                self._new_sheet()
+            self._sheet.append(list(row))
+            self._sheet_rows += 1
+        self.rows_written += len(rows)
+
+    def close(self) -> str:
+        if self._workbook is not None:
+            self._workbook.save(self.output_path)
+            self._workbook = None
+        return self.output_path
+
+
+# Map of report formats to incremental writers
+STREAM_WRITERS = {
+    ReportFormat.CSV: CSVStreamWriter,
+    ReportFormat.JSONL: JSONLStreamWriter,
+    ReportFormat.EXCEL: ExcelStreamWriter,
+}
+
+
+def supports_streaming(formats: Iterable[Any]) -> bool:
+    """
+    Check whether every requested format can be written incrementally.
+
+    Args:
+        formats: Requested report formats
+
+    Returns:
+        True if all formats have a streaming writer; False if any format
+        is not a known report format
+    """
+    formats = list(formats)
+    try:
+        return bool(formats) and all(ReportFormat(f) in STREAM_WRITERS for f in formats)
+    except ValueError:
+        return False
+
+
+class StreamingReportPipeline:
+    """Write all requested formats in a single pass over streamed rows."""
+
+    def __init__(self, formats: Iterable[Any], template_data: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            formats: Report formats to produce
+            template_data: Template data defining the report structure
+
+        Raises:
+            ValueError: If a format has no streaming writer
+        """
+        self.writers: Dict[ReportFormat, BaseStreamWriter] = {}
+        for report_format in formats:
+            report_format = ReportFormat(report_format)
+            writer_class = STREAM_WRITERS.get(report_format)
+            if writer_class is None:
+                raise ValueError(f"Format {report_format.value} does not support streaming")
+            self.writers[report_format] = writer_class(template_data)
+        self.rows_written = 0
+
+    def run(
+        self, columns: Sequence[str], chunks: Iterable[Sequence[Sequence[Any]]]
+    ) -> List[Tuple[ReportFormat, str]]:
+        """
+        Consume the row chunks and write every format.
+
+        Args:
+            columns: Column names of the streamed rows
+            chunks: Iterable of row chunks
+
+        Returns:
+            List of (format, file path) tuples
+        """
+        for writer in self.writers.values():
+            writer.open(columns)
+
+        try:
+            for chunk in chunks:
+                for writer in self.writers.values():
+                    writer.write_rows(chunk)
+                self.rows_written += len(chunk)
+            return [(report_format, writer.close()) for report_format, writer in self.writers.items()]
+        except Exception:
+            for writer in self.writers.values():
+                writer.abort()
+            raise
@@ -0,0 +1,333 @@
+"""
+Campaign fan-out for the Communications module.
+
+Notifications and announcements may target tens of thousands of users.
+This module resolves recipients with one set-based query per chunk of IDs
+instead of one query per user, writes the recipient associations with bulk
+inserts, and delivers messages through the batch APIs of the external
+services with bounded concurrency, reporting progress and throughput as it
+goes.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Column, Table, insert, select
+from sqlalchemy.orm import Session
+
+from backend_core.models import Customer, User
+from core.metrics import MetricsCollector
+from modules.communications import models
+from modules.communications.external_services import (
+    BaseExternalService, ExternalServiceError, ExternalServiceFactory
+)
+
+logger = logging.getLogger(__name__)
+metrics = MetricsCollector("campaigns")
+
+# Configuration
+CAMPAIGN_CHUNK_SIZE = int(os.getenv("CAMPAIGN_CHUNK_SIZE", "1000"))
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "4"))
+
+user_table = User.__table__
+customer_table = Customer.__table__
+external_service_table = models.ExternalService.__table__
+
+# Column holding the address for each external service type; phone
+# numbers are kept on the users' customer records
+CONTACT_COLUMNS = {
+    "email": user_table.c.email,
+    "sms": customer_table.c.phone,
+}
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """
+    Split a sequence into chunks.
+
+    Args:
+        items: Items to split
+        size: Maximum chunk size
+
+    Returns:
+        Iterator over the chunks
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def resolve_recipients(
+    db: Session,
+    recipient_ids: Iterable[int],
+    chunk_size: int = CAMPAIGN_CHUNK_SIZE
+) -> List[int]:
+    """
+    Get the IDs of the requested recipients that exist.
+
+    Args:
+        db: Database session
+        recipient_ids: Requested user IDs, duplicates are ignored
+        chunk_size: Number of IDs per query
+
+    Returns:
+        Existing user IDs in request order
+    """
+    requested = list(dict.fromkeys(recipient_ids))
+    existing = set()
+    for chunk in chunked(requested, chunk_size):
+        existing.update(db.execute(
+            select(user_table.c.id).where(user_table.c.id.in_(chunk))
+        ).scalars())
+    return [user_id for user_id in requested if user_id in existing]
+
+
+def attach_recipients(
+    db: Session,
+    association: Table,
+    owner_column: str,
+    owner_id: int,
+    recipient_ids: Iterable[int],
+    chunk_size: int = CAMPAIGN_CHUNK_SIZE
+) -> List[int]:
+    """
+    Link users to a notification or announcement with bulk inserts.
+
+    The caller commits the session.
+
+    Args:
+        db: Database session
+        association: Association table, e.g. ``notification_recipients``
+        owner_column: Column referencing the notification or announcement
+        owner_id: ID of the notification or announcement
+        recipient_ids: Requested user IDs; unknown users are skipped
+        chunk_size: Number of rows per statement
+
+    Returns:
+        IDs of the attached users
+    """
+    user_ids = resolve_recipients(db, recipient_ids, chunk_size)
+    for chunk in chunked(user_ids, chunk_size):
+        db.execute(insert(association), [{owner_column: owner_id, "user_id": user_id} for user_id in chunk])
+    return user_ids
+
+
+def recipient_ids(db: Session, association: Table, owner_column: str, owner_id: int) -> List[int]:
+    """
+    Get the IDs of the recipients of a message, notification or announcement.
+
+    Reads the association table only, without loading the users.
+
+    Args:
+        db: Database session
+        association: Association table, e.g. ``notification_recipients``
+        owner_column: Column referencing the owner
+        owner_id: ID of the owner
+
+    Returns:
+        User IDs in ascending order
+    """
+    return list(db.execute(
+        select(association.c.user_id)
+        .where(association.c[owner_column] == owner_id)
+        .order_by(association.c.user_id)
+    ).scalars())
+
+
+def recipient_contacts(
+    db: Session,
+    association: Table,
+    owner_column: str,
+    owner_id: int,
+    contact: Column = user_table.c.email
+) -> List[str]:
+    """
+    Get the contact addresses of the active recipients of a notification or announcement.
+
+    Args:
+        db: Database session
+        association: Association table, e.g. ``notification_recipients``
+        owner_column: Column referencing the notification or announcement
+        owner_id: ID of the notification or announcement
+        contact: Column holding the address, of the users table or of a
+            table referencing users by ``user_id``
+
+    Returns:
+        Distinct, non-empty addresses
+    """
+    source = user_table.join(association, association.c.user_id == user_table.c.id)
+    if contact.table is not user_table:
+        source = source.join(contact.table, contact.table.c.user_id == user_table.c.id)
+
+    rows = db.execute(
+        select(contact)
+        .select_from(source)
+        .where(association.c[owner_column] == owner_id, user_table.c.is_active == True, contact.isnot(None))
+        .distinct()
+    ).scalars()
+    return [value for value in rows if value]
+
+
+class CampaignProgress:
+    """Progress and throughput of a campaign delivery."""
+
+    def __init__(self, total: int):
+        """
+        Initialize the progress.
+
+        Args:
+            total: Number of recipients to deliver to
+        """
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.failed_recipients: List[str] = []
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        """Number of recipients handled so far."""
+        return self.sent + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the delivery started."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Messages sent per second."""
+        elapsed = self.elapsed
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the progress as a dictionary."""
+        return {
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "percent": round(100.0 * self.processed / self.total, 1) if self.total else 100.0,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "messages_per_second": round(self.throughput, 1),
+        }
+
+
+class CampaignFanout:
+    """Deliver one message to many recipients over a provider's batch API."""
+
+    def __init__(
+        self,
+        concurrency: int = CAMPAIGN_CONCURRENCY,
+        on_progress: Optional[Callable[[CampaignProgress], None]] = None
+    ):
+        """
+        Initialize the fan-out engine.
+
+        Args:
+            concurrency: Maximum number of batches in flight
+            on_progress: Called with the progress after every batch
+        """
+        self.concurrency = concurrency
+        self.on_progress = on_progress
+
+    async def deliver(
+        self,
+        client: BaseExternalService,
+        recipients: Sequence[str],
+        message: str,
+        **kwargs
+    ) -> CampaignProgress:
+        """
+        Send a message to all recipients.
+
+        Recipients are split into batches of the client's ``batch_size``.
+        A failed batch is counted as failed and does not stop the campaign;
+        the provider's throughput limit paces the batches.
+
+        Args:
+            client: External service client
+            recipients: Addresses of the recipients
+            message: Message content
+            **kwargs: Additional arguments for the service, e.g. ``subject``
+
+        Returns:
+            Final progress of the delivery
+        """
+        progress = CampaignProgress(len(recipients))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        service = type(client).__name__
+
+        async def send(batch: Sequence[str]) -> None:
+            async with semaphore:
+                try:
+                    result = await client.send_batch(list(batch), message, **kwargs)
+                    failed = list(result.get("failed", []))
+                except ExternalServiceError as e:
+                    logger.error(f"Campaign batch of {len(batch)} via {service} failed: {str(e)}")
+                    failed = list(batch)
+
+            progress.batches += 1
+            progress.failed += len(failed)
+            progress.sent += len(batch) - len(failed)
+            progress.failed_recipients.extend(failed)
+            metrics.increment("messages", len(batch) - len(failed), {"service": service, "outcome": "sent"})
+            if failed:
+                metrics.increment("messages", len(failed), {"service": service, "outcome": "failed"})
+            logger.debug(f"Campaign via {service}: {progress.processed}/{progress.total} recipients processed")
+            if self.on_progress:
+                self.on_progress(progress)
+
+        await asyncio.gather(*[send(batch) for batch in chunked(list(recipients), client.batch_size)])
+
+        progress.finished_at = time.monotonic()
+        metrics.gauge("throughput", progress.throughput, {"service": service})
+        logger.info(f"Campaign via {service} finished: {progress.as_dict()}")
+        return progress
+
+
+async def deliver_campaign(
+    db: Session,
+    service_type: str,
+    association: Table,
+    owner_column: str,
+    owner_id: int,
+    message: str,
+    on_progress: Optional[Callable[[CampaignProgress], None]] = None,
+    **kwargs
+) -> Optional[CampaignProgress]:
+    """
+    Deliver a notification or announcement to its recipients through an external service.
+
+    Uses the first active external service of the given type.
+
+    Args:
+        db: Database session
+        service_type: External service type, ``"email"`` or ``"sms"``
+        association: Association table, e.g. ``notification_recipients``
+        owner_column: Column referencing the notification or announcement
+        owner_id: ID of the notification or announcement
+        message: Message content
+        on_progress: Called with the progress after every batch
+        **kwargs: Additional arguments for the service, e.g. ``subject``
+
+    Returns:
+        Final progress, or None if no active service is configured
+    """
+    service = db.execute(
+        select(external_service_table.c.config)
+        .where(external_service_table.c.service_type == service_type, external_service_table.c.is_active == True)
+        .order_by(external_service_table.c.id)
+        .limit(1)
+    ).first()
+    if service is None:
+        logger.warning(f"No active {service_type} service configured; campaign for {owner_column}={owner_id} not sent")
+        return None
+
+    contacts = recipient_contacts(db, association, owner_column, owner_id, CONTACT_COLUMNS[service_type])
+    client = ExternalServiceFactory.create_client(service_type, service.config)
+    return await CampaignFanout(on_progress=on_progress).deliver(client, contacts, message, **kwargs)
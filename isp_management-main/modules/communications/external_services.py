@@ -2,11 +2,18 @@
 External service integration for the Communications module.
 
 This module provides functionality for integrating with external services
-such as SMS providers, email services, and chat platforms.
+such as SMS providers, email services, and chat platforms. Requests to a
+provider share one pooled HTTP client and are paced by a per-provider
+throughput limit, and providers with batch APIs accept many recipients
+per request.
 """
 
+import asyncio
 import logging
 import json
+import threading
+import time
+import weakref
 from typing import Dict, Any, List, Optional, Union, Tuple, TYPE_CHECKING
 import httpx
 from fastapi import BackgroundTasks
@@ -21,23 +28,185 @@ from backend_core.database import Base, get_db
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Configuration
+EXTERNAL_SERVICE_TIMEOUT = float(os.getenv("EXTERNAL_SERVICE_TIMEOUT", "10"))
+EXTERNAL_SERVICE_MAX_CONNECTIONS = int(os.getenv("EXTERNAL_SERVICE_MAX_CONNECTIONS", "20"))
+EXTERNAL_SERVICE_BATCH_SIZE = int(os.getenv("EXTERNAL_SERVICE_BATCH_SIZE", "100"))
+# Messages per second per provider, 0 disables the limit
+EXTERNAL_SERVICE_RATE_LIMIT = float(os.getenv("EXTERNAL_SERVICE_RATE_LIMIT", "0"))
+
 
 class ExternalServiceError(Exception):
     """Exception raised for errors in external service operations."""
     pass
 
 
+class ThroughputLimiter:
+    """
+    Token bucket limiting the number of messages sent to a provider.
+
+    Each message consumes one token; tokens are refilled at ``rate`` per
+    second up to ``burst``. A request for more tokens than are available
+    reserves them anyway and waits until the bucket has been refilled, so
+    large batches are paced rather than rejected.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Messages per second
+            burst: Bucket size, defaults to one second worth of messages
+            clock: Monotonic clock returning seconds
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Take tokens from the bucket.
+
+        Args:
+            tokens: Number of messages about to be sent
+
+        Returns:
+            Seconds to wait before sending
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """
+        Wait until tokens may be sent.
+
+        Args:
+            tokens: Number of messages about to be sent
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ProviderConnectionPool:
+    """
+    Shared HTTP clients and throughput limiters per provider endpoint.
+
+    HTTP clients are bound to an event loop, so they are kept per loop in
+    a weak map and never handed to another loop; the clients of loops that
+    have been closed are dropped. Limiters are shared by every loop of the
+    process.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = EXTERNAL_SERVICE_MAX_CONNECTIONS,
+        timeout: float = EXTERNAL_SERVICE_TIMEOUT
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            max_connections: Maximum open connections per provider
+            timeout: Request timeout in seconds
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._limiters: Dict[str, ThroughputLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get_client(
+        self,
+        provider: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ) -> httpx.AsyncClient:
+        """
+        Get the HTTP client of a provider for the running event loop.
+
+        Args:
+            provider: Provider key
+            transport: Custom transport, e.g. for tests
+
+        Returns:
+            Pooled HTTP client
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for finished in [other for other in self._clients.keys() if other.is_closed()]:
+                del self._clients[finished]
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(provider)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    transport=transport
+                )
+                clients[provider] = client
+            return client
+
+    def get_limiter(self, provider: str, rate: float) -> Optional[ThroughputLimiter]:
+        """
+        Get the throughput limiter of a provider.
+
+        Args:
+            provider: Provider key
+            rate: Messages per second, 0 for no limit
+
+        Returns:
+            The limiter, or None if the provider is not limited
+        """
+        if rate <= 0:
+            return None
+        with self._lock:
+            limiter = self._limiters.get(provider)
+            if limiter is None or limiter.rate != rate:
+                limiter = ThroughputLimiter(rate)
+                self._limiters[provider] = limiter
+            return limiter
+
+    async def aclose(self) -> None:
+        """Close the clients created in the running event loop."""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+
+# Process-wide pool shared by all external service clients
+provider_pool = ProviderConnectionPool()
+
+
 class ExternalServiceFactory:
     """Factory for creating external service clients."""
     
     @staticmethod
-    def create_client(service_type: str, config: Dict[str, Any]) -> 'BaseExternalService':
+    def create_client(
+        service_type: str,
+        config: Dict[str, Any],
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ) -> 'BaseExternalService':
         """
         Create an external service client based on service type.
         
         Args:
             service_type: Type of service (e.g., 'sms', 'email', 'chat')
             config: Configuration for the service
+            transport: Custom HTTP transport, e.g. for tests
             
         Returns:
             An instance of the appropriate external service client
@@ -46,11 +215,11 @@ class ExternalServiceFactory:
             ExternalServiceError: If the service type is not supported
         """
         if service_type == "sms":
-            return SMSService(config)
+            return SMSService(config, transport)
         elif service_type == "email":
-            return EmailService(config)
+            return EmailService(config, transport)
         elif service_type == "chat":
-            return ChatService(config)
+            return ChatService(config, transport)
         else:
             raise ExternalServiceError(f"Unsupported service type: {service_type}")
 
@@ -58,15 +227,51 @@ class ExternalServiceFactory:
 class BaseExternalService:
     """Base class for external service clients."""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], transport: Optional[httpx.AsyncBaseTransport] = None):
         """
         Initialize the external service client.
         
         Args:
             config: Configuration for the service
+            transport: Custom HTTP transport, e.g. for tests
         """
         self.config = config
+        self.transport = transport
         self.validate_config()
+
+    @property
+    def endpoint(self) -> str:
+        """URL of the provider API."""
+        return self.config.get("api_url") or self.config.get("webhook_url", "")
+
+    @property
+    def provider(self) -> str:
+        """Key under which connections and throughput limits are shared."""
+        return f"{type(self).__name__}:{self.endpoint}"
+
+    @property
+    def batch_size(self) -> int:
+        """Maximum number of recipients per provider request."""
+        return int(self.config.get("batch_size", EXTERNAL_SERVICE_BATCH_SIZE))
+
+    async def _post(self, url: str, payload: Dict[str, Any], messages: int = 1) -> httpx.Response:
+        """
+        Post a JSON payload over the provider's pooled client.
+
+        Args:
+            url: Request URL
+            payload: JSON payload
+            messages: Number of messages the request sends, for the throughput limit
+
+        Returns:
+            The HTTP response
+        """
+        rate = float(self.config.get("rate_limit", EXTERNAL_SERVICE_RATE_LIMIT))
+        limiter = provider_pool.get_limiter(self.provider, rate)
+        if limiter:
+            await limiter.acquire(messages)
+        client = provider_pool.get_client(self.provider, self.transport)
+        return await client.post(url, json=payload, headers={"Content-Type": "application/json"})
     
     def validate_config(self):
         """
@@ -94,6 +299,40 @@ class BaseExternalService:
         """
         raise NotImplementedError("Subclasses must implement send_message()")
 
+    async def send_batch(self, recipients: List[str], message: str, **kwargs) -> Dict[str, Any]:
+        """
+        Send the same message to several recipients.
+
+        Services without a batch API send one request per recipient over
+        the shared connection pool.
+
+        Args:
+            recipients: Recipients of the message, at most ``batch_size``
+            message: Message content
+            **kwargs: Additional arguments for the service
+
+        Returns:
+            Number of messages sent and the recipients that failed
+        """
+        results = await asyncio.gather(
+            *[self.send_message(recipient, message, **kwargs) for recipient in recipients],
+            return_exceptions=True
+        )
+        failed = [recipient for recipient, result in zip(recipients, results) if isinstance(result, Exception)]
+        return {"sent": len(recipients) - len(failed), "failed": failed}
+
+    @staticmethod
+    def _batch_result(recipients: List[str], response: httpx.Response) -> Dict[str, Any]:
+        """Read the recipients a provider rejected from a batch response."""
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        failed = body.get("failed", []) if isinstance(body, dict) else []
+        if not isinstance(failed, list):
+            failed = []
+        return {"sent": len(recipients) - len(failed), "failed": failed, "response": body}
+
 
 class SMSService(BaseExternalService):
     """Client for SMS service providers."""
@@ -136,23 +375,56 @@ class SMSService(BaseExternalService):
             }
             
             # Send the request to the SMS service
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    self.config["api_url"],
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code >= 400:
-                    raise ExternalServiceError(f"SMS service returned error: {response.text}")
-                
-                return response.json()
+            response = await self._post(self.config["api_url"], payload)
+            
+            if response.status_code >= 400:
+                raise ExternalServiceError(f"SMS service returned error: {response.text}")
+            
+            return response.json()
                 
         except httpx.RequestError as e:
             raise ExternalServiceError(f"Error sending SMS: {str(e)}")
         except Exception as e:
             raise ExternalServiceError(f"Unexpected error sending SMS: {str(e)}")
 
+    async def send_batch(self, recipients: List[str], message: str, **kwargs) -> Dict[str, Any]:
+        """
+        Send an SMS to several recipients in one provider request.
+
+        Uses ``batch_api_url`` from the config, falling back to ``api_url``
+        with a list of recipients.
+
+        Args:
+            recipients: Phone numbers of the recipients
+            message: SMS content
+            **kwargs: Additional arguments for the SMS service
+
+        Returns:
+            Number of messages sent and the recipients the provider rejected
+
+        Raises:
+            ExternalServiceError: If the batch could not be sent
+        """
+        payload = {
+            "api_key": self.config["api_key"],
+            "sender_id": self.config["sender_id"],
+            "to": list(recipients),
+            "message": message,
+            **kwargs
+        }
+        try:
+            response = await self._post(
+                self.config.get("batch_api_url", self.config["api_url"]),
+                payload,
+                messages=len(recipients)
+            )
+        except httpx.RequestError as e:
+            raise ExternalServiceError(f"Error sending SMS batch: {str(e)}")
+
+        if response.status_code >= 400:
+            raise ExternalServiceError(f"SMS service returned error: {response.text}")
+        return self._batch_result(recipients, response)
+
 
 class EmailService(BaseExternalService):
     """Client for email service providers."""
@@ -216,23 +488,72 @@ class EmailService(BaseExternalService):
                 payload["attachments"] = attachments
             
             # Send the request to the email service
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    self.config["api_url"],
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code >= 400:
-                    raise ExternalServiceError(f"Email service returned error: {response.text}")
-                
-                return response.json()
+            response = await self._post(self.config["api_url"], payload)
+            
+            if response.status_code >= 400:
+                raise ExternalServiceError(f"Email service returned error: {response.text}")
+            
+            return response.json()
                 
         except httpx.RequestError as e:
             raise ExternalServiceError(f"Error sending email: {str(e)}")
         except Exception as e:
             raise ExternalServiceError(f"Unexpected error sending email: {str(e)}")
 
+    async def send_batch(
+        self,
+        recipients: List[str],
+        message: str,
+        subject: str,
+        html_content: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Send an email to several recipients in one provider request.
+
+        Each recipient gets a separate personalization, so recipients do
+        not see each other's addresses.
+
+        Args:
+            recipients: Email addresses of the recipients
+            message: Plain text content of the email
+            subject: Email subject
+            html_content: HTML content of the email (optional)
+            **kwargs: Additional arguments for the email service
+
+        Returns:
+            Number of messages sent and the recipients the provider rejected
+
+        Raises:
+            ExternalServiceError: If the batch could not be sent
+        """
+        payload = {
+            "api_key": self.config["api_key"],
+            "from": {
+                "email": self.config["from_email"],
+                "name": self.config["from_name"]
+            },
+            "personalizations": [{"to": [{"email": recipient}]} for recipient in recipients],
+            "subject": subject,
+            "text": message,
+            **kwargs
+        }
+        if html_content:
+            payload["html"] = html_content
+
+        try:
+            response = await self._post(
+                self.config.get("batch_api_url", self.config["api_url"]),
+                payload,
+                messages=len(recipients)
+            )
+        except httpx.RequestError as e:
+            raise ExternalServiceError(f"Error sending email batch: {str(e)}")
+
+        if response.status_code >= 400:
+            raise ExternalServiceError(f"Email service returned error: {response.text}")
+        return self._batch_result(recipients, response)
+
 
 class ChatService(BaseExternalService):
     """Client for chat service providers (e.g., Slack, Discord)."""
@@ -284,17 +605,12 @@ class ChatService(BaseExternalService):
                 payload["attachments"] = attachments
             
             # Send the request to the chat service
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    self.config["webhook_url"],
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                if response.status_code >= 400:
-                    raise ExternalServiceError(f"Chat service returned error: {response.text}")
-                
-                return {"status": "success", "response": response.text}
+            response = await self._post(self.config["webhook_url"], payload)
+            
+            if response.status_code >= 400:
+                raise ExternalServiceError(f"Chat service returned error: {response.text}")
+            
+            return {"status": "success", "response": response.text}
                 
         except httpx.RequestError as e:
             raise ExternalServiceError(f"Error sending chat message: {str(e)}")
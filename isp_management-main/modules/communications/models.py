@@ -331,6 +331,7 @@ class Webhook(Base):
     is_active = Column(Boolean, default=True)
     secret = Column(String(255), nullable=True)  # Secret for signing webhook payloads
     headers = Column(JSON, nullable=True)  # Custom headers to include in webhook requests
+    batch_delivery = Column(Boolean, default=False)  # Deliver pending events in batched requests
     description = Column(Text, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -339,6 +340,7 @@ class Webhook(Base):
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
     logs = relationship("WebhookLog", back_populates="webhook", cascade="all, delete-orphan")
+    outbox = relationship("WebhookOutbox", back_populates="webhook", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Webhook(id={self.id}, name='{self.name}', active={self.is_active})>"
@@ -364,6 +366,36 @@ class WebhookLog(Base):
         return f"<WebhookLog(id={self.id}, webhook_id={self.webhook_id}, event='{self.event}', success={self.success})>"
 
 
+class WebhookDeliveryStatus(str, enum.Enum):
+    """Enum for webhook outbox entry status."""
+    PENDING = "pending"
+    DELIVERING = "delivering"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class WebhookOutbox(Base):
+    """Model for webhook events waiting to be delivered."""
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    webhook_id = Column(Integer, ForeignKey("webhooks.id"), nullable=False, index=True)
+    event = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)  # Full signed payload as sent to the endpoint
+    status = Column(Enum(WebhookDeliveryStatus), default=WebhookDeliveryStatus.PENDING, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    webhook = relationship("Webhook", back_populates="outbox")
+    
+    def __repr__(self):
+        return f"<WebhookOutbox(id={self.id}, webhook_id={self.webhook_id}, event='{self.event}', status='{self.status}')>"
+
+
 class ExternalService(Base):
     """Model for external service integrations."""
     __tablename__ = "external_services"
@@ -37,8 +37,13 @@ TicketCategory = models_module.TicketCategory
 Template = models_module.Template
 Webhook = models_module.Webhook
 WebhookLog = models_module.WebhookLog
+WebhookOutbox = models_module.WebhookOutbox
+WebhookDeliveryStatus = models_module.WebhookDeliveryStatus
 ExternalService = models_module.ExternalService
 DeliveryMethod = models_module.DeliveryMethod
+message_recipients = models_module.message_recipients
+notification_recipients = models_module.notification_recipients
+announcement_recipients = models_module.announcement_recipients
 
 # Re-export all imported models
 __all__ = [
@@ -59,11 +64,14 @@ __all__ = [
     'Template',
     
     # Webhook models
-    'Webhook', 'WebhookLog',
+    'Webhook', 'WebhookLog', 'WebhookOutbox', 'WebhookDeliveryStatus',
     
     # External service models
     'ExternalService',
     
     # Delivery method
-    'DeliveryMethod'
+    'DeliveryMethod',
+    
+    # Recipient association tables
+    'message_recipients', 'notification_recipients', 'announcement_recipients'
 ]
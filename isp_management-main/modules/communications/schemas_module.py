@@ -411,6 +411,7 @@ class WebhookBase(BaseModel):
     url: HttpUrl = Field(..., description="URL to send webhook events to")
     events: List[str] = Field(..., description="List of events to subscribe to")
     is_active: bool = Field(True, description="Whether the webhook is active")
+    batch_delivery: bool = Field(False, description="Whether pending events are delivered in batches")
     description: Optional[str] = Field(None, description="Description of the webhook")
 
 
@@ -426,6 +427,7 @@ class WebhookUpdate(BaseModel):
     url: Optional[HttpUrl] = Field(None, description="URL to send webhook events to")
     events: Optional[List[str]] = Field(None, description="List of events to subscribe to")
     is_active: Optional[bool] = Field(None, description="Whether the webhook is active")
+    batch_delivery: Optional[bool] = Field(None, description="Whether pending events are delivered in batches")
     secret: Optional[str] = Field(None, description="Secret for signing webhook payloads")
     headers: Optional[Dict[str, str]] = Field(None, description="Custom headers to include in webhook requests")
     description: Optional[str] = Field(None, description="Description of the webhook")
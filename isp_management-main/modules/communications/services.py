@@ -22,6 +22,8 @@ from backend_core.config import settings
 from backend_core.cache import get_redis
 from modules.communications import models, schemas
 from modules.communications.webhooks import WebhookService
+from modules.communications.campaigns import attach_recipients, deliver_campaign, recipient_ids
+from modules.communications.template_renderer import TemplateSource, template_renderer
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -137,14 +139,15 @@ class MessageService:
             "message_id": message.id,
             "subject": message.subject,
             "sender_id": message.sender_id,
-            "recipient_ids": [recipient.id for recipient in message.recipients],
+            "recipient_ids": recipient_ids(db, models.message_recipients, "message_id", message.id),
             "status": message.status.value if hasattr(message.status, 'value') else message.status,
             "priority": message.priority.value if hasattr(message.priority, 'value') else message.priority,
             "created_at": message.created_at.isoformat() if message.created_at else None
         }
 
-        # Trigger webhook
+        # Trigger webhook; the outbox entries are delivered once committed
         await WebhookService.trigger_event(db, event, payload)
+        db.commit()
 
     @staticmethod
     async def _send_message(
@@ -435,12 +438,14 @@ class NotificationService:
         db.commit()
         db.refresh(notification)
 
-        # Add recipients
-        for recipient_id in notification_data.recipient_ids:
-            # Check if recipient exists
-            recipient = db.query(models.User).filter(models.User.id == recipient_id).first()
-            if recipient:
-                notification.recipients.append(recipient)
+        # Add recipients with one lookup and bulk insert per chunk
+        attach_recipients(
+            db,
+            models.notification_recipients,
+            "notification_id",
+            notification.id,
+            notification_data.recipient_ids
+        )
 
         db.commit()
         db.refresh(notification)
@@ -487,7 +492,7 @@ class NotificationService:
             "notification_id": notification.id,
             "title": notification.title,
             "sender_id": notification.sender_id,
-            "recipient_ids": [recipient.id for recipient in notification.recipients],
+            "recipient_ids": recipient_ids(db, models.notification_recipients, "notification_id", notification.id),
             "notification_type": notification.notification_type.value if hasattr(notification.notification_type, 'value') else notification.notification_type,
             "priority": notification.priority.value if hasattr(notification.priority, 'value') else notification.priority,
             "is_read": notification.is_read,
@@ -495,8 +500,9 @@ class NotificationService:
             "expires_at": notification.expires_at.isoformat() if notification.expires_at else None
         }
 
-        # Trigger webhook
+        # Trigger webhook; the outbox entries are delivered once committed
         await WebhookService.trigger_event(db, event, payload)
+        db.commit()
 
     @staticmethod
     async def _send_notification(
@@ -521,11 +527,17 @@ class NotificationService:
                 # TODO: Implement push notification
                 logger.info(f"Sending push notification {notification_id}")
             elif notification.notification_type == models.NotificationType.EMAIL:
-                # TODO: Implement email notification
                 logger.info(f"Sending email notification {notification_id}")
+                await deliver_campaign(
+                    db, "email", models.notification_recipients, "notification_id", notification_id,
+                    notification.content, subject=notification.title
+                )
             elif notification.notification_type == models.NotificationType.SMS:
-                # TODO: Implement SMS notification
                 logger.info(f"Sending SMS notification {notification_id}")
+                await deliver_campaign(
+                    db, "sms", models.notification_recipients, "notification_id", notification_id,
+                    notification.content
+                )
             else:
                 # In-app notification doesn't need additional delivery
                 logger.info(f"In-app notification {notification_id} is available")
@@ -772,10 +784,13 @@ class AnnouncementService:
 
         # Add targeted recipients if any
         if announcement_data.targeted_recipient_ids:
-            for recipient_id in announcement_data.targeted_recipient_ids:
-                recipient = db.query(models.User).filter(models.User.id == recipient_id).first()
-                if recipient:
-                    announcement.targeted_recipients.append(recipient)
+            attach_recipients(
+                db,
+                models.announcement_recipients,
+                "announcement_id",
+                announcement.id,
+                announcement_data.targeted_recipient_ids
+            )
 
             db.commit()
             db.refresh(announcement)
@@ -821,11 +836,14 @@ class AnnouncementService:
             "end_date": announcement.end_date.isoformat() if announcement.end_date else None,
             "created_by": announcement.created_by,
             "created_at": announcement.created_at.isoformat() if announcement.created_at else None,
-            "targeted_recipient_ids": [recipient.id for recipient in announcement.targeted_recipients] if announcement.targeted_recipients else []
+            "targeted_recipient_ids": recipient_ids(
+                db, models.announcement_recipients, "announcement_id", announcement.id
+            )
         }
 
-        # Trigger webhook
+        # Trigger webhook; the outbox entries are delivered once committed
         await WebhookService.trigger_event(db, event, payload)
+        db.commit()
 
     @staticmethod
     async def update_announcement(
@@ -885,10 +903,13 @@ class AnnouncementService:
             announcement.targeted_recipients = []
 
             # Add new recipients
-            for recipient_id in announcement_data.targeted_recipient_ids:
-                recipient = db.query(models.User).filter(models.User.id == recipient_id).first()
-                if recipient:
-                    announcement.targeted_recipients.append(recipient)
+            attach_recipients(
+                db,
+                models.announcement_recipients,
+                "announcement_id",
+                announcement.id,
+                announcement_data.targeted_recipient_ids
+            )
 
         db.commit()
         db.refresh(announcement)
@@ -1131,8 +1152,9 @@ class SupportTicketService:
             "closed_at": ticket.closed_at.isoformat() if ticket.closed_at else None
         }
 
-        # Trigger webhook
+        # Trigger webhook; the outbox entries are delivered once committed
         await WebhookService.trigger_event(db, event, payload)
+        db.commit()
 
     @staticmethod
     async def update_ticket(
@@ -1285,6 +1307,7 @@ class SupportTicketService:
 
             # Trigger webhook
             await WebhookService.trigger_event(db, "ticket.response_added", response_payload)
+            db.commit()
 
             # Also trigger ticket updated webhook
             await SupportTicketService._trigger_ticket_webhook(db, ticket.id, "ticket.updated")
@@ -1561,6 +1584,7 @@ class TemplateService:
 
         db.commit()
         db.refresh(template)
+        template_renderer.invalidate(template.id)
         return template
 
     @staticmethod
@@ -1612,6 +1636,7 @@ class TemplateService:
         # Delete the template
         db.delete(template)
         db.commit()
+        template_renderer.invalidate(template_id)
         return True
 
     @staticmethod
@@ -1674,23 +1699,15 @@ class TemplateService:
         Raises:
             HTTPException: If the template doesn't exist
         """
-        from jinja2 import Template as JinjaTemplate
-
         # Get the template
         template = await TemplateService.get_template(db, template_id)
 
         try:
-            # Render subject and body with Jinja2
-            subject_template = JinjaTemplate(template.subject)
-            body_template = JinjaTemplate(template.body)
-
-            rendered_subject = subject_template.render(**context)
-            rendered_body = body_template.render(**context)
-
-            return {
-                "subject": rendered_subject,
-                "body": rendered_body
-            }
+            # Render subject and body from the compiled template cache
+            return template_renderer.render(
+                TemplateSource(template.id, template.updated_at, template.subject, template.body),
+                context
+            )
 
         except Exception as e:
             logger.error(f"Error rendering template: {str(e)}")
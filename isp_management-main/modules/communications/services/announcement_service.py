@@ -10,12 +10,12 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any, Union
 from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import delete, desc
 
 from backend_core.config import settings
 from modules.communications import models, schemas
 from modules.communications.webhooks import WebhookService
-from backend_core.models import User  # Import User from backend_core
+from modules.communications.campaigns import attach_recipients
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -53,15 +53,20 @@ class AnnouncementService:
             end_date=announcement_data.end_date
         )
         
-        # Add targeted recipients if any
-        if announcement_data.targeted_recipient_ids:
-            for recipient_id in announcement_data.targeted_recipient_ids:
-                user = db.query(User).filter(User.id == recipient_id).first()
-                if user:
-                    announcement.targeted_recipients.append(user)
-        
         # Save to database
         db.add(announcement)
+        db.flush()  # Get the announcement ID without committing
+        
+        # Add targeted recipients with one lookup and bulk insert per chunk
+        if announcement_data.targeted_recipient_ids:
+            attach_recipients(
+                db,
+                models.announcement_recipients,
+                "announcement_id",
+                announcement.id,
+                announcement_data.targeted_recipient_ids
+            )
+        
         db.commit()
         db.refresh(announcement)
         
@@ -206,14 +211,18 @@ class AnnouncementService:
         
         # Update targeted recipients if provided
         if update_data.targeted_recipient_ids is not None:
-            # Clear existing recipients
-            announcement.targeted_recipients = []
-            
-            # Add new recipients
-            for recipient_id in update_data.targeted_recipient_ids:
-                user = db.query(User).filter(User.id == recipient_id).first()
-                if user:
-                    announcement.targeted_recipients.append(user)
+            # Replace existing recipients with set-based statements
+            db.execute(
+                delete(models.announcement_recipients)
+                .where(models.announcement_recipients.c.announcement_id == announcement.id)
+            )
+            attach_recipients(
+                db,
+                models.announcement_recipients,
+                "announcement_id",
+                announcement.id,
+                update_data.targeted_recipient_ids
+            )
         
         # Save changes
         announcement.updated_at = datetime.utcnow()
@@ -15,6 +15,7 @@ from sqlalchemy import desc
 from backend_core.config import settings
 from modules.communications import models, schemas
 from modules.communications.webhooks import WebhookService
+from modules.communications.campaigns import attach_recipients, deliver_campaign
 from backend_core.models import User  # Import User from backend_core
 
 # Configure logging
@@ -56,12 +57,14 @@ class NotificationService:
         db.add(notification)
         db.flush()  # Get the notification ID without committing
         
-        # Add recipients
-        if notification_data.recipient_ids:
-            for recipient_id in notification_data.recipient_ids:
-                user = db.query(User).get(recipient_id)
-                if user:
-                    notification.recipients.append(user)
+        # Add recipients with one lookup and bulk insert per chunk
+        recipient_ids = attach_recipients(
+            db,
+            models.notification_recipients,
+            "notification_id",
+            notification.id,
+            notification_data.recipient_ids or []
+        )
         
         # Save to database
         db.commit()
@@ -76,7 +79,7 @@ class NotificationService:
                     "notification_id": notification.id,
                     "title": notification.title,
                     "sender_id": sender_id,
-                    "recipient_ids": [r.id for r in notification.recipients],
+                    "recipient_ids": recipient_ids,
                     "notification_type": notification.notification_type.value
                 }
             )
@@ -144,13 +147,17 @@ class NotificationService:
         # Send via the appropriate delivery method
         if notification.delivery_method == models.DeliveryMethod.EMAIL:
             logger.info(f"Sending email notification {notification.id}")
-            # Implement email sending logic here
-            # ...
+            await deliver_campaign(
+                db, "email", models.notification_recipients, "notification_id", notification.id,
+                notification.content, subject=notification.title
+            )
             
         elif notification.delivery_method == models.DeliveryMethod.SMS:
             logger.info(f"Sending SMS notification {notification.id}")
-            # Implement SMS sending logic here
-            # ...
+            await deliver_campaign(
+                db, "sms", models.notification_recipients, "notification_id", notification.id,
+                notification.content
+            )
             
         elif notification.delivery_method == models.DeliveryMethod.PUSH:
             logger.info(f"Sending push notification {notification.id}")
@@ -9,14 +9,15 @@ import logging
 import json
 from datetime import datetime
 from typing import List, Optional, Dict, Any, Union
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select
 from redis import Redis
 
 from backend_core.config import settings
 from backend_core.cache import get_redis
 from modules.communications import models, schemas
+from modules.communications.template_renderer import TemplateSource, template_renderer
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -169,6 +170,7 @@ class TemplateService:
         db.refresh(template)
         
         # Invalidate cache
+        template_renderer.invalidate(template.id)
         redis = await get_redis()
         if redis:
             cache_key = f"template:{template.id}"
@@ -207,6 +209,7 @@ class TemplateService:
         db.commit()
         
         # Invalidate cache
+        template_renderer.invalidate(template_id)
         redis = await get_redis()
         if redis:
             cache_key = f"template:{template_id}"
@@ -291,26 +294,84 @@ class TemplateService:
         
         return templates
 
+    @staticmethod
+    def _get_template_source(db: Session, template_id: int) -> TemplateSource:
+        """
+        Get the source of a template for rendering.
+
+        Args:
+            db: Database session
+            template_id: ID of the template
+
+        Returns:
+            The template source
+
+        Raises:
+            HTTPException: If the template doesn't exist
+        """
+        table = models.Template.__table__
+        row = db.execute(
+            select(table.c.id, table.c.updated_at, table.c.subject, table.c.body)
+            .where(table.c.id == template_id)
+        ).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Template {template_id} not found")
+        return TemplateSource(*row)
+
     @staticmethod
     async def render_template(
-        template_content: str,
-        variables: Dict[str, Any]
-    ) -> str:
+        db: Session,
+        template_id: int,
+        context: Dict[str, Any]
+    ) -> Dict[str, str]:
+        """
+        Render a template with the provided context.
+
+        The compiled template is cached until the template is updated.
+
+        Args:
+            db: Database session
+            template_id: ID of the template to render
+            context: Context variables for rendering
+
+        Returns:
+            A dictionary with the rendered subject and body
+
+        Raises:
+            HTTPException: If the template doesn't exist or cannot be rendered
         """
-        Render a template with the provided variables.
+        template = TemplateService._get_template_source(db, template_id)
+        try:
+            return template_renderer.render(template, context)
+        except Exception as e:
+            logger.error(f"Error rendering template: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error rendering template: {str(e)}")
+
+    @staticmethod
+    async def render_templates(
+        db: Session,
+        template_id: int,
+        contexts: List[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """
+        Render a template against many contexts, e.g. for a mail merge.
+
+        Large batches are rendered in parallel worker processes.
 
         Args:
-            template_content: Template content with placeholders
-            variables: Dictionary of variables to substitute
+            db: Database session
+            template_id: ID of the template to render
+            contexts: Context variables for each rendering
 
         Returns:
-            Rendered template content
+            Rendered subject and body for each context, in order
+
+        Raises:
+            HTTPException: If the template doesn't exist or cannot be rendered
         """
-        rendered_content = template_content
-        
-        # Simple placeholder substitution
-        for key, value in variables.items():
-            placeholder = f"{{{{{key}}}}}"
-            rendered_content = rendered_content.replace(placeholder, str(value))
-        
-        return rendered_content
+        template = TemplateService._get_template_source(db, template_id)
+        try:
+            return await template_renderer.render_batch(template, contexts)
+        except Exception as e:
+            logger.error(f"Error rendering template batch: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error rendering template: {str(e)}")
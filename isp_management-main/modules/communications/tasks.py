@@ -0,0 +1,28 @@
+"""
+Celery tasks for the Communications module.
+
+This module defines Celery tasks for background processing related to
+communications, such as delivering queued webhook events.
+"""
+
+import asyncio
+import logging
+
+from celery import shared_task
+
+from modules.communications.webhooks import WebhookService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="dispatch_webhook_outbox")
+def dispatch_webhook_outbox() -> dict:
+    """
+    Deliver webhook events that are due, including retries.
+    
+    Returns:
+        Dictionary with counts of delivered, retried and failed events
+    """
+    stats = asyncio.run(WebhookService.dispatch_outbox())
+    logger.info(f"Webhook outbox dispatch finished: {stats}")
+    return stats
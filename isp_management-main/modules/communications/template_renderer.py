@@ -0,0 +1,204 @@
+"""
+Compiled template cache for the Communications module.
+
+Templates are compiled once through a shared Jinja environment and kept in
+an LRU cache keyed by the template ID and its ``updated_at`` timestamp, so
+editing a template never serves a stale compilation. Compiled code is also
+written to a bytecode cache, letting other worker processes and restarts
+skip compilation. Bulk mail-merge renders one template against many
+contexts in a process pool.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, Template as JinjaTemplate
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "256"))
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR") or None
+TEMPLATE_RENDER_WORKERS = int(os.getenv("TEMPLATE_RENDER_WORKERS", str(os.cpu_count() or 2)))
+# Batches smaller than this are rendered in the calling process
+TEMPLATE_PARALLEL_THRESHOLD = int(os.getenv("TEMPLATE_PARALLEL_THRESHOLD", "5000"))
+
+
+class TemplateSource(NamedTuple):
+    """Source of a stored template, as sent to render workers."""
+    id: int
+    updated_at: Optional[datetime]
+    subject: str
+    body: str
+
+
+class CompiledTemplate(NamedTuple):
+    """Compiled subject and body of a template."""
+    subject: JinjaTemplate
+    body: JinjaTemplate
+
+
+class TemplateRenderer:
+    """Render stored templates from a bounded cache of compiled templates."""
+
+    def __init__(
+        self,
+        cache_size: int = TEMPLATE_CACHE_SIZE,
+        bytecode_cache_dir: Optional[str] = TEMPLATE_BYTECODE_CACHE_DIR,
+        workers: int = TEMPLATE_RENDER_WORKERS,
+        parallel_threshold: int = TEMPLATE_PARALLEL_THRESHOLD
+    ):
+        """
+        Initialize the renderer.
+
+        Args:
+            cache_size: Maximum number of compiled templates kept in memory
+            bytecode_cache_dir: Directory of the bytecode cache, defaults to the temp directory
+            workers: Processes used for batch rendering
+            parallel_threshold: Smallest batch rendered in the process pool
+        """
+        self.cache_size = cache_size
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        self.environment = Environment(bytecode_cache=self.bytecode_cache)
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[Tuple[int, Optional[datetime]], CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _compile(self, name: str, source: str) -> JinjaTemplate:
+        """Compile a template, reusing bytecode compiled by any process."""
+        env = self.environment
+        bucket = self.bytecode_cache.get_bucket(env, name, None, source)
+        if bucket.code is None:
+            bucket.code = env.compile(source, name)
+            self.bytecode_cache.set_bucket(bucket)
+        return env.template_class.from_code(env, bucket.code, env.make_globals(None))
+
+    def get_compiled(self, template: TemplateSource) -> CompiledTemplate:
+        """
+        Get the compiled subject and body of a template.
+
+        Args:
+            template: Template source
+
+        Returns:
+            Compiled template, from the cache when it has not changed
+        """
+        key = (template.id, template.updated_at)
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        version = template.updated_at.isoformat() if template.updated_at else "0"
+        compiled = CompiledTemplate(
+            subject=self._compile(f"template-{template.id}-{version}-subject", template.subject or ""),
+            body=self._compile(f"template-{template.id}-{version}-body", template.body or ""),
+        )
+        with self._lock:
+            self._cache[key] = compiled
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compiled
+
+    def render(self, template: TemplateSource, context: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Render a template.
+
+        Args:
+            template: Template source
+            context: Context variables for rendering
+
+        Returns:
+            A dictionary with the rendered subject and body
+        """
+        compiled = self.get_compiled(template)
+        return {
+            "subject": compiled.subject.render(**context),
+            "body": compiled.body.render(**context),
+        }
+
+    def invalidate(self, template_id: int) -> None:
+        """
+        Drop every cached compilation of a template.
+
+        Args:
+            template_id: ID of the template
+        """
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == template_id]:
+                del self._cache[key]
+
+    def cache_info(self) -> Dict[str, int]:
+        """Get cache hits, misses and size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Process pool used for batch rendering."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    async def render_batch(
+        self,
+        template: TemplateSource,
+        contexts: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Render one template against many contexts.
+
+        Large batches are split into chunks rendered in parallel by the
+        process pool; each worker compiles the template once and renders
+        its whole chunk.
+
+        Args:
+            template: Template source
+            contexts: Context variables for each rendering; must be picklable
+            chunk_size: Contexts per worker task, defaults to an even split
+
+        Returns:
+            Rendered subject and body for each context, in order
+        """
+        if len(contexts) < self.parallel_threshold or self.workers <= 1:
+            return [self.render(template, context) for context in contexts]
+
+        chunk_size = chunk_size or max(1, math.ceil(len(contexts) / (self.workers * 4)))
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*[
+            loop.run_in_executor(self.pool, _render_chunk, template, contexts[start:start + chunk_size])
+            for start in range(0, len(contexts), chunk_size)
+        ])
+        return [rendered for chunk in chunks for rendered in chunk]
+
+    def shutdown(self) -> None:
+        """Stop the batch rendering processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+# Process-wide renderer; render workers use their own instance
+template_renderer = TemplateRenderer()
+
+
+def _render_chunk(template: TemplateSource, contexts: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Render a chunk of contexts in a worker process."""
+    return [template_renderer.render(template, context) for context in contexts]
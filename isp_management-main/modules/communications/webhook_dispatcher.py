@@ -0,0 +1,560 @@
+"""
+Webhook dispatcher for the Communications module.
+
+Webhook events are written to a persistent outbox in the same transaction
+that triggers them and delivered from there. Each dispatch run shares one
+pooled HTTP client across its deliveries and closes it when it is done,
+limits concurrent connections per destination host, retries failed deliveries with jittered exponential
+backoff, groups events into batched requests for endpoints that opt in,
+and writes the delivery logs of a dispatch run in a single bulk insert.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import math
+import os
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from core.metrics import MetricsCollector
+from modules.communications import models
+
+logger = logging.getLogger(__name__)
+metrics = MetricsCollector("webhooks")
+
+# Configuration
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100"))
+WEBHOOK_MAX_CONNECTIONS_PER_HOST = int(os.getenv("WEBHOOK_MAX_CONNECTIONS_PER_HOST", "10"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_HTTP2 = os.getenv("WEBHOOK_HTTP2", "true").lower() == "true"
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", "2"))
+WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", "3600"))
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+WEBHOOK_DISPATCH_LIMIT = int(os.getenv("WEBHOOK_DISPATCH_LIMIT", "500"))
+# Claimed entries are leased for as long as delivering them can take, plus this margin
+WEBHOOK_CLAIM_LEASE_SECONDS = int(os.getenv("WEBHOOK_CLAIM_LEASE_SECONDS", "120"))
+
+# Stored response bodies are truncated to keep the log table small
+MAX_LOGGED_RESPONSE_BODY = 2000
+
+# Event header value used for batched requests
+BATCH_EVENT = "batch"
+
+# The dispatch path works on the tables directly so claiming, status
+# updates and log writes are single set-based statements
+outbox_table = models.WebhookOutbox.__table__
+webhook_table = models.Webhook.__table__
+webhook_log_table = models.WebhookLog.__table__
+
+_update_outbox_entry = update(outbox_table).where(
+    outbox_table.c.id == bindparam("b_id")
+).values(
+    status=bindparam("b_status"),
+    attempts=bindparam("b_attempts"),
+    next_attempt_at=bindparam("b_next_attempt_at"),
+    last_error=bindparam("b_last_error"),
+    delivered_at=bindparam("b_delivered_at"),
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def generate_signature(payload: Dict[str, Any], secret: str) -> str:
+    """
+    Generate HMAC signature for webhook payload.
+
+    Args:
+        payload: Webhook payload
+        secret: Webhook secret
+
+    Returns:
+        HMAC signature
+    """
+    payload_str = json.dumps(payload, sort_keys=True)
+    hmac_obj = hmac.new(
+        key=secret.encode('utf-8'),
+        msg=payload_str.encode('utf-8'),
+        digestmod=hashlib.sha256
+    )
+    return hmac_obj.hexdigest()
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = WEBHOOK_BACKOFF_BASE,
+    cap: float = WEBHOOK_BACKOFF_MAX,
+    rng: Optional[random.Random] = None
+) -> float:
+    """
+    Get the delay before the next delivery attempt.
+
+    Uses "equal jitter": half of the exponential backoff for the attempt
+    plus a random part of up to the other half, so retries of many failed
+    deliveries to the same endpoint do not arrive in lockstep, and a
+    retry is never due again right away.
+
+    Args:
+        attempt: Number of attempts made so far (1 for the first retry)
+        base: Backoff of the first retry in seconds
+        cap: Maximum backoff in seconds
+        rng: Random number generator to use
+
+    Returns:
+        Delay in seconds
+    """
+    half = min(cap, base * (2 ** max(attempt - 1, 0))) / 2
+    return half + (rng or random).uniform(0, half)
+
+
+def build_payload(webhook: models.Webhook, event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap event data in the webhook envelope.
+
+    Args:
+        webhook: Destination webhook
+        event: Event type
+        data: Event payload
+
+    Returns:
+        Payload sent to the webhook endpoint
+    """
+    return {
+        "event": event,
+        "timestamp": datetime.utcnow().isoformat(),
+        "webhook_id": webhook.id,
+        "data": data
+    }
+
+
+class ClaimedEvent(NamedTuple):
+    """Snapshot of an outbox entry claimed for delivery."""
+    id: int
+    webhook_id: int
+    event: str
+    payload: Dict[str, Any]
+    # Attempts made, including the one the entry is claimed for
+    attempts: int
+
+
+class DeliveryResult(NamedTuple):
+    """Outcome of a single HTTP delivery."""
+    status_code: int
+    body: str
+    success: bool
+
+
+class DeliveryRun:
+    """HTTP client and per-host limits of one dispatch run."""
+
+    def __init__(self, dispatcher: "WebhookDispatcher"):
+        """
+        Initialize the run.
+
+        Args:
+            dispatcher: Dispatcher whose settings the run uses
+        """
+        self.dispatcher = dispatcher
+        self.client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "DeliveryRun":
+        dispatcher = self.dispatcher
+        self.client = httpx.AsyncClient(
+            http2=dispatcher.http2,
+            timeout=dispatcher.timeout,
+            limits=httpx.Limits(
+                max_connections=dispatcher.max_connections,
+                max_keepalive_connections=dispatcher.max_connections,
+            ),
+            transport=dispatcher.transport,
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.client.aclose()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.dispatcher.max_connections_per_host)
+        return semaphore
+
+    async def post(self, webhook: models.Webhook, event: str, payload: Any) -> DeliveryResult:
+        """
+        Send a signed payload to a webhook endpoint.
+
+        Args:
+            webhook: Destination webhook
+            event: Event type, or ``"batch"`` for batched requests
+            payload: JSON payload
+
+        Returns:
+            Result of the delivery; transport errors are reported with status 0
+        """
+        headers = dict(webhook.headers or {})
+        if webhook.secret:
+            headers["X-ISP-Signature"] = generate_signature(payload, webhook.secret)
+        headers["X-ISP-Event"] = event
+        headers["Content-Type"] = "application/json"
+
+        try:
+            async with self._host_limit(webhook.url):
+                # The timeout bounds the whole request, so claimed entries are delivered within their lease
+                response = await asyncio.wait_for(
+                    self.client.post(webhook.url, json=payload, headers=headers),
+                    self.dispatcher.timeout
+                )
+        except Exception as e:
+            logger.warning(f"Error delivering webhook {webhook.name}: {str(e) or type(e).__name__}")
+            return DeliveryResult(0, str(e) or type(e).__name__, False)
+
+        success = 200 <= response.status_code < 300
+        return DeliveryResult(response.status_code, response.text, success)
+
+
+class WebhookDispatcher:
+    """Deliver webhook events over a per-run, per-host limited connection pool."""
+
+    def __init__(
+        self,
+        max_connections: int = WEBHOOK_MAX_CONNECTIONS,
+        max_connections_per_host: int = WEBHOOK_MAX_CONNECTIONS_PER_HOST,
+        timeout: float = WEBHOOK_TIMEOUT,
+        max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+        batch_size: int = WEBHOOK_BATCH_SIZE,
+        http2: bool = WEBHOOK_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            max_connections: Maximum number of open connections
+            max_connections_per_host: Maximum concurrent requests per destination host
+            timeout: Request timeout in seconds
+            max_attempts: Delivery attempts before an event is marked failed
+            batch_size: Maximum number of events per batched request
+            http2: Use HTTP/2 when the h2 package is installed
+            transport: Custom transport, e.g. for tests
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.http2 = http2 and _http2_available()
+        self.transport = transport
+
+    def run(self) -> DeliveryRun:
+        """Get a delivery run, to be used as an async context manager."""
+        return DeliveryRun(self)
+
+    async def post(self, webhook: models.Webhook, event: str, payload: Any) -> DeliveryResult:
+        """
+        Send a signed payload to a webhook endpoint in a run of its own.
+
+        Args:
+            webhook: Destination webhook
+            event: Event type
+            payload: JSON payload
+
+        Returns:
+            Result of the delivery; transport errors are reported with status 0
+        """
+        async with self.run() as run:
+            return await run.post(webhook, event, payload)
+
+    def claim_lease_seconds(self, limit: int) -> float:
+        """
+        Get how long entries claimed in one round are leased for.
+
+        In the worst case every claimed entry goes to the same host, so its
+        requests are sent in rounds of the per-host limit, each taking up
+        to the timeout.
+
+        Args:
+            limit: Maximum number of entries claimed
+
+        Returns:
+            Lease in seconds
+        """
+        concurrency = max(1, min(self.max_connections_per_host, self.max_connections))
+        return math.ceil(limit / concurrency) * self.timeout + WEBHOOK_CLAIM_LEASE_SECONDS
+
+    def enqueue(
+        self,
+        db: Session,
+        webhooks: Iterable[models.Webhook],
+        event: str,
+        data: Dict[str, Any]
+    ) -> int:
+        """
+        Add an event to the outbox of each webhook.
+
+        The rows are inserted in the caller's transaction; they are delivered
+        once it commits.
+
+        Args:
+            db: Database session
+            webhooks: Webhooks subscribed to the event
+            event: Event type
+            data: Event payload
+
+        Returns:
+            Number of outbox entries created
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "webhook_id": webhook.id,
+                "event": event,
+                "payload": build_payload(webhook, event, data),
+                "status": models.WebhookDeliveryStatus.PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for webhook in webhooks
+        ]
+        if rows:
+            db.execute(insert(outbox_table), rows)
+        return len(rows)
+
+    def _fail_abandoned(self, db: Session, now: datetime) -> int:
+        """
+        Fail entries whose lease expired on their last attempt.
+
+        Such an entry was claimed as many times as it may be attempted
+        without its delivery ever completing, e.g. because it crashes the
+        worker, so it is not claimed again.
+        """
+        result = db.execute(
+            update(outbox_table).where(
+                outbox_table.c.status == models.WebhookDeliveryStatus.DELIVERING,
+                outbox_table.c.next_attempt_at <= now,
+                outbox_table.c.attempts >= self.max_attempts
+            ).values(
+                status=models.WebhookDeliveryStatus.FAILED,
+                last_error="Delivery did not complete within its lease"
+            )
+        )
+        if result.rowcount:
+            logger.warning(f"Failed {result.rowcount} webhook events whose last delivery attempt did not complete")
+        return result.rowcount
+
+    def _claim(self, db: Session, limit: int) -> List[ClaimedEvent]:
+        """
+        Claim due outbox entries for delivery.
+
+        Claiming an entry counts as an attempt. Claimed entries are leased
+        for as long as delivering them can take (see ``claim_lease_seconds``);
+        entries whose lease expired (e.g. the worker died) become claimable
+        again until they run out of attempts.
+        """
+        now = datetime.utcnow()
+        claimable = (models.WebhookDeliveryStatus.PENDING, models.WebhookDeliveryStatus.DELIVERING)
+        claimed = [
+            ClaimedEvent(*row[:4], row.attempts + 1)
+            for row in db.execute(
+                select(
+                    outbox_table.c.id,
+                    outbox_table.c.webhook_id,
+                    outbox_table.c.event,
+                    outbox_table.c.payload,
+                    outbox_table.c.attempts
+                ).where(
+                    outbox_table.c.status.in_(claimable),
+                    outbox_table.c.next_attempt_at <= now
+                ).order_by(outbox_table.c.id).limit(limit).with_for_update(skip_locked=True)
+            )
+        ]
+
+        if claimed:
+            db.execute(
+                update(outbox_table).where(
+                    outbox_table.c.id.in_([entry.id for entry in claimed])
+                ).values(
+                    status=models.WebhookDeliveryStatus.DELIVERING,
+                    attempts=outbox_table.c.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=self.claim_lease_seconds(limit))
+                )
+            )
+        db.commit()
+        return claimed
+
+    def _requests(
+        self, entries: List[ClaimedEvent], webhooks: Dict[int, models.Webhook]
+    ) -> List[Tuple[models.Webhook, str, Any, List[ClaimedEvent]]]:
+        """Group claimed entries into HTTP requests."""
+        requests = []
+        by_webhook = defaultdict(list)
+        for entry in entries:
+            by_webhook[entry.webhook_id].append(entry)
+
+        for webhook_id, webhook_entries in by_webhook.items():
+            webhook = webhooks[webhook_id]
+            if webhook.batch_delivery:
+                for start in range(0, len(webhook_entries), self.batch_size):
+                    batch = webhook_entries[start:start + self.batch_size]
+                    payload = {
+                        "webhook_id": webhook.id,
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "events": [entry.payload for entry in batch],
+                    }
+                    requests.append((webhook, BATCH_EVENT, payload, batch))
+            else:
+                for entry in webhook_entries:
+                    requests.append((webhook, entry.event, entry.payload, [entry]))
+        return requests
+
+    async def dispatch_pending(
+        self,
+        db: Session,
+        limit: int = WEBHOOK_DISPATCH_LIMIT,
+        run: Optional[DeliveryRun] = None
+    ) -> Dict[str, int]:
+        """
+        Deliver due outbox entries.
+
+        Args:
+            db: Database session
+            limit: Maximum number of entries to claim
+            run: Delivery run to send the requests in, a new one if not given
+
+        Returns:
+            Counts of delivered, retried and failed entries
+        """
+        if run is None:
+            async with self.run() as run:
+                return await self.dispatch_pending(db, limit, run)
+
+        stats = {"delivered": 0, "retried": 0, "failed": 0}
+        stats["failed"] += self._fail_abandoned(db, datetime.utcnow())
+        entries = self._claim(db, limit)
+        if not entries:
+            return stats
+
+        webhook_ids = {entry.webhook_id for entry in entries}
+        webhooks = {
+            webhook.id: webhook
+            for webhook in db.execute(
+                select(
+                    webhook_table.c.id,
+                    webhook_table.c.name,
+                    webhook_table.c.url,
+                    webhook_table.c.secret,
+                    webhook_table.c.headers,
+                    webhook_table.c.is_active,
+                    webhook_table.c.batch_delivery
+                ).where(webhook_table.c.id.in_(webhook_ids))
+            )
+        }
+
+        now = datetime.utcnow()
+        entry_updates = []
+
+        def record(entry, status, attempts, last_error=None, next_attempt_at=now, delivered_at=None):
+            entry_updates.append({
+                "b_id": entry.id,
+                "b_status": status,
+                "b_attempts": attempts,
+                "b_next_attempt_at": next_attempt_at,
+                "b_last_error": last_error[:MAX_LOGGED_RESPONSE_BODY] if last_error else None,
+                "b_delivered_at": delivered_at,
+            })
+
+        deliverable = []
+        for entry in entries:
+            webhook = webhooks.get(entry.webhook_id)
+            if webhook is None or not webhook.is_active:
+                record(entry, models.WebhookDeliveryStatus.FAILED, entry.attempts, "Webhook inactive")
+                stats["failed"] += 1
+            else:
+                deliverable.append(entry)
+
+        requests = self._requests(deliverable, webhooks)
+        results = await asyncio.gather(*[
+            run.post(webhook, event, payload) for webhook, event, payload, _ in requests
+        ])
+
+        log_rows = []
+        for (webhook, event, payload, batch), result in zip(requests, results):
+            log_rows.append({
+                "webhook_id": webhook.id,
+                "event": event,
+                "request_payload": payload,
+                "response_status": result.status_code,
+                "response_body": result.body[:MAX_LOGGED_RESPONSE_BODY] if result.body else result.body,
+                "success": result.success,
+                "created_at": now,
+            })
+            error = None if result.success else f"{result.status_code}: {result.body}"
+            for entry in batch:
+                attempts = entry.attempts
+                if result.success:
+                    record(entry, models.WebhookDeliveryStatus.DELIVERED, attempts, delivered_at=now)
+                    stats["delivered"] += 1
+                elif attempts >= self.max_attempts:
+                    record(entry, models.WebhookDeliveryStatus.FAILED, attempts, error)
+                    stats["failed"] += 1
+                else:
+                    retry_at = now + timedelta(seconds=backoff_delay(attempts))
+                    record(entry, models.WebhookDeliveryStatus.PENDING, attempts, error, retry_at)
+                    stats["retried"] += 1
+
+        if entry_updates:
+            db.execute(_update_outbox_entry, entry_updates)
+        if log_rows:
+            db.execute(insert(webhook_log_table), log_rows)
+        db.commit()
+
+        for outcome, count in stats.items():
+            if count:
+                metrics.increment("deliveries", count, {"outcome": outcome})
+        logger.info(
+            f"Dispatched {len(entries)} webhook events in {len(requests)} requests: "
+            f"{stats['delivered']} delivered, {stats['retried']} retried, {stats['failed']} failed"
+        )
+        return stats
+
+    async def drain(self, db: Session, limit: int = WEBHOOK_DISPATCH_LIMIT) -> Dict[str, int]:
+        """
+        Dispatch until no due entries are left.
+
+        Args:
+            db: Database session
+            limit: Maximum number of entries claimed per round
+
+        Returns:
+            Accumulated counts of delivered, retried and failed entries
+        """
+        totals = {"delivered": 0, "retried": 0, "failed": 0}
+        async with self.run() as run:
+            while True:
+                stats = await self.dispatch_pending(db, limit, run)
+                for key, value in stats.items():
+                    totals[key] += value
+                if sum(stats.values()) < limit:
+                    return totals
+
+
+# Process-wide dispatcher
+webhook_dispatcher = WebhookDispatcher()
@@ -5,19 +5,18 @@ This module provides functionality for registering, managing, and triggering web
 for various communication events in the ISP Management Platform.
 """
 
-import json
-import hmac
-import hashlib
 import logging
-import httpx
-import asyncio
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from fastapi import BackgroundTasks
 
 from backend_core.config import get_settings
+from backend_core.database import SessionLocal
 from modules.communications import models, schemas
+from modules.communications.webhook_dispatcher import (
+    webhook_dispatcher, build_payload, generate_signature
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -48,6 +47,7 @@ class WebhookService:
             url=webhook_data.url,
             events=webhook_data.events,
             is_active=webhook_data.is_active,
+            batch_delivery=webhook_data.batch_delivery,
             secret=webhook_data.secret,
             headers=webhook_data.headers,
             description=webhook_data.description,
@@ -232,27 +232,27 @@ class WebhookService:
         Returns:
             HMAC signature
         """
-        payload_str = json.dumps(payload, sort_keys=True)
-        hmac_obj = hmac.new(
-            key=secret.encode('utf-8'),
-            msg=payload_str.encode('utf-8'),
-            digestmod=hashlib.sha256
-        )
-        return hmac_obj.hexdigest()
+        return generate_signature(payload, secret)
 
     @staticmethod
     async def trigger_webhook(
         webhook: models.Webhook,
         event: str,
-        payload: Dict[str, Any]
+        payload: Dict[str, Any],
+        db: Optional[Session] = None
     ) -> bool:
         """
-        Trigger a webhook by sending an HTTP request.
+        Deliver an event to a single webhook immediately.
+        
+        This bypasses the outbox and does not retry; it is used to test
+        webhook endpoints. Events raised by the platform go through
+        ``trigger_event``.
         
         Args:
             webhook: Webhook to trigger
             event: Event type
             payload: Event payload
+            db: Database session used to record the delivery log, if given
             
         Returns:
             True if successful, False otherwise
@@ -261,72 +261,24 @@ class WebhookService:
             logger.warning(f"Webhook {webhook.name} is not active")
             return False
         
-        # Add event metadata to payload
-        full_payload = {
-            "event": event,
-            "timestamp": datetime.utcnow().isoformat(),
-            "webhook_id": webhook.id,
-            "data": payload
-        }
-        
-        # Prepare headers
-        headers = {}
-        if webhook.headers:
-            headers.update(webhook.headers)
-        
-        # Add signature if secret is provided
-        if webhook.secret:
-            signature = WebhookService.generate_signature(full_payload, webhook.secret)
-            headers["X-ISP-Signature"] = signature
-        
-        headers["X-ISP-Event"] = event
-        headers["Content-Type"] = "application/json"
+        full_payload = build_payload(webhook, event, payload)
+        result = await webhook_dispatcher.post(webhook, event, full_payload)
         
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    webhook.url,
-                    json=full_payload,
-                    headers=headers
-                )
-                
-                # Log webhook delivery
-                webhook_log = models.WebhookLog(
-                    webhook_id=webhook.id,
-                    event=event,
-                    request_payload=full_payload,
-                    response_status=response.status_code,
-                    response_body=response.text,
-                    success=200 <= response.status_code < 300
-                )
-                
-                # This needs to be done in a separate database session
-                # We'll use a background task to save the log
-                
-                if 200 <= response.status_code < 300:
-                    logger.info(f"Webhook {webhook.name} triggered successfully for event {event}")
-                    return True
-                else:
-                    logger.warning(f"Webhook {webhook.name} failed for event {event}: {response.status_code}")
-                    return False
-                
-        except Exception as e:
-            logger.error(f"Error triggering webhook {webhook.name}: {str(e)}")
-            
-            # Log webhook failure
-            webhook_log = models.WebhookLog(
+        if db is not None:
+            await WebhookService.save_webhook_log(db, models.WebhookLog(
                 webhook_id=webhook.id,
                 event=event,
                 request_payload=full_payload,
-                response_status=0,
-                response_body=str(e),
-                success=False
-            )
-            
-            # This needs to be done in a separate database session
-            # We'll use a background task to save the log
-            
-            return False
+                response_status=result.status_code,
+                response_body=result.body,
+                success=result.success
+            ))
+        
+        if result.success:
+            logger.info(f"Webhook {webhook.name} triggered successfully for event {event}")
+        else:
+            logger.warning(f"Webhook {webhook.name} failed for event {event}: {result.status_code}")
+        return result.success
 
     @staticmethod
     async def save_webhook_log(
@@ -348,46 +300,6 @@ class WebhookService:
         db.refresh(webhook_log)
         return webhook_log
 
-    @staticmethod
-    async def trigger_event(
-        db: Session,
-        event: str,
-        payload: Dict[str, Any]
-    ) -> List[bool]:
-        """
-        Trigger all webhooks for a specific event.
-        
-        Args:
-            db: Database session
-            event: Event type
-            payload: Event payload
-            
-        Returns:
-            List of success/failure for each webhook
-        """
-        webhooks = await WebhookService.get_webhooks_for_event(db, event)
-        
-        if not webhooks:
-            logger.info(f"No webhooks found for event {event}")
-            return []
-        
-        logger.info(f"Triggering {len(webhooks)} webhooks for event {event}")
-        
-        # Trigger all webhooks concurrently
-        tasks = [WebhookService.trigger_webhook(webhook, event, payload) for webhook in webhooks]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter out exceptions and convert to success/failure
-        success_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error triggering webhook {webhooks[i].name}: {str(result)}")
-                success_results.append(False)
-            else:
-                success_results.append(result)
-        
-        return success_results
-
     @staticmethod
     async def get_webhook_logs(
         db: Session,
@@ -429,6 +341,13 @@ class WebhookService:
         """
         Trigger webhooks for a specific event.
         
+        The event is written to the outbox of every subscribed webhook in the
+        caller's transaction; the caller commits. With a task runner, the
+        outbox is dispatched in the background once the response is sent;
+        otherwise the outbox entries are delivered by the
+        ``dispatch_webhook_outbox`` task, which also retries failed
+        deliveries.
+        
         Args:
             db: Database session
             event: Event type
@@ -449,23 +368,25 @@ class WebhookService:
             return False
         
         # Add timestamp to payload
-        payload["timestamp"] = datetime.utcnow().isoformat()
-        payload["event"] = event
-        
-        # Trigger each webhook
-        for webhook in webhooks:
-            if background_tasks:
-                background_tasks.add_task(
-                    WebhookService.trigger_webhook,
-                    webhook=webhook,
-                    event=event,
-                    payload=payload
-                )
-            else:
-                await WebhookService.trigger_webhook(
-                    webhook=webhook,
-                    event=event,
-                    payload=payload
-                )
+        payload = {**payload, "timestamp": datetime.utcnow().isoformat(), "event": event}
+        
+        webhook_dispatcher.enqueue(db, webhooks, event, payload)
+        
+        if background_tasks:
+            background_tasks.add_task(WebhookService.dispatch_outbox)
         
         return True
+
+    @staticmethod
+    async def dispatch_outbox() -> Dict[str, int]:
+        """
+        Deliver all due outbox entries using a dedicated database session.
+        
+        Returns:
+            Counts of delivered, retried and failed entries
+        """
+        db = SessionLocal()
+        try:
+            return await webhook_dispatcher.drain(db)
+        finally:
+            db.close()
@@ -6,12 +6,14 @@ available through a single import statement.
 """
 
 from modules.config_management.models.configuration import (
-    Configuration, ConfigurationHistory, ConfigEnvironment, ConfigCategory
+    Configuration, ConfigurationHistory, ConfigEnvironment, ConfigCategory,
+    ElasticsearchSyncState
 )
 
 __all__ = [
     'Configuration',
     'ConfigurationHistory',
     'ConfigEnvironment',
-    'ConfigCategory'
+    'ConfigCategory',
+    'ElasticsearchSyncState'
 ]
@@ -259,3 +259,24 @@ class ConfigurationGroupItem(Base):
     
     def __repr__(self):
         return f"<ConfigurationGroupItem(group_id='{self.group_id}', configuration_id='{self.configuration_id}')>"
+
+
+class ElasticsearchSyncState(Base):
+    """
+    Model for the Elasticsearch sync progress of an entity type.
+    
+    Stores the modification time and ID of the last row indexed, so each
+    sync only reads rows changed after it, and the row the last sync
+    stopped at with the number of syncs that failed to index it.
+    """
+    __tablename__ = "configuration_es_sync_state"
+    
+    entity = Column(String(50), primary_key=True)  # configurations, history, groups
+    watermark_at = Column(DateTime, nullable=True)
+    watermark_id = Column(String(50), nullable=True)
+    failed_id = Column(String(50), nullable=True)
+    failed_attempts = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ElasticsearchSyncState(entity='{self.entity}', watermark_at='{self.watermark_at}')>"
@@ -9,10 +9,13 @@ from modules.config_management.services.configuration_service import Configurati
 from modules.config_management.services.encryption_service import EncryptionService
 from modules.config_management.services.cache_service import CacheService
 from modules.config_management.services.elasticsearch_service import ConfigurationElasticsearchService
+from modules.config_management.services.snapshot_service import ConfigurationSnapshot, ConfigurationSnapshotStore
 
 __all__ = [
     "ConfigurationService",
     "EncryptionService",
     "CacheService",
-    "ConfigurationElasticsearchService"
+    "ConfigurationElasticsearchService",
+    "ConfigurationSnapshot",
+    "ConfigurationSnapshotStore"
 ]
@@ -8,32 +8,46 @@ CRUD operations, validation, and version control.
 from datetime import datetime
 import json
 import logging
+import os
 from typing import Dict, Any, List, Optional, Union, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
+from sqlalchemy import or_, and_, desc, select, tuple_, update
 from fastapi import HTTPException, status
 import jsonschema
 
 from modules.config_management.models.configuration import (
     Configuration, ConfigurationHistory, ConfigurationGroup, ConfigurationGroupItem,
-    ConfigEnvironment, ConfigCategory
+    ConfigEnvironment, ConfigCategory, ElasticsearchSyncState
 )
 from modules.config_management.services.encryption_service import EncryptionService
 from modules.config_management.services.cache_service import CacheService
 from modules.config_management.services.elasticsearch_service import ConfigurationElasticsearchService
+from modules.config_management.services.snapshot_service import (
+    ConfigurationSnapshot, ConfigurationSnapshotStore, configuration_snapshots
+)
 from sqlalchemy import func
 from sqlalchemy import exists
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+# Elasticsearch sync settings
+CONFIG_ES_SYNC_PAGE_SIZE = int(os.getenv("CONFIG_ES_SYNC_PAGE_SIZE", "1000"))
+CONFIG_ES_SYNC_CHUNK_SIZE = int(os.getenv("CONFIG_ES_SYNC_CHUNK_SIZE", "500"))
+# Rows changed this many seconds before the watermark are read again, covering
+# transactions that committed after a later change was already synced
+CONFIG_ES_SYNC_OVERLAP_SECONDS = int(os.getenv("CONFIG_ES_SYNC_OVERLAP_SECONDS", "30"))
+# Syncs that may stop at the same failed document before it is skipped
+CONFIG_ES_SYNC_MAX_ATTEMPTS = int(os.getenv("CONFIG_ES_SYNC_MAX_ATTEMPTS", "5"))
+
 
 class ConfigurationService:
     """Service for managing system configurations."""
     
     def __init__(self, db: Session, encryption_service: Optional[EncryptionService] = None, 
                  cache_service: Optional[CacheService] = None,
-                 es_service: Optional[ConfigurationElasticsearchService] = None):
+                 es_service: Optional[ConfigurationElasticsearchService] = None,
+                 snapshot_store: Optional[ConfigurationSnapshotStore] = None):
         """
         Initialize the configuration service.
         
@@ -42,10 +56,12 @@ class ConfigurationService:
             encryption_service: Service for encrypting/decrypting sensitive configurations
             cache_service: Service for caching frequently accessed configurations
             es_service: Service for Elasticsearch integration
+            snapshot_store: Store of configuration value snapshots (defaults to the process-wide store)
         """
         self.db = db
         self.encryption_service = encryption_service or EncryptionService()
         self.cache_service = cache_service or CacheService()
+        self.snapshot_store = snapshot_store or configuration_snapshots
         self.es_service = es_service
         self.elasticsearch_enabled = es_service is not None
     
@@ -109,6 +125,9 @@ class ConfigurationService:
         """
         Get a configuration value by key and environment.
         
+        Values are read from the environment's configuration snapshot, where
+        encrypted values are already decrypted.
+        
         Args:
             key: Configuration key
             environment: Environment to get configuration for (defaults to current environment)
@@ -117,8 +136,24 @@ class ConfigurationService:
         Returns:
             Configuration value if found, default otherwise
         """
-        config = self.get_configuration(key, environment)
-        return config.value if config else default
+        try:
+            snapshot = self.get_configuration_snapshot(environment)
+        except Exception as e:
+            logger.error(f"Error getting configuration value: {str(e)}")
+            return default
+        return snapshot.get(key, default)
+    
+    def get_configuration_snapshot(self, environment: Optional[str] = None) -> ConfigurationSnapshot:
+        """
+        Get the snapshot of the active configuration values of an environment.
+        
+        Args:
+            environment: Environment to get the snapshot for (defaults to all environments)
+            
+        Returns:
+            Immutable snapshot of decrypted configuration values
+        """
+        return self.snapshot_store.get(self.db, environment or ConfigEnvironment.ALL, self.encryption_service)
     
     def get_configurations(self, filters: Dict[str, Any] = None, 
                           skip: int = 0, limit: int = 100) -> List[Configuration]:
@@ -256,6 +291,7 @@ class ConfigurationService:
             
             # Add to cache
             self.cache_service.set_configuration(config)
+            self.snapshot_store.invalidate(config.environment)
             
             # Index in Elasticsearch if enabled
             if self.elasticsearch_enabled:
@@ -358,6 +394,7 @@ class ConfigurationService:
             
             # Update cache
             self.cache_service.set_configuration(config)
+            self.snapshot_store.invalidate(config.environment)
             
             # Index in Elasticsearch if enabled
             if self.elasticsearch_enabled:
@@ -430,6 +467,7 @@ class ConfigurationService:
             
             # Remove from cache
             self.cache_service.delete_configuration(key, environment)
+            self.snapshot_store.invalidate(config.environment)
             
             # Update in Elasticsearch if enabled
             if self.elasticsearch_enabled:
@@ -983,9 +1021,25 @@ class ConfigurationService:
                 detail=f"Error getting configuration statistics: {str(e)}"
             )
     
-    def sync_configurations_to_elasticsearch(self) -> Dict[str, int]:
+    def sync_configurations_to_elasticsearch(
+        self,
+        page_size: int = CONFIG_ES_SYNC_PAGE_SIZE,
+        chunk_size: int = CONFIG_ES_SYNC_CHUNK_SIZE,
+        overlap_seconds: int = CONFIG_ES_SYNC_OVERLAP_SECONDS
+    ) -> Dict[str, int]:
         """
-        Sync all configurations, configuration history, and configuration groups to Elasticsearch.
+        Sync changed configurations, configuration history, and configuration groups to Elasticsearch.
+        
+        Only rows changed since the persisted watermark of each entity type
+        are read, a page at a time in (modification time, ID) order. Each
+        page is streamed to Elasticsearch in bounded bulk requests, marked
+        synced with a single UPDATE and committed together with the new
+        watermark.
+        
+        Args:
+            page_size: Rows read from the database per page
+            chunk_size: Documents per bulk request
+            overlap_seconds: Seconds before the watermark that are read again
         
         Returns:
             Dictionary with counts of indexed items
@@ -1000,44 +1054,23 @@ class ConfigurationService:
             )
         
         try:
-            # Get all configurations that haven't been synced or have been updated
-            configurations = self.db.query(Configuration).filter(
-                or_(
-                    Configuration.elasticsearch_synced == False,
-                    and_(
-                        Configuration.updated_at != None,
-                        Configuration.updated_at > Configuration.created_at
-                    )
-                )
-            ).all()
-            
-            # Get all configuration history items that haven't been synced
-            history_items = self.db.query(ConfigurationHistory).filter(
-                ConfigurationHistory.elasticsearch_synced == False
-            ).all()
-            
-            # Get all configuration groups that haven't been synced or have been updated
-            groups = self.db.query(ConfigurationGroup).filter(
-                or_(
-                    ConfigurationGroup.elasticsearch_synced == False,
-                    and_(
-                        ConfigurationGroup.updated_at != None,
-                        ConfigurationGroup.updated_at > ConfigurationGroup.created_at
-                    )
-                )
-            ).all()
-            
-            # Bulk index configurations
-            config_count = self.es_service.bulk_index_configurations(configurations)
-            
-            # Bulk index configuration history
-            history_count = self.es_service.bulk_index_configuration_history(history_items)
-            
-            # Bulk index configuration groups
-            group_count = self.es_service.bulk_index_configuration_groups(groups)
-            
-            # Commit the changes to the database
-            self.db.commit()
+            config_count = self._sync_entity(
+                "configurations", Configuration.__table__,
+                func.coalesce(Configuration.updated_at, Configuration.created_at),
+                self.es_service.config_index, self.es_service.configuration_document,
+                page_size, chunk_size, overlap_seconds
+            )
+            history_count = self._sync_entity(
+                "history", ConfigurationHistory.__table__, ConfigurationHistory.created_at,
+                self.es_service.config_history_index, self.es_service.history_document,
+                page_size, chunk_size, overlap_seconds
+            )
+            group_count = self._sync_entity(
+                "groups", ConfigurationGroup.__table__,
+                func.coalesce(ConfigurationGroup.updated_at, ConfigurationGroup.created_at),
+                self.es_service.config_group_index, self.es_service.group_document,
+                page_size, chunk_size, overlap_seconds
+            )
             
             return {
                 "configurations_indexed": config_count,
@@ -1052,6 +1085,101 @@ class ConfigurationService:
                 detail=f"Error syncing configurations to Elasticsearch: {str(e)}"
             )
     
+    def _sync_entity(self, entity: str, table, changed_at, index: str, build_document,
+                     page_size: int, chunk_size: int, overlap_seconds: int) -> int:
+        """
+        Index the rows of one entity type changed since its watermark.
+        
+        Unsynced rows up to ``overlap_seconds`` before the watermark are
+        indexed first; they belong to transactions that committed after a
+        later change had been synced. The watermark only moves past rows
+        that were indexed, and the first failed document ends the sync of
+        the entity so that it is retried on the next run. A document that
+        fails in CONFIG_ES_SYNC_MAX_ATTEMPTS syncs in a row is logged as
+        failed and skipped: it stays unsynced and the watermark moves past
+        it.
+        
+        Returns:
+            Number of rows indexed
+        """
+        state = self.db.get(ElasticsearchSyncState, entity)
+        if state is None:
+            state = ElasticsearchSyncState(entity=entity)
+            self.db.add(state)
+        
+        # Marking rows synced must not count as a change
+        mark_synced = {"elasticsearch_synced": True}
+        if "updated_at" in table.c:
+            mark_synced["updated_at"] = table.c.updated_at
+        
+        def index_rows(rows):
+            results = list(self.es_service.stream_index(
+                index, (build_document(row) for row in rows), chunk_size=chunk_size
+            ))
+            synced_ids = [document_id for ok, document_id in results if ok]
+            if synced_ids:
+                self.db.execute(update(table).where(table.c.id.in_(synced_ids)).values(**mark_synced))
+            failures = [i for i, (ok, _) in enumerate(results) if not ok]
+            return len(synced_ids), failures
+        
+        query = select(table, changed_at.label("changed_at")).order_by(changed_at, table.c.id).limit(page_size)
+        indexed = 0
+        position = None
+        if state.watermark_at is not None:
+            position = (state.watermark_at, state.watermark_id or "")
+            if overlap_seconds:
+                stragglers = self.db.execute(query.where(
+                    changed_at >= state.watermark_at - timedelta(seconds=overlap_seconds),
+                    tuple_(changed_at, table.c.id) <= tuple_(*position),
+                    table.c.elasticsearch_synced == False
+                )).all()
+                if stragglers:
+                    indexed += index_rows(stragglers)[0]
+                    self.db.commit()
+        
+        while True:
+            page = query if position is None else query.where(tuple_(changed_at, table.c.id) > tuple_(*position))
+            rows = self.db.execute(page).all()
+            if not rows:
+                break
+            
+            synced, failures = index_rows(rows)
+            indexed += synced
+            
+            stopped_at = None
+            for failed_at in failures:
+                failed = rows[failed_at]
+                if state.failed_id == str(failed.id):
+                    state.failed_attempts = (state.failed_attempts or 0) + 1
+                else:
+                    state.failed_id, state.failed_attempts = str(failed.id), 1
+                if state.failed_attempts < CONFIG_ES_SYNC_MAX_ATTEMPTS:
+                    stopped_at = failed_at
+                    break
+                logger.error(
+                    f"Elasticsearch sync of {entity} {failed.id} failed {state.failed_attempts} times, skipping it"
+                )
+            if stopped_at is None:
+                state.failed_id, state.failed_attempts = None, 0
+            
+            last = rows[-1] if stopped_at is None else (rows[stopped_at - 1] if stopped_at else None)
+            if last is not None:
+                position = (last.changed_at, last.id)
+                state.watermark_at, state.watermark_id = position
+            self.db.commit()
+            
+            if stopped_at is not None:
+                logger.warning(
+                    f"Elasticsearch sync of {entity} stopped at {state.failed_id} "
+                    f"(attempt {state.failed_attempts}), retrying next run"
+                )
+                break
+            if len(rows) < page_size:
+                break
+        
+        logger.info(f"Synced {indexed} {entity} to Elasticsearch")
+        return indexed
+    
     def cleanup_old_history(self, days_to_keep: int = 90) -> int:
         """
         Clean up old configuration history entries.
@@ -7,7 +7,7 @@ This module provides functionality for indexing and searching configurations in
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
 
 from elasticsearch import Elasticsearch, helpers
 from fastapi import HTTPException, status
@@ -237,6 +237,109 @@ class ConfigurationElasticsearchService:
             logger.error(f"Error indexing configuration group {group.id}: {str(e)}")
             raise
 
+    def configuration_document(self, config: Configuration) -> Dict[str, Any]:
+        """
+        Build the bulk document of a configuration.
+
+        Args:
+            config: Configuration, or a row with the same columns
+
+        Returns:
+            Document to index
+        """
+        return {
+            "id": config.id,
+            "key": config.key,
+            "value": config.value,
+            "description": config.description,
+            "environment": config.environment.value,
+            "category": config.category.value,
+            "is_encrypted": config.is_encrypted,
+            "version": config.version,
+            "is_active": config.is_active,
+            "created_by": config.created_by,
+            "created_at": config.created_at.isoformat() if config.created_at else None,
+            "updated_by": config.updated_by,
+            "updated_at": config.updated_at.isoformat() if config.updated_at else None,
+            "elasticsearch_synced": True
+        }
+
+    def history_document(self, history: ConfigurationHistory) -> Dict[str, Any]:
+        """
+        Build the bulk document of a configuration history item.
+
+        Args:
+            history: Configuration history item, or a row with the same columns
+
+        Returns:
+            Document to index
+        """
+        return {
+            "id": history.id,
+            "configuration_id": history.configuration_id,
+            "key": history.key,
+            "value": history.value,
+            "environment": history.environment.value,
+            "category": history.category.value,
+            "is_encrypted": history.is_encrypted,
+            "version": history.version,
+            "action": history.action,
+            "created_by": history.created_by,
+            "created_at": history.created_at.isoformat() if history.created_at else None,
+            "elasticsearch_synced": True
+        }
+
+    def group_document(self, group: ConfigurationGroup) -> Dict[str, Any]:
+        """
+        Build the bulk document of a configuration group.
+
+        Args:
+            group: Configuration group, or a row with the same columns
+
+        Returns:
+            Document to index
+        """
+        return {
+            "id": group.id,
+            "name": group.name,
+            "description": group.description,
+            "created_by": group.created_by,
+            "created_at": group.created_at.isoformat() if group.created_at else None,
+            "updated_by": group.updated_by,
+            "updated_at": group.updated_at.isoformat() if group.updated_at else None,
+            "elasticsearch_synced": True
+        }
+
+    def stream_index(self, index: str, documents: Iterable[Dict[str, Any]],
+                     chunk_size: int = 500) -> Iterator[Tuple[bool, str]]:
+        """
+        Index documents with the streaming bulk helper.
+
+        Documents are sent in bulk requests of at most ``chunk_size``
+        documents, and failures are reported per document instead of
+        aborting the whole operation.
+
+        Args:
+            index: Index to write to
+            documents: Documents to index, each with an ``id``
+            chunk_size: Maximum number of documents per bulk request
+
+        Returns:
+            Iterator of (success, document ID) in the order of the documents
+        """
+        actions = (
+            {"_index": index, "_id": document["id"], "_source": document}
+            for document in documents
+        )
+        for ok, item in helpers.streaming_bulk(
+            self.es_client, actions, chunk_size=chunk_size,
+            raise_on_error=False, raise_on_exception=False
+        ):
+            result = next(iter(item.values()))
+            if not ok:
+                logger.warning(f"Error indexing document {result.get('_id')} in {index}: {result.get('error')}")
+            yield ok, result.get("_id")
+
     def bulk_index_configurations(self, configurations: List[Configuration]) -> int:
         """
         Bulk index configurations.
@@ -258,24 +361,7 @@ class ConfigurationElasticsearchService:
                     "index": {"_id": config.id}
                 }
                 actions.append(action)
-                
-                doc = {
-                    "id": config.id,
-                    "key": config.key,
-                    "value": config.value,
-                    "description": config.description,
-                    "environment": config.environment.value,
-                    "category": config.category.value,
-                    "is_encrypted": config.is_encrypted,
-                    "version": config.version,
-                    "is_active": config.is_active,
-                    "created_by": config.created_by,
-                    "created_at": config.created_at.isoformat() if config.created_at else None,
-                    "updated_by": config.updated_by,
-                    "updated_at": config.updated_at.isoformat() if config.updated_at else None,
-                    "elasticsearch_synced": True
-                }
-                actions.append(doc)
+                actions.append(self.configuration_document(config))
             
             if not actions:
                 return 0
@@ -319,22 +405,7 @@ class ConfigurationElasticsearchService:
                     "index": {"_id": history.id}
                 }
                 actions.append(action)
-                
-                doc = {
-                    "id": history.id,
-                    "configuration_id": history.configuration_id,
-                    "key": history.key,
-                    "value": history.value,
-                    "environment": history.environment.value,
-                    "category": history.category.value,
-                    "is_encrypted": history.is_encrypted,
-                    "version": history.version,
-                    "action": history.action,
-                    "created_by": history.created_by,
-                    "created_at": history.created_at.isoformat() if history.created_at else None,
-                    "elasticsearch_synced": True
-                }
-                actions.append(doc)
+                actions.append(self.history_document(history))
             
             if not actions:
                 return 0
@@ -378,18 +449,7 @@ class ConfigurationElasticsearchService:
                     "index": {"_id": group.id}
                 }
                 actions.append(action)
-                
-                doc = {
-                    "id": group.id,
-                    "name": group.name,
-                    "description": group.description,
-                    "created_by": group.created_by,
-                    "created_at": group.created_at.isoformat() if group.created_at else None,
-                    "updated_by": group.updated_by,
-                    "updated_at": group.updated_at.isoformat() if group.updated_at else None,
-                    "elasticsearch_synced": True
-                }
-                actions.append(doc)
+                actions.append(self.group_document(group))
             
             if not actions:
                 return 0
@@ -0,0 +1,233 @@
+"""
+Configuration snapshot service for the Configuration Management Module.
+
+This service keeps an immutable snapshot of the active configuration values
+of each environment in memory, with encrypted values decrypted once when
+the snapshot is built, so reading a value is a dictionary lookup.
+
+Snapshots are versioned by a cheap aggregate over the configurations table
+and replaced as a whole when the version changes. Each worker polls the
+version at most every CONFIG_SNAPSHOT_POLL_INTERVAL seconds; when
+CONFIG_SNAPSHOT_REDIS_URL is set, writes are also announced over Redis
+pub/sub so every worker drops its snapshots immediately.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from modules.config_management.models.configuration import Configuration, ConfigEnvironment
+from modules.config_management.services.encryption_service import EncryptionService
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CONFIG_SNAPSHOT_POLL_INTERVAL = float(os.getenv("CONFIG_SNAPSHOT_POLL_INTERVAL", "5"))
+CONFIG_SNAPSHOT_REDIS_URL = os.getenv("CONFIG_SNAPSHOT_REDIS_URL") or None
+CONFIG_SNAPSHOT_CHANNEL = os.getenv("CONFIG_SNAPSHOT_CHANNEL", "config_management:snapshots")
+
+# Published to drop the snapshots of every environment
+ALL_ENVIRONMENTS = "*"
+
+
+class ConfigurationSnapshot(NamedTuple):
+    """Active configuration values of an environment at one version."""
+    environment: str
+    version: Tuple[int, Optional[datetime]]
+    values: Mapping[str, Any]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get a configuration value.
+
+        Args:
+            key: Configuration key
+            default: Value returned if the key is not configured
+
+        Returns:
+            Configuration value if found, default otherwise
+        """
+        return self.values.get(key, default)
+
+
+def _environment_name(environment: Any) -> str:
+    """Get the plain name of an environment."""
+    return getattr(environment, "value", environment) or ConfigEnvironment.ALL.value
+
+
+def get_configuration_version(db: Session) -> Tuple[int, Optional[datetime]]:
+    """
+    Get the current version of the configurations.
+
+    Every create, update and deactivation changes either the number of
+    configurations or their latest modification time.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of configurations and the latest modification time
+    """
+    count, modified = db.execute(
+        select(func.count(Configuration.id), func.max(func.coalesce(Configuration.updated_at, Configuration.created_at)))
+    ).one()
+    return count, modified
+
+
+class ConfigurationSnapshotStore:
+    """Process-wide store of configuration snapshots."""
+
+    def __init__(
+        self,
+        poll_interval: float = CONFIG_SNAPSHOT_POLL_INTERVAL,
+        redis_client: Optional[redis.Redis] = None,
+        channel: str = CONFIG_SNAPSHOT_CHANNEL
+    ):
+        """
+        Initialize the snapshot store.
+
+        Args:
+            poll_interval: Seconds between checks of the configuration version
+            redis_client: Redis client used to announce and receive invalidations
+            channel: Redis pub/sub channel of invalidations
+        """
+        self.poll_interval = poll_interval
+        self.redis = redis_client
+        self.channel = channel
+        self._snapshots: Dict[str, ConfigurationSnapshot] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def get(
+        self,
+        db: Session,
+        environment: Any = ConfigEnvironment.ALL,
+        encryption_service: Optional[EncryptionService] = None
+    ) -> ConfigurationSnapshot:
+        """
+        Get the snapshot of an environment.
+
+        The snapshot is returned as is until the poll interval has passed;
+        it is then rebuilt only if the configuration version has changed.
+
+        Args:
+            db: Database session used to check the version and rebuild
+            environment: Configuration environment
+            encryption_service: Service used to decrypt encrypted values
+
+        Returns:
+            Configuration snapshot of the environment
+        """
+        environment = _environment_name(environment)
+        snapshot = self._snapshots.get(environment)
+        if snapshot is not None and time.monotonic() - self._checked.get(environment, 0.0) < self.poll_interval:
+            return snapshot
+
+        self._start_listener()
+        with self._lock:
+            snapshot = self._snapshots.get(environment)
+            version = get_configuration_version(db)
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build(db, environment, version, encryption_service)
+                self._snapshots[environment] = snapshot
+            self._checked[environment] = time.monotonic()
+        return snapshot
+
+    def _build(
+        self,
+        db: Session,
+        environment: str,
+        version: Tuple[int, Optional[datetime]],
+        encryption_service: Optional[EncryptionService]
+    ) -> ConfigurationSnapshot:
+        """Load and decrypt the active configurations of an environment."""
+        rows = db.execute(
+            select(Configuration.key, Configuration.value, Configuration.is_encrypted, Configuration.environment)
+            .where(
+                Configuration.is_active == True,
+                Configuration.environment.in_({environment, ConfigEnvironment.ALL.value})
+            )
+        ).all()
+
+        values: Dict[str, Any] = {}
+        # Configurations of the environment itself take precedence over ALL
+        for row in sorted(rows, key=lambda row: _environment_name(row.environment) == environment):
+            value = row.value
+            if row.is_encrypted and encryption_service:
+                try:
+                    value = encryption_service.decrypt(value)
+                except Exception as e:
+                    logger.error(f"Error decrypting configuration '{row.key}': {str(e)}")
+                    continue
+            values[row.key] = value
+
+        logger.debug(f"Built configuration snapshot for '{environment}' with {len(values)} values")
+        return ConfigurationSnapshot(environment, version, MappingProxyType(values))
+
+    def invalidate(self, environment: Any = None, publish: bool = True) -> None:
+        """
+        Drop snapshots so they are rebuilt on next use.
+
+        Changing a configuration of all environments drops every snapshot.
+
+        Args:
+            environment: Environment of the changed configuration, None for all
+            publish: Whether to tell the other workers
+        """
+        environment = getattr(environment, "value", environment)
+        if environment in (None, ConfigEnvironment.ALL.value):
+            environment = ALL_ENVIRONMENTS
+        self._drop(environment)
+
+        if publish and self.redis is not None:
+            try:
+                self.redis.publish(self.channel, environment)
+            except redis.RedisError as e:
+                logger.warning(f"Could not publish configuration invalidation: {str(e)}")
+
+    def _drop(self, environment: str) -> None:
+        """Drop the snapshots of an environment, or all of them."""
+        with self._lock:
+            if environment == ALL_ENVIRONMENTS:
+                self._snapshots = {}
+            else:
+                self._snapshots.pop(environment, None)
+
+    def _start_listener(self) -> None:
+        """Start listening for invalidations from other workers."""
+        if self.redis is None or self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        """Drop snapshots named by invalidation messages, resubscribing on errors."""
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Messages may have been missed while not subscribed
+                self._drop(ALL_ENVIRONMENTS)
+                for message in pubsub.listen():
+                    data = message.get("data")
+                    self._drop(data.decode() if isinstance(data, bytes) else str(data))
+            except Exception as e:
+                logger.warning(f"Configuration invalidation listener error: {str(e)}")
+                time.sleep(self.poll_interval or 1)
+
+
+# Process-wide snapshot store shared by all configuration services
+configuration_snapshots = ConfigurationSnapshotStore(
+    redis_client=redis.Redis.from_url(CONFIG_SNAPSHOT_REDIS_URL) if CONFIG_SNAPSHOT_REDIS_URL else None
+)
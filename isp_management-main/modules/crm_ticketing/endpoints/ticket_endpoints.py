@@ -14,7 +14,7 @@ from backend_core.auth import get_current_user, require_permissions
 from ..services.ticket_service import TicketService
 from ..schemas.ticket import (
     Ticket, TicketCreate, TicketUpdate, TicketComment, TicketCommentCreate,
-    TicketAttachment, Tag, TagCreate, TagUpdate
+    TicketAttachment, Tag, TagCreate, TagUpdate, TicketSearchResponse
 )
 from ..schemas.common import TicketStatus, TicketPriority, TicketType
 
@@ -65,6 +65,46 @@ async def list_tickets(
     )
 
 
+@router.get("/search", response_model=TicketSearchResponse)
+async def search_tickets(
+    q: str = Query(..., min_length=1, description="Search terms, matched as prefixes"),
+    limit: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor returned with the previous page"),
+    status: Optional[TicketStatus] = None,
+    priority: Optional[TicketPriority] = None,
+    assigned_to: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Search tickets by relevance.
+    
+    Args:
+        q: Search terms
+        limit: Maximum number of records to return
+        cursor: Cursor of the next page from a previous search
+        status: Optional filter by ticket status
+        priority: Optional filter by ticket priority
+        assigned_to: Optional filter by assigned user ID
+        customer_id: Optional filter by customer ID
+        
+    Returns:
+        A page of matching tickets with the total number of matches
+    """
+    require_permissions(current_user, ["crm.view_ticket"])
+    ticket_service = TicketService(db)
+    return ticket_service.search_tickets(
+        q,
+        limit=limit,
+        cursor=cursor,
+        status=[status] if status else None,
+        priority=[priority] if priority else None,
+        assigned_to=assigned_to,
+        customer_id=customer_id
+    )
+
+
 @router.get("/{ticket_id}", response_model=Ticket)
 async def get_ticket(
     ticket_id: int = Path(..., description="The ID of the ticket to retrieve"),
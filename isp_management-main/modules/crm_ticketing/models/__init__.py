@@ -3,9 +3,9 @@ Database models for the CRM & Ticketing module.
 """
 
 from .customer import Customer, CustomerContact, CustomerNote
-from .ticket import Ticket, TicketComment, TicketAttachment, TicketHistory
+from .ticket import Ticket, TicketComment, TicketAttachment, TicketHistory, TicketSearchDocument, TicketNumberCounter
 from .knowledge_base import KnowledgeBaseArticle, KnowledgeBaseCategory
-from .sla import SLA, SLAMetric
+from .sla import SLA, SLAMetric, SLADailySummary, SLASummaryState
 from .common import TicketPriority, TicketStatus, TicketType, ContactType, ContactMethod
 
 __all__ = [
@@ -16,10 +16,14 @@ __all__ = [
     "TicketComment",
     "TicketAttachment",
     "TicketHistory",
+    "TicketSearchDocument",
+    "TicketNumberCounter",
     "KnowledgeBaseArticle",
     "KnowledgeBaseCategory",
     "SLA",
     "SLAMetric",
+    "SLADailySummary",
+    "SLASummaryState",
     "TicketPriority",
     "TicketStatus",
     "TicketType",
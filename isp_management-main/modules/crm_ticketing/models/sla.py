@@ -4,7 +4,7 @@ SLA (Service Level Agreement) models for the CRM & Ticketing module.
 
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Text, ForeignKey, JSON, Enum, Float, Index
 from sqlalchemy.orm import relationship
 
 from backend_core.database import Base
@@ -110,3 +110,57 @@ class SLAMetric(Base):
     
     def __repr__(self):
         return f"<SLAMetric(id={self.id}, period={self.period_start} to {self.period_end})>"
+
+
+class SLADailySummary(Base):
+    """
+    SLA aggregates of the tickets created on a day.
+
+    Holds additive counts and sums per day, SLA and priority so that SLA
+    performance over closed days is read from a few summary rows instead of
+    every ticket. Rows are rebuilt by ``SLAService.refresh_sla_summary``.
+    """
+    __tablename__ = "crm_sla_daily_summary"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    sla_id = Column(Integer, ForeignKey("crm_slas.id", ondelete="CASCADE"), nullable=True)
+    priority = Column(Enum(TicketPriority), nullable=False)
+
+    total = Column(Integer, default=0, nullable=False)
+    resolved = Column(Integer, default=0, nullable=False)
+    first_response_breached = Column(Integer, default=0, nullable=False)
+    resolution_breached = Column(Integer, default=0, nullable=False)
+
+    # Sums of response and resolution times in seconds, with their counts
+    first_response_count = Column(Integer, default=0, nullable=False)
+    first_response_seconds = Column(Float, default=0.0, nullable=False)
+    resolution_count = Column(Integer, default=0, nullable=False)
+    resolution_seconds = Column(Float, default=0.0, nullable=False)
+
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_crm_sla_daily_summary_day_sla", "day", "sla_id"),
+    )
+
+    def __repr__(self):
+        return f"<SLADailySummary(day={self.day}, sla_id={self.sla_id}, priority={self.priority})>"
+
+
+class SLASummaryState(Base):
+    """
+    Refresh state of the SLA daily summary.
+
+    A single row recording the first day not yet summarized and when the
+    last refresh started, so the next refresh only rebuilds new days and
+    days whose tickets changed since.
+    """
+    __tablename__ = "crm_sla_summary_state"
+
+    id = Column(Integer, primary_key=True)
+    summarized_through = Column(Date, nullable=True)  # Days before this date are summarized
+    last_refreshed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<SLASummaryState(summarized_through={self.summarized_through})>"
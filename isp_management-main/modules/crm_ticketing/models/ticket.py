@@ -4,7 +4,8 @@ Ticket models for the CRM & Ticketing module.
 
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Table, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 
 from backend_core.database import Base
@@ -81,11 +82,11 @@ class Ticket(Base):
     
     # Custom fields and metadata
     custom_fields = Column(JSON, default=dict)
-    metadata = Column(JSON, default=dict)
+    ticket_metadata = Column("metadata", JSON, default=dict)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     resolved_at = Column(DateTime, nullable=True)
     closed_at = Column(DateTime, nullable=True)
     
@@ -208,3 +209,43 @@ class TicketHistory(Base):
     
     def __repr__(self):
         return f"<TicketHistory(id={self.id}, field={self.field_name})>"
+
+
+class TicketSearchDocument(Base):
+    """
+    Full-text search document of a ticket.
+    
+    Holds a weighted tsvector over the ticket number and subject (A), the
+    description (B) and the comments (C), kept up to date by the search
+    service whenever a ticket is created, updated or commented on.
+    """
+    __tablename__ = "crm_ticket_search"
+    __table_args__ = (
+        Index("ix_crm_ticket_search_document", "document", postgresql_using="gin"),
+    )
+    
+    ticket_id = Column(Integer, ForeignKey("crm_tickets.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<TicketSearchDocument(ticket_id={self.ticket_id})>"
+
+
+class TicketNumberCounter(Base):
+    """
+    Daily counter of ticket numbers.
+    
+    Holds the highest sequential number handed out for a day. Allocators
+    reserve numbers from it in blocks, so the row is touched once per block
+    rather than once per ticket.
+    """
+    __tablename__ = "crm_ticket_number_counters"
+    
+    day = Column(String(8), primary_key=True)  # YYYYMMDD
+    last_value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TicketNumberCounter(day={self.day}, last_value={self.last_value})>"
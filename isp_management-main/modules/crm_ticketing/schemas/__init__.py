@@ -8,7 +8,7 @@ from .customer import (
     CustomerNoteBase, CustomerNoteCreate, CustomerNoteUpdate, CustomerNoteResponse
 )
 from .ticket import (
-    TicketBase, TicketCreate, TicketUpdate, TicketResponse,
+    TicketBase, TicketCreate, TicketUpdate, TicketResponse, TicketSearchResponse,
     TicketCommentBase, TicketCommentCreate, TicketCommentUpdate, TicketCommentResponse,
     TicketAttachmentBase, TicketAttachmentCreate, TicketAttachmentResponse,
     TicketHistoryResponse, TagBase, TagCreate, TagUpdate, TagResponse
@@ -30,7 +30,7 @@ __all__ = [
     "CustomerBase", "CustomerCreate", "CustomerUpdate", "CustomerResponse",
     "CustomerContactBase", "CustomerContactCreate", "CustomerContactUpdate", "CustomerContactResponse",
     "CustomerNoteBase", "CustomerNoteCreate", "CustomerNoteUpdate", "CustomerNoteResponse",
-    "TicketBase", "TicketCreate", "TicketUpdate", "TicketResponse",
+    "TicketBase", "TicketCreate", "TicketUpdate", "TicketResponse", "TicketSearchResponse",
     "TicketCommentBase", "TicketCommentCreate", "TicketCommentUpdate", "TicketCommentResponse",
     "TicketAttachmentBase", "TicketAttachmentCreate", "TicketAttachmentResponse",
     "TicketHistoryResponse", "TagBase", "TagCreate", "TagUpdate", "TagResponse",
@@ -4,7 +4,7 @@ Ticket schemas for the CRM & Ticketing module.
 
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import AliasChoices, BaseModel, Field, validator
 
 from .common import TicketStatusEnum, TicketPriorityEnum, TicketTypeEnum, ContactMethodEnum, SLAStatusEnum
 
@@ -51,7 +51,12 @@ class TicketBase(BaseModel):
     parent_ticket_id: Optional[int] = Field(None, description="ID of the parent ticket if this is a sub-ticket")
     related_service_id: Optional[int] = Field(None, description="ID of the service related to this ticket")
     custom_fields: Optional[Dict[str, Any]] = Field(None, description="Custom fields for the ticket")
-    metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata for the ticket")
+    # Tickets store it as ticket_metadata, as metadata is reserved on models
+    metadata: Optional[Dict[str, Any]] = Field(
+        None,
+        validation_alias=AliasChoices("ticket_metadata", "metadata"),
+        description="Additional metadata for the ticket"
+    )
     tag_ids: Optional[List[int]] = Field(None, description="IDs of tags associated with the ticket")
 
 
@@ -110,6 +115,13 @@ class TicketResponse(TicketBase):
         orm_mode = True
 
 
+class TicketSearchResponse(BaseModel):
+    """Schema for a page of ticket search results."""
+    items: List[TicketResponse]
+    total: Optional[int] = Field(None, description="Number of matching tickets")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, if any")
+
+
 class TicketCommentBase(BaseModel):
     """Base schema for ticket comments."""
     content: str = Field(..., description="Comment content")
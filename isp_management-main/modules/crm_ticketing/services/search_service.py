@@ -0,0 +1,397 @@
+"""
+Search service for the CRM & Ticketing module.
+
+This service maintains the full-text search documents of tickets and runs
+ranked ticket searches with prefix matching and keyset pagination. On
+PostgreSQL the documents are weighted tsvectors behind a GIN index, so a
+search touches only matching tickets; other databases fall back to
+substring matching.
+
+Searches keep using substring matching until every ticket has a search
+document. The rebuild_ticket_search_index task backfills the documents of
+existing tickets.
+"""
+
+import base64
+import binascii
+import json
+import os
+import re
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Double, Float, cast, exists, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR, insert as pg_insert
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import Subquery
+from fastapi import HTTPException, status
+
+from ..models.ticket import Ticket, TicketComment, TicketSearchDocument
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration used for subjects, descriptions and comments
+TICKET_SEARCH_CONFIG = os.getenv("TICKET_SEARCH_CONFIG", "english")
+# Maximum number of search terms taken from the user's input
+TICKET_SEARCH_MAX_TERMS = int(os.getenv("TICKET_SEARCH_MAX_TERMS", "8"))
+# Seconds between checks whether the search index has been backfilled
+TICKET_SEARCH_INDEX_CHECK_SECONDS = int(os.getenv("TICKET_SEARCH_INDEX_CHECK_SECONDS", "60"))
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_prefix_query(search: str) -> Optional[str]:
+    """
+    Convert search input into a tsquery matching every term as a prefix.
+
+    Only word characters are kept, so the result is always valid tsquery
+    syntax whatever the user typed.
+
+    Args:
+        search: Search input, e.g. ``"router dow"``
+
+    Returns:
+        Query such as ``"router:* & dow:*"``, or None if the input has no terms
+    """
+    terms = _TERM_PATTERN.findall(search.lower())[:TICKET_SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def encode_cursor(rank: float, ticket_id: int) -> str:
+    """
+    Encode the position after a search result.
+
+    Args:
+        rank: Rank of the last result
+        ticket_id: ID of the last result
+
+    Returns:
+        Opaque cursor for the next page
+    """
+    return base64.urlsafe_b64encode(json.dumps([rank, ticket_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decode a cursor returned by a previous search.
+
+    Args:
+        cursor: Cursor of the previous page
+
+    Returns:
+        Rank and ticket ID of the last result of the previous page
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        rank, ticket_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(ticket_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid search cursor"
+        )
+
+
+def _config(name: str) -> ColumnElement:
+    return cast(literal(name), REGCONFIG)
+
+
+class _IndexState:
+    """Whether every ticket has a search document, as last checked by this process."""
+
+    def __init__(self):
+        self.ready = False
+        self.checked_at = 0.0
+
+    def reset(self) -> None:
+        self.ready = False
+        self.checked_at = 0.0
+
+
+# Process-wide index state; once complete, the index is kept up to date as tickets change
+_index_state = _IndexState()
+
+
+class SearchService:
+    """Service for full-text ticket search."""
+
+    def __init__(self, db: Session):
+        """Initialize the search service with a database session."""
+        self.db = db
+
+    @property
+    def is_postgresql(self) -> bool:
+        """Whether the session is bound to PostgreSQL."""
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    @property
+    def use_index(self) -> bool:
+        """Whether searches can use the search documents."""
+        return self.is_postgresql and self.is_index_complete()
+
+    def is_index_complete(self) -> bool:
+        """
+        Check whether every ticket has a search document.
+
+        Once the index is complete the result is kept for the life of the
+        process; until then the check is repeated at most every
+        TICKET_SEARCH_INDEX_CHECK_SECONDS.
+
+        Returns:
+            True if no ticket is missing its search document
+        """
+        if _index_state.ready:
+            return True
+        now = time.monotonic()
+        if _index_state.checked_at and now - _index_state.checked_at < TICKET_SEARCH_INDEX_CHECK_SECONDS:
+            return False
+
+        _index_state.checked_at = now
+        _index_state.ready = not self.db.execute(select(self._missing_documents().exists())).scalar()
+        return _index_state.ready
+
+    @staticmethod
+    def _missing_documents():
+        """Select the IDs of tickets without a search document."""
+        tickets = Ticket.__table__
+        documents = TicketSearchDocument.__table__
+        return select(tickets.c.id).where(
+            ~exists().where(documents.c.ticket_id == tickets.c.id)
+        )
+
+    def _document(self) -> ColumnElement:
+        """Weighted tsvector expression over a ticket and its comments."""
+        tickets = Ticket.__table__
+        comments = TicketComment.__table__
+        comment_text = select(
+            func.coalesce(func.string_agg(comments.c.content, literal(" ")), "")
+        ).where(comments.c.ticket_id == tickets.c.id).scalar_subquery()
+
+        def weighted(config: str, text, weight: str) -> ColumnElement:
+            vector = func.to_tsvector(_config(config), func.coalesce(text, ""), type_=TSVECTOR)
+            return func.setweight(vector, weight, type_=TSVECTOR)
+
+        return (
+            weighted("simple", tickets.c.ticket_number, "A")
+            .op("||")(weighted(TICKET_SEARCH_CONFIG, tickets.c.subject, "A"))
+            .op("||")(weighted(TICKET_SEARCH_CONFIG, tickets.c.description, "B"))
+            .op("||")(weighted(TICKET_SEARCH_CONFIG, comment_text, "C"))
+        )
+
+    def index_tickets(self, ticket_ids: List[int]) -> None:
+        """
+        Rebuild the search documents of tickets.
+
+        Runs as a single INSERT ... SELECT in the caller's transaction; the
+        caller commits.
+
+        Args:
+            ticket_ids: IDs of the tickets to index
+        """
+        if not ticket_ids or not self.is_postgresql:
+            return
+
+        tickets = Ticket.__table__
+        stmt = pg_insert(TicketSearchDocument.__table__).from_select(
+            ["ticket_id", "document", "updated_at"],
+            select(tickets.c.id, self._document(), func.now()).where(tickets.c.id.in_(ticket_ids))
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticket_id"],
+            set_={"document": stmt.excluded.document, "updated_at": stmt.excluded.updated_at}
+        )
+        self.db.execute(stmt)
+
+    def index_ticket(self, ticket_id: int) -> None:
+        """
+        Rebuild the search document of a ticket.
+
+        Args:
+            ticket_id: ID of the ticket
+        """
+        self.index_tickets([ticket_id])
+
+    def index_comment(self, ticket_id: int, content: str) -> None:
+        """
+        Add a new comment to a ticket's search document.
+
+        Appends the comment's lexemes instead of re-reading every comment
+        of the ticket.
+
+        Args:
+            ticket_id: ID of the ticket
+            content: Comment content
+        """
+        if not self.is_postgresql:
+            return
+
+        documents = TicketSearchDocument.__table__
+        comment_vector = func.setweight(
+            func.to_tsvector(_config(TICKET_SEARCH_CONFIG), content, type_=TSVECTOR), "C", type_=TSVECTOR
+        )
+        result = self.db.execute(
+            documents.update()
+            .where(documents.c.ticket_id == ticket_id)
+            .values(document=documents.c.document.op("||")(comment_vector), updated_at=func.now())
+        )
+        if result.rowcount == 0:
+            self.index_ticket(ticket_id)
+
+    def rebuild_index(self, batch_size: int = 1000, missing_only: bool = True) -> int:
+        """
+        Index tickets, e.g. to backfill the documents of existing tickets.
+
+        Tickets are indexed in ID order, one committed batch at a time, so
+        an interrupted rebuild continues where it stopped when run again.
+
+        Args:
+            batch_size: Tickets per batch
+            missing_only: Only index tickets without a search document
+
+        Returns:
+            Number of tickets indexed
+        """
+        if not self.is_postgresql:
+            return 0
+
+        tickets = Ticket.__table__
+        candidates = self._missing_documents() if missing_only else select(tickets.c.id)
+        indexed = 0
+        last_id = 0
+        while True:
+            ticket_ids = list(self.db.execute(
+                candidates.where(tickets.c.id > last_id).order_by(tickets.c.id).limit(batch_size)
+            ).scalars())
+            if not ticket_ids:
+                break
+            self.index_tickets(ticket_ids)
+            self.db.commit()
+            indexed += len(ticket_ids)
+            last_id = ticket_ids[-1]
+
+        _index_state.reset()
+        logger.info(f"Indexed {indexed} tickets for search")
+        return indexed
+
+    def match_condition(self, search: str) -> ColumnElement:
+        """
+        Get the condition selecting tickets that match a search.
+
+        Args:
+            search: Search input
+
+        Returns:
+            SQL condition on tickets
+        """
+        query = build_prefix_query(search)
+        if query is None:
+            return literal(True)
+
+        tickets = Ticket.__table__
+        if self.use_index:
+            documents = TicketSearchDocument.__table__
+            return tickets.c.id.in_(
+                select(documents.c.ticket_id).where(
+                    documents.c.document.op("@@")(func.to_tsquery(_config(TICKET_SEARCH_CONFIG), query))
+                )
+            )
+
+        return or_(
+            tickets.c.subject.ilike(f"%{search}%"),
+            tickets.c.description.ilike(f"%{search}%"),
+            tickets.c.ticket_number.ilike(f"%{search}%")
+        )
+
+    def match_query(self, search: str, conditions: Optional[List[ColumnElement]] = None) -> Subquery:
+        """
+        Get the ranked matches of a search.
+
+        Args:
+            search: Search input
+            conditions: Additional conditions on tickets
+
+        Returns:
+            Subquery with the ``id``, ``rank`` and ``total`` number of matches
+        """
+        conditions = list(conditions or [])
+        query = build_prefix_query(search)
+        tickets = Ticket.__table__
+
+        if query is not None and self.use_index:
+            documents = TicketSearchDocument.__table__
+            tsquery = func.to_tsquery(_config(TICKET_SEARCH_CONFIG), query)
+            # ts_rank_cd returns a real; as a double the rank round-trips through the cursor exactly
+            rank = cast(func.ts_rank_cd(documents.c.document, tsquery), Double)
+            matches = (
+                select(tickets.c.id.label("id"), rank.label("rank"), func.count().over().label("total"))
+                .join(documents, documents.c.ticket_id == tickets.c.id)
+                .where(documents.c.document.op("@@")(tsquery), *conditions)
+            )
+        else:
+            matches = select(
+                tickets.c.id.label("id"), literal(0.0, Float).label("rank"), func.count().over().label("total")
+            ).where(self.match_condition(search), *conditions)
+
+        return matches.subquery("matches")
+
+    @staticmethod
+    def after_cursor(matches: Subquery, cursor: str) -> ColumnElement:
+        """
+        Get the condition selecting the matches after a cursor.
+
+        Args:
+            matches: Subquery returned by ``match_query``
+            cursor: Cursor returned with the previous page
+
+        Returns:
+            SQL condition on the matches
+        """
+        last_rank, last_id = decode_cursor(cursor)
+        return tuple_(matches.c.rank, matches.c.id) < tuple_(cast(literal(last_rank), Double), last_id)
+
+    def search(
+        self,
+        search: str,
+        conditions: Optional[List[ColumnElement]] = None,
+        limit: int = 25,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search tickets, most relevant first.
+
+        Matches, ranking, the page and the total count come from a single
+        query: the total is a window count over all matches, and pages are
+        selected by keyset on (rank, ticket ID) instead of an offset.
+
+        Args:
+            search: Search input; every term is matched as a prefix
+            conditions: Additional conditions on tickets, e.g. status filters
+            limit: Maximum number of tickets to return
+            cursor: Cursor returned with the previous page
+
+        Returns:
+            Dictionary with the tickets (``items``), the number of matches
+            (``total``, None when the cursor is past the last match) and the
+            cursor of the next page (``next_cursor``, None on the last page)
+        """
+        matches = self.match_query(search, conditions)
+        page = select(Ticket, matches.c.rank, matches.c.total).join(matches, matches.c.id == Ticket.id)
+        if cursor:
+            page = page.where(self.after_cursor(matches, cursor))
+        page = page.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit + 1)
+
+        rows = self.db.execute(page).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "items": [row[0] for row in rows],
+            "total": rows[0].total if rows else (None if cursor else 0),
+            "next_cursor": encode_cursor(rows[-1].rank, rows[-1][0].id) if has_more else None,
+        }
@@ -6,13 +6,13 @@ including creation, updates, and SLA metrics tracking.
 """
 
 from typing import List, Optional, Dict, Any, Union
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc
+from sqlalchemy import and_, func, desc, asc, literal, select
 from fastapi import HTTPException, status
 
 from modules.monitoring.services import LoggingService
-from ..models.sla import SLA, SLAMetric
+from ..models.sla import SLA, SLAMetric, SLADailySummary, SLASummaryState
 from ..models.common import TicketPriority, TicketStatus
 from ..schemas.sla import SLACreate, SLAUpdate, SLAMetricCreate, SLAMetricUpdate
 
@@ -461,6 +461,107 @@ class SLAService:
         
         return timedelta(hours=metric.threshold_hours, minutes=metric.threshold_minutes)
     
+    def _seconds_between(self, later, earlier):
+        """SQL expression for the seconds between two timestamps."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.extract("epoch", later - earlier)
+        return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+
+    def _ticket_aggregates(self) -> List[Any]:
+        """
+        Aggregate columns over tickets, matching the columns of SLADailySummary.
+
+        Every metric is a filtered aggregate, so all of them come from a
+        single scan of the selected tickets.
+        """
+        from ..models.ticket import Ticket
+
+        resolved = Ticket.status.in_([TicketStatus.RESOLVED, TicketStatus.CLOSED])
+        resolution_date = func.coalesce(Ticket.resolved_at, Ticket.closed_at)
+        has_resolution_date = and_(resolved, resolution_date.isnot(None))
+
+        return [
+            func.count().label("total"),
+            func.count().filter(resolved).label("resolved"),
+            func.count().filter(Ticket.first_response_at > Ticket.first_response_target)
+                .label("first_response_breached"),
+            func.count().filter(and_(resolved, resolution_date > Ticket.resolution_target))
+                .label("resolution_breached"),
+            func.count(Ticket.first_response_at).label("first_response_count"),
+            func.coalesce(
+                func.sum(self._seconds_between(Ticket.first_response_at, Ticket.created_at)), 0.0
+            ).label("first_response_seconds"),
+            func.count().filter(has_resolution_date).label("resolution_count"),
+            func.coalesce(
+                func.sum(self._seconds_between(resolution_date, Ticket.created_at)).filter(has_resolution_date), 0.0
+            ).label("resolution_seconds"),
+        ]
+
+    def refresh_sla_summary(self, full: bool = False, batch_days: int = 31) -> int:
+        """
+        Bring the SLA daily summary up to date.
+
+        Only closed days (before today) are summarized. A refresh rebuilds
+        the days added since the previous refresh and the days whose tickets
+        were updated since it started; every batch of days is replaced with
+        a DELETE and an INSERT ... SELECT and committed on its own.
+
+        Args:
+            full: Rebuild every day instead of refreshing incrementally
+            batch_days: Days rebuilt per transaction
+
+        Returns:
+            Number of days rebuilt
+        """
+        from ..models.ticket import Ticket
+
+        started = datetime.utcnow()
+        today = started.date()
+        state = self.db.get(SLASummaryState, 1)
+        if state is None:
+            state = SLASummaryState(id=1)
+            self.db.add(state)
+
+        created_day = func.date(Ticket.created_at)
+        days = set()
+        if full or state.summarized_through is None or state.last_refreshed_at is None:
+            first_created = self.db.execute(select(func.min(Ticket.created_at))).scalar()
+            first_day = first_created.date() if first_created else today
+        else:
+            first_day = state.summarized_through
+            changed = self.db.execute(
+                select(created_day).distinct().where(
+                    Ticket.updated_at >= state.last_refreshed_at,
+                    Ticket.created_at < datetime.combine(first_day, time.min)
+                )
+            ).scalars()
+            days.update(_as_date(day) for day in changed)
+        days.update(first_day + timedelta(days=offset) for offset in range((today - first_day).days))
+
+        summary = SLADailySummary.__table__
+        ordered = sorted(days)
+        for index in range(0, len(ordered), batch_days):
+            batch = ordered[index:index + batch_days]
+            self.db.execute(summary.delete().where(summary.c.day.in_(batch)))
+            self.db.execute(summary.insert().from_select(
+                ["day", "sla_id", "priority", "total", "resolved", "first_response_breached",
+                 "resolution_breached", "first_response_count", "first_response_seconds",
+                 "resolution_count", "resolution_seconds", "refreshed_at"],
+                select(created_day, Ticket.sla_id, Ticket.priority, *self._ticket_aggregates(), literal(started))
+                .where(
+                    Ticket.created_at >= datetime.combine(batch[0], time.min),
+                    Ticket.created_at < datetime.combine(batch[-1] + timedelta(days=1), time.min),
+                    created_day.in_(batch)
+                )
+                .group_by(created_day, Ticket.sla_id, Ticket.priority)
+            ))
+            self.db.commit()
+
+        state.summarized_through = today
+        state.last_refreshed_at = started
+        self.db.commit()
+        return len(ordered)
+
     def calculate_sla_performance(
         self, 
         start_date: datetime, 
@@ -470,6 +571,11 @@ class SLAService:
         """
         Calculate SLA performance metrics for a given time period.
         
+        Whole days covered by the SLA daily summary are read from it; the
+        partial days at the edges of the period and days not summarized yet
+        are aggregated from tickets, grouped by priority in one query per
+        range. Summarized days reflect the tickets as of the last refresh.
+        
         Args:
             start_date: The start date for the calculation
             end_date: The end date for the calculation
@@ -480,107 +586,94 @@ class SLAService:
         """
         from ..models.ticket import Ticket
         
-        # Build base query for tickets in the date range
-        query = self.db.query(Ticket).filter(
-            Ticket.created_at >= start_date,
-            Ticket.created_at <= end_date
-        )
-        
-        # Filter by SLA if provided
-        if sla_id:
-            query = query.filter(Ticket.sla_id == sla_id)
-        
-        # Get all tickets in the range
-        tickets = query.all()
+        state = self.db.get(SLASummaryState, 1)
+        first_full_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+        end_full_day = end_date.date()
+        if state is not None and state.summarized_through is not None:
+            end_full_day = min(end_full_day, state.summarized_through)
+        else:
+            end_full_day = first_full_day
+        
+        in_period = [Ticket.created_at >= start_date, Ticket.created_at <= end_date]
+        live_ranges = [in_period]
+        partials = []
+        if first_full_day < end_full_day:
+            live_ranges = [
+                in_period + [Ticket.created_at < datetime.combine(first_full_day, time.min)],
+                in_period + [Ticket.created_at >= datetime.combine(end_full_day, time.min)],
+            ]
+            summary = SLADailySummary.__table__
+            query = select(
+                summary.c.priority,
+                *[func.sum(summary.c[column]).label(column) for column in SUMMARY_COLUMNS]
+            ).where(summary.c.day >= first_full_day, summary.c.day < end_full_day)
+            if sla_id:
+                query = query.where(summary.c.sla_id == sla_id)
+            partials.extend(self.db.execute(query.group_by(summary.c.priority)).all())
+        
+        for conditions in live_ranges:
+            query = select(Ticket.priority, *self._ticket_aggregates()).where(*conditions)
+            if sla_id:
+                query = query.where(Ticket.sla_id == sla_id)
+            partials.extend(self.db.execute(query.group_by(Ticket.priority)).all())
+        
+        # Add up the partial aggregates per priority
+        by_priority = {priority.value: dict.fromkeys(SUMMARY_COLUMNS, 0) for priority in TicketPriority}
+        for row in partials:
+            priority = row.priority.value if isinstance(row.priority, TicketPriority) else row.priority
+            for column in SUMMARY_COLUMNS:
+                by_priority[priority][column] += getattr(row, column) or 0
+        
+        totals = dict.fromkeys(SUMMARY_COLUMNS, 0)
+        for aggregates in by_priority.values():
+            for column in SUMMARY_COLUMNS:
+                totals[column] += aggregates[column]
         
-        # Initialize results
         results = {
-            "total_tickets": len(tickets),
-            "resolved_tickets": 0,
-            "first_response_breached": 0,
-            "resolution_breached": 0,
-            "sla_compliance_percentage": 0,
-            "average_first_response_time": None,
-            "average_resolution_time": None,
-            "by_priority": {}
-        }
-        
-        # Initialize priority-specific metrics
-        for priority in TicketPriority:
-            results["by_priority"][priority.value] = {
-                "total": 0,
-                "resolved": 0,
-                "first_response_breached": 0,
-                "resolution_breached": 0,
-                "sla_compliance_percentage": 0,
-                "average_first_response_time": None,
-                "average_resolution_time": None
+            "total_tickets": totals["total"],
+            **_performance(totals, "resolved_tickets"),
+            "by_priority": {
+                priority: {"total": aggregates["total"], **_performance(aggregates, "resolved")}
+                for priority, aggregates in by_priority.items()
             }
-        
-        # Calculate metrics
-        first_response_times = []
-        resolution_times = []
-        priority_first_response_times = {p.value: [] for p in TicketPriority}
-        priority_resolution_times = {p.value: [] for p in TicketPriority}
-        
-        for ticket in tickets:
-            priority = ticket.priority.value
-            results["by_priority"][priority]["total"] += 1
-            
-            # First response metrics
-            if ticket.first_response_at:
-                response_time = (ticket.first_response_at - ticket.created_at).total_seconds() / 3600  # hours
-                first_response_times.append(response_time)
-                priority_first_response_times[priority].append(response_time)
-                
-                if ticket.first_response_target and ticket.first_response_at > ticket.first_response_target:
-                    results["first_response_breached"] += 1
-                    results["by_priority"][priority]["first_response_breached"] += 1
-            
-            # Resolution metrics
-            if ticket.status in [TicketStatus.RESOLVED, TicketStatus.CLOSED]:
-                results["resolved_tickets"] += 1
-                results["by_priority"][priority]["resolved"] += 1
-                
-                resolution_date = ticket.resolved_at or ticket.closed_at
-                if resolution_date:
-                    resolution_time = (resolution_date - ticket.created_at).total_seconds() / 3600  # hours
-                    resolution_times.append(resolution_time)
-                    priority_resolution_times[priority].append(resolution_time)
-                    
-                    if ticket.resolution_target and resolution_date > ticket.resolution_target:
-                        results["resolution_breached"] += 1
-                        results["by_priority"][priority]["resolution_breached"] += 1
-        
-        # Calculate averages and compliance
-        if first_response_times:
-            results["average_first_response_time"] = sum(first_response_times) / len(first_response_times)
-        
-        if resolution_times:
-            results["average_resolution_time"] = sum(resolution_times) / len(resolution_times)
-        
-        # Calculate overall SLA compliance
-        if results["resolved_tickets"] > 0:
-            total_breaches = results["first_response_breached"] + results["resolution_breached"]
-            total_possible_breaches = results["total_tickets"] + results["resolved_tickets"]
-            compliance = 100 - (total_breaches / total_possible_breaches * 100)
-            results["sla_compliance_percentage"] = round(compliance, 2)
-        
-        # Calculate priority-specific metrics
-        for priority in TicketPriority:
-            p_value = priority.value
-            p_results = results["by_priority"][p_value]
-            
-            if priority_first_response_times[p_value]:
-                p_results["average_first_response_time"] = sum(priority_first_response_times[p_value]) / len(priority_first_response_times[p_value])
-            
-            if priority_resolution_times[p_value]:
-                p_results["average_resolution_time"] = sum(priority_resolution_times[p_value]) / len(priority_resolution_times[p_value])
-            
-            if p_results["resolved"] > 0:
-                total_p_breaches = p_results["first_response_breached"] + p_results["resolution_breached"]
-                total_p_possible_breaches = p_results["total"] + p_results["resolved"]
-                p_compliance = 100 - (total_p_breaches / total_p_possible_breaches * 100)
-                p_results["sla_compliance_percentage"] = round(p_compliance, 2)
-        
+        }
         return results
+
+
+SUMMARY_COLUMNS = (
+    "total", "resolved", "first_response_breached", "resolution_breached",
+    "first_response_count", "first_response_seconds", "resolution_count", "resolution_seconds",
+)
+
+
+def _as_date(value: Union[date, str]) -> date:
+    """Convert a day returned by the database into a date."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _performance(aggregates: Dict[str, Any], resolved_key: str) -> Dict[str, Any]:
+    """Derive SLA performance metrics from summed aggregates."""
+    results = {
+        resolved_key: aggregates["resolved"],
+        "first_response_breached": aggregates["first_response_breached"],
+        "resolution_breached": aggregates["resolution_breached"],
+        "sla_compliance_percentage": 0,
+        "average_first_response_time": None,
+        "average_resolution_time": None,
+    }
+    
+    # Averages in hours
+    if aggregates["first_response_count"]:
+        results["average_first_response_time"] = (
+            aggregates["first_response_seconds"] / aggregates["first_response_count"] / 3600
+        )
+    if aggregates["resolution_count"]:
+        results["average_resolution_time"] = aggregates["resolution_seconds"] / aggregates["resolution_count"] / 3600
+    
+    if aggregates["resolved"] > 0:
+        total_breaches = aggregates["first_response_breached"] + aggregates["resolution_breached"]
+        total_possible_breaches = aggregates["total"] + aggregates["resolved"]
+        compliance = 100 - (total_breaches / total_possible_breaches * 100)
+        results["sla_compliance_percentage"] = round(compliance, 2)
+    
+    return results
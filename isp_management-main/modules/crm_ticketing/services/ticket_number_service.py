@@ -0,0 +1,154 @@
+"""
+Ticket number allocation for the CRM & Ticketing module.
+
+Ticket numbers have the form TKT-YYYYMMDD-NNNN. Each process reserves a
+block of numbers at a time from a shared daily counter, either a Redis
+INCRBY when TICKET_NUMBER_REDIS_URL is set or a counter row in the
+database, and hands them out from memory. Creating a ticket therefore
+neither scans existing tickets nor races other workers for the next
+number. Numbers are unique but not gap-free: numbers left in a block
+when a process exits or the day ends are never used.
+"""
+
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import redis
+from sqlalchemy import Integer, cast, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.ticket import Ticket, TicketNumberCounter
+
+# Configuration
+TICKET_NUMBER_PREFIX = "TKT"
+TICKET_NUMBER_BLOCK_SIZE = int(os.getenv("TICKET_NUMBER_BLOCK_SIZE", "20"))
+TICKET_NUMBER_REDIS_URL = os.getenv("TICKET_NUMBER_REDIS_URL") or None
+# Daily Redis counters expire this many seconds after the day's first ticket
+TICKET_NUMBER_KEY_TTL = int(os.getenv("TICKET_NUMBER_KEY_TTL", str(2 * 24 * 3600)))
+
+
+def format_ticket_number(day: str, value: int) -> str:
+    """
+    Format a ticket number.
+
+    Args:
+        day: Day in YYYYMMDD format
+        value: Sequential number within the day
+
+    Returns:
+        Ticket number, e.g. ``TKT-20240131-0042``
+    """
+    return f"{TICKET_NUMBER_PREFIX}-{day}-{value:04d}"
+
+
+class TicketNumberAllocator:
+    """Hand out ticket numbers from blocks reserved on a shared daily counter."""
+
+    def __init__(
+        self,
+        block_size: int = TICKET_NUMBER_BLOCK_SIZE,
+        redis_client: Optional[redis.Redis] = None,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        """
+        Initialize the allocator.
+
+        Args:
+            block_size: Numbers reserved per round trip to the shared counter
+            redis_client: Redis client holding the counters, defaults to the database
+            clock: Source of the current time
+        """
+        self.block_size = max(1, block_size)
+        self.redis = redis_client
+        self.clock = clock
+        self._block: Dict[str, Tuple[int, int]] = {}  # day -> (next value, last reserved value)
+        self._seeded_day: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def allocate(self, db: Session) -> str:
+        """
+        Get the next ticket number.
+
+        Args:
+            db: Database session, used when a new block is needed
+
+        Returns:
+            A unique ticket number
+        """
+        day = self.clock().strftime("%Y%m%d")
+        with self._lock:
+            next_value, last_value = self._block.get(day, (1, 0))
+            if next_value > last_value:
+                next_value, last_value = self._reserve(db, day)
+            self._block = {day: (next_value + 1, last_value)}
+        return format_ticket_number(day, next_value)
+
+    def _reserve(self, db: Session, day: str) -> Tuple[int, int]:
+        """Reserve the next block of a day, returning its first and last values."""
+        if self._seeded_day != day:
+            self._seed(db, day)
+            self._seeded_day = day
+
+        if self.redis is not None:
+            last_value = int(self.redis.incrby(self._key(day), self.block_size))
+        else:
+            counters = TicketNumberCounter.__table__
+            with self._connect(db) as conn:
+                last_value = conn.execute(
+                    update(counters)
+                    .where(counters.c.day == day)
+                    .values(last_value=counters.c.last_value + self.block_size)
+                    .returning(counters.c.last_value)
+                ).scalar_one()
+        return last_value - self.block_size + 1, last_value
+
+    def _seed(self, db: Session, day: str) -> None:
+        """
+        Create the counter of a day if it does not exist yet.
+
+        The counter starts after the highest number already used that day,
+        so numbers issued before the counter existed are never reissued.
+        """
+        if self.redis is not None:
+            if not self.redis.exists(self._key(day)):
+                self.redis.set(self._key(day), self._highest_issued(db, day), nx=True, ex=TICKET_NUMBER_KEY_TTL)
+            return
+
+        counters = TicketNumberCounter.__table__
+        with self._connect(db) as conn:
+            if conn.execute(select(counters.c.day).where(counters.c.day == day)).first() is not None:
+                return
+            try:
+                conn.execute(insert(counters).values(day=day, last_value=self._highest_issued(db, day)))
+            except IntegrityError:
+                # Another worker created the counter first
+                pass
+
+    def _highest_issued(self, db: Session, day: str) -> int:
+        """Get the highest sequential number used by existing tickets of a day."""
+        prefix = f"{TICKET_NUMBER_PREFIX}-{day}-"
+        ticket_number = Ticket.__table__.c.ticket_number
+        highest = db.execute(
+            select(func.max(cast(func.substr(ticket_number, len(prefix) + 1), Integer)))
+            .where(ticket_number.like(f"{prefix}%"))
+        ).scalar()
+        return highest or 0
+
+    def _key(self, day: str) -> str:
+        """Redis key of a day's counter."""
+        return f"crm:ticket_number:{day}"
+
+    @staticmethod
+    def _connect(db: Session) -> Connection:
+        """Open an autocommit connection so reservations never wait on the caller's transaction."""
+        return db.get_bind().engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+# Process-wide allocator shared by all ticket services
+ticket_number_allocator = TicketNumberAllocator(
+    redis_client=redis.Redis.from_url(TICKET_NUMBER_REDIS_URL) if TICKET_NUMBER_REDIS_URL else None
+)
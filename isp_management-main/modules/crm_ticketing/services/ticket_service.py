@@ -30,6 +30,8 @@ from ..schemas.ticket import (
 )
 from .sla_service import SLAService
 from .notification_service import NotificationService
+from .search_service import SearchService
+from .ticket_number_service import ticket_number_allocator
 
 
 class TicketService:
@@ -41,6 +43,7 @@ class TicketService:
         self.logging_service = LoggingService(db)
         self.sla_service = SLAService(db)
         self.notification_service = NotificationService(db)
+        self.search_service = SearchService(db)
         self.upload_dir = os.environ.get("TICKET_ATTACHMENT_DIR", "/tmp/ticket_attachments")
         
         # Create upload directory if it doesn't exist
@@ -88,10 +91,8 @@ class TicketService:
             )
         return ticket
     
-    def list_tickets(
-        self, 
-        skip: int = 0, 
-        limit: int = 100, 
+    def _ticket_filters(
+        self,
         search: Optional[str] = None,
         status: Optional[List[TicketStatus]] = None,
         priority: Optional[List[TicketPriority]] = None,
@@ -102,16 +103,12 @@ class TicketService:
         created_after: Optional[datetime] = None,
         created_before: Optional[datetime] = None,
         tags: Optional[List[int]] = None,
-        is_overdue: Optional[bool] = None,
-        sort_by: Optional[str] = None,
-        sort_desc: bool = False
-    ) -> List[Ticket]:
+        is_overdue: Optional[bool] = None
+    ) -> List[Any]:
         """
-        List tickets with optional filtering, sorting, and pagination.
+        Build the filter conditions shared by ticket listing, counting and search.
         
         Args:
-            skip: Number of records to skip
-            limit: Maximum number of records to return
             search: Search term to filter by
             status: Filter by ticket status
             priority: Filter by ticket priority
@@ -123,66 +120,58 @@ class TicketService:
             created_before: Filter by creation date (before)
             tags: Filter by tag IDs
             is_overdue: Filter by overdue status
-            sort_by: Field to sort by
-            sort_desc: Whether to sort in descending order
             
         Returns:
-            List of ticket objects
+            List of SQL conditions on tickets
         """
-        query = self.db.query(Ticket)
+        conditions = []
         
         # Apply search filter
         if search:
-            query = query.filter(
-                or_(
-                    Ticket.subject.ilike(f"%{search}%"),
-                    Ticket.description.ilike(f"%{search}%"),
-                    Ticket.ticket_number.ilike(f"%{search}%")
-                )
-            )
+            conditions.append(self.search_service.match_condition(search))
         
         # Apply status filter
         if status:
-            query = query.filter(Ticket.status.in_(status))
+            conditions.append(Ticket.status.in_(status))
         
         # Apply priority filter
         if priority:
-            query = query.filter(Ticket.priority.in_(priority))
+            conditions.append(Ticket.priority.in_(priority))
         
         # Apply ticket type filter
         if ticket_type:
-            query = query.filter(Ticket.ticket_type.in_(ticket_type))
+            conditions.append(Ticket.ticket_type.in_(ticket_type))
         
         # Apply customer filter
         if customer_id:
-            query = query.filter(Ticket.customer_id == customer_id)
+            conditions.append(Ticket.customer_id == customer_id)
         
         # Apply assignee filter
         if assigned_to:
-            query = query.filter(Ticket.assigned_to == assigned_to)
+            conditions.append(Ticket.assigned_to == assigned_to)
         
         # Apply team filter
         if assigned_team:
-            query = query.filter(Ticket.assigned_team == assigned_team)
+            conditions.append(Ticket.assigned_team == assigned_team)
         
         # Apply date filters
         if created_after:
-            query = query.filter(Ticket.created_at >= created_after)
+            conditions.append(Ticket.created_at >= created_after)
         
         if created_before:
-            query = query.filter(Ticket.created_at <= created_before)
+            conditions.append(Ticket.created_at <= created_before)
         
         # Apply tag filter
         if tags:
             for tag_id in tags:
-                query = query.filter(Ticket.tags.any(Tag.id == tag_id))
+                conditions.append(Ticket.tags.any(Tag.id == tag_id))
         
         # Apply overdue filter
         if is_overdue is not None:
             now = datetime.utcnow()
             if is_overdue:
                 # Tickets that are not closed/resolved/cancelled and have breached SLA
-                query = query.filter(
+                conditions.append(
                     and_(
                         Ticket.status.not_in([TicketStatus.RESOLVED, TicketStatus.CLOSED, TicketStatus.CANCELLED]),
                         or_(
@@ -193,7 +182,7 @@ class TicketService:
                 )
             else:
                 # Tickets that are not overdue
-                query = query.filter(
+                conditions.append(
                     or_(
                         Ticket.status.in_([TicketStatus.RESOLVED, TicketStatus.CLOSED, TicketStatus.CANCELLED]),
                         and_(
@@ -209,6 +198,56 @@ class TicketService:
                     )
                 )
         
+        return conditions
+    
+    def list_tickets(
+        self, 
+        skip: int = 0, 
+        limit: int = 100, 
+        search: Optional[str] = None,
+        status: Optional[List[TicketStatus]] = None,
+        priority: Optional[List[TicketPriority]] = None,
+        ticket_type: Optional[List[TicketType]] = None,
+        customer_id: Optional[int] = None,
+        assigned_to: Optional[int] = None,
+        assigned_team: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        tags: Optional[List[int]] = None,
+        is_overdue: Optional[bool] = None,
+        sort_by: Optional[str] = None,
+        sort_desc: bool = False
+    ) -> List[Ticket]:
+        """
+        List tickets with optional filtering, sorting, and pagination.
+        
+        Args:
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            search: Search term to filter by
+            status: Filter by ticket status
+            priority: Filter by ticket priority
+            ticket_type: Filter by ticket type
+            customer_id: Filter by customer ID
+            assigned_to: Filter by assigned user ID
+            assigned_team: Filter by assigned team ID
+            created_after: Filter by creation date (after)
+            created_before: Filter by creation date (before)
+            tags: Filter by tag IDs
+            is_overdue: Filter by overdue status
+            sort_by: Field to sort by
+            sort_desc: Whether to sort in descending order
+            
+        Returns:
+            List of ticket objects
+        """
+        query = self.db.query(Ticket).filter(*self._ticket_filters(
+            search=search, status=status, priority=priority, ticket_type=ticket_type,
+            customer_id=customer_id, assigned_to=assigned_to, assigned_team=assigned_team,
+            created_after=created_after, created_before=created_before, tags=tags,
+            is_overdue=is_overdue
+        ))
+        
         # Apply sorting
         if sort_by and hasattr(Ticket, sort_by):
             order_func = desc if sort_desc else asc
@@ -253,112 +292,53 @@ class TicketService:
         Returns:
             Total count of matching tickets
         """
-        query = self.db.query(func.count(Ticket.id))
-        
-        # Apply search filter
-        if search:
-            query = query.filter(
-                or_(
-                    Ticket.subject.ilike(f"%{search}%"),
-                    Ticket.description.ilike(f"%{search}%"),
-                    Ticket.ticket_number.ilike(f"%{search}%")
-                )
-            )
-        
-        # Apply status filter
-        if status:
-            query = query.filter(Ticket.status.in_(status))
-        
-        # Apply priority filter
-        if priority:
-            query = query.filter(Ticket.priority.in_(priority))
-        
-        # Apply ticket type filter
-        if ticket_type:
-            query = query.filter(Ticket.ticket_type.in_(ticket_type))
-        
-        # Apply customer filter
-        if customer_id:
-            query = query.filter(Ticket.customer_id == customer_id)
-        
-        # Apply assignee filter
-        if assigned_to:
-            query = query.filter(Ticket.assigned_to == assigned_to)
-        
-        # Apply team filter
-        if assigned_team:
-            query = query.filter(Ticket.assigned_team == assigned_team)
-        
-        # Apply date filters
-        if created_after:
-            query = query.filter(Ticket.created_at >= created_after)
-        
-        if created_before:
-            query = query.filter(Ticket.created_at <= created_before)
-        
-        # Apply tag filter
-        if tags:
-            for tag_id in tags:
-                query = query.filter(Ticket.tags.any(Tag.id == tag_id))
+        return self.db.query(func.count(Ticket.id)).filter(*self._ticket_filters(
+            search=search, status=status, priority=priority, ticket_type=ticket_type,
+            customer_id=customer_id, assigned_to=assigned_to, assigned_team=assigned_team,
+            created_after=created_after, created_before=created_before, tags=tags,
+            is_overdue=is_overdue
+        )).scalar()
+    
+    def search_tickets(
+        self,
+        search: str,
+        limit: int = 25,
+        cursor: Optional[str] = None,
+        **filters: Any
+    ) -> Dict[str, Any]:
+        """
+        Search tickets by relevance.
         
-        # Apply overdue filter
-        if is_overdue is not None:
-            now = datetime.utcnow()
-            if is_overdue:
-                # Tickets that are not closed/resolved/cancelled and have breached SLA
-                query = query.filter(
-                    and_(
-                        Ticket.status.not_in([TicketStatus.RESOLVED, TicketStatus.CLOSED, TicketStatus.CANCELLED]),
-                        or_(
-                            and_(Ticket.first_response_at.is_(None), Ticket.first_response_target <= now),
-                            Ticket.resolution_target <= now
-                        )
-                    )
-                )
-            else:
-                # Tickets that are not overdue
-                query = query.filter(
-                    or_(
-                        Ticket.status.in_([TicketStatus.RESOLVED, TicketStatus.CLOSED, TicketStatus.CANCELLED]),
-                        and_(
-                            or_(
-                                Ticket.first_response_at.is_not(None),
-                                Ticket.first_response_target > now
-                            ),
-                            or_(
-                                Ticket.resolution_target > now,
-                                Ticket.resolution_target.is_(None)
-                            )
-                        )
-                    )
-                )
+        Returns a page of tickets together with the total number of matches
+        from one query; pass the returned ``next_cursor`` to get the next page.
         
-        return query.scalar()
+        Args:
+            search: Search input; every term is matched as a prefix
+            limit: Maximum number of tickets to return
+            cursor: Cursor returned with the previous page
+            **filters: Filters accepted by ``list_tickets``, e.g. ``status``
+            
+        Returns:
+            Dictionary with ``items``, ``total`` and ``next_cursor``
+        """
+        return self.search_service.search(
+            search,
+            conditions=self._ticket_filters(**filters),
+            limit=limit,
+            cursor=cursor
+        )
     
     def generate_ticket_number(self) -> str:
         """
         Generate a unique ticket number.
         
+        Numbers come from the process-wide allocator, which reserves them in
+        blocks from a shared daily counter.
+        
         Returns:
-            A unique ticket number
+            A unique ticket number of the form TKT-YYYYMMDD-XXXX
         """
-        # Format: TKT-YYYYMMDD-XXXX where XXXX is a sequential number
-        date_part = datetime.utcnow().strftime("%Y%m%d")
-        
-        # Get the highest ticket number for today
-        latest_ticket = self.db.query(Ticket).filter(
-            Ticket.ticket_number.like(f"TKT-{date_part}-%")
-        ).order_by(desc(Ticket.ticket_number)).first()
-        
-        if latest_ticket:
-            # Extract the sequential part and increment
-            seq_part = int(latest_ticket.ticket_number.split("-")[-1])
-            seq_part += 1
-        else:
-            # First ticket of the day
-            seq_part = 1
-        
-        return f"TKT-{date_part}-{seq_part:04d}"
+        return ticket_number_allocator.allocate(self.db)
     
     def create_ticket(self, ticket_data: TicketCreate, user_id: int) -> Ticket:
         """
@@ -377,6 +357,7 @@ class TicketService:
         # Create ticket dict from schema
         ticket_dict = ticket_data.dict(exclude={"tag_ids"})
         ticket_dict["ticket_number"] = ticket_number
+        ticket_dict["ticket_metadata"] = ticket_dict.pop("metadata", None)
         
         # Set up SLA if provided or get default
         if ticket_data.sla_id:
@@ -407,6 +388,8 @@ class TicketService:
             ticket.tags = tags
         
         self.db.add(ticket)
+        self.db.flush()
+        self.search_service.index_ticket(ticket.id)
         self.db.commit()
         self.db.refresh(ticket)
         
@@ -451,6 +434,8 @@ class TicketService:
         
         # Update fields
         for field, value in ticket_data.dict(exclude={"tag_ids"}, exclude_unset=True).items():
+            if field == "metadata":
+                field = "ticket_metadata"
             if hasattr(ticket, field) and getattr(ticket, field) != value:
                 old_value = getattr(ticket, field)
                 setattr(ticket, field, value)
@@ -488,6 +473,11 @@ class TicketService:
             old_status, new_status = status_change[1], status_change[2]
             self._handle_status_change(ticket, old_status, new_status, user_id)
         
+        # Refresh the search document if searchable text changed
+        if any(c[0] in ("subject", "description") for c in changes):
+            self.db.flush()
+            self.search_service.index_ticket(ticket.id)
+        
         self.db.commit()
         self.db.refresh(ticket)
         
@@ -640,6 +630,46 @@ class TicketService:
         # Update last update time
         ticket.last_update_at = now
     
+    def add_comment(self, comment_data: TicketCommentCreate, user_id: int) -> TicketComment:
+        """
+        Add a comment to a ticket.
+        
+        Args:
+            comment_data: Data for the new comment
+            user_id: The ID of the user adding the comment
+            
+        Returns:
+            The created comment object
+            
+        Raises:
+            HTTPException: If the ticket is not found
+        """
+        ticket = self.get_ticket(comment_data.ticket_id)
+        
+        comment = TicketComment(**comment_data.dict(), created_by=user_id)
+        self.db.add(comment)
+        ticket.last_update_at = datetime.utcnow()
+        
+        # Make the comment searchable in the same transaction
+        self.db.flush()
+        self.search_service.index_comment(ticket.id, comment.content)
+        
+        self.db.commit()
+        self.db.refresh(comment)
+        
+        # Log comment creation
+        self.logging_service.log_event(
+            "ticket_comment_added",
+            f"Comment added to ticket {ticket.ticket_number} by user {user_id}",
+            {
+                "ticket_id": ticket.id,
+                "comment_id": comment.id,
+                "user_id": user_id
+            }
+        )
+        
+        return comment
+    
     def get_comments(
         self,
         ticket_id: int,
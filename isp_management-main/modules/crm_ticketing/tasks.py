@@ -0,0 +1,68 @@
+"""
+Celery tasks for the CRM & Ticketing module.
+
+This module defines Celery tasks for background processing related to
+ticketing, such as keeping the SLA daily summary and the ticket search
+index up to date.
+"""
+
+import logging
+from celery import shared_task
+
+from modules.core.database import get_db
+from modules.crm_ticketing.services.sla_service import SLAService
+from modules.crm_ticketing.services.search_service import SearchService
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="refresh_sla_summary")
+def refresh_sla_summary(full: bool = False) -> dict:
+    """
+    Rebuild the SLA daily summary for new days and days with changed tickets.
+    
+    Args:
+        full: Rebuild every day instead of refreshing incrementally
+    
+    Returns:
+        Dictionary with the number of days rebuilt
+    """
+    db = next(get_db())
+    
+    try:
+        days = SLAService(db).refresh_sla_summary(full=full)
+        logger.info(f"Refreshed SLA summary for {days} days")
+        return {"days": days}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error refreshing SLA summary: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+@shared_task(name="rebuild_ticket_search_index")
+def rebuild_ticket_search_index(full: bool = False) -> dict:
+    """
+    Index tickets for full-text search, backfilling tickets without a search document.
+    
+    Searches use the index once every ticket has a document.
+    
+    Args:
+        full: Re-index every ticket instead of only the missing ones
+    
+    Returns:
+        Dictionary with the number of tickets indexed
+    """
+    db = next(get_db())
+    
+    try:
+        tickets = SearchService(db).rebuild_index(missing_only=not full)
+        return {"tickets": tickets}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding ticket search index: {str(e)}")
+        raise
+    finally:
+        db.close()
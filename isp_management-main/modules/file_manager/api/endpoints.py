@@ -7,13 +7,13 @@ including uploading, downloading, and sharing files.
 
 import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, status, BackgroundTasks
 from sqlalchemy.orm import Session
 
 from backend_core.dependencies import get_db, get_current_user
 from backend_core.models.user import User
 from ..services.file_service import FileService
+from .responses import FileDownloadResponse
 from ..schemas.file import (
     FileCreate, FileUpdate, FileResponse, FileVersionCreate, FilePermissionCreate,
     FilePermissionResponse, FileShareCreate, FileShareResponse, FolderCreate,
@@ -200,23 +200,25 @@ async def delete_file(
 @router.get("/files/{file_id}/download")
 async def download_file(
     file_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Download a file.
+    
+    Supports single byte ranges (Range and If-Range headers), so clients can
+    resume interrupted downloads.
     """
     file_service = FileService(db)
-    file_data, filename, mime_type = await file_service.download_file(
+    download = await file_service.download_file(
         file_id=file_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        range_header=request.headers.get("range"),
+        if_range=request.headers.get("if-range")
     )
     
-    return StreamingResponse(
-        file_data,
-        media_type=mime_type,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return FileDownloadResponse(download)
 
 
 # Folder endpoints
@@ -0,0 +1,79 @@
+"""
+Response classes for the File Manager module.
+
+This module provides the response used to send file downloads, with
+support for partial content and zero-copy sending of local files.
+"""
+
+from typing import Any
+
+from fastapi import status
+from fastapi.responses import StreamingResponse
+
+from ..services.file_service import FileDownload
+
+# ASGI extension letting the server send a file descriptor with sendfile()
+ZERO_COPY_SEND = "http.response.zerocopysend"
+
+
+class FileDownloadResponse(StreamingResponse):
+    """
+    Response streaming a file download.
+
+    Byte ranges are answered with 206 Partial Content. Files in local
+    storage are handed to the server with the zero-copy send extension when
+    the server supports it; otherwise, and for remote storage, the content
+    is streamed in chunks.
+    """
+
+    def __init__(self, download: FileDownload):
+        """
+        Initialize the response.
+
+        Args:
+            download: The file download to send
+        """
+        start, end = download.byte_range or (0, download.size_bytes - 1)
+        headers = {
+            "Content-Disposition": f"attachment; filename={download.filename}",
+            "Content-Length": str(end - start + 1),
+            "Accept-Ranges": "bytes",
+            "ETag": download.etag
+        }
+        if download.byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{download.size_bytes}"
+
+        super().__init__(
+            download.content,
+            status_code=status.HTTP_206_PARTIAL_CONTENT if download.byte_range else status.HTTP_200_OK,
+            headers=headers,
+            media_type=download.mime_type
+        )
+        self.download = download
+        self.offset = start
+        self.count = end - start + 1
+        self.zero_copy = False
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        self.zero_copy = self.download.local_path is not None and ZERO_COPY_SEND in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def stream_response(self, send: Any) -> None:
+        if not self.zero_copy:
+            await super().stream_response(send)
+            return
+
+        await self.body_iterator.aclose()
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        with open(self.download.local_path, "rb") as file:
+            await send({
+                "type": ZERO_COPY_SEND,
+                "file": file,
+                "offset": self.offset,
+                "count": self.count,
+                "more_body": False
+            })
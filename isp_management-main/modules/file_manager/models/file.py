@@ -8,7 +8,7 @@ such as file versions, access permissions, and metadata.
 import uuid
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Text, Enum, UniqueConstraint, Index, Table
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
@@ -71,7 +71,7 @@ class File(Base, TimestampMixin):
     # Metadata
     title = Column(String(255), nullable=True)
     description = Column(Text, nullable=True)
-    metadata = Column(JSONB, nullable=True)  # Flexible metadata storage
+    file_metadata = Column("metadata", JSONB, nullable=True)  # Flexible metadata storage
     tags = Column(JSONB, nullable=True)  # Array of tags
     
     # Status
@@ -93,13 +93,45 @@ class File(Base, TimestampMixin):
     access_logs = relationship("FileAccessLog", back_populates="file", cascade="all, delete-orphan")
     
     __table_args__ = (
-        UniqueConstraint('storage_backend', 'storage_path', name='uix_storage_location'),
+        # Files with identical content share one content-addressed blob
+        Index('ix_files_storage_location', 'storage_backend', 'storage_path'),
     )
     
     def __repr__(self):
         return f"<File(id={self.id}, filename='{self.filename}', type='{self.file_type}')>"
 
 
+class FileBlob(Base, TimestampMixin):
+    """
+    Model for storing content-addressed file blobs.
+    
+    Each distinct content is stored once per storage backend under a path
+    derived from its SHA-256 checksum. The blob counts the File and
+    FileVersion rows that reference it and is garbage collected once the
+    count has dropped to zero.
+    """
+    __tablename__ = "file_blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    storage_backend = Column(Enum(StorageBackend), nullable=False)
+    checksum = Column(String(64), nullable=False)  # SHA-256 hash
+    storage_path = Column(String(1024), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    
+    # Number of File and FileVersion rows referencing the blob
+    ref_count = Column(Integer, nullable=False, default=0)
+    # When the last reference was released
+    orphaned_at = Column(DateTime, nullable=True, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint('storage_backend', 'checksum', name='uix_file_blob_checksum'),
+        UniqueConstraint('storage_backend', 'storage_path', name='uix_file_blob_location'),
+    )
+    
+    def __repr__(self):
+        return f"<FileBlob(id={self.id}, checksum='{self.checksum}', ref_count={self.ref_count})>"
+
+
 class FileVersion(Base, TimestampMixin):
     """
     Model for storing file versions.
@@ -7,7 +7,7 @@ including file creation, updates, and responses.
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Union, ClassVar
-from pydantic import BaseModel, Field, field_validator, model_validator, AnyHttpUrl, constr, ConfigDict
+from pydantic import AliasChoices, BaseModel, Field, field_validator, model_validator, AnyHttpUrl, constr, ConfigDict
 import uuid
 
 from ..models.file import FileType, StorageBackend, FileStatus
@@ -18,7 +18,10 @@ class FileBase(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     tags: Optional[List[str]] = None
-    metadata: Optional[Dict[str, Any]] = None
+    # Files store it as file_metadata, as metadata is reserved on models
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("file_metadata", "metadata")
+    )
 
 
 class FileCreate(FileBase):
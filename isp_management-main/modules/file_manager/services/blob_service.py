@@ -0,0 +1,256 @@
+"""
+Blob service for the File Manager module.
+
+This module stores file content once per storage backend, keyed by its
+SHA-256 checksum. Every File and FileVersion row referencing a blob holds
+one reference; uploads whose checksum is already stored only add a
+reference and discard their staged copy, and blobs whose last reference
+was released are removed by garbage collection.
+"""
+
+import os
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.metrics import MetricsCollector
+from ..models.file import FileBlob, StorageBackend
+from .storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+# Unreferenced blobs are kept this long before garbage collection
+FILE_BLOB_GC_GRACE_SECONDS = int(os.getenv("FILE_BLOB_GC_GRACE_SECONDS", "3600"))
+FILE_BLOB_GC_BATCH_SIZE = int(os.getenv("FILE_BLOB_GC_BATCH_SIZE", "500"))
+
+metrics = MetricsCollector("file_manager")
+
+
+class StoredBlob(NamedTuple):
+    """Location and properties of stored file content."""
+    storage_path: str
+    size_bytes: int
+    checksum: str
+    mime_type: str
+    deduplicated: bool  # True if the content was already stored
+
+
+class BlobService:
+    """
+    Service for storing deduplicated, reference-counted file content.
+    """
+
+    def __init__(self, db: Session, storage_service: Optional[StorageService] = None):
+        """
+        Initialize the blob service.
+
+        Args:
+            db: Database session
+            storage_service: Storage service holding the blobs
+        """
+        self.db = db
+        self.storage_service = storage_service or StorageService()
+
+    async def store(
+        self,
+        file: UploadFile,
+        storage_backend: StorageBackend,
+        references: int = 1
+    ) -> StoredBlob:
+        """
+        Store the content of an upload, reusing an identical stored blob.
+
+        The upload is streamed and hashed first; if a blob with the same
+        checksum exists, the staged copy is discarded instead of being
+        written again.
+
+        Args:
+            file: The file to store
+            storage_backend: The storage backend to use
+            references: Number of rows that will reference the content
+
+        Returns:
+            The stored content
+        """
+        staged = await self.storage_service.stage_file(file, storage_backend)
+        tags = {"backend": _backend_name(storage_backend)}
+
+        try:
+            storage_path = self._add_references(storage_backend, staged.checksum, references)
+            if storage_path is not None:
+                self.storage_service.discard_staged_file(staged)
+                metrics.increment("dedup_hits", tags=tags)
+                metrics.increment("dedup_bytes_saved", staged.size_bytes, tags=tags)
+                return StoredBlob(storage_path, staged.size_bytes, staged.checksum, staged.mime_type, True)
+
+            storage_path = await self.storage_service.commit_staged_file(staged, file)
+        except Exception:
+            self.storage_service.discard_staged_file(staged)
+            raise
+
+        blobs = FileBlob.__table__
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(blobs).values(
+                    storage_backend=storage_backend,
+                    checksum=staged.checksum,
+                    storage_path=storage_path,
+                    size_bytes=staged.size_bytes,
+                    ref_count=references
+                ))
+        except IntegrityError:
+            # A concurrent upload of the same content created the blob first
+            self._add_references(storage_backend, staged.checksum, references)
+
+        metrics.increment("dedup_misses", tags=tags)
+        metrics.increment("stored_bytes", staged.size_bytes, tags=tags)
+        return StoredBlob(storage_path, staged.size_bytes, staged.checksum, staged.mime_type, False)
+
+    def _add_references(self, storage_backend: StorageBackend, checksum: str, count: int) -> Optional[str]:
+        """Add references to the blob of a checksum, returning its path if it exists."""
+        blobs = FileBlob.__table__
+        return self.db.execute(
+            update(blobs)
+            .where(blobs.c.storage_backend == storage_backend, blobs.c.checksum == checksum)
+            .values(ref_count=blobs.c.ref_count + count, orphaned_at=None)
+            .returning(blobs.c.storage_path)
+        ).scalar()
+
+    def release_references(self, storage_backend: StorageBackend, storage_paths: Iterable[str]) -> List[str]:
+        """
+        Release one reference per storage path.
+
+        Blobs are not deleted here; those left without references are
+        removed by collect_garbage once the grace period has passed.
+
+        Args:
+            storage_backend: The storage backend of the paths
+            storage_paths: Storage paths of the rows no longer referencing them
+
+        Returns:
+            Paths that are not managed as blobs, i.e. files stored before
+            deduplication, which the caller deletes directly
+        """
+        blobs = FileBlob.__table__
+        now = datetime.utcnow()
+        unmanaged = []
+
+        for storage_path, count in Counter(storage_paths).items():
+            result = self.db.execute(
+                update(blobs)
+                .where(blobs.c.storage_backend == storage_backend, blobs.c.storage_path == storage_path)
+                .values(
+                    ref_count=case((blobs.c.ref_count > count, blobs.c.ref_count - count), else_=0),
+                    orphaned_at=case((blobs.c.ref_count > count, blobs.c.orphaned_at), else_=now)
+                )
+            )
+            if result.rowcount == 0:
+                unmanaged.append(storage_path)
+
+        return unmanaged
+
+    async def collect_garbage(
+        self,
+        grace_period: int = FILE_BLOB_GC_GRACE_SECONDS,
+        batch_size: int = FILE_BLOB_GC_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Delete blobs that have had no references for the grace period.
+
+        Each blob is locked while its content is deleted, so an upload of
+        the same content waits and then stores the content again. Blobs
+        whose content could not be deleted are kept and retried on the
+        next run.
+
+        Args:
+            grace_period: Seconds a blob must have been unreferenced
+            batch_size: Number of blobs deleted per transaction
+
+        Returns:
+            Dictionary with the number of deleted blobs and freed bytes
+        """
+        blobs = FileBlob.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_period)
+        stats = {"blobs": 0, "bytes": 0, "failed": 0}
+        last_id = 0
+
+        while True:
+            candidates = self.db.execute(
+                select(blobs.c.id, blobs.c.storage_backend, blobs.c.storage_path, blobs.c.size_bytes)
+                .where(blobs.c.id > last_id, blobs.c.ref_count == 0, blobs.c.orphaned_at < cutoff)
+                .order_by(blobs.c.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not candidates:
+                break
+
+            for blob in candidates:
+                last_id = blob.id
+                if not await self.storage_service.delete_file(blob.storage_backend, blob.storage_path):
+                    logger.warning(f"Failed to delete blob {blob.id} from storage")
+                    stats["failed"] += 1
+                    continue
+
+                self.db.execute(delete(blobs).where(blobs.c.id == blob.id, blobs.c.ref_count == 0))
+                stats["blobs"] += 1
+                stats["bytes"] += blob.size_bytes
+
+            self.db.commit()
+
+        if stats["blobs"]:
+            metrics.increment("gc_blobs_deleted", stats["blobs"])
+            metrics.increment("gc_bytes_freed", stats["bytes"])
+        logger.info(f"Collected {stats['blobs']} unreferenced blobs, freeing {stats['bytes']} bytes")
+        return stats
+
+    def get_storage_statistics(self) -> Dict[str, Any]:
+        """
+        Get storage savings from deduplication.
+
+        Returns:
+            Dictionary with the number of blobs and references, the bytes
+            stored and referenced, and the bytes saved by deduplication
+        """
+        blobs = FileBlob.__table__
+        blob_count, references, stored_bytes, referenced_bytes = self.db.execute(
+            select(
+                func.count(blobs.c.id),
+                func.coalesce(func.sum(blobs.c.ref_count), 0),
+                func.coalesce(func.sum(blobs.c.size_bytes), 0),
+                func.coalesce(func.sum(blobs.c.size_bytes * blobs.c.ref_count), 0)
+            ).where(blobs.c.ref_count > 0)
+        ).one()
+
+        return {
+            "blobs": blob_count,
+            "references": references,
+            "stored_bytes": stored_bytes,
+            "referenced_bytes": referenced_bytes,
+            "saved_bytes": referenced_bytes - stored_bytes,
+            "dedup_ratio": referenced_bytes / stored_bytes if stored_bytes else 1.0
+        }
+
+    def report_metrics(self) -> Dict[str, Any]:
+        """
+        Publish the storage statistics as gauges.
+
+        Returns:
+            The published statistics
+        """
+        statistics = self.get_storage_statistics()
+        for name in ("stored_bytes", "referenced_bytes", "saved_bytes", "dedup_ratio"):
+            metrics.gauge(f"storage_{name}", statistics[name])
+        return statistics
+
+
+def _backend_name(storage_backend: Any) -> str:
+    """Get the plain name of a storage backend."""
+    return getattr(storage_backend, "value", storage_backend)
@@ -7,7 +7,7 @@ updates, and deletion, as well as handling file permissions and versions.
 
 import os
 import logging
-from typing import List, Optional, Dict, Any, BinaryIO, Tuple
+from typing import List, Optional, Dict, Any, AsyncIterator, NamedTuple, Tuple
 from datetime import datetime
 from fastapi import UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
@@ -23,10 +23,23 @@ from ..schemas.file import (
     FileShareCreate, FolderCreate, FolderUpdate, FileSearchParams
 )
 from .storage_service import StorageService
+from .blob_service import BlobService
+from ..utils.http_range import parse_range_header
 
 logger = logging.getLogger(__name__)
 
 
+class FileDownload(NamedTuple):
+    """A file, or a byte range of it, ready to be sent to a client."""
+    content: AsyncIterator[bytes]
+    filename: str
+    mime_type: str
+    size_bytes: int  # Size of the whole file
+    byte_range: Optional[Tuple[int, int]]  # Inclusive range served, None for the whole file
+    etag: str
+    local_path: Optional[str]  # Set for files in local storage
+
+
 class FileService:
     """
     Service for managing files and related operations.
@@ -44,6 +57,7 @@ class FileService:
         """
         self.db = db
         self.storage_service = StorageService()
+        self.blob_service = BlobService(db, self.storage_service)
     
     async def create_file(
         self, 
@@ -68,13 +82,11 @@ class FileService:
         if storage_backend is None:
             storage_backend = self.storage_service.get_preferred_storage_backend()
         
-        # Store the file
-        storage_path, size_bytes, checksum, mime_type = await self.storage_service.store_file(
+        # Store the file, referenced by the file and its initial version
+        storage_path, size_bytes, checksum, mime_type, _ = await self.blob_service.store(
             file=file,
             storage_backend=storage_backend,
-            module=file_data.module,
-            entity_type=file_data.entity_type,
-            entity_id=file_data.entity_id
+            references=2
         )
         
         # Create the file record
@@ -89,7 +101,7 @@ class FileService:
             storage_path=storage_path,
             title=file_data.title,
             description=file_data.description,
-            metadata=file_data.metadata,
+            file_metadata=file_data.metadata,
             tags=file_data.tags,
             status=FileStatus.ACTIVE,
             is_encrypted=file_data.is_encrypted,
@@ -338,7 +350,7 @@ class FileService:
             db_file.tags = file_data.tags
         
         if file_data.metadata is not None:
-            db_file.metadata = file_data.metadata
+            db_file.file_metadata = file_data.metadata
         
         if file_data.status is not None:
             db_file.status = file_data.status
@@ -399,15 +411,16 @@ class FileService:
         
         new_version_number = latest_version.version_number + 1 if latest_version else 1
         
-        # Store the new file
-        storage_path, size_bytes, checksum, mime_type = await self.storage_service.store_file(
+        # Store the new file, referenced by the file and the new version
+        storage_path, size_bytes, checksum, mime_type, _ = await self.blob_service.store(
             file=file,
             storage_backend=db_file.storage_backend,
-            module=db_file.module,
-            entity_type=db_file.entity_type,
-            entity_id=db_file.entity_id
+            references=2
         )
         
+        # The file no longer references its previous content, its versions still do
+        self.blob_service.release_references(db_file.storage_backend, [db_file.storage_path])
+        
         # Create new version
         db_version = FileVersion(
             file_id=db_file.id,
@@ -467,22 +480,22 @@ class FileService:
                 detail="You don't have permission to delete this file"
             )
         
-        # Delete the file from storage
-        success = await self.storage_service.delete_file(
-            storage_backend=db_file.storage_backend,
-            storage_path=db_file.storage_path
+        # Release the content of the file and its versions; shared blobs are
+        # kept and unreferenced ones are removed by garbage collection
+        unmanaged_paths = self.blob_service.release_references(
+            db_file.storage_backend,
+            [db_file.storage_path] + [version.storage_path for version in db_file.versions]
         )
         
-        if not success:
-            logger.warning(f"Failed to delete file {db_file.id} from storage")
-        
-        # Delete all versions from storage
-        for version in db_file.versions:
-            if version.storage_path != db_file.storage_path:
-                await self.storage_service.delete_file(
-                    storage_backend=db_file.storage_backend,
-                    storage_path=version.storage_path
-                )
+        # Files stored before deduplication are deleted directly
+        for storage_path in unmanaged_paths:
+            success = await self.storage_service.delete_file(
+                storage_backend=db_file.storage_backend,
+                storage_path=storage_path
+            )
+            
+            if not success:
+                logger.warning(f"Failed to delete {storage_path} of file {db_file.id} from storage")
         
         # Log access
         self._log_file_access(
@@ -498,16 +511,25 @@ class FileService:
         
         return True
     
-    async def download_file(self, file_id: int, user_id: int) -> Tuple[BinaryIO, str, str]:
+    async def download_file(
+        self,
+        file_id: int,
+        user_id: int,
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None
+    ) -> FileDownload:
         """
-        Download a file.
+        Download a file, or a byte range of it.
         
         Args:
             file_id: ID of the file to download
             user_id: ID of the user downloading the file
+            range_header: Optional value of the Range request header
+            if_range: Optional value of the If-Range request header; the
+                range is only served if it matches the file's ETag
             
         Returns:
-            Tuple containing (file_data, filename, mime_type)
+            The download, with the content streamed lazily
         """
         # Get the file
         db_file = self.db.query(File).filter(File.id == file_id).first()
@@ -525,10 +547,24 @@ class FileService:
                 detail="You don't have permission to download this file"
             )
         
-        # Get the file data
-        file_data = await self.storage_service.retrieve_file(
+        # The checksum identifies the content, so it serves as a strong ETag
+        etag = f'"{db_file.checksum or db_file.uuid}"'
+        byte_range = None
+        if range_header and (if_range is None or if_range == etag):
+            byte_range = parse_range_header(range_header, db_file.size_bytes)
+        start, end = byte_range or (0, db_file.size_bytes - 1)
+        
+        # Local files can be sent by the server directly; check they exist
+        # before the response starts
+        local_path = None
+        if db_file.storage_backend == StorageBackend.LOCAL:
+            local_path = self.storage_service.get_local_path(db_file.storage_path)
+        
+        content = self.storage_service.iter_file(
             storage_backend=db_file.storage_backend,
-            storage_path=db_file.storage_path
+            storage_path=db_file.storage_path,
+            start=start,
+            end=end
         )
         
         # Log access
@@ -536,10 +572,19 @@ class FileService:
             file_id=db_file.id,
             user_id=user_id,
             operation="download",
-            success=True
+            success=True,
+            details=f"bytes {start}-{end}/{db_file.size_bytes}" if byte_range else None
         )
         
-        return file_data, db_file.original_filename, db_file.mime_type
+        return FileDownload(
+            content=content,
+            filename=db_file.original_filename,
+            mime_type=db_file.mime_type,
+            size_bytes=db_file.size_bytes,
+            byte_range=byte_range,
+            etag=etag,
+            local_path=local_path
+        )
     
     def _check_file_permission(self, file_id: int, user_id: int, permission_type: str) -> bool:
         """
@@ -7,14 +7,17 @@ storage backends, including local filesystem and S3-compatible storage.
 
 import os
 import shutil
+import asyncio
 import hashlib
 import logging
 import mimetypes
-from typing import Optional, BinaryIO, Tuple, Dict, Any
+from typing import Optional, AsyncIterator, BinaryIO, NamedTuple, Tuple, Dict, Any
+from collections import deque
 from datetime import datetime
 import uuid
 from pathlib import Path
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from fastapi import UploadFile, HTTPException, status
 
@@ -23,6 +26,25 @@ from ..models.file import StorageBackend, FileStatus
 
 logger = logging.getLogger(__name__)
 
+# Content-addressed blobs and in-flight uploads, relative to the storage root
+CONTENT_DIR = "cas"
+STAGING_DIR = ".staging"
+
+# Streaming settings
+FILE_STREAM_CHUNK_SIZE = int(os.getenv("FILE_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# S3 transfers are split into parts of this size, moved by parallel requests
+FILE_S3_PART_SIZE = int(os.getenv("FILE_S3_PART_SIZE", str(8 * 1024 * 1024)))
+FILE_S3_MAX_CONCURRENCY = int(os.getenv("FILE_S3_MAX_CONCURRENCY", "4"))
+
+
+class StagedFile(NamedTuple):
+    """An upload that has been read and hashed but not yet stored."""
+    storage_backend: StorageBackend
+    staging_path: Optional[str]  # Local staging copy, if any
+    size_bytes: int
+    checksum: str
+    mime_type: str
+
 
 class StorageService:
     """
@@ -32,17 +54,36 @@ class StorageService:
     across different storage backends.
     """
     
-    def __init__(self):
-        """Initialize the storage service."""
+    def __init__(
+        self,
+        local_storage_path: Optional[str] = None,
+        s3_client: Optional[Any] = None,
+        s3_bucket: Optional[str] = None
+    ):
+        """
+        Initialize the storage service.
+        
+        Args:
+            local_storage_path: Root of local storage, defaults to the configured path
+            s3_client: S3 client to use instead of one built from the settings
+            s3_bucket: S3 bucket to use instead of the configured bucket
+        """
         # Set up local storage
-        self.local_storage_path = settings.FILE_STORAGE_PATH
+        self.local_storage_path = local_storage_path or settings.FILE_STORAGE_PATH
         os.makedirs(self.local_storage_path, exist_ok=True)
         
+        # Parallel multipart transfers for large S3 objects
+        self.s3_transfer_config = TransferConfig(
+            multipart_threshold=FILE_S3_PART_SIZE,
+            multipart_chunksize=FILE_S3_PART_SIZE,
+            max_concurrency=FILE_S3_MAX_CONCURRENCY
+        )
+        
         # Set up S3 storage if configured
-        self.s3_client = None
-        self.s3_bucket = settings.S3_BUCKET_NAME if hasattr(settings, 'S3_BUCKET_NAME') else None
+        self.s3_client = s3_client
+        self.s3_bucket = s3_bucket or (settings.S3_BUCKET_NAME if hasattr(settings, 'S3_BUCKET_NAME') else None)
         
-        if hasattr(settings, 'S3_ENDPOINT_URL') and settings.S3_ENDPOINT_URL:
+        if s3_client is None and hasattr(settings, 'S3_ENDPOINT_URL') and settings.S3_ENDPOINT_URL:
             self.s3_client = boto3.client(
                 's3',
                 endpoint_url=settings.S3_ENDPOINT_URL,
@@ -51,109 +92,88 @@ class StorageService:
                 region_name=settings.S3_REGION
             )
     
-    async def store_file(
-        self, 
-        file: UploadFile, 
-        storage_backend: StorageBackend,
-        module: Optional[str] = None,
-        entity_type: Optional[str] = None,
-        entity_id: Optional[int] = None
-    ) -> Tuple[str, int, str, str]:
+    async def stage_file(self, file: UploadFile, storage_backend: StorageBackend) -> StagedFile:
         """
-        Store a file in the specified storage backend.
+        Read an upload once, computing its size and checksum.
+        
+        The content is not visible under its content-addressed path until
+        commit_staged_file is called, so the caller can first check whether
+        a blob with the same checksum is already stored.
         
         Args:
-            file: The file to store
-            storage_backend: The storage backend to use
-            module: Optional module identifier
-            entity_type: Optional entity type
-            entity_id: Optional entity ID
+            file: The file to stage
+            storage_backend: The storage backend the file will be stored in
             
         Returns:
-            Tuple containing (storage_path, file_size, checksum, mime_type)
+            The staged file
         """
         if storage_backend == StorageBackend.LOCAL:
-            return await self._store_file_local(file, module, entity_type, entity_id)
+            return await self._stage_file_local(file)
         elif storage_backend == StorageBackend.S3:
-            return await self._store_file_s3(file, module, entity_type, entity_id)
+            return await self._stage_file_s3(file)
         elif storage_backend == StorageBackend.DATABASE:
             raise NotImplementedError("Database storage is not yet implemented")
         else:
             raise ValueError(f"Unsupported storage backend: {storage_backend}")
     
-    async def _store_file_local(
-        self, 
-        file: UploadFile, 
-        module: Optional[str] = None,
-        entity_type: Optional[str] = None,
-        entity_id: Optional[int] = None
-    ) -> Tuple[str, int, str, str]:
+    async def _stage_file_local(self, file: UploadFile) -> StagedFile:
         """
-        Store a file in the local filesystem.
+        Stream a file to the local staging directory.
+        
+        The staging directory is inside the storage root, so committing the
+        file is a rename rather than a second copy.
         
         Args:
-            file: The file to store
-            module: Optional module identifier
-            entity_type: Optional entity type
-            entity_id: Optional entity ID
+            file: The file to stage
             
         Returns:
-            Tuple containing (storage_path, file_size, checksum, mime_type)
+            The staged file
         """
-        # Generate a unique filename to avoid collisions
-        file_uuid = str(uuid.uuid4())
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        # Create directory structure
-        relative_path = self._get_relative_path(module, entity_type, entity_id)
-        full_dir_path = os.path.join(self.local_storage_path, relative_path)
-        os.makedirs(full_dir_path, exist_ok=True)
-        
-        # Full path for the file
-        filename = f"{file_uuid}{file_extension}"
-        full_file_path = os.path.join(full_dir_path, filename)
-        relative_file_path = os.path.join(relative_path, filename)
+        staging_dir = os.path.join(self.local_storage_path, STAGING_DIR)
+        os.makedirs(staging_dir, exist_ok=True)
+        staging_path = os.path.join(staging_dir, str(uuid.uuid4()))
         
         # Calculate checksum and size while saving
         sha256_hash = hashlib.sha256()
         file_size = 0
         
-        # Save the file
-        with open(full_file_path, "wb") as buffer:
+        # Hashing and writing run in a worker thread so the event loop stays free
+        buffer = await asyncio.to_thread(open, staging_path, "wb")
+        try:
             # Read in chunks to handle large files
-            while content := await file.read(1024 * 1024):  # 1MB chunks
-                sha256_hash.update(content)
+            while content := await file.read(FILE_STREAM_CHUNK_SIZE):
+                await asyncio.to_thread(self._hash_and_write, sha256_hash, buffer, content)
                 file_size += len(content)
-                buffer.write(content)
-        
-        # Determine mime type
-        mime_type = file.content_type
-        if not mime_type or mime_type == "application/octet-stream":
-            mime_type = mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
+        except Exception:
+            await asyncio.to_thread(buffer.close)
+            self._remove_local(staging_path)
+            raise
+        await asyncio.to_thread(buffer.close)
         
         # Reset file position for potential reuse
         await file.seek(0)
         
-        return relative_file_path, file_size, sha256_hash.hexdigest(), mime_type
+        return StagedFile(
+            storage_backend=StorageBackend.LOCAL,
+            staging_path=staging_path,
+            size_bytes=file_size,
+            checksum=sha256_hash.hexdigest(),
+            mime_type=self._get_mime_type(file)
+        )
     
-    async def _store_file_s3(
-        self, 
-        file: UploadFile, 
-        module: Optional[str] = None,
-        entity_type: Optional[str] = None,
-        entity_id: Optional[int] = None
-    ) -> Tuple[str, int, str, str]:
+    async def _stage_file_s3(self, file: UploadFile) -> StagedFile:
         """
-        Store a file in S3-compatible storage.
+        Hash a file that will be uploaded to S3-compatible storage.
+        
+        Uploads are already spooled to local disk by the web server, so the
+        file is only read here and uploaded on commit, when its content is
+        not stored yet.
         
         Args:
-            file: The file to store
-            module: Optional module identifier
-            entity_type: Optional entity type
-            entity_id: Optional entity ID
+            file: The file to stage
             
         Returns:
-            Tuple containing (storage_path, file_size, checksum, mime_type)
+            The staged file
         """
         if not self.s3_client or not self.s3_bucket:
             raise HTTPException(
@@ -161,47 +181,112 @@ class StorageService:
                 detail="S3 storage is not properly configured"
             )
         
-        # Generate a unique key to avoid collisions
-        file_uuid = str(uuid.uuid4())
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        
-        # Create S3 key
-        relative_path = self._get_relative_path(module, entity_type, entity_id)
-        s3_key = f"{relative_path}/{file_uuid}{file_extension}"
-        
-        # Calculate checksum and size while uploading
+        # Calculate checksum and size without holding the file in memory
         sha256_hash = hashlib.sha256()
         file_size = 0
-        file_content = await file.read()
+        while content := await file.read(FILE_STREAM_CHUNK_SIZE):
+            await asyncio.to_thread(sha256_hash.update, content)
+            file_size += len(content)
+        
+        # Reset file position for the upload
+        await file.seek(0)
+        
+        return StagedFile(
+            storage_backend=StorageBackend.S3,
+            staging_path=None,
+            size_bytes=file_size,
+            checksum=sha256_hash.hexdigest(),
+            mime_type=self._get_mime_type(file)
+        )
+    
+    async def commit_staged_file(self, staged: StagedFile, file: UploadFile) -> str:
+        """
+        Store a staged file under its content-addressed path.
+        
+        Args:
+            staged: The staged file
+            file: The upload the file was staged from
+            
+        Returns:
+            The storage path of the file
+        """
+        storage_path = self.get_content_path(staged.checksum)
         
-        # Update hash and size
-        sha256_hash.update(file_content)
-        file_size = len(file_content)
+        if staged.storage_backend == StorageBackend.LOCAL:
+            full_path = os.path.join(self.local_storage_path, storage_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(staged.staging_path, full_path)
         
-        # Determine mime type
+        elif staged.storage_backend == StorageBackend.S3:
+            try:
+                # Large files are sent as a multipart upload with parallel parts
+                await asyncio.to_thread(
+                    self.s3_client.upload_fileobj,
+                    file.file,
+                    self.s3_bucket,
+                    storage_path,
+                    ExtraArgs={"ContentType": staged.mime_type},
+                    Config=self.s3_transfer_config
+                )
+            except ClientError as e:
+                logger.error(f"Error uploading file to S3: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to upload file to S3: {str(e)}"
+                )
+            await file.seek(0)
+        
+        else:
+            raise ValueError(f"Unsupported storage backend: {staged.storage_backend}")
+        
+        return storage_path
+    
+    def discard_staged_file(self, staged: StagedFile) -> None:
+        """
+        Discard a staged file whose content is already stored.
+        
+        Args:
+            staged: The staged file
+        """
+        if staged.staging_path:
+            self._remove_local(staged.staging_path)
+    
+    @staticmethod
+    def get_content_path(checksum: str) -> str:
+        """
+        Get the content-addressed storage path of a checksum.
+        
+        Args:
+            checksum: SHA-256 hash of the content
+            
+        Returns:
+            Relative storage path, e.g. ``cas/ab/cd/abcd...``
+        """
+        return "/".join([CONTENT_DIR, checksum[:2], checksum[2:4], checksum])
+    
+    @staticmethod
+    def _hash_and_write(sha256_hash: Any, buffer: BinaryIO, content: bytes) -> None:
+        """Add a chunk to a checksum and write it to a file."""
+        sha256_hash.update(content)
+        buffer.write(content)
+    
+    @staticmethod
+    def _get_mime_type(file: UploadFile) -> str:
+        """Determine the mime type of an upload."""
         mime_type = file.content_type
         if not mime_type or mime_type == "application/octet-stream":
             mime_type = mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
-        
-        # Upload to S3
+        return mime_type
+    
+    @staticmethod
+    def _remove_local(path: str) -> None:
+        """Remove a local file, ignoring files that are already gone."""
         try:
-            self.s3_client.put_object(
-                Bucket=self.s3_bucket,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=mime_type
-            )
-        except ClientError as e:
-            logger.error(f"Error uploading file to S3: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload file to S3: {str(e)}"
-            )
-        
-        # Reset file position for potential reuse
-        await file.seek(0)
-        
-        return s3_key, file_size, sha256_hash.hexdigest(), mime_type
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing staged file {path}: {e}")
     
     def _get_relative_path(
         self, 
@@ -261,6 +346,116 @@ class StorageService:
         else:
             raise ValueError(f"Unsupported storage backend: {storage_backend}")
     
+    def get_local_path(self, storage_path: str) -> str:
+        """
+        Get the full path of a file in local storage.
+        
+        Args:
+            storage_path: The path to the file in storage
+            
+        Returns:
+            Full filesystem path of the file
+        """
+        full_path = os.path.join(self.local_storage_path, storage_path)
+        
+        if not os.path.exists(full_path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        
+        return full_path
+    
+    def iter_file(
+        self,
+        storage_backend: StorageBackend,
+        storage_path: str,
+        start: int,
+        end: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a byte range of a file without blocking the event loop.
+        
+        Args:
+            storage_backend: The storage backend where the file is stored
+            storage_path: The path to the file in storage
+            start: Offset of the first byte
+            end: Offset of the last byte, inclusive
+            
+        Returns:
+            Asynchronous iterator over chunks of the range
+        """
+        if storage_backend == StorageBackend.LOCAL:
+            return self._iter_file_local(storage_path, start, end)
+        elif storage_backend == StorageBackend.S3:
+            return self._iter_file_s3(storage_path, start, end)
+        elif storage_backend == StorageBackend.DATABASE:
+            raise NotImplementedError("Database storage is not yet implemented")
+        else:
+            raise ValueError(f"Unsupported storage backend: {storage_backend}")
+    
+    async def _iter_file_local(self, storage_path: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Stream a byte range of a local file, reading in a worker thread."""
+        full_path = self.get_local_path(storage_path)
+        fd = await asyncio.to_thread(os.open, full_path, os.O_RDONLY)
+        try:
+            offset = start
+            while offset <= end:
+                chunk = await asyncio.to_thread(os.pread, fd, min(FILE_STREAM_CHUNK_SIZE, end - offset + 1), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+    
+    async def _iter_file_s3(self, storage_path: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Stream a byte range of an S3 object.
+        
+        The range is fetched as parts of FILE_S3_PART_SIZE bytes, with up to
+        FILE_S3_MAX_CONCURRENCY ranged GET requests in flight, and yielded in
+        order.
+        """
+        if not self.s3_client or not self.s3_bucket:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="S3 storage is not properly configured"
+            )
+        
+        parts = iter(range(start, end + 1, FILE_S3_PART_SIZE))
+        pending = deque()
+        
+        def schedule() -> None:
+            for offset in parts:
+                last = min(offset + FILE_S3_PART_SIZE, end + 1) - 1
+                pending.append(asyncio.ensure_future(asyncio.to_thread(self._get_s3_range, storage_path, offset, last)))
+                if len(pending) >= FILE_S3_MAX_CONCURRENCY:
+                    return
+        
+        try:
+            schedule()
+            while pending:
+                part = await pending.popleft()
+                schedule()
+                yield part
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _get_s3_range(self, storage_path: str, start: int, end: int) -> bytes:
+        """Fetch a byte range of an S3 object."""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.s3_bucket,
+                Key=storage_path,
+                Range=f"bytes={start}-{end}"
+            )
+            return response['Body'].read()
+        except ClientError as e:
+            logger.error(f"Error retrieving file range from S3: {e}")
+            raise
+    
     def _retrieve_file_local(self, storage_path: str) -> BinaryIO:
         """
         Retrieve a file from local storage.
@@ -298,7 +493,8 @@ class StorageService:
             )
         
         try:
-            response = self.s3_client.get_object(
+            response = await asyncio.to_thread(
+                self.s3_client.get_object,
                 Bucket=self.s3_bucket,
                 Key=storage_path
             )
@@ -375,7 +571,8 @@ class StorageService:
             )
         
         try:
-            self.s3_client.delete_object(
+            await asyncio.to_thread(
+                self.s3_client.delete_object,
                 Bucket=self.s3_bucket,
                 Key=storage_path
             )
@@ -6,6 +6,7 @@ including background processing, cleanup, and Elasticsearch integration.
 """
 
 import os
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
@@ -18,6 +19,7 @@ from backend_core.services.elasticsearch_client import ElasticsearchClient
 from .models.file import File, FileAccessLog, FileShare, FileStatus
 from .config import file_manager_settings
 from .services.storage_service import StorageService
+from .services.blob_service import BlobService
 
 logger = logging.getLogger(__name__)
 
@@ -269,54 +271,71 @@ def cleanup_deleted_files(days_to_keep: int = 30):
     """
     Permanently delete files that have been marked as deleted for a specified period.
     
+    The content of deleted files is shared with other files and versions
+    holding the same checksum, so only their references are released here;
+    blobs left without any reference are then garbage collected.
+    
     Args:
         days_to_keep: Number of days to keep deleted files before permanent deletion
+        
+    Returns:
+        Dictionary with the number of deleted files and collected blobs
     """
     logger.info(f"Starting cleanup of deleted files older than {days_to_keep} days")
     
+    with get_db_session() as db:
+        stats = asyncio.run(_cleanup_deleted_files(db, days_to_keep))
+    
+    logger.info(
+        f"Completed cleanup of deleted files. Permanently deleted {stats['files']} files "
+        f"and {stats['blobs']} unreferenced blobs ({stats['bytes']} bytes)."
+    )
+    return stats
+
+
+async def _cleanup_deleted_files(db: Session, days_to_keep: int) -> Dict[str, int]:
+    """Delete expired file records and garbage collect unreferenced blobs."""
     threshold = datetime.utcnow() - timedelta(days=days_to_keep)
     
-    with get_db_session() as db:
-        # Find files marked as deleted before the threshold
-        files_to_delete = db.query(File).filter(
-            File.status == FileStatus.DELETED,
-            File.updated_at < threshold
-        ).all()
-        
-        if not files_to_delete:
-            logger.info("No deleted files to clean up")
-            return
-        
-        storage_service = StorageService()
-        count = 0
-        
-        for file in files_to_delete:
-            try:
-                # Delete file from storage
-                success = await storage_service.delete_file(
-                    storage_backend=file.storage_backend,
-                    storage_path=file.storage_path
+    # Find files marked as deleted before the threshold
+    files_to_delete = db.query(File).filter(
+        File.status == FileStatus.DELETED,
+        File.updated_at < threshold
+    ).all()
+    
+    storage_service = StorageService()
+    blob_service = BlobService(db, storage_service)
+    count = 0
+    
+    for file in files_to_delete:
+        try:
+            with db.begin_nested():
+                unmanaged_paths = blob_service.release_references(
+                    file.storage_backend,
+                    [file.storage_path] + [version.storage_path for version in file.versions]
                 )
                 
-                if success:
-                    # Delete all versions from storage
-                    for version in file.versions:
-                        if version.storage_path != file.storage_path:
-                            await storage_service.delete_file(
-                                storage_backend=file.storage_backend,
-                                storage_path=version.storage_path
-                            )
-                    
-                    # Delete file record
-                    db.delete(file)
-                    count += 1
-                    logger.info(f"Permanently deleted file {file.id}")
-                else:
-                    logger.warning(f"Failed to delete file {file.id} from storage")
+                # Files stored before deduplication are deleted directly
+                for storage_path in unmanaged_paths:
+                    if not await storage_service.delete_file(
+                        storage_backend=file.storage_backend,
+                        storage_path=storage_path
+                    ):
+                        raise RuntimeError(f"failed to delete {storage_path} from storage")
+                
+                # Delete file record
+                db.delete(file)
             
-            except Exception as e:
-                logger.error(f"Error deleting file {file.id}: {str(e)}")
+            count += 1
+            logger.info(f"Permanently deleted file {file.id}")
         
-        db.commit()
-        
-        logger.info(f"Completed cleanup of deleted files. Permanently deleted {count} files.")
+        except Exception as e:
+            logger.error(f"Error deleting file {file.id}: {str(e)}")
+    
+    db.commit()
+    
+    # Remove blobs that are no longer referenced by any file or version
+    stats = await blob_service.collect_garbage()
+    blob_service.report_metrics()
+    
+    return {"files": count, "blobs": stats["blobs"], "bytes": stats["bytes"]}
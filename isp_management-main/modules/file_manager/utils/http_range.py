@@ -0,0 +1,59 @@
+"""
+HTTP range utilities for the File Manager module.
+
+This module parses the Range header of download requests (RFC 9110,
+section 14) into the byte range to serve.
+"""
+
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header against a file of the given size.
+
+    Only single ranges are served; headers with several ranges, other units
+    or invalid syntax are ignored, so the whole file is sent.
+
+    Args:
+        range_header: Value of the Range header
+        size: Size of the file in bytes
+
+    Returns:
+        First and last byte offsets of the range (inclusive), or None to
+        send the whole file
+
+    Raises:
+        HTTPException: 416 if the range does not overlap the file
+    """
+    if not range_header:
+        return None
+
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    first, separator, last = (part.strip() for part in ranges.partition("-"))
+    if not separator or not (first or last) or not (first + last).isdigit():
+        return None
+
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        start, end = (max(size - suffix, 0) if suffix else size), size - 1
+
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    return start, min(end, size - 1)
@@ -168,13 +168,18 @@ class WebhookEvent(Base):
     payload = Column(JSON, nullable=False)
     headers = Column(JSON, nullable=True)
     signature = Column(String(255), nullable=True)
-    status = Column(Enum(ActivityStatus), default=ActivityStatus.PENDING)
+    status = Column(Enum(ActivityStatus), default=ActivityStatus.PENDING, index=True)
     processing_attempts = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
     ip_address = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=func.now())
     processed_at = Column(DateTime, nullable=True)
     
+    # Work queue: the claim token of the worker processing the event, and
+    # until when it holds the event (for pending events, when to retry)
+    claimed_by = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    
     # Relationships
     endpoint = relationship("WebhookEndpoint", back_populates="events")
     
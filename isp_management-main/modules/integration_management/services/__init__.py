@@ -6,5 +6,7 @@ webhook endpoints, and performing integration-related operations.
 """
 
 from .integration_service import IntegrationService
+from .webhook_queue import WebhookEventQueue
+from .health_checker import IntegrationHealthChecker
 
-__all__ = ["IntegrationService"]
+__all__ = ["IntegrationService", "WebhookEventQueue", "IntegrationHealthChecker"]
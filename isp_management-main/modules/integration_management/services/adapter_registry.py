@@ -0,0 +1,270 @@
+"""
+Adapter registry for the Integration Management Module.
+
+This module keeps ready adapter instances in memory, so repeat calls to a
+hot integration skip decrypting its credentials and setting up its
+adapter. Entries are keyed by integration ID and configuration version:
+an integration changed by any worker gets a new version and therefore a
+new adapter, and updates made through this process also drop the old
+entry immediately. Entries expire after a TTL and the registry is bounded
+by least-recent use.
+
+Adapters are lent out under a lease (see AdapterRegistry.borrow). Evicted
+adapters have their secrets cleared as soon as the last lease on them is
+released, so threads still using an evicted adapter can finish with it.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple
+
+from core.metrics import MetricsCollector
+from ..models.integration import Integration
+from ..utils.adapters import IntegrationAdapter
+from ..utils.security import CredentialEncryptor
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INTEGRATION_ADAPTER_CACHE_SIZE = int(os.getenv("INTEGRATION_ADAPTER_CACHE_SIZE", "256"))
+INTEGRATION_ADAPTER_CACHE_TTL = float(os.getenv("INTEGRATION_ADAPTER_CACHE_TTL", "300"))
+
+metrics = MetricsCollector(namespace="integration_management")
+
+
+class _Entry(NamedTuple):
+    """A cached adapter and when it expires."""
+    version: str
+    adapter: IntegrationAdapter
+    expires_at: float
+
+
+def get_integration_config_version(integration: Integration) -> str:
+    """
+    Get the configuration version of an integration.
+
+    The version changes whenever the type, configuration or credentials
+    of the integration change.
+
+    Args:
+        integration: Integration
+
+    Returns:
+        Version digest
+    """
+    digest = hashlib.sha256()
+    digest.update(str(getattr(integration.type, "value", integration.type)).encode())
+    digest.update(json.dumps(integration.configuration, sort_keys=True, default=str).encode())
+    digest.update((integration.encrypted_credentials or "").encode())
+    return digest.hexdigest()[:32]
+
+
+def _detached_copy(integration: Integration) -> Integration:
+    """Copy the fields adapters use, so cached adapters outlive the session."""
+    return Integration(
+        id=integration.id,
+        name=integration.name,
+        type=integration.type,
+        configuration=json.loads(json.dumps(integration.configuration or {}, default=str)),
+        encrypted_credentials=integration.encrypted_credentials,
+        status=integration.status,
+        environment=integration.environment
+    )
+
+
+class AdapterRegistry:
+    """Bounded, TTL-based registry of ready integration adapters."""
+
+    def __init__(self, max_size: int = INTEGRATION_ADAPTER_CACHE_SIZE, ttl: float = INTEGRATION_ADAPTER_CACHE_TTL):
+        """
+        Initialize the registry.
+
+        Args:
+            max_size: Maximum number of cached adapters
+            ttl: Seconds an adapter is cached
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Number of leases on each lent adapter, by id() of the adapter
+        self._leases: Dict[int, int] = {}
+        # Evicted adapters waiting for their last lease to be released
+        self._retired: Dict[int, IntegrationAdapter] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, integration: Integration, credential_encryptor: CredentialEncryptor) -> Iterator[IntegrationAdapter]:
+        """
+        Borrow a ready adapter for the current version of an integration.
+
+        The adapter keeps its credentials until the block exits, even if it
+        is evicted in the meantime.
+
+        Args:
+            integration: Integration configuration
+            credential_encryptor: Encryptor used if the adapter must be created
+
+        Yields:
+            Adapter instance for the integration
+
+        Raises:
+            ValueError: If no adapter is available for the integration type
+        """
+        adapter = self.acquire(integration, credential_encryptor)
+        try:
+            yield adapter
+        finally:
+            self.release(adapter)
+
+    def acquire(self, integration: Integration, credential_encryptor: CredentialEncryptor) -> IntegrationAdapter:
+        """
+        Take a lease on a ready adapter for the current version of an integration.
+
+        Every acquired adapter must be handed back with release(); prefer
+        borrow() unless the adapter outlives the calling block.
+
+        Args:
+            integration: Integration configuration
+            credential_encryptor: Encryptor used if the adapter must be created
+
+        Returns:
+            Adapter instance for the integration
+
+        Raises:
+            ValueError: If no adapter is available for the integration type
+        """
+        version = get_integration_config_version(integration)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(integration.id)
+            if entry and entry.version == version and entry.expires_at > now:
+                self._entries.move_to_end(integration.id)
+                self._lease(entry.adapter)
+                metrics.increment("adapter_cache_hits")
+                return entry.adapter
+
+        metrics.increment("adapter_cache_misses")
+        adapter = IntegrationAdapter.get_adapter_for_integration(_detached_copy(integration), credential_encryptor)
+
+        with self._lock:
+            self._lease(adapter)
+            evicted = []
+            replaced = self._entries.pop(integration.id, None)
+            if replaced:
+                evicted.append(replaced.adapter)
+            self._entries[integration.id] = _Entry(version, adapter, now + self.ttl)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[1].adapter)
+            unused = self._retire(evicted)
+
+        self._close(unused, evicted=len(evicted))
+        return adapter
+
+    def release(self, adapter: IntegrationAdapter) -> None:
+        """
+        Release a lease taken with acquire().
+
+        Args:
+            adapter: The acquired adapter
+        """
+        with self._lock:
+            leases = self._leases.get(id(adapter), 0) - 1
+            if leases > 0:
+                self._leases[id(adapter)] = leases
+                return
+            self._leases.pop(id(adapter), None)
+            retired = self._retired.pop(id(adapter), None)
+
+        if retired is not None:
+            self._close([retired])
+
+    def invalidate(self, integration_id: int) -> None:
+        """
+        Drop the cached adapter of an integration.
+
+        Args:
+            integration_id: Integration ID
+        """
+        with self._lock:
+            entry = self._entries.pop(integration_id, None)
+            evicted = [entry.adapter] if entry else []
+            unused = self._retire(evicted)
+        self._close(unused, evicted=len(evicted))
+
+    def clear(self) -> None:
+        """Drop all cached adapters."""
+        with self._lock:
+            evicted = [entry.adapter for entry in self._entries.values()]
+            self._entries.clear()
+            unused = self._retire(evicted)
+        self._close(unused, evicted=len(evicted))
+
+    def purge_expired(self) -> int:
+        """
+        Drop adapters whose TTL has passed.
+
+        Returns:
+            Number of dropped adapters
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+            evicted = [self._entries.pop(key).adapter for key in expired]
+            unused = self._retire(evicted)
+        self._close(unused, evicted=len(evicted))
+        return len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the state of the registry.
+
+        Returns:
+            Dictionary with the number of cached, borrowed and retired
+            adapters and the limits
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "borrowed": len(self._leases),
+                "retired": len(self._retired),
+                "max_size": self.max_size,
+                "ttl": self.ttl
+            }
+
+    def _lease(self, adapter: IntegrationAdapter) -> None:
+        """Count a lease on an adapter; called with the lock held."""
+        self._leases[id(adapter)] = self._leases.get(id(adapter), 0) + 1
+
+    def _retire(self, adapters: Iterable[IntegrationAdapter]) -> List[IntegrationAdapter]:
+        """
+        Hold back evicted adapters that are still borrowed; called with the lock held.
+
+        Returns:
+            The evicted adapters nobody borrows, to be closed now
+        """
+        unused = []
+        for adapter in adapters:
+            if id(adapter) in self._leases:
+                self._retired[id(adapter)] = adapter
+            else:
+                unused.append(adapter)
+        return unused
+
+    @staticmethod
+    def _close(adapters: Iterable[IntegrationAdapter], evicted: int = 0) -> None:
+        """Clear the secrets of adapters that are evicted and no longer borrowed."""
+        for adapter in adapters:
+            adapter.close()
+        if evicted:
+            metrics.increment("adapter_cache_evictions", evicted)
+
+
+# Process-wide registry shared by the integration services
+adapter_registry = AdapterRegistry()
@@ -0,0 +1,244 @@
+"""
+Health checker for the Integration Management Module.
+
+This module probes the external services of integrations concurrently.
+Each probe runs its adapter's connection test in a worker thread under a
+bounded semaphore and is abandoned once the adapter's deadline has
+passed, so a sweep takes about as long as its slowest probe instead of
+the sum of all of them.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from core.metrics import MetricsCollector
+from ..models.integration import (
+    Integration, IntegrationActivity, IntegrationStatus, ActivityType, ActivityStatus
+)
+from ..utils.adapters import IntegrationAdapter
+from ..utils.security import CredentialEncryptor
+from .adapter_registry import adapter_registry
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INTEGRATION_HEALTH_CONCURRENCY = int(os.getenv("INTEGRATION_HEALTH_CONCURRENCY", "10"))
+# Probes that succeed but take longer than this report the service as degraded
+INTEGRATION_HEALTH_DEGRADED_SECONDS = float(os.getenv("INTEGRATION_HEALTH_DEGRADED_SECONDS", "5"))
+
+metrics = MetricsCollector(namespace="integration_management")
+
+
+class HealthCheckResult(NamedTuple):
+    """Outcome of probing one integration."""
+    integration_id: int
+    integration_name: str
+    integration_type: str
+    health_status: str  # "healthy", "degraded" or "failing"
+    previous_status: Optional[str]
+    latency: float  # Seconds
+    timed_out: bool
+    message: Optional[str]
+
+
+class IntegrationHealthChecker:
+    """Concurrent health checker of integrations."""
+
+    def __init__(
+        self,
+        db: Session,
+        credential_encryptor: Optional[CredentialEncryptor] = None,
+        concurrency: int = INTEGRATION_HEALTH_CONCURRENCY,
+        degraded_seconds: float = INTEGRATION_HEALTH_DEGRADED_SECONDS
+    ):
+        """
+        Initialize the health checker.
+
+        Args:
+            db: Database session
+            credential_encryptor: Encryptor for handling credentials
+            concurrency: Maximum number of probes running at the same time
+            degraded_seconds: Latency above which a healthy service is degraded
+        """
+        self.db = db
+        self.credential_encryptor = credential_encryptor or CredentialEncryptor()
+        self.concurrency = max(1, concurrency)
+        self.degraded_seconds = degraded_seconds
+
+    def check_active_integrations(self) -> List[HealthCheckResult]:
+        """
+        Probe all active integrations and store their health status.
+
+        Returns:
+            Results of the probes
+        """
+        integrations = self.db.query(Integration).filter(
+            Integration.status == IntegrationStatus.ACTIVE
+        ).all()
+        return self.check_integrations(integrations)
+
+    def check_integrations(self, integrations: List[Integration]) -> List[HealthCheckResult]:
+        """
+        Probe integrations concurrently and store their health status.
+
+        Health status changes are recorded as status change activities.
+
+        Args:
+            integrations: Integrations to probe
+
+        Returns:
+            Results of the probes, in the order of the integrations
+        """
+        adapters = []
+        for integration in integrations:
+            try:
+                adapters.append(adapter_registry.acquire(integration, self.credential_encryptor))
+            except Exception as e:
+                logger.error(f"Error creating adapter for integration {integration.id}: {str(e)}")
+                adapters.append(None)
+
+        results = asyncio.run(self._probe_all(integrations, adapters))
+        self._record(integrations, results)
+        return results
+
+    async def _probe_all(
+        self, integrations: List[Integration], adapters: List[Optional[IntegrationAdapter]]
+    ) -> List[HealthCheckResult]:
+        """Run the probes, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Not shut down with waiting: threads of abandoned probes finish on their own
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="integration-health")
+        try:
+            return await asyncio.gather(*(
+                self._probe(integration, adapter, semaphore, executor)
+                for integration, adapter in zip(integrations, adapters)
+            ))
+        finally:
+            executor.shutdown(wait=False)
+
+    async def _probe(
+        self,
+        integration: Integration,
+        adapter: Optional[IntegrationAdapter],
+        semaphore: asyncio.Semaphore,
+        executor: ThreadPoolExecutor
+    ) -> HealthCheckResult:
+        """Probe one integration within its adapter's deadline."""
+        timed_out = False
+        await semaphore.acquire()
+        start = time.perf_counter()
+
+        if adapter is None:
+            semaphore.release()
+            success, message = False, "No adapter available"
+        else:
+            probe = asyncio.get_running_loop().run_in_executor(executor, self._test_connection, adapter)
+            # The slot is held until the thread finishes, even past the
+            # deadline, so hung probes cannot exceed the concurrency limit
+            probe.add_done_callback(lambda _: semaphore.release())
+            try:
+                success, message = await asyncio.wait_for(asyncio.shield(probe), adapter.get_health_check_timeout())
+            except asyncio.TimeoutError:
+                timed_out = True
+                success, message = False, f"Health check timed out after {adapter.get_health_check_timeout():g}s"
+            except Exception as e:
+                success, message = False, f"Health check error: {str(e)}"
+
+        latency = time.perf_counter() - start
+        if not success:
+            health_status = "failing"
+        elif latency > self.degraded_seconds:
+            health_status = "degraded"
+        else:
+            health_status = "healthy"
+
+        return HealthCheckResult(
+            integration_id=integration.id,
+            integration_name=integration.name,
+            integration_type=integration.type.value,
+            health_status=health_status,
+            previous_status=integration.health_status,
+            latency=latency,
+            timed_out=timed_out,
+            message=message
+        )
+
+    @staticmethod
+    def _test_connection(adapter: IntegrationAdapter):
+        """
+        Run an adapter's connection test in a worker thread.
+
+        The adapter's lease is released by the thread itself, which may
+        finish after the sweep has abandoned it and its event loop is gone.
+        """
+        try:
+            return adapter.test_connection()
+        finally:
+            adapter_registry.release(adapter)
+
+    def _record(self, integrations: List[Integration], results: List[HealthCheckResult]) -> None:
+        """Store the health status of the probed integrations and publish metrics."""
+        now = datetime.utcnow()
+        for integration, result in zip(integrations, results):
+            tags = {"integration_type": result.integration_type, "health_status": result.health_status}
+            metrics.record("integration_health_check_latency", result.latency, tags=tags)
+            if result.timed_out:
+                metrics.increment("integration_health_check_timeouts", tags={"integration_type": result.integration_type})
+
+            integration.health_status = result.health_status
+            integration.last_health_check = now
+
+            if result.previous_status != result.health_status:
+                logger.info(
+                    f"Integration {integration.id} health changed from "
+                    f"{result.previous_status} to {result.health_status}"
+                )
+                metrics.increment(
+                    "integration_health_transitions",
+                    tags={
+                        "integration_type": result.integration_type,
+                        "from": result.previous_status or "unknown",
+                        "to": result.health_status
+                    }
+                )
+                self.db.add(IntegrationActivity(
+                    integration_id=integration.id,
+                    activity_type=ActivityType.STATUS_CHANGED,
+                    status=ActivityStatus.SUCCESS if result.health_status != "failing" else ActivityStatus.FAILURE,
+                    details={
+                        "previous_health_status": result.previous_status,
+                        "health_status": result.health_status,
+                        "latency": round(result.latency, 3),
+                        "message": result.message
+                    }
+                ))
+
+        self.db.commit()
+
+    @staticmethod
+    def summarize(results: List[HealthCheckResult]) -> Dict[str, Any]:
+        """
+        Summarize the results of a sweep.
+
+        Args:
+            results: Results of the probes
+
+        Returns:
+            Dictionary with counts per outcome and the slowest probe latency
+        """
+        return {
+            "total": len(results),
+            "healthy": sum(1 for result in results if result.health_status == "healthy"),
+            "degraded": sum(1 for result in results if result.health_status == "degraded"),
+            "failing": sum(1 for result in results if result.health_status == "failing"),
+            "timed_out": sum(1 for result in results if result.timed_out),
+            "transitions": sum(1 for result in results if result.previous_status != result.health_status),
+            "max_latency": max((result.latency for result in results), default=0.0)
+        }
@@ -8,7 +8,8 @@ and performing integration-related operations.
 import json
 import logging
 import uuid
-from typing import Dict, Any, Optional, List, Tuple, Union
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, List, Tuple, Union
 from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -24,6 +25,7 @@ from ..schemas.integration import (
 )
 from ..utils.security import CredentialEncryptor, generate_webhook_secret
 from ..utils.adapters import IntegrationAdapter
+from .adapter_registry import adapter_registry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -248,6 +250,9 @@ class IntegrationService:
             self.db.add(activity)
             self.db.commit()
             
+            # Drop the adapter built from the previous configuration
+            adapter_registry.invalidate(integration_id)
+            
             return integration
         except Exception as e:
             self.db.rollback()
@@ -271,11 +276,31 @@ class IntegrationService:
             # Delete the integration
             self.db.delete(integration)
             self.db.commit()
+            
+            adapter_registry.invalidate(integration_id)
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error deleting integration: {str(e)}")
             raise
     
+    @contextmanager
+    def borrow_adapter(self, integration: Integration) -> Iterator[IntegrationAdapter]:
+        """
+        Borrow a ready adapter for an integration.
+        
+        Adapters are cached per integration and configuration version, so
+        credentials are only decrypted when the integration changes. The
+        adapter keeps its credentials until the block exits.
+        
+        Args:
+            integration: Integration configuration
+            
+        Yields:
+            Adapter instance for the integration
+        """
+        with adapter_registry.borrow(integration, self.credential_encryptor) as adapter:
+            yield adapter
+    
     def test_integration_connection(self, integration_id: int) -> Tuple[bool, Optional[str]]:
         """
         Test the connection to an integration.
@@ -293,14 +318,9 @@ class IntegrationService:
             if not integration:
                 raise ValueError(f"Integration with ID {integration_id} not found")
             
-            # Get the appropriate adapter for the integration
-            adapter = IntegrationAdapter.get_adapter_for_integration(
-                integration,
-                self.credential_encryptor
-            )
-            
-            # Test the connection
-            success, message = adapter.test_connection()
+            # Test the connection with the appropriate adapter for the integration
+            with self.borrow_adapter(integration) as adapter:
+                success, message = adapter.test_connection()
             
             # Update the integration status based on the test result
             new_status = IntegrationStatus.ACTIVE if success else IntegrationStatus.ERROR
@@ -629,3 +649,28 @@ class IntegrationService:
             self.db.rollback()
             logger.error(f"Error processing webhook event: {str(e)}")
             raise
+    
+    def dispatch_webhook_event(self, event: WebhookEvent) -> Dict[str, Any]:
+        """
+        Hand a received webhook event to the adapter of its integration.
+        
+        Args:
+            event: Webhook event to dispatch
+            
+        Returns:
+            Dictionary describing how the adapter handled the event
+        """
+        endpoint = event.endpoint
+        if not endpoint:
+            raise ValueError(f"Webhook endpoint with ID {event.endpoint_id} not found")
+        
+        integration = endpoint.integration
+        if not integration:
+            raise ValueError(f"Integration with ID {endpoint.integration_id} not found")
+        
+        # Providers put the event type in the payload; fall back to the header
+        payload = event.payload if isinstance(event.payload, dict) else {}
+        event_type = payload.get("type") or event.event_type
+        
+        with self.borrow_adapter(integration) as adapter:
+            return adapter.handle_webhook_event(event_type, payload)
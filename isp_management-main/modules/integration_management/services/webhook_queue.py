@@ -0,0 +1,299 @@
+"""
+Webhook event queue for the Integration Management Module.
+
+Received webhook events are processed as a work queue shared by all
+workers. A worker claims a batch of pending events atomically, with
+SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL and a conditional update
+elsewhere, and holds them under a lease. Events whose lease expires, for
+example because their worker crashed, are returned to the queue. Failed
+events are retried after a delay until they run out of attempts.
+"""
+
+import os
+import socket
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend_core.database import SessionLocal
+from core.metrics import MetricsCollector
+from ..models.integration import WebhookEvent, ActivityStatus
+from .integration_service import IntegrationService
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+WEBHOOK_QUEUE_BATCH_SIZE = int(os.getenv("WEBHOOK_QUEUE_BATCH_SIZE", "50"))
+WEBHOOK_QUEUE_CONCURRENCY = int(os.getenv("WEBHOOK_QUEUE_CONCURRENCY", "8"))
+WEBHOOK_QUEUE_LEASE_SECONDS = int(os.getenv("WEBHOOK_QUEUE_LEASE_SECONDS", "300"))
+WEBHOOK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_QUEUE_MAX_ATTEMPTS", "5"))
+# Failed events are retried after this delay times the number of attempts
+WEBHOOK_QUEUE_RETRY_DELAY_SECONDS = int(os.getenv("WEBHOOK_QUEUE_RETRY_DELAY_SECONDS", "60"))
+
+metrics = MetricsCollector(namespace="integration_management")
+
+
+class WebhookEventQueue:
+    """Work queue of received webhook events."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = WEBHOOK_QUEUE_BATCH_SIZE,
+        concurrency: int = WEBHOOK_QUEUE_CONCURRENCY,
+        lease_seconds: int = WEBHOOK_QUEUE_LEASE_SECONDS,
+        max_attempts: int = WEBHOOK_QUEUE_MAX_ATTEMPTS,
+        retry_delay_seconds: int = WEBHOOK_QUEUE_RETRY_DELAY_SECONDS,
+        worker_id: Optional[str] = None
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            session_factory: Factory of database sessions, one per processed event
+            batch_size: Number of events claimed at a time
+            concurrency: Number of events processed in parallel
+            lease_seconds: How long a claimed event is held before it can be reclaimed
+            max_attempts: Attempts after which an event is marked as failed
+            retry_delay_seconds: Base delay before a failed event is retried
+            worker_id: Identifier of this worker, defaults to host and process id
+        """
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def claim(self, db: Session, limit: int, event_ids: Optional[Sequence[int]] = None) -> Tuple[str, List[int]]:
+        """
+        Claim pending events, oldest first.
+
+        Args:
+            db: Database session
+            limit: Maximum number of events to claim
+            event_ids: Only claim these events
+
+        Returns:
+            Claim token and IDs of the claimed events
+        """
+        events = WebhookEvent.__table__
+        now = datetime.utcnow()
+        token = f"{self.worker_id}:{uuid.uuid4().hex[:12]}"
+
+        claimable = and_(
+            events.c.status == ActivityStatus.PENDING,
+            or_(events.c.lease_expires_at.is_(None), events.c.lease_expires_at <= now)
+        )
+        candidates = select(events.c.id).where(claimable).order_by(events.c.created_at, events.c.id).limit(limit)
+        if event_ids is not None:
+            candidates = candidates.where(events.c.id.in_(event_ids))
+
+        if db.get_bind().dialect.name == "postgresql":
+            # Rows locked by another worker's claim are skipped, not waited for
+            claimed = events.c.id.in_(candidates.with_for_update(skip_locked=True).scalar_subquery())
+        else:
+            # Without row locks the conditional update below claims only the
+            # candidates no other worker has claimed in the meantime
+            claimed = events.c.id.in_(db.execute(candidates).scalars().all())
+
+        claimed_ids = db.execute(
+            update(events)
+            .where(claimed, claimable)
+            .values(
+                status=ActivityStatus.PROCESSING,
+                claimed_by=token,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                processing_attempts=events.c.processing_attempts + 1
+            )
+            .returning(events.c.id)
+        ).scalars().all()
+        db.commit()
+
+        if claimed_ids:
+            metrics.increment("webhook_events_claimed", len(claimed_ids))
+        return token, sorted(claimed_ids)
+
+    def expire_leases(self, db: Session) -> int:
+        """
+        Return events whose lease has expired to the queue.
+
+        Events that have used all their attempts are marked as failed instead.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of expired leases
+        """
+        events = WebhookEvent.__table__
+        expired = and_(
+            events.c.status == ActivityStatus.PROCESSING,
+            events.c.lease_expires_at < datetime.utcnow()
+        )
+
+        exhausted = db.execute(
+            update(events)
+            .where(expired, events.c.processing_attempts >= self.max_attempts)
+            .values(
+                status=ActivityStatus.FAILURE,
+                claimed_by=None,
+                lease_expires_at=None,
+                error_message="Lease expired on the last attempt"
+            )
+        ).rowcount
+        requeued = db.execute(
+            update(events)
+            .where(expired)
+            .values(status=ActivityStatus.PENDING, claimed_by=None, lease_expires_at=None)
+        ).rowcount
+        db.commit()
+
+        if exhausted or requeued:
+            logger.warning(f"Expired {exhausted + requeued} webhook event leases, {exhausted} out of attempts")
+            metrics.increment("webhook_leases_expired", exhausted + requeued)
+        return exhausted + requeued
+
+    def complete(self, db: Session, event_id: int, token: str) -> bool:
+        """
+        Mark a claimed event as processed.
+
+        Args:
+            db: Database session
+            event_id: ID of the event
+            token: Claim token the event was claimed with
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        events = WebhookEvent.__table__
+        return db.execute(
+            update(events)
+            .where(events.c.id == event_id, events.c.claimed_by == token)
+            .values(
+                status=ActivityStatus.SUCCESS,
+                processed_at=datetime.utcnow(),
+                claimed_by=None,
+                lease_expires_at=None,
+                error_message=None
+            )
+        ).rowcount == 1
+
+    def fail(self, db: Session, event_id: int, token: str, error: str) -> Optional[ActivityStatus]:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+
+        Args:
+            db: Database session
+            event_id: ID of the event
+            token: Claim token the event was claimed with
+            error: Error message
+
+        Returns:
+            New status of the event, or None if the lease was lost
+        """
+        events = WebhookEvent.__table__
+        attempts = db.execute(
+            select(events.c.processing_attempts).where(events.c.id == event_id, events.c.claimed_by == token)
+        ).scalar()
+        if attempts is None:
+            return None
+
+        if attempts >= self.max_attempts:
+            status, retry_at = ActivityStatus.FAILURE, None
+        else:
+            status = ActivityStatus.PENDING
+            retry_at = datetime.utcnow() + timedelta(seconds=self.retry_delay_seconds * attempts)
+
+        db.execute(
+            update(events)
+            .where(events.c.id == event_id, events.c.claimed_by == token)
+            .values(status=status, claimed_by=None, lease_expires_at=retry_at, error_message=error)
+        )
+        return status
+
+    def process(self, event_id: int, token: str) -> str:
+        """
+        Dispatch a claimed event to its integration's adapter.
+
+        Database writes made while handling the event are committed together
+        with its completion, and discarded if the event fails or its lease
+        was lost to another worker.
+
+        Args:
+            event_id: ID of the event
+            token: Claim token the event was claimed with
+
+        Returns:
+            Outcome: "succeeded", "retried", "failed" or "lost"
+        """
+        start_time = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            try:
+                event = db.get(WebhookEvent, event_id)
+                IntegrationService(db).dispatch_webhook_event(event)
+                if self.complete(db, event_id, token):
+                    outcome = "succeeded"
+                else:
+                    # Another worker owns the event now and handles it again
+                    db.rollback()
+                    outcome = "lost"
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error processing webhook event {event_id}: {str(e)}")
+                status = self.fail(db, event_id, token, str(e))
+                outcome = {ActivityStatus.PENDING: "retried", ActivityStatus.FAILURE: "failed"}.get(status, "lost")
+            db.commit()
+        finally:
+            db.close()
+
+        metrics.increment("webhook_events_processed", tags={"status": outcome})
+        metrics.record("webhook_processing_time", (datetime.utcnow() - start_time).total_seconds())
+        return outcome
+
+    def drain(self, max_events: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, int]:
+        """
+        Process pending events until the queue is empty.
+
+        Several workers can drain the queue at the same time; each claims
+        its own batches.
+
+        Args:
+            max_events: Maximum number of events to claim, None for no limit
+            concurrency: Number of events processed in parallel
+
+        Returns:
+            Dictionary with the number of claimed events, their outcomes and
+            the number of expired leases
+        """
+        stats = {"claimed": 0, "succeeded": 0, "retried": 0, "failed": 0, "lost": 0, "expired": 0}
+
+        db = self.session_factory()
+        try:
+            stats["expired"] = self.expire_leases(db)
+        finally:
+            db.close()
+
+        with ThreadPoolExecutor(max_workers=concurrency or self.concurrency) as executor:
+            while max_events is None or stats["claimed"] < max_events:
+                limit = self.batch_size if max_events is None else min(self.batch_size, max_events - stats["claimed"])
+                db = self.session_factory()
+                try:
+                    token, event_ids = self.claim(db, limit)
+                finally:
+                    db.close()
+                if not event_ids:
+                    break
+
+                stats["claimed"] += len(event_ids)
+                for outcome in executor.map(lambda event_id: self.process(event_id, token), event_ids):
+                    stats[outcome] += 1
+
+        return stats
@@ -8,15 +8,17 @@ testing integration connections, and collecting integration metrics.
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from celery import shared_task
 
-from core.database import get_db
+from backend_core.database import get_db
 from core.metrics import MetricsCollector, timed
 from .models.integration import (
     Integration, WebhookEvent, WebhookEndpoint, 
-    IntegrationStatus, ActivityType, IntegrationType
+    IntegrationStatus, ActivityType, ActivityStatus, IntegrationType
 )
 from .services.integration_service import IntegrationService
+from .services.webhook_queue import WebhookEventQueue
+from .services.health_checker import IntegrationHealthChecker
 from .utils.adapters import IntegrationAdapter
 from .utils.security import CredentialEncryptor
 
@@ -26,6 +28,9 @@ logger = logging.getLogger(__name__)
 # Initialize metrics collector
 metrics_collector = MetricsCollector(namespace="integration_management")
 
+# Queue of received webhook events
+webhook_queue = WebhookEventQueue()
+
 
 @shared_task(name="integration_management.process_webhook_event")
 @timed("process_webhook_event_time")
@@ -33,6 +38,9 @@ def process_webhook_event(webhook_event_id: int) -> Dict[str, Any]:
     """
     Process a webhook event asynchronously.
     
+    The event is claimed from the webhook event queue first, so an event
+    already being processed by another worker is skipped.
+    
     Args:
         webhook_event_id: ID of the webhook event to process
         
@@ -52,238 +60,23 @@ def process_webhook_event(webhook_event_id: int) -> Dict[str, Any]:
         db = next(get_db())
         
         try:
-            # Get the webhook event
-            webhook_event = db.query(WebhookEvent).filter(WebhookEvent.id == webhook_event_id).first()
-            
-            if not webhook_event:
-                raise ValueError(f"Webhook event with ID {webhook_event_id} not found")
-            
-            # Get the webhook endpoint
-            webhook_endpoint = db.query(WebhookEndpoint).filter(
-                WebhookEndpoint.id == webhook_event.webhook_id
-            ).first()
-            
-            if not webhook_endpoint:
-                raise ValueError(f"Webhook endpoint with ID {webhook_event.webhook_id} not found")
-            
-            # Get the integration
-            integration = db.query(Integration).filter(
-                Integration.id == webhook_endpoint.integration_id
-            ).first()
-            
-            if not integration:
-                raise ValueError(f"Integration with ID {webhook_endpoint.integration_id} not found")
-            
-            # Process the webhook event based on the integration type
-            if integration.type == IntegrationType.PAYMENT_GATEWAY:
-                _process_payment_gateway_webhook(db, webhook_event, webhook_endpoint, integration)
-            elif integration.type == IntegrationType.SMS_PROVIDER:
-                _process_sms_provider_webhook(db, webhook_event, webhook_endpoint, integration)
-            elif integration.type == IntegrationType.EMAIL_PROVIDER:
-                _process_email_provider_webhook(db, webhook_event, webhook_endpoint, integration)
-            else:
-                # For other integration types, just mark as processed
-                logger.info(f"No specific processing for integration type {integration.type}")
-            
-            # Mark the webhook event as processed
-            webhook_event.processed = True
-            webhook_event.processed_at = datetime.utcnow()
-            db.commit()
-            
-            # Record success metrics
-            metrics_collector.increment(
-                "webhook_events_processed",
-                tags={
-                    "integration_type": integration.type.value,
-                    "integration_name": integration.name,
-                    "status": "success"
-                }
-            )
-            
-            # Record processing time
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-            metrics_collector.record(
-                "webhook_processing_time",
-                processing_time,
-                tags={
-                    "integration_type": integration.type.value,
-                    "integration_name": integration.name
-                }
-            )
-            
-            result["success"] = True
-            
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error processing webhook event {webhook_event_id}: {str(e)}")
-            
-            # Record failure metrics
-            metrics_collector.increment(
-                "webhook_events_processed",
-                tags={
-                    "integration_type": integration.type.value if 'integration' in locals() else "unknown",
-                    "integration_name": integration.name if 'integration' in locals() else "unknown",
-                    "status": "failure"
-                }
-            )
-            
-            result["error"] = str(e)
-            
+            token, claimed = webhook_queue.claim(db, 1, event_ids=[webhook_event_id])
         finally:
             db.close()
-    
-    except Exception as e:
-        logger.error(f"Error setting up database session: {str(e)}")
-        result["error"] = str(e)
-    
-    return result
-
-
-def _process_payment_gateway_webhook(
-    db: Session,
-    webhook_event: WebhookEvent,
-    webhook_endpoint: WebhookEndpoint,
-    integration: Integration
-) -> None:
-    """
-    Process a payment gateway webhook event.
-    
-    Args:
-        db: Database session
-        webhook_event: Webhook event to process
-        webhook_endpoint: Webhook endpoint
-        integration: Integration
-    """
-    logger.info(f"Processing payment gateway webhook event {webhook_event.id}")
-    
-    try:
-        # Parse the payload
-        payload = webhook_event.payload
-        
-        # Extract the event type
-        event_type = payload.get("type")
         
-        if not event_type:
-            logger.warning(f"No event type in webhook payload: {webhook_event.id}")
-            return
+        if not claimed:
+            result["error"] = f"Webhook event with ID {webhook_event_id} is not pending"
+            return result
         
-        # Process based on event type
-        if event_type == "payment.succeeded":
-            logger.info(f"Payment succeeded: {webhook_event.id}")
-            # TODO: Update payment status in billing module
-        elif event_type == "payment.failed":
-            logger.info(f"Payment failed: {webhook_event.id}")
-            # TODO: Update payment status in billing module
-        elif event_type == "refund.succeeded":
-            logger.info(f"Refund succeeded: {webhook_event.id}")
-            # TODO: Process refund in billing module
-        else:
-            logger.info(f"Unhandled payment gateway event type: {event_type}")
+        outcome = webhook_queue.process(webhook_event_id, token)
+        result["success"] = outcome == "succeeded"
+        result["outcome"] = outcome
     
     except Exception as e:
-        logger.error(f"Error processing payment gateway webhook: {str(e)}")
-        raise
-
-
-def _process_sms_provider_webhook(
-    db: Session,
-    webhook_event: WebhookEvent,
-    webhook_endpoint: WebhookEndpoint,
-    integration: Integration
-) -> None:
-    """
-    Process an SMS provider webhook event.
-    
-    Args:
-        db: Database session
-        webhook_event: Webhook event to process
-        webhook_endpoint: Webhook endpoint
-        integration: Integration
-    """
-    logger.info(f"Processing SMS provider webhook event {webhook_event.id}")
-    
-    try:
-        # Parse the payload
-        payload = webhook_event.payload
-        
-        # Extract the event type
-        event_type = payload.get("type")
-        
-        if not event_type:
-            logger.warning(f"No event type in webhook payload: {webhook_event.id}")
-            return
-        
-        # Process based on event type
-        if event_type == "message.sent":
-            logger.info(f"Message sent: {webhook_event.id}")
-            # TODO: Update message status in notification module
-        elif event_type == "message.delivered":
-            logger.info(f"Message delivered: {webhook_event.id}")
-            # TODO: Update message status in notification module
-        elif event_type == "message.failed":
-            logger.info(f"Message failed: {webhook_event.id}")
-            # TODO: Update message status in notification module
-        else:
-            logger.info(f"Unhandled SMS provider event type: {event_type}")
-    
-    except Exception as e:
-        logger.error(f"Error processing SMS provider webhook: {str(e)}")
-        raise
-
-
-def _process_email_provider_webhook(
-    db: Session,
-    webhook_event: WebhookEvent,
-    webhook_endpoint: WebhookEndpoint,
-    integration: Integration
-) -> None:
-    """
-    Process an email provider webhook event.
-    
-    Args:
-        db: Database session
-        webhook_event: Webhook event to process
-        webhook_endpoint: Webhook endpoint
-        integration: Integration
-    """
-    logger.info(f"Processing email provider webhook event {webhook_event.id}")
-    
-    try:
-        # Parse the payload
-        payload = webhook_event.payload
-        
-        # Extract the event type
-        event_type = payload.get("type")
-        
-        if not event_type:
-            logger.warning(f"No event type in webhook payload: {webhook_event.id}")
-            return
-        
-        # Process based on event type
-        if event_type == "email.sent":
-            logger.info(f"Email sent: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        elif event_type == "email.delivered":
-            logger.info(f"Email delivered: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        elif event_type == "email.opened":
-            logger.info(f"Email opened: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        elif event_type == "email.clicked":
-            logger.info(f"Email clicked: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        elif event_type == "email.bounced":
-            logger.info(f"Email bounced: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        elif event_type == "email.spam":
-            logger.info(f"Email marked as spam: {webhook_event.id}")
-            # TODO: Update email status in notification module
-        else:
-            logger.info(f"Unhandled email provider event type: {event_type}")
+        logger.error(f"Error processing webhook event {webhook_event_id}: {str(e)}")
+        result["error"] = str(e)
     
-    except Exception as e:
-        logger.error(f"Error processing email provider webhook: {str(e)}")
-        raise
+    return result
 
 
 @shared_task(name="integration_management.test_integration_connection")
@@ -352,6 +145,9 @@ def test_all_active_integrations() -> Dict[str, Any]:
     """
     Test all active integrations.
     
+    The integrations are probed concurrently, each within its adapter's
+    health check deadline.
+    
     Returns:
         Dictionary containing test results
     """
@@ -360,7 +156,7 @@ def test_all_active_integrations() -> Dict[str, Any]:
         "total": 0,
         "successful": 0,
         "failed": 0,
-        "skipped": 0,
+        "timed_out": 0,
         "tested_at": start_time.isoformat(),
         "details": []
     }
@@ -370,49 +166,36 @@ def test_all_active_integrations() -> Dict[str, Any]:
         db = next(get_db())
         
         try:
-            # Get all active integrations
-            active_integrations = db.query(Integration).filter(
-                Integration.status == IntegrationStatus.ACTIVE
-            ).all()
-            
-            results["total"] = len(active_integrations)
+            health_checker = IntegrationHealthChecker(db)
+            checks = health_checker.check_active_integrations()
+            summary = IntegrationHealthChecker.summarize(checks)
+            
+            results["total"] = summary["total"]
+            results["successful"] = summary["healthy"] + summary["degraded"]
+            results["failed"] = summary["failing"]
+            results["timed_out"] = summary["timed_out"]
+            results["transitions"] = summary["transitions"]
+            results["details"] = [
+                {
+                    "integration_id": check.integration_id,
+                    "integration_name": check.integration_name,
+                    "integration_type": check.integration_type,
+                    "success": check.health_status != "failing",
+                    "health_status": check.health_status,
+                    "latency": round(check.latency, 3),
+                    "message": check.message
+                }
+                for check in checks
+            ]
             
-            # Test each integration
-            for integration in active_integrations:
-                try:
-                    # Initialize the integration service
-                    integration_service = IntegrationService(db)
-                    
-                    # Test the integration connection
-                    success, message = integration_service.test_integration_connection(integration.id)
-                    
-                    # Record result
-                    if success:
-                        results["successful"] += 1
-                    else:
-                        results["failed"] += 1
-                    
-                    results["details"].append({
-                        "integration_id": integration.id,
-                        "integration_name": integration.name,
-                        "integration_type": integration.type.value,
-                        "success": success,
-                        "message": message
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error testing integration {integration.id}: {str(e)}")
-                    results["failed"] += 1
-                    results["details"].append({
-                        "integration_id": integration.id,
-                        "integration_name": integration.name,
-                        "integration_type": integration.type.value,
-                        "success": False,
-                        "error": str(e)
-                    })
+            metrics_collector.record(
+                "integration_health_sweep_time",
+                (datetime.utcnow() - start_time).total_seconds()
+            )
             
         except Exception as e:
-            logger.error(f"Error getting active integrations: {str(e)}")
+            db.rollback()
+            logger.error(f"Error testing active integrations: {str(e)}")
             results["error"] = str(e)
             
         finally:
@@ -426,69 +209,35 @@ def test_all_active_integrations() -> Dict[str, Any]:
 
 
 @shared_task(name="integration_management.process_pending_webhook_events")
-def process_pending_webhook_events(limit: int = 100) -> Dict[str, Any]:
+def process_pending_webhook_events(
+    limit: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> Dict[str, Any]:
     """
-    Process pending webhook events.
+    Drain the queue of pending webhook events.
+    
+    Events are claimed in batches and processed concurrently; workers
+    running this task at the same time claim disjoint batches.
     
     Args:
-        limit: Maximum number of events to process
+        limit: Maximum number of events to process, None for all pending
+        concurrency: Number of events processed in parallel
         
     Returns:
         Dictionary containing processing results
     """
     start_time = datetime.utcnow()
-    results = {
-        "total": 0,
-        "successful": 0,
-        "failed": 0,
-        "processed_at": start_time.isoformat(),
-        "details": []
-    }
+    results = {"processed_at": start_time.isoformat()}
     
     try:
-        # Create a new database session
-        db = next(get_db())
-        
-        try:
-            # Get pending webhook events
-            pending_events = db.query(WebhookEvent).filter(
-                WebhookEvent.processed == False
-            ).order_by(WebhookEvent.created_at.asc()).limit(limit).all()
-            
-            results["total"] = len(pending_events)
-            
-            # Process each event
-            for event in pending_events:
-                try:
-                    # Queue the event for processing
-                    process_webhook_event.delay(event.id)
-                    
-                    results["successful"] += 1
-                    results["details"].append({
-                        "webhook_event_id": event.id,
-                        "webhook_id": event.webhook_id,
-                        "queued": True
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error queuing webhook event {event.id}: {str(e)}")
-                    results["failed"] += 1
-                    results["details"].append({
-                        "webhook_event_id": event.id,
-                        "webhook_id": event.webhook_id,
-                        "queued": False,
-                        "error": str(e)
-                    })
-            
-        except Exception as e:
-            logger.error(f"Error getting pending webhook events: {str(e)}")
-            results["error"] = str(e)
-            
-        finally:
-            db.close()
+        results.update(webhook_queue.drain(max_events=limit, concurrency=concurrency))
+        logger.info(
+            f"Processed {results['claimed']} webhook events: {results['succeeded']} succeeded, "
+            f"{results['retried']} retried, {results['failed']} failed"
+        )
     
     except Exception as e:
-        logger.error(f"Error setting up database session: {str(e)}")
+        logger.error(f"Error processing pending webhook events: {str(e)}")
         results["error"] = str(e)
     
     return results
@@ -549,7 +298,7 @@ def collect_integration_metrics() -> Dict[str, Any]:
             
             # Collect webhook event metrics
             total_events = db.query(WebhookEvent).count()
-            processed_events = db.query(WebhookEvent).filter(WebhookEvent.processed == True).count()
+            processed_events = db.query(WebhookEvent).filter(WebhookEvent.status == ActivityStatus.SUCCESS).count()
             pending_events = total_events - processed_events
             metrics_collector.gauge("total_webhook_events", total_events)
             metrics_collector.gauge("processed_webhook_events", processed_events)
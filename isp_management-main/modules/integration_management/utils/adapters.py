@@ -21,6 +21,9 @@ logger = logging.getLogger(__name__)
 class IntegrationAdapter(abc.ABC):
     """Abstract base class for integration adapters."""
     
+    # Seconds a health check may take before the service is considered failing
+    health_check_timeout = 15.0
+    
     def __init__(self, integration: Integration, credential_encryptor: CredentialEncryptor):
         """
         Initialize the adapter with an integration configuration.
@@ -47,6 +50,18 @@ class IntegrationAdapter(abc.ABC):
             logger.error(f"Failed to decrypt credentials for integration {self.integration.id}: {str(e)}")
             return {}
     
+    def close(self) -> None:
+        """
+        Clear the decrypted credentials held by the adapter.
+        
+        Called by the adapter registry once an evicted adapter is no longer
+        borrowed. Values are overwritten before the dictionary is emptied,
+        so no reference to a secret is left behind in the adapter.
+        """
+        for key in list(self.credentials):
+            self.credentials[key] = None
+        self.credentials.clear()
+    
     @abc.abstractmethod
     def test_connection(self) -> Tuple[bool, Optional[str]]:
         """
@@ -67,6 +82,38 @@ class IntegrationAdapter(abc.ABC):
         """
         pass
     
+    def get_health_check_timeout(self) -> float:
+        """
+        Get the deadline of health checks of the integration.
+        
+        The adapter's default can be overridden with the
+        "health_check_timeout" configuration setting.
+        
+        Returns:
+            Deadline in seconds
+        """
+        try:
+            return float((self.configuration or {}).get("health_check_timeout", self.health_check_timeout))
+        except (TypeError, ValueError):
+            return self.health_check_timeout
+    
+    def handle_webhook_event(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Handle a webhook event received from the external service.
+        
+        Adapters of services that send webhooks override this; by default
+        events are accepted without further processing.
+        
+        Args:
+            event_type: Type of the event
+            payload: Event payload
+            
+        Returns:
+            Dictionary describing how the event was handled
+        """
+        logger.info(f"No specific processing for {self.integration.type} event {event_type}")
+        return {"event_type": event_type, "handled": False}
+    
     @classmethod
     def get_adapter_for_integration(
         cls, integration: Integration, credential_encryptor: CredentialEncryptor
@@ -244,6 +291,23 @@ class PaymentGatewayAdapter(IntegrationAdapter):
         except Exception as e:
             logger.error(f"Error creating payment: {str(e)}")
             raise
+    
+    def handle_webhook_event(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a payment gateway webhook event."""
+        if event_type == "payment.succeeded":
+            logger.info(f"Payment succeeded for integration {self.integration.id}")
+            # TODO: Update payment status in billing module
+        elif event_type == "payment.failed":
+            logger.info(f"Payment failed for integration {self.integration.id}")
+            # TODO: Update payment status in billing module
+        elif event_type == "refund.succeeded":
+            logger.info(f"Refund succeeded for integration {self.integration.id}")
+            # TODO: Process refund in billing module
+        else:
+            logger.info(f"Unhandled payment gateway event type: {event_type}")
+            return {"event_type": event_type, "handled": False}
+        
+        return {"event_type": event_type, "handled": True}
 
 
 class SMSProviderAdapter(IntegrationAdapter):
@@ -405,6 +469,23 @@ class SMSProviderAdapter(IntegrationAdapter):
         except Exception as e:
             logger.error(f"Error sending SMS: {str(e)}")
             raise
+    
+    def handle_webhook_event(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle an SMS provider webhook event."""
+        if event_type == "message.sent":
+            logger.info(f"Message sent for integration {self.integration.id}")
+            # TODO: Update message status in notification module
+        elif event_type == "message.delivered":
+            logger.info(f"Message delivered for integration {self.integration.id}")
+            # TODO: Update message status in notification module
+        elif event_type == "message.failed":
+            logger.info(f"Message failed for integration {self.integration.id}")
+            # TODO: Update message status in notification module
+        else:
+            logger.info(f"Unhandled SMS provider event type: {event_type}")
+            return {"event_type": event_type, "handled": False}
+        
+        return {"event_type": event_type, "handled": True}
 
 
 class EmailProviderAdapter(IntegrationAdapter):
@@ -495,6 +576,17 @@ class EmailProviderAdapter(IntegrationAdapter):
             status["is_connected"] = False
             status["details"]["error"] = f"Error getting service status: {str(e)}"
             return status
+    
+    def handle_webhook_event(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle an email provider webhook event."""
+        if event_type in ("email.sent", "email.delivered", "email.opened", "email.clicked", "email.bounced", "email.spam"):
+            logger.info(f"Email event {event_type} for integration {self.integration.id}")
+            # TODO: Update email status in notification module
+        else:
+            logger.info(f"Unhandled email provider event type: {event_type}")
+            return {"event_type": event_type, "handled": False}
+        
+        return {"event_type": event_type, "handled": True}
 
 
 class AnalyticsAdapter(IntegrationAdapter):
@@ -570,6 +662,8 @@ class StorageAdapter(IntegrationAdapter):
 class CustomAdapter(IntegrationAdapter):
     """Adapter for custom integrations."""
     
+    health_check_timeout = 35.0  # Test requests may take up to 30 seconds
+    
     def test_connection(self) -> Tuple[bool, Optional[str]]:
         """Test the connection to the custom service."""
         # For custom integrations, we'll use a configurable endpoint for testing
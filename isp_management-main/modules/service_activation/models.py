@@ -76,6 +76,10 @@ class ActivationStep(Base):
     max_retries = Column(Integer, default=3, nullable=False)
     is_rollback_step = Column(Boolean, default=False, nullable=False)
     depends_on_step_id = Column(Integer, ForeignKey("activation_steps.id"), nullable=True)
+    # Names of the steps this step waits for; steps without dependencies run
+    # concurrently. NULL keeps the previous behaviour of waiting for the
+    # depends_on_step_id step, or the previous step
+    dependencies = Column(JSON, nullable=True)
     
     # Relationships
     activation = relationship("ServiceActivation", back_populates="steps")
@@ -0,0 +1,165 @@
+"""
+Activation Scheduler for the Service Activation Module.
+
+This scheduler drives many service activations at once, for example during
+bulk migrations. Each activation runs its workflow in its own session.
+The total number of running activations is capped, and so is the number
+per tenant, so one tenant's bulk migration cannot use every slot or
+flood the systems behind that tenant's activations.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Any, Optional, Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend_core.database import AsyncSessionLocal
+from core.metrics import MetricsCollector
+from modules.service_activation.models import ServiceActivation, ActivationStatus
+
+# Configuration
+ACTIVATION_SCHEDULER_CONCURRENCY = int(os.getenv("ACTIVATION_SCHEDULER_CONCURRENCY", "200"))
+ACTIVATION_TENANT_CONCURRENCY = int(os.getenv("ACTIVATION_TENANT_CONCURRENCY", "25"))
+
+# Tenant of activations whose metadata names none
+DEFAULT_TENANT = "default"
+
+metrics = MetricsCollector(namespace="service_activation")
+
+
+def get_activation_tenant(activation: ServiceActivation) -> str:
+    """
+    Get the tenant an activation is capped under.
+
+    Args:
+        activation: The service activation record
+
+    Returns:
+        The tenant_id or reseller_id from the activation's metadata, or the default tenant
+    """
+    metadata = activation.metadata or {}
+    tenant = metadata.get("tenant_id") or metadata.get("reseller_id")
+    return str(tenant) if tenant is not None else DEFAULT_TENANT
+
+
+class ActivationScheduler:
+    """
+    Scheduler running service activation workflows concurrently.
+    """
+
+    def __init__(
+        self,
+        service_factory: Callable[[AsyncSession], Any],
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        concurrency: int = ACTIVATION_SCHEDULER_CONCURRENCY,
+        tenant_concurrency: int = ACTIVATION_TENANT_CONCURRENCY
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            service_factory: Creates the activation service of a session
+            session_factory: Creates a database session per activation
+            concurrency: Maximum number of activations running at once
+            tenant_concurrency: Maximum number of activations of one tenant running at once
+        """
+        self.service_factory = service_factory
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency)
+        self.tenant_concurrency = max(1, tenant_concurrency)
+        self.logger = logging.getLogger(__name__)
+
+    async def run_pending(self, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Run the oldest pending activations.
+
+        Args:
+            limit: Maximum number of activations to run
+
+        Returns:
+            Dictionary with the outcome of each activation, see run
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ServiceActivation.id)
+                .where(ServiceActivation.status == ActivationStatus.PENDING)
+                .order_by(ServiceActivation.created_at)
+                .limit(limit)
+            )
+            activation_ids = result.scalars().all()
+
+        return await self.run(activation_ids)
+
+    async def run(self, activation_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Run the workflows of activations concurrently.
+
+        Activations that are not pending are skipped.
+
+        Args:
+            activation_ids: IDs of the activations to run
+
+        Returns:
+            Dictionary with the number of completed, failed and skipped
+            activations, the elapsed time, and the outcome per activation
+        """
+        start = time.perf_counter()
+        activation_ids = list(activation_ids)
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ServiceActivation).where(ServiceActivation.id.in_(activation_ids))
+            )
+            activations = {activation.id: activation for activation in result.scalars().all()}
+            tenants = {
+                activation_id: get_activation_tenant(activation)
+                for activation_id, activation in activations.items()
+                if activation.status == ActivationStatus.PENDING
+            }
+
+        slots = asyncio.Semaphore(self.concurrency)
+        tenant_slots: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.tenant_concurrency))
+
+        async def run_one(activation_id: int) -> Optional[bool]:
+            if activation_id not in tenants:
+                return None
+            # Wait for the tenant's slot first, so activations queued behind a
+            # busy tenant do not hold slots other tenants could use
+            async with tenant_slots[tenants[activation_id]]:
+                async with slots:
+                    return await self._run_activation(activation_id)
+
+        outcomes = await asyncio.gather(*(run_one(activation_id) for activation_id in activation_ids))
+
+        results = {
+            "completed": sum(1 for outcome in outcomes if outcome is True),
+            "failed": sum(1 for outcome in outcomes if outcome is False),
+            "skipped": sum(1 for outcome in outcomes if outcome is None),
+            "elapsed": time.perf_counter() - start,
+            "activations": dict(zip(activation_ids, outcomes))
+        }
+        self.logger.info(
+            f"Ran {len(activation_ids)} activations: {results['completed']} completed, "
+            f"{results['failed']} failed, {results['skipped']} skipped in {results['elapsed']:.1f}s"
+        )
+        return results
+
+    async def _run_activation(self, activation_id: int) -> bool:
+        """Run one activation workflow in its own session."""
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as session:
+                service = self.service_factory(session)
+                success = await service.start_activation(activation_id)
+        except Exception as e:
+            self.logger.error(f"Error running activation {activation_id}: {str(e)}")
+            success = False
+
+        metrics.increment("activations_run", tags={"status": "completed" if success else "failed"})
+        metrics.record("activation_time", time.perf_counter() - start)
+        return success
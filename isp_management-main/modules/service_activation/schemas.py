@@ -39,6 +39,7 @@ class ActivationStepBase(BaseModel):
     max_retries: int = 3
     is_rollback_step: bool = False
     depends_on_step_id: Optional[int] = None
+    dependencies: Optional[List[str]] = None
 
 
 class ActivationStepCreate(ActivationStepBase):
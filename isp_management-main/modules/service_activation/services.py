@@ -126,13 +126,18 @@ class ActivationService:
         workflow = await self._get_workflow_for_service(activation_data.service_id)
         
         for i, step_def in enumerate(workflow.steps):
+            # Steps without declared dependencies wait for the previous step
+            dependencies = step_def.get("depends_on")
+            if dependencies is None:
+                dependencies = [workflow.steps[i - 1]["name"]] if i > 0 else []
+            
             step = ActivationStep(
                 activation_id=activation.id,
                 step_name=step_def["name"],
                 step_order=i,
                 description=step_def.get("description"),
                 max_retries=step_def.get("max_retries", 3),
-                depends_on_step_id=step_def.get("depends_on")
+                dependencies=list(dependencies)
             )
             self.session.add(step)
         
@@ -145,8 +150,7 @@ class ActivationService:
                     step_order=i,
                     description=step_def.get("description"),
                     max_retries=step_def.get("max_retries", 3),
-                    is_rollback_step=True,
-                    depends_on_step_id=step_def.get("depends_on")
+                    is_rollback_step=True
                 )
                 self.session.add(step)
         
@@ -341,37 +345,38 @@ class ActivationService:
                 {
                     "name": "verify_payment",
                     "description": "Verify payment for the service",
-                    "max_retries": 3
+                    "max_retries": 3,
+                    "depends_on": []
                 },
                 {
                     "name": "create_radius_account",
                     "description": "Create RADIUS account for the customer",
                     "max_retries": 3,
-                    "depends_on": None  # This will be set to the ID of the verify_payment step
+                    "depends_on": ["verify_payment"]
                 },
                 {
                     "name": "configure_nas",
                     "description": "Configure network access server",
                     "max_retries": 2,
-                    "depends_on": None  # This will be set to the ID of the create_radius_account step
+                    "depends_on": ["create_radius_account"]
                 },
                 {
                     "name": "provision_service",
                     "description": "Provision the service",
                     "max_retries": 3,
-                    "depends_on": None  # This will be set to the ID of the configure_nas step
+                    "depends_on": ["verify_payment"]  # Runs alongside the RADIUS and NAS branch
                 },
                 {
                     "name": "update_customer_status",
                     "description": "Update customer status to active",
                     "max_retries": 3,
-                    "depends_on": None  # This will be set to the ID of the provision_service step
+                    "depends_on": ["configure_nas", "provision_service"]
                 },
                 {
                     "name": "notify_customer",
                     "description": "Send activation notification to customer",
                     "max_retries": 3,
-                    "depends_on": None  # This will be set to the ID of the update_customer_status step
+                    "depends_on": ["update_customer_status"]
                 }
             ],
             rollback_steps=[
@@ -5,14 +5,16 @@ This engine manages the execution of multi-step workflows for service activation
 handling dependencies, retries, and rollbacks.
 """
 
+import os
+import random
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Callable, Awaitable
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Set, Tuple, Type
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import insert, select, update
 
-from backend_core.exceptions import WorkflowException
+from backend_core.exceptions import WorkflowException, ExternalServiceException
 from modules.service_activation.models import (
     ServiceActivation,
     ActivationStep,
@@ -22,6 +24,147 @@ from modules.service_activation.models import (
 )
 
 
+# Configuration
+ACTIVATION_RETRY_BASE_DELAY = float(os.getenv("ACTIVATION_RETRY_BASE_DELAY", "1"))
+ACTIVATION_RETRY_MAX_DELAY = float(os.getenv("ACTIVATION_RETRY_MAX_DELAY", "30"))
+
+
+class RetryPolicy:
+    """
+    Policy deciding whether and when a failed workflow step is retried.
+    
+    Delays grow exponentially with the attempt number and are drawn with
+    full jitter, so steps of many activations failing against the same
+    system do not retry in lockstep.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: float = ACTIVATION_RETRY_BASE_DELAY,
+        max_delay: float = ACTIVATION_RETRY_MAX_DELAY,
+        multiplier: float = 2.0,
+        retryable_exceptions: Tuple[Type[BaseException], ...] = (
+            ExternalServiceException, ConnectionError, TimeoutError, asyncio.TimeoutError
+        )
+    ):
+        """
+        Initialize the retry policy.
+        
+        Args:
+            max_attempts: Maximum number of attempts, None to use each step's max_retries
+            base_delay: Delay before the first retry, in seconds
+            max_delay: Upper bound of the delay, in seconds
+            multiplier: Factor the delay grows by with each retry
+            retryable_exceptions: Exceptions raised by handlers that are retried;
+                other exceptions fail the step immediately
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retryable_exceptions = retryable_exceptions
+    
+    def get_max_retries(self, step: ActivationStep) -> int:
+        """
+        Get the number of retries allowed for a step.
+        
+        Args:
+            step: The workflow step
+            
+        Returns:
+            Number of retries after the first attempt
+        """
+        if self.max_attempts is None:
+            return step.max_retries
+        return min(step.max_retries, self.max_attempts - 1)
+    
+    def is_retryable(self, error: Optional[BaseException]) -> bool:
+        """
+        Check whether a failed attempt may be retried.
+        
+        Args:
+            error: Exception raised by the handler, None if it returned False
+            
+        Returns:
+            bool: True if the failure is retryable
+        """
+        return error is None or isinstance(error, self.retryable_exceptions)
+    
+    def get_delay(self, retry: int) -> float:
+        """
+        Get the delay before a retry.
+        
+        Args:
+            retry: Number of the retry, starting at 1
+            
+        Returns:
+            Delay in seconds
+        """
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        return random.uniform(0, ceiling)
+
+
+class ActivationLogWriter:
+    """
+    Buffer of activation and step log entries written in bulk.
+    
+    Entries are inserted with a single multi-row statement as part of the
+    next commit, so the number of round trips does not grow with the
+    number of entries.
+    """
+    
+    def __init__(self):
+        """Initialize an empty buffer."""
+        self._entries: List[Dict[str, Any]] = []
+    
+    def add(
+        self,
+        activation_id: int,
+        level: str,
+        message: str,
+        step_id: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Add a log entry to the buffer.
+        
+        Args:
+            activation_id: ID of the activation
+            level: Log level (INFO, WARNING, ERROR, DEBUG)
+            message: Log message
+            step_id: ID of the step, if the entry belongs to one
+            details: Additional details for the log
+        """
+        self._entries.append({
+            "activation_id": activation_id,
+            "step_id": step_id,
+            "timestamp": datetime.utcnow(),
+            "level": level,
+            "message": message,
+            "details": details
+        })
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    async def flush(self, session: AsyncSession) -> int:
+        """
+        Insert the buffered entries in the session's transaction.
+        
+        Args:
+            session: Database session
+            
+        Returns:
+            Number of inserted entries
+        """
+        if not self._entries:
+            return 0
+        entries, self._entries = self._entries, []
+        await session.execute(insert(ActivationLog.__table__), entries)
+        return len(entries)
+
+
 class WorkflowEngine:
     """
     Engine for executing multi-step service activation workflows.
@@ -32,24 +175,50 @@ class WorkflowEngine:
     - Automatic retries for failed steps
     - Rollback mechanisms for failed activations
     - Comprehensive logging of all actions
+    
+    Steps form a dependency graph: a step starts as soon as all the steps it
+    depends on have completed, so independent branches run concurrently.
+    Steps run as tasks sharing one session, so every database operation is
+    serialized through a lock.
+    
+    Log entries are buffered and written with the next commit; a step
+    commits when it starts and when it ends, however often it is retried.
     """
     
-    def __init__(self, session: AsyncSession):
-        """Initialize the workflow engine with a database session."""
+    def __init__(self, session: AsyncSession, retry_policy: Optional[RetryPolicy] = None):
+        """
+        Initialize the workflow engine with a database session.
+        
+        Args:
+            session: Database session
+            retry_policy: Retry policy of steps registered without their own
+        """
         self.session = session
         self.logger = logging.getLogger(__name__)
+        self.retry_policy = retry_policy or RetryPolicy()
         self._step_handlers: Dict[str, Callable] = {}
         self._rollback_handlers: Dict[str, Callable] = {}
+        self._retry_policies: Dict[str, RetryPolicy] = {}
+        self._session_lock = asyncio.Lock()
+        self._log_writer = ActivationLogWriter()
     
-    def register_step_handler(self, step_name: str, handler: Callable[[ActivationStep, Dict[str, Any]], Awaitable[bool]]):
+    def register_step_handler(
+        self,
+        step_name: str,
+        handler: Callable[[ActivationStep, Dict[str, Any]], Awaitable[bool]],
+        retry_policy: Optional[RetryPolicy] = None
+    ):
         """
         Register a handler function for a specific workflow step.
         
         Args:
             step_name: The name of the step
             handler: Async function that performs the step's action
+            retry_policy: Retry policy of the step, defaults to the engine's
         """
         self._step_handlers[step_name] = handler
+        if retry_policy:
+            self._retry_policies[step_name] = retry_policy
     
     def register_rollback_handler(self, step_name: str, handler: Callable[[ActivationStep, Dict[str, Any]], Awaitable[bool]]):
         """
@@ -71,8 +240,17 @@ class WorkflowEngine:
         Returns:
             bool: True if workflow completed successfully, False otherwise
         """
+        try:
+            return await self._run_workflow(activation_id)
+        finally:
+            # Write the log entries made after the last commit
+            if len(self._log_writer):
+                await self._commit()
+    
+    async def _run_workflow(self, activation_id: int) -> bool:
+        """Execute the workflow of an activation, see execute_workflow."""
         # Get the activation record
-        result = await self.session.execute(
+        result = await self._execute(
             select(ServiceActivation).where(ServiceActivation.id == activation_id)
         )
         activation = result.scalars().first()
@@ -84,7 +262,7 @@ class WorkflowEngine:
         # Update activation status to in-progress
         activation.status = ActivationStatus.IN_PROGRESS
         activation.updated_at = datetime.utcnow()
-        await self.session.commit()
+        await self._commit()
         
         # Log workflow start
         await self._log_activation_event(
@@ -108,29 +286,35 @@ class WorkflowEngine:
                 return False
         
         # Get all steps for this activation in order
-        result = await self.session.execute(
-            select(ActivationStep)
-            .where(
-                ActivationStep.activation_id == activation_id,
-                ActivationStep.is_rollback_step == False
-            )
-            .order_by(ActivationStep.step_order)
-        )
-        steps = result.scalars().all()
+        steps = await self._get_workflow_steps(activation_id)
         
-        # Execute each step
-        for step in steps:
-            success = await self._execute_step(step, activation.metadata or {})
-            if not success:
-                # If a step fails, start rollback process
-                await self._start_rollback(activation_id)
-                return False
+        try:
+            dependencies = self._build_dependency_graph(steps)
+        except WorkflowException as e:
+            await self._fail_activation(activation_id, str(e))
+            return False
+        
+        # Execute the steps, starting each once its dependencies completed
+        steps_by_id = {step.id: step for step in steps}
+        completed = {step.id for step in steps if step.status in (StepStatus.COMPLETED, StepStatus.SKIPPED)}
+        remaining = {step_id: dependencies[step_id] - completed for step_id in steps_by_id if step_id not in completed}
+        
+        failed = await self._run_graph(
+            remaining,
+            lambda step_id: self._execute_step(steps_by_id[step_id], activation.metadata or {}),
+            order=lambda step_id: steps_by_id[step_id].step_order,
+            stop_on_failure=True
+        )
+        if failed:
+            # If a step fails, start rollback process
+            await self._start_rollback(activation_id)
+            return False
         
         # If we get here, all steps completed successfully
         activation.status = ActivationStatus.COMPLETED
         activation.completed_at = datetime.utcnow()
         activation.updated_at = datetime.utcnow()
-        await self.session.commit()
+        await self._commit()
         
         await self._log_activation_event(
             activation_id=activation_id,
@@ -140,9 +324,126 @@ class WorkflowEngine:
         
         return True
     
+    async def _get_workflow_steps(self, activation_id: int) -> List[ActivationStep]:
+        """
+        Get the workflow steps of an activation in order.
+        
+        Args:
+            activation_id: ID of the activation
+            
+        Returns:
+            List of steps, excluding rollback steps
+        """
+        result = await self._execute(
+            select(ActivationStep)
+            .where(
+                ActivationStep.activation_id == activation_id,
+                ActivationStep.is_rollback_step == False
+            )
+            .order_by(ActivationStep.step_order)
+        )
+        return result.scalars().all()
+    
+    def _build_dependency_graph(self, steps: List[ActivationStep]) -> Dict[int, Set[int]]:
+        """
+        Resolve the dependencies of workflow steps.
+        
+        A step depends on the steps named in its dependencies. Steps created
+        without declared dependencies depend on their depends_on_step_id, or
+        otherwise on the previous step, so older workflows stay sequential.
+        
+        Args:
+            steps: Steps of the workflow, in order
+            
+        Returns:
+            Dictionary mapping each step ID to the IDs of the steps it depends on
+            
+        Raises:
+            WorkflowException: If a dependency is unknown or the steps form a cycle
+        """
+        by_name = {step.step_name: step for step in steps}
+        ids = {step.id for step in steps}
+        dependencies: Dict[int, Set[int]] = {}
+        previous = None
+        
+        for step in steps:
+            if step.dependencies is not None:
+                unknown = [name for name in step.dependencies if name not in by_name]
+                if unknown:
+                    raise WorkflowException(f"Step {step.step_name} depends on unknown steps: {', '.join(unknown)}")
+                dependencies[step.id] = {by_name[name].id for name in step.dependencies}
+            elif step.depends_on_step_id in ids:
+                dependencies[step.id] = {step.depends_on_step_id}
+            else:
+                dependencies[step.id] = {previous.id} if previous else set()
+            previous = step
+        
+        # Check that every step can be reached, i.e. there is no cycle
+        resolved: Set[int] = set()
+        while len(resolved) < len(dependencies):
+            ready = {step_id for step_id, deps in dependencies.items() if step_id not in resolved and deps <= resolved}
+            if not ready:
+                cyclic = sorted(step.step_name for step in steps if step.id not in resolved)
+                raise WorkflowException(f"Workflow steps have cyclic dependencies: {', '.join(cyclic)}")
+            resolved |= ready
+        
+        return dependencies
+    
+    async def _run_graph(
+        self,
+        prerequisites: Dict[int, Set[int]],
+        run: Callable[[int], Awaitable[bool]],
+        order: Callable[[int], Any],
+        stop_on_failure: bool
+    ) -> Set[int]:
+        """
+        Run actions for the nodes of a graph, each once its prerequisites succeeded.
+        
+        Nodes whose prerequisites are met run concurrently. With
+        stop_on_failure set, no further nodes are started once a node has
+        failed, but nodes already running are awaited; otherwise a failed
+        node counts as done for the nodes waiting for it.
+        
+        Args:
+            prerequisites: Dictionary mapping each node to the nodes it waits for
+            run: Async function running a node, returning True on success
+            order: Sort key deciding which ready node starts first
+            stop_on_failure: Whether to stop starting nodes after a failure
+            
+        Returns:
+            Set of nodes that failed
+        """
+        pending = {node: set(waits_for) for node, waits_for in prerequisites.items()}
+        running: Dict[asyncio.Task, int] = {}
+        failed: Set[int] = set()
+        
+        while pending or running:
+            if not (failed and stop_on_failure):
+                for node in sorted((node for node, waits_for in pending.items() if not waits_for), key=order):
+                    del pending[node]
+                    running[asyncio.ensure_future(run(node))] = node
+            
+            if not running:
+                # The remaining nodes wait for nodes that failed
+                break
+            
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                node = running.pop(task)
+                if task.exception() is not None:
+                    self.logger.error(f"Workflow node {node} raised: {task.exception()}")
+                succeeded = task.exception() is None and task.result()
+                if not succeeded:
+                    failed.add(node)
+                if succeeded or not stop_on_failure:
+                    for waits_for in pending.values():
+                        waits_for.discard(node)
+        
+        return failed
+    
     async def _execute_step(self, step: ActivationStep, metadata: Dict[str, Any]) -> bool:
         """
-        Execute a single workflow step.
+        Execute a single workflow step, retrying it according to its retry policy.
         
         Args:
             step: The step to execute
@@ -151,111 +452,90 @@ class WorkflowEngine:
         Returns:
             bool: True if step completed successfully, False otherwise
         """
-        # Check if this step depends on another step
-        if step.depends_on_step_id:
-            result = await self.session.execute(
-                select(ActivationStep).where(ActivationStep.id == step.depends_on_step_id)
-            )
-            dependency = result.scalars().first()
-            
-            if dependency and dependency.status != StepStatus.COMPLETED:
-                await self._log_step_event(
-                    step_id=step.id,
-                    activation_id=step.activation_id,
-                    level="WARNING",
-                    message=f"Step {step.step_name} depends on step {dependency.step_name} which is not completed"
-                )
-                step.status = StepStatus.PENDING
-                await self.session.commit()
-                return False
-        
         # Update step status to in-progress
         step.status = StepStatus.IN_PROGRESS
         step.started_at = datetime.utcnow()
-        await self.session.commit()
-        
         await self._log_step_event(
             step_id=step.id,
             activation_id=step.activation_id,
             level="INFO",
             message=f"Executing step: {step.step_name}"
         )
+        await self._commit()
         
         # Get the handler for this step
         handler = self._step_handlers.get(step.step_name)
         if not handler:
             step.status = StepStatus.FAILED
             step.error_message = f"No handler registered for step {step.step_name}"
-            await self.session.commit()
-            
             await self._log_step_event(
                 step_id=step.id,
                 activation_id=step.activation_id,
                 level="ERROR",
                 message=f"No handler registered for step {step.step_name}"
             )
+            await self._commit()
             return False
         
-        # Execute the step handler
-        try:
-            success = await handler(step, metadata)
+        policy = self._retry_policies.get(step.step_name, self.retry_policy)
+        max_retries = policy.get_max_retries(step)
+        
+        # Execute the step handler until it succeeds or may not be retried
+        while True:
+            error = None
+            try:
+                success = await handler(step, metadata)
+            except Exception as e:
+                success, error = False, e
             
-            if success:
-                step.status = StepStatus.COMPLETED
-                step.completed_at = datetime.utcnow()
-                await self.session.commit()
-                
-                await self._log_step_event(
-                    step_id=step.id,
-                    activation_id=step.activation_id,
-                    level="INFO",
-                    message=f"Step {step.step_name} completed successfully"
-                )
-                return True
-            else:
-                # Step failed but can be retried
-                if step.retry_count < step.max_retries:
-                    step.retry_count += 1
-                    step.status = StepStatus.PENDING
-                    await self.session.commit()
-                    
-                    await self._log_step_event(
-                        step_id=step.id,
-                        activation_id=step.activation_id,
-                        level="WARNING",
-                        message=f"Step {step.step_name} failed, retrying (attempt {step.retry_count}/{step.max_retries})"
-                    )
-                    
-                    # Retry the step
-                    return await self._execute_step(step, metadata)
-                else:
-                    # Step failed and max retries reached
-                    step.status = StepStatus.FAILED
-                    step.error_message = "Step failed after maximum retry attempts"
-                    await self.session.commit()
-                    
-                    await self._log_step_event(
-                        step_id=step.id,
-                        activation_id=step.activation_id,
-                        level="ERROR",
-                        message=f"Step {step.step_name} failed after {step.max_retries} retry attempts"
-                    )
-                    return False
+            if success or not policy.is_retryable(error) or step.retry_count >= max_retries:
+                break
+            
+            step.retry_count += 1
+            delay = policy.get_delay(step.retry_count)
+            await self._log_step_event(
+                step_id=step.id,
+                activation_id=step.activation_id,
+                level="WARNING",
+                message=(
+                    f"Step {step.step_name} failed, retrying in {delay:.1f}s "
+                    f"(attempt {step.retry_count}/{max_retries})"
+                ),
+                details={"exception": str(error)} if error else None
+            )
+            await asyncio.sleep(delay)
         
-        except Exception as e:
-            # Handle exceptions during step execution
+        if success:
+            step.status = StepStatus.COMPLETED
+            step.completed_at = datetime.utcnow()
+            await self._log_step_event(
+                step_id=step.id,
+                activation_id=step.activation_id,
+                level="INFO",
+                message=f"Step {step.step_name} completed successfully"
+            )
+        elif error is not None:
             step.status = StepStatus.FAILED
-            step.error_message = str(e)
-            await self.session.commit()
-            
+            step.error_message = str(error)
             await self._log_step_event(
                 step_id=step.id,
                 activation_id=step.activation_id,
                 level="ERROR",
-                message=f"Exception in step {step.step_name}: {str(e)}",
-                details={"exception": str(e)}
+                message=f"Exception in step {step.step_name}: {str(error)}",
+                details={"exception": str(error)}
             )
-            return False
+        else:
+            step.status = StepStatus.FAILED
+            step.error_message = "Step failed after maximum retry attempts"
+            await self._log_step_event(
+                step_id=step.id,
+                activation_id=step.activation_id,
+                level="ERROR",
+                message=f"Step {step.step_name} failed after {max_retries} retry attempts"
+            )
+        
+        await self._commit()
+        return success
     
     async def _start_rollback(self, activation_id: int) -> bool:
         """
@@ -268,7 +548,7 @@ class WorkflowEngine:
             bool: True if rollback completed successfully, False otherwise
         """
         # Update activation status
-        result = await self.session.execute(
+        result = await self._execute(
             select(ServiceActivation).where(ServiceActivation.id == activation_id)
         )
         activation = result.scalars().first()
@@ -279,7 +559,7 @@ class WorkflowEngine:
         
         activation.status = ActivationStatus.ROLLBACK_IN_PROGRESS
         activation.updated_at = datetime.utcnow()
-        await self.session.commit()
+        await self._commit()
         
         await self._log_activation_event(
             activation_id=activation_id,
@@ -287,25 +567,27 @@ class WorkflowEngine:
             message=f"Starting rollback for failed activation {activation_id}"
         )
         
-        # Get completed steps that need to be rolled back (in reverse order)
-        result = await self.session.execute(
-            select(ActivationStep)
-            .where(
-                ActivationStep.activation_id == activation_id,
-                ActivationStep.status == StepStatus.COMPLETED,
-                ActivationStep.is_rollback_step == False
-            )
-            .order_by(ActivationStep.step_order.desc())
+        # Roll back the completed steps, each after the completed steps
+        # depending on it, so every branch is unwound in reverse order
+        steps = await self._get_workflow_steps(activation_id)
+        try:
+            dependencies = self._build_dependency_graph(steps)
+        except WorkflowException:
+            dependencies = {step.id: set() for step in steps}
+        
+        steps_by_id = {step.id: step for step in steps if step.status == StepStatus.COMPLETED}
+        dependents = {
+            step_id: {other for other in steps_by_id if step_id in dependencies[other]}
+            for step_id in steps_by_id
+        }
+        
+        failed = await self._run_graph(
+            dependents,
+            lambda step_id: self._rollback_step(steps_by_id[step_id], activation.metadata or {}),
+            order=lambda step_id: -steps_by_id[step_id].step_order,
+            stop_on_failure=False
         )
-        steps_to_rollback = result.scalars().all()
-        
-        rollback_success = True
-        
-        # Execute rollback for each completed step
-        for step in steps_to_rollback:
-            success = await self._rollback_step(step, activation.metadata or {})
-            if not success:
-                rollback_success = False
+        rollback_success = not failed
         
         # Update activation status based on rollback result
         if rollback_success:
@@ -324,7 +606,7 @@ class WorkflowEngine:
             )
         
         activation.updated_at = datetime.utcnow()
-        await self.session.commit()
+        await self._commit()
         
         return rollback_success
     
@@ -361,6 +643,9 @@ class WorkflowEngine:
             success = await handler(step, metadata)
             
             if success:
+                step.status = StepStatus.ROLLBACK_COMPLETED
+                await self._commit()
+                
                 await self._log_step_event(
                     step_id=step.id,
                     activation_id=step.activation_id,
@@ -369,6 +654,9 @@ class WorkflowEngine:
                 )
                 return True
             else:
+                step.status = StepStatus.ROLLBACK_FAILED
+                await self._commit()
+                
                 await self._log_step_event(
                     step_id=step.id,
                     activation_id=step.activation_id,
@@ -378,6 +666,9 @@ class WorkflowEngine:
                 return False
         
         except Exception as e:
+            step.status = StepStatus.ROLLBACK_FAILED
+            await self._commit()
+            
             await self._log_step_event(
                 step_id=step.id,
                 activation_id=step.activation_id,
@@ -409,7 +700,7 @@ class WorkflowEngine:
             
             # For now, we'll just mark prerequisites as checked
             activation.prerequisites_checked = True
-            await self.session.commit()
+            await self._commit()
             
             await self._log_activation_event(
                 activation_id=activation.id,
@@ -450,7 +741,7 @@ class WorkflowEngine:
             
             # For now, we'll just mark payment as verified
             activation.payment_verified = True
-            await self.session.commit()
+            await self._commit()
             
             await self._log_activation_event(
                 activation_id=activation.id,
@@ -477,7 +768,7 @@ class WorkflowEngine:
             activation_id: ID of the activation to mark as failed
             reason: Reason for the failure
         """
-        result = await self.session.execute(
+        result = await self._execute(
             select(ServiceActivation).where(ServiceActivation.id == activation_id)
         )
         activation = result.scalars().first()
@@ -488,7 +779,7 @@ class WorkflowEngine:
         
         activation.status = ActivationStatus.FAILED
         activation.updated_at = datetime.utcnow()
-        await self.session.commit()
+        await self._commit()
         
         await self._log_activation_event(
             activation_id=activation_id,
@@ -506,21 +797,15 @@ class WorkflowEngine:
         """
         Log an event for a service activation.
         
+        The entry is written with the next commit.
+        
         Args:
             activation_id: ID of the activation
             level: Log level (INFO, WARNING, ERROR, DEBUG)
             message: Log message
             details: Additional details for the log
         """
-        log_entry = ActivationLog(
-            activation_id=activation_id,
-            level=level,
-            message=message,
-            details=details
-        )
-        
-        self.session.add(log_entry)
-        await self.session.commit()
+        self._log_writer.add(activation_id, level, message, details=details)
         
         # Also log to the application logger
         log_method = getattr(self.logger, level.lower(), self.logger.info)
@@ -537,6 +822,8 @@ class WorkflowEngine:
         """
         Log an event for a workflow step.
         
+        The entry is written with the next commit.
+        
         Args:
             step_id: ID of the step
             activation_id: ID of the activation
@@ -544,17 +831,22 @@ class WorkflowEngine:
             message: Log message
             details: Additional details for the log
         """
-        log_entry = ActivationLog(
-            activation_id=activation_id,
-            step_id=step_id,
-            level=level,
-            message=message,
-            details=details
-        )
-        
-        self.session.add(log_entry)
-        await self.session.commit()
+        self._log_writer.add(activation_id, level, message, step_id=step_id, details=details)
         
         # Also log to the application logger
         log_method = getattr(self.logger, level.lower(), self.logger.info)
         log_method(f"Activation {activation_id}, Step {step_id}: {message}")
+    
+    async def _execute(self, statement: Any) -> Any:
+        """Execute a statement, serialized with the other steps' database operations."""
+        async with self._session_lock:
+            return await self.session.execute(statement)
+    
+    async def _commit(self) -> None:
+        """
+        Commit the session with the buffered log entries, serialized with the
+        other steps' database operations.
+        """
+        async with self._session_lock:
+            await self._log_writer.flush(self.session)
+            await self.session.commit()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""
+File Transfer Benchmark Script
+
+This script measures upload and download throughput of the file manager
+storage service against S3 and local storage, comparing the previous
+buffered, blocking calls with the streaming layer (thread-offloaded local
+I/O, parallel multipart uploads and parallel ranged downloads). It also
+reports the longest event loop stall seen during each transfer.
+
+Unless --endpoint-url points at a real S3-compatible server (e.g. MinIO),
+an in-process S3 stand-in is started. It adds a fixed latency per request
+and limits the bandwidth of each connection, like a remote object store.
+
+Usage:
+    python scripts/file_transfer_benchmark.py --size-mb 64
+    python scripts/file_transfer_benchmark.py --endpoint-url http://localhost:9000 --bucket bench
+"""
+import os
+import re
+import sys
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
+from botocore.config import Config
+from fastapi import UploadFile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.file_manager.models.file import StorageBackend
+from modules.file_manager.services.storage_service import StorageService
+
+
+class S3StandIn(BaseHTTPRequestHandler):
+    """Minimal path-style S3 API: objects, multipart uploads and ranged GETs."""
+
+    protocol_version = "HTTP/1.1"
+    objects = {}
+    uploads = {}
+    latency = 0.0
+    bandwidth = None  # Bytes per second per connection
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _throttle(self, size):
+        time.sleep(self.latency + (size / self.bandwidth if self.bandwidth else 0))
+
+    def _reply(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _target(self):
+        path, _, query = self.path.partition("?")
+        params = dict(part.partition("=")[::2] for part in query.split("&") if part)
+        return path, params
+
+    def _body(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            # Strip the chunk framing of checksummed streaming uploads
+            data, rest = b"", body
+            while rest:
+                header, _, rest = rest.partition(b"\r\n")
+                length = int(header.split(b";")[0], 16)
+                if length == 0:
+                    break
+                data, rest = data + rest[:length], rest[length + 2:]
+            body = data
+        self._throttle(len(body))
+        return body
+
+    def do_PUT(self):
+        path, params = self._target()
+        body = self._body()
+        if "uploadId" in params:
+            with self.lock:
+                self.uploads[params["uploadId"]][int(params["partNumber"])] = body
+        elif path.count("/") > 1:
+            with self.lock:
+                self.objects[path] = body
+        self._reply(200, headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+    def do_POST(self):
+        path, params = self._target()
+        self._body()
+        if "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.uploads[upload_id] = {}
+            body = (
+                "<InitiateMultipartUploadResult><Bucket>b</Bucket><Key>k</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+        else:
+            with self.lock:
+                parts = self.uploads.pop(params["uploadId"])
+                self.objects[path] = b"".join(parts[number] for number in sorted(parts))
+            body = "<CompleteMultipartUploadResult><ETag>\"x\"</ETag></CompleteMultipartUploadResult>"
+        self._reply(200, body.encode())
+
+    def do_GET(self):
+        path, _ = self._target()
+        data = self.objects.get(path)
+        if data is None:
+            self._reply(404, b"<Error><Code>NoSuchKey</Code></Error>")
+            return
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+            body = data[start:end + 1]
+            self._throttle(len(body))
+            self._reply(206, body, {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        else:
+            self._throttle(len(data))
+            self._reply(200, data)
+
+    do_HEAD = do_GET
+
+    def do_DELETE(self):
+        path, _ = self._target()
+        with self.lock:
+            self.objects.pop(path, None)
+        self._reply(204)
+
+
+async def measure(label, size, transfer):
+    """Run a transfer while watching the event loop, and print its results."""
+    stalls = []
+
+    async def heartbeat():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stalls.append(time.perf_counter() - started - 0.005)
+
+    watcher = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await transfer()
+    elapsed = time.perf_counter() - start
+    # Let a heartbeat delayed by a blocking transfer record its stall
+    await asyncio.sleep(0.01)
+    watcher.cancel()
+
+    print(
+        f"  {label:<36} {elapsed:8.2f} s {size / elapsed / 1024 / 1024:9.1f} MB/s "
+        f"{max(stalls, default=0) * 1000:9.1f} ms max loop stall"
+    )
+
+
+def open_upload(path):
+    """Open a file as an upload, like a request body spooled to disk."""
+    return UploadFile(file=open(path, "rb"), filename="firmware.bin")
+
+
+async def benchmark(service, source, size):
+    """Run each transfer scenario once."""
+    backend_key = f"bench/{uuid.uuid4().hex}"
+
+    async def buffered_s3_upload():
+        # Previous behaviour: read the whole upload, then one blocking put_object
+        upload = open_upload(source)
+        content = await upload.read()
+        service.s3_client.put_object(Bucket=service.s3_bucket, Key=backend_key, Body=content)
+
+    async def streaming_s3_upload():
+        upload = open_upload(source)
+        staged = await service.stage_file(upload, StorageBackend.S3)
+        await service.commit_staged_file(staged, upload)
+
+    async def buffered_s3_download():
+        # Previous behaviour: blocking get_object, body read on the event loop
+        body = service.s3_client.get_object(Bucket=service.s3_bucket, Key=backend_key)["Body"]
+        while body.read(1024 * 1024):
+            pass
+
+    async def streaming_s3_download():
+        path = service.get_content_path(checksum)
+        async for _ in service.iter_file(StorageBackend.S3, path, 0, size - 1):
+            pass
+
+    async def buffered_local_upload():
+        # Previous behaviour: blocking hashing and writes inside the coroutine
+        upload = open_upload(source)
+        sha256_hash = hashlib.sha256()
+        with open(os.path.join(service.local_storage_path, "buffered.bin"), "wb") as buffer:
+            while content := await upload.read(1024 * 1024):
+                sha256_hash.update(content)
+                buffer.write(content)
+
+    async def streaming_local_upload():
+        upload = open_upload(source)
+        staged = await service.stage_file(upload, StorageBackend.LOCAL)
+        await service.commit_staged_file(staged, upload)
+
+    async def streaming_local_download():
+        path = service.get_content_path(checksum)
+        async for _ in service.iter_file(StorageBackend.LOCAL, path, 0, size - 1):
+            pass
+
+    staged = await service.stage_file(open_upload(source), StorageBackend.LOCAL)
+    service.discard_staged_file(staged)
+    checksum = staged.checksum
+
+    print("S3")
+    await measure("buffered put_object", size, buffered_s3_upload)
+    await measure("parallel multipart upload", size, streaming_s3_upload)
+    await measure("get_object body", size, buffered_s3_download)
+    await measure("parallel ranged download", size, streaming_s3_download)
+    print("Local")
+    await measure("blocking writes", size, buffered_local_upload)
+    await measure("thread-offloaded writes", size, streaming_local_upload)
+    await measure("thread-offloaded reads", size, streaming_local_download)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark file manager storage transfers")
+    parser.add_argument("--size-mb", type=int, default=64, help="Size of the transferred file")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint, defaults to an in-process stand-in")
+    parser.add_argument("--bucket", default="isp-management-files", help="S3 bucket to use")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in latency per request")
+    parser.add_argument("--bandwidth-mb", type=float, default=50.0, help="Stand-in bandwidth per connection")
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if not endpoint_url:
+        S3StandIn.latency = args.latency_ms / 1000
+        S3StandIn.bandwidth = args.bandwidth_mb * 1024 * 1024
+        server = ThreadingHTTPServer(("127.0.0.1", 0), S3StandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint_url = f"http://127.0.0.1:{server.server_port}"
+
+    s3_client = boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "bench"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "bench"),
+        region_name="us-east-1",
+        config=Config(s3={"addressing_style": "path"}, max_pool_connections=32)
+    )
+    if server:
+        s3_client.create_bucket(Bucket=args.bucket)
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.bin")
+        with open(source, "wb") as f:
+            f.write(os.urandom(size))
+
+        service = StorageService(
+            local_storage_path=os.path.join(tmp, "storage"),
+            s3_client=s3_client,
+            s3_bucket=args.bucket
+        )
+        print(f"Transferring {args.size_mb} MB to {endpoint_url}")
+        asyncio.run(benchmark(service, source, size))
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Webhook Delivery Load Test Script
+
+This script starts a local HTTP sink, registers webhooks pointing at it in an
+in-memory database, queues events in the webhook outbox and measures how many
+deliveries per second the webhook dispatcher sustains, with and without batch
+delivery.
+
+Usage:
+    python scripts/webhook_load_test.py --events 5000 --webhooks 10
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.communications.models import Webhook, WebhookLog, WebhookOutbox
+from modules.communications.webhook_dispatcher import WebhookDispatcher
+
+
+class HTTPSink:
+    """Minimal keep-alive HTTP/1.1 server that accepts every POST."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.requests += 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return f"http://{self.host}:{self.port}"
+
+
+def create_session():
+    """Create an in-memory database with the webhook tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for model in (Webhook, WebhookLog, WebhookOutbox):
+        model.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def run_scenario(sink, sink_url, args, batch_delivery):
+    """Queue events and drain the outbox, returning deliveries per second."""
+    db = create_session()
+    table = Webhook.__table__
+    db.execute(insert(table), [
+        {"name": f"hook-{i}", "url": f"{sink_url}/hooks/{i}", "events": ["load.test"],
+         "is_active": True, "batch_delivery": batch_delivery, "created_by": 1}
+        for i in range(args.webhooks)
+    ])
+    db.commit()
+    webhooks = db.execute(select(table.c.id)).all()
+
+    dispatcher = WebhookDispatcher(
+        max_connections=args.connections,
+        max_connections_per_host=args.connections,
+        batch_size=args.batch_size,
+    )
+    per_webhook = max(1, args.events // args.webhooks)
+    for i in range(per_webhook):
+        dispatcher.enqueue(db, webhooks, "load.test", {"sequence": i, "body": "x" * args.payload_bytes})
+    db.commit()
+
+    requests_before = sink.requests
+    start = time.perf_counter()
+    stats = asyncio.run(dispatcher.drain(db, limit=args.claim_size))
+    elapsed = time.perf_counter() - start
+
+    delivered = stats["delivered"]
+    requests = sink.requests - requests_before
+    print(f"  {'batched' if batch_delivery else 'single':<8} {delivered:>8} events "
+          f"{requests:>8} requests {elapsed:8.2f} s {delivered / elapsed:10.0f} deliveries/s")
+    db.close()
+    return delivered / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test webhook delivery against a local sink")
+    parser.add_argument("--events", type=int, default=5000, help="Total number of events to deliver")
+    parser.add_argument("--webhooks", type=int, default=10, help="Number of webhooks")
+    parser.add_argument("--connections", type=int, default=50, help="Connection pool size")
+    parser.add_argument("--batch-size", type=int, default=50, help="Events per batched request")
+    parser.add_argument("--claim-size", type=int, default=500, help="Outbox entries claimed per round")
+    parser.add_argument("--payload-bytes", type=int, default=256, help="Size of the event payload")
+    parser.add_argument("--latency", type=float, default=0.0, help="Sink response latency in seconds")
+    args = parser.parse_args()
+
+    sink = HTTPSink(latency=args.latency)
+    sink_url = sink.start()
+    print(f"Sink listening on {sink_url}")
+    print(f"Delivering {args.events:,} events to {args.webhooks} webhooks")
+
+    single = run_scenario(sink, sink_url, args, batch_delivery=False)
+    batched = run_scenario(sink, sink_url, args, batch_delivery=True)
+    print(f"  batching speed-up: {batched / single:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,15 @@
 Tests for User Session Management core functionality.
 """
 
+import threading
+import time
 import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
 from fastapi import Request
 
 # Import the Session manager and shared models
-from backend_core.user_session import SessionManager
+from backend_core.user_session import SessionManager, SessionActivityBuffer
 from backend_core.auth_models import UserSession
 
 @pytest.fixture
@@ -139,25 +141,61 @@ def test_terminate_all_user_sessions_except(mock_db):
     # Verify that the commit was called
     mock_db.commit.assert_called_once()
 
-def test_update_session_activity_success(mock_db):
+@patch('backend_core.user_session.session_activity_buffer', new_callable=lambda: SessionActivityBuffer(flush_interval=0))
+def test_update_session_activity_success(mock_buffer, mock_db):
     """Test updating the last activity timestamp for a session."""
     # Setup mock session
     session = MagicMock(spec=UserSession)
     session.is_active = True
     mock_db.query.return_value.filter_by.return_value.first.return_value = session
+    flush_db = MagicMock()
     
     # Call the update_session_activity method
-    result = SessionManager.update_session_activity(mock_db, "test-session-id")
+    with patch('backend_core.database.SessionLocal', return_value=flush_db):
+        result = SessionManager.update_session_activity(mock_db, "test-session-id")
     
     # Check that the result is True
     assert result is True
     
-    # Check that the session was updated
-    assert session.last_active is not None
+    # Check that the activity was written in a batched update on a session of its own
+    flush_db.execute.assert_called_once()
+    _, params = flush_db.execute.call_args[0]
+    assert params[0]["b_session_id"] == "test-session-id"
+    assert params[0]["b_last_active_at"] is not None
+    flush_db.commit.assert_called_once()
+    flush_db.close.assert_called_once()
     
-    # Verify that the commit was called
+    # Verify that the caller's transaction was not committed
+    mock_db.commit.assert_not_called()
+
+@patch('backend_core.user_session.session_activity_buffer', new_callable=lambda: SessionActivityBuffer(flush_interval=3600))
+def test_update_session_activity_coalesced(mock_buffer, mock_db):
+    """Test that repeated activity updates are coalesced into one write."""
+    mock_db.query.return_value.filter_by.return_value.first.return_value = MagicMock(spec=UserSession)
+    mock_buffer._last_flush = time.time()
+    
+    for _ in range(5):
+        assert SessionManager.update_session_activity(mock_db, "session-a") is True
+    assert SessionManager.update_session_activity(mock_db, "session-b") is True
+    
+    # Nothing is written until the buffer is due
+    mock_db.commit.assert_not_called()
+    
+    # Flushing writes one row per session in a single statement
+    assert SessionManager.flush_session_activity(mock_db) == 2
+    mock_db.execute.assert_called_once()
     mock_db.commit.assert_called_once()
 
+def test_session_activity_timer_flushes_buffer():
+    """Test that buffered activity is written without further requests."""
+    flushed = threading.Event()
+    buffer = SessionActivityBuffer(flush_interval=0.01, flush=lambda: flushed.set() or len(buffer.drain()))
+    
+    buffer.touch("session-a")
+    
+    assert flushed.wait(1)
+    assert len(buffer) == 0
+
 def test_update_session_activity_not_found(mock_db):
     """Test updating the last activity timestamp for a session that doesn't exist."""
     # Setup
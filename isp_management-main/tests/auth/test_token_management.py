@@ -18,6 +18,7 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
 from backend_core.auth_service import AuthService
+from backend_core.token_validation import TokenRevocationFilter
 from backend_core.config import SECRET_KEY, ALGORITHM
 
 
@@ -125,17 +126,24 @@ def test_token_blacklisting(mock_redis):
     mock_redis.set.assert_called_once()
 
 
+@patch('backend_core.auth_service.revocation_filter', new_callable=TokenRevocationFilter)
 @patch('backend_core.auth_service.redis_client')
-def test_token_blacklist_checking(mock_redis):
+def test_token_blacklist_checking(mock_redis, mock_filter):
     """Test checking if a token is blacklisted."""
     # Setup
     token = "test.jwt.token"
+    mock_redis.scan_iter.return_value = iter([])
+    assert mock_filter.sync(mock_redis) is True
     
-    # Test when token is not blacklisted
-    mock_redis.exists.return_value = False
+    # Test when token is not in the revocation filter, Redis is not consulted
+    mock_redis.exists.return_value = True
     assert AuthService.is_token_blacklisted(token) is False
+    mock_redis.exists.assert_not_called()
     
-    # Test when token is blacklisted
+    # Test when the filter reports a possible hit, Redis decides
+    mock_filter.add(token)
+    mock_redis.exists.return_value = False
+    assert AuthService.is_token_blacklisted(token) is False
     mock_redis.exists.return_value = True
     assert AuthService.is_token_blacklisted(token) is True
 
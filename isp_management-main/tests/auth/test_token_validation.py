@@ -0,0 +1,152 @@
+"""
+Tests for the token validation cache and revocation filter.
+"""
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta
+from jose import JWTError, jwt
+
+from backend_core.token_validation import (
+    BloomFilter,
+    TokenRevocationFilter,
+    TokenValidator,
+    token_digest,
+)
+
+SECRET = "test-secret"
+
+
+def _token(**claims):
+    payload = {"sub": "testuser", "exp": datetime.utcnow() + timedelta(minutes=5)}
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_bloom_filter_membership():
+    """Test that added digests are always reported as present."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    digests = [token_digest(f"token-{i}") for i in range(500)]
+    for digest in digests:
+        bloom.add(digest)
+    
+    assert all(digest in bloom for digest in digests)
+    false_positives = sum(token_digest(f"other-{i}") in bloom for i in range(1000))
+    assert false_positives < 50
+
+def test_revocation_filter_not_ready_reports_possible_hit():
+    """Test that an unsynced filter sends every lookup to Redis."""
+    revocations = TokenRevocationFilter()
+    assert revocations.might_contain("any-token") is True
+
+def test_revocation_filter_sync_from_redis():
+    """Test rebuilding the filter from Redis blacklist keys."""
+    redis_client = MagicMock()
+    redis_client.scan_iter.side_effect = [
+        iter(["blacklist:revoked-access"]),
+        iter(["refresh_blacklist:revoked-refresh"]),
+    ]
+    revocations = TokenRevocationFilter()
+    revocations.add("revoked-locally")
+    
+    assert revocations.sync(redis_client) is True
+    assert revocations.might_contain("revoked-access")
+    assert revocations.might_contain("revoked-refresh")
+    assert revocations.might_contain("revoked-locally")
+    assert not revocations.might_contain("valid-token")
+    assert not revocations.sync_due()
+
+def test_revocation_filter_sync_failure_keeps_state():
+    """Test that a failed sync leaves the filter unready and retries later."""
+    redis_client = MagicMock()
+    redis_client.scan_iter.side_effect = Exception("Redis unavailable")
+    revocations = TokenRevocationFilter(sync_interval=60)
+    
+    assert revocations.sync(redis_client) is False
+    assert revocations.ready is False
+    assert not revocations.sync_due()
+
+def test_validator_caches_verified_claims():
+    """Test that repeat validations skip signature verification."""
+    validator = TokenValidator()
+    token = _token()
+    
+    with patch("backend_core.token_validation.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = validator.decode(token, SECRET, ["HS256"])
+        second = validator.decode(token, SECRET, ["HS256"])
+    
+    assert first == second
+    assert mock_decode.call_count == 1
+    assert validator.hits == 1
+
+def test_validator_rejects_invalid_token():
+    """Test that invalid tokens raise and are not cached."""
+    validator = TokenValidator()
+    with pytest.raises(JWTError):
+        validator.decode(_token(), "wrong-secret", ["HS256"])
+    assert validator.misses == 0
+
+def test_validator_respects_token_expiry():
+    """Test that cached claims are not served past the token expiry."""
+    validator = TokenValidator()
+    token = _token(exp=int(time.time()) + 1)
+    validator.decode(token, SECRET, ["HS256"])
+    
+    # Past the expiry the cached entry is dropped and the token re-verified
+    with patch("backend_core.token_validation.time.time", return_value=time.time() + 5), \
+            patch("backend_core.token_validation.jwt.decode", side_effect=JWTError("expired")):
+        with pytest.raises(JWTError):
+            validator.decode(token, SECRET, ["HS256"])
+    assert token_digest(token) not in validator._cache
+
+def test_validator_lru_eviction_and_invalidate():
+    """Test LRU eviction and explicit invalidation."""
+    validator = TokenValidator(max_size=2)
+    tokens = [_token(sub=f"user{i}") for i in range(3)]
+    for token in tokens:
+        validator.decode(token, SECRET, ["HS256"])
+    
+    assert token_digest(tokens[0]) not in validator._cache
+    validator.invalidate(tokens[2])
+    assert token_digest(tokens[2]) not in validator._cache
+
+def test_validator_does_not_reuse_claims_verified_with_another_key():
+    """Test that cached claims are only served for the same key and algorithms."""
+    validator = TokenValidator()
+    token = _token()
+    validator.decode(token, SECRET, ["HS256"])
+    
+    with pytest.raises(JWTError):
+        validator.decode(token, "rotated-secret", ["HS256"])
+    with pytest.raises(JWTError):
+        validator.decode(token, SECRET, ["HS512"])
+    assert validator.hits == 0
+
+def test_revocation_filter_syncs_in_background():
+    """Test that a background rebuild does not block and runs one at a time."""
+    started, release = threading.Event(), threading.Event()
+    
+    def scan_iter(match, count):
+        started.set()
+        release.wait(1)
+        return iter([match.replace("*", "revoked")])
+    
+    redis_client = MagicMock()
+    redis_client.scan_iter.side_effect = scan_iter
+    revocations = TokenRevocationFilter()
+    
+    assert revocations.sync_in_background(redis_client) is True
+    assert started.wait(1)
+    assert revocations.sync_in_background(redis_client) is False
+    assert revocations.might_contain("anything")
+    
+    release.set()
+    for _ in range(100):
+        if revocations.ready:
+            break
+        time.sleep(0.01)
+    assert revocations.ready
+    assert revocations.might_contain("revoked")
+    assert not revocations.might_contain("valid-token")
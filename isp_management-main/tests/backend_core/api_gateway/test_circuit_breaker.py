@@ -69,6 +69,19 @@ class TestCircuitBreaker:
         # Check that success was recorded
         assert circuit_breaker._get_success_count(path) == 1
     
+    def test_success_resets_failures_of_closed_circuit(self, circuit_breaker):
+        """Test that only consecutive failures open the circuit."""
+        path = "/api/test"
+        circuit_breaker.configure(path, 3, 30)
+        
+        for _ in range(3):
+            circuit_breaker.record_failure(path)
+            circuit_breaker.record_failure(path)
+            circuit_breaker.record_success(path)
+        
+        assert circuit_breaker._get_failure_count(path) == 0
+        assert circuit_breaker._get_circuit_state(path) == CircuitState.CLOSED
+    
     def test_record_failure(self, circuit_breaker):
         """Test recording a failed request."""
         path = "/api/test"
@@ -0,0 +1,177 @@
+"""
+Tests for the write-behind audit log sink.
+"""
+
+import sys
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend_core.audit_log_service import AuditLog, AuditLogService
+from backend_core.audit_log_sink import AuditLogSink
+
+
+@pytest.fixture
+def engine():
+    """Create an in-memory SQLite engine with the audit log table."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    AuditLog.__table__.create(bind=engine)
+    return engine
+
+
+def _event(**overrides):
+    event = {
+        "event_type": "login",
+        "user_id": 1,
+        "username": "alice",
+        "ip_address": "10.0.0.1",
+        "timestamp": datetime.utcnow(),
+        "status": "success",
+        "details": None,
+        "severity": "info",
+        "resource_type": None,
+        "resource_id": None,
+    }
+    event.update(overrides)
+    return event
+
+
+class TestAuditLogSink:
+    """Tests for the AuditLogSink class."""
+
+    def test_flush_bulk_inserts_buffered_events(self, engine):
+        """Buffered events are written in batches on flush."""
+        sink = AuditLogSink(engine, batch_size=10, spill_path=None)
+        for i in range(25):
+            assert sink.enqueue(_event(user_id=i))
+
+        assert sink.pending() == 25
+        assert sink.flush() == 25
+        assert sink.pending() == 0
+        assert sink.stats["flushes"] == 3
+
+        with engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(AuditLog.__table__)).scalar()
+        assert count == 25
+
+    def test_full_buffer_spills_to_disk(self, engine, tmp_path):
+        """Events that do not fit in the buffer are spilled and replayed later."""
+        spill_path = str(tmp_path / "audit.jsonl")
+        sink = AuditLogSink(engine, capacity=2, enqueue_timeout=0, spill_path=spill_path)
+
+        assert sink.enqueue(_event())
+        assert sink.enqueue(_event())
+        assert not sink.enqueue(_event(username="bob"))
+
+        with open(spill_path) as f:
+            spilled = [json.loads(line) for line in f]
+        assert [e["username"] for e in spilled] == ["bob"]
+
+        sink.flush()
+        assert sink._replay_spill() == 1
+        with engine.connect() as conn:
+            count = conn.execute(select(func.count()).select_from(AuditLog.__table__)).scalar()
+        assert count == 3
+
+    def test_interrupted_replay_resumes_from_checkpoint(self, engine, tmp_path):
+        """A replay cut short by the process dying resumes without losing or repeating events."""
+        spill_path = str(tmp_path / "audit.jsonl")
+        sink = AuditLogSink(engine, batch_size=2, spill_path=spill_path)
+        sink._spill([_event(user_id=i) for i in range(5)])
+
+        write_batch = sink._write_batch
+        written = []
+
+        def die_after_first_batch(batch):
+            if written:
+                raise SystemExit("worker died")
+            written.append(batch)
+            return write_batch(batch)
+
+        with patch.object(sink, "_write_batch", die_after_first_batch):
+            with pytest.raises(SystemExit):
+                sink._replay_spill()
+
+        # Events spilled after the crash must not replace the unfinished replay
+        sink._spill([_event(user_id=5)])
+
+        restarted = AuditLogSink(engine, batch_size=2, spill_path=spill_path)
+        assert restarted._replay_spill() == 4
+        assert not list(tmp_path.iterdir())
+
+        with engine.connect() as conn:
+            user_ids = conn.execute(select(AuditLog.__table__.c.user_id)).scalars().all()
+        assert sorted(user_ids) == [0, 1, 2, 3, 4, 5]
+
+    def test_failed_insert_spills_batch(self, tmp_path):
+        """A batch that cannot be inserted is spilled rather than lost."""
+        broken_engine = MagicMock()
+        broken_engine.begin.side_effect = Exception("database unavailable")
+        spill_path = str(tmp_path / "audit.jsonl")
+        sink = AuditLogSink(broken_engine, spill_path=spill_path)
+
+        sink.enqueue(_event())
+        assert sink.flush() == 0
+        assert sink.stats["spilled"] == 1
+
+    def test_ships_batch_to_elasticsearch(self, engine):
+        """Written batches are shipped to Elasticsearch with a single bulk call."""
+        es_client = MagicMock()
+        sink = AuditLogSink(engine, es_client=es_client, spill_path=None)
+        sink.enqueue(_event())
+        sink.enqueue(_event())
+
+        with patch("elasticsearch.helpers.bulk", return_value=(2, [])) as mock_bulk:
+            sink.flush()
+
+        mock_bulk.assert_called_once()
+        actions = mock_bulk.call_args[0][1]
+        assert len(actions) == 2
+        assert isinstance(actions[0]["_source"]["timestamp"], str)
+        assert sink.stats["es_shipped"] == 2
+
+    def test_background_flusher(self, engine):
+        """The flusher thread writes events without an explicit flush."""
+        sink = AuditLogSink(engine, flush_interval=0.01, spill_path=None)
+        sink.start()
+        try:
+            sink.enqueue(_event())
+            for _ in range(200):
+                if sink.stats["written"]:
+                    break
+                time.sleep(0.01)
+        finally:
+            sink.stop()
+        assert sink.stats["written"] == 1
+
+
+class TestAuditLogServiceWriteBehind:
+    """Tests for AuditLogService using the sink."""
+
+    def test_log_event_does_not_commit_caller_session(self, engine):
+        """log_event must not commit the caller's session."""
+        db = sessionmaker(bind=engine)()
+        db.commit = MagicMock()
+
+        AuditLogService.log_event(event_type="login", status="success", user_id=1, db=db)
+
+        db.commit.assert_not_called()
+        logs, total = AuditLogService.get_logs(db=db)
+        assert total == 1
+        assert logs[0]["event_type"] == "login"
+        db.close()
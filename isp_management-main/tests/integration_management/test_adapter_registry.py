@@ -0,0 +1,138 @@
+"""
+Tests for the Integration Management Module's adapter registry.
+
+This module tests the AdapterRegistry class, which caches ready adapters
+per integration and configuration version.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from modules.integration_management.models.integration import (
+    Integration, IntegrationType, IntegrationStatus, IntegrationEnvironment
+)
+from modules.integration_management.services.adapter_registry import AdapterRegistry
+from modules.integration_management.utils.adapters import PaymentGatewayAdapter
+from modules.integration_management.utils.security import CredentialEncryptor
+
+
+def make_integration(integration_id=1, **configuration):
+    return Integration(
+        id=integration_id,
+        name=f"Integration {integration_id}",
+        type=IntegrationType.PAYMENT_GATEWAY,
+        status=IntegrationStatus.ACTIVE,
+        environment=IntegrationEnvironment.PRODUCTION,
+        configuration={"base_url": "https://example.com", **configuration},
+        encrypted_credentials="encrypted_credentials"
+    )
+
+
+@pytest.fixture
+def credential_encryptor():
+    """Create a mock credential encryptor returning fresh credentials."""
+    encryptor = MagicMock(spec=CredentialEncryptor)
+    encryptor.decrypt.side_effect = lambda _: {"api_key": "test_api_key"}
+    return encryptor
+
+
+def get(registry, integration, credential_encryptor):
+    """Borrow an adapter and hand it back at once."""
+    with registry.borrow(integration, credential_encryptor) as adapter:
+        return adapter
+
+
+def test_adapters_are_reused(credential_encryptor):
+    """Test that repeat calls skip decryption and setup."""
+    registry = AdapterRegistry()
+
+    adapters = [get(registry, make_integration(), credential_encryptor) for _ in range(5)]
+
+    assert all(adapter is adapters[0] for adapter in adapters)
+    assert isinstance(adapters[0], PaymentGatewayAdapter)
+    assert adapters[0].credentials == {"api_key": "test_api_key"}
+    assert credential_encryptor.decrypt.call_count == 1
+    assert registry.stats()["borrowed"] == 0
+
+
+def test_new_version_replaces_adapter(credential_encryptor):
+    """Test that a changed integration gets a new adapter and the old one is cleared."""
+    registry = AdapterRegistry()
+    old = get(registry, make_integration(), credential_encryptor)
+
+    changed = make_integration(base_url="https://example.org")
+    new = get(registry, changed, credential_encryptor)
+
+    assert new is not old
+    assert new.configuration["base_url"] == "https://example.org"
+    assert old.credentials == {}
+    assert new.credentials == {"api_key": "test_api_key"}
+    assert registry.stats()["size"] == 1
+
+
+def test_invalidate_and_ttl(credential_encryptor):
+    """Test that invalidated and expired adapters are rebuilt."""
+    registry = AdapterRegistry(ttl=60)
+    first = get(registry, make_integration(), credential_encryptor)
+
+    registry.invalidate(1)
+    second = get(registry, make_integration(), credential_encryptor)
+    assert second is not first
+    assert first.credentials == {}
+
+    with patch("modules.integration_management.services.adapter_registry.time.monotonic", return_value=1e12):
+        assert get(registry, make_integration(), credential_encryptor) is not second
+        assert registry.purge_expired() == 0
+
+
+def test_least_recently_used_is_evicted(credential_encryptor):
+    """Test that the registry stays within its size."""
+    registry = AdapterRegistry(max_size=2)
+    first = get(registry, make_integration(1), credential_encryptor)
+    second = get(registry, make_integration(2), credential_encryptor)
+    get(registry, make_integration(1), credential_encryptor)
+    get(registry, make_integration(3), credential_encryptor)
+
+    assert registry.stats()["size"] == 2
+    assert get(registry, make_integration(1), credential_encryptor) is first
+    assert credential_encryptor.decrypt.call_count == 3
+    assert second.credentials == {}
+
+
+def test_borrowed_adapter_is_cleared_after_last_release(credential_encryptor):
+    """Test that an adapter evicted while borrowed keeps its credentials until it is released."""
+    registry = AdapterRegistry(max_size=1)
+
+    with registry.borrow(make_integration(1), credential_encryptor) as in_use:
+        with registry.borrow(make_integration(1), credential_encryptor) as shared:
+            assert shared is in_use
+            registry.clear()
+            get(registry, make_integration(2), credential_encryptor)
+            registry.purge_expired()
+
+            assert registry.stats()["retired"] == 1
+            assert in_use.credentials == {"api_key": "test_api_key"}
+
+        # Still borrowed by the outer block
+        assert in_use.credentials == {"api_key": "test_api_key"}
+
+    assert in_use.credentials == {}
+    assert registry.stats()["borrowed"] == registry.stats()["retired"] == 0
+
+
+def test_cached_adapter_keeps_credentials_after_release(credential_encryptor):
+    """Test that releasing an adapter still in the registry does not clear it."""
+    registry = AdapterRegistry()
+    adapter = registry.acquire(make_integration(), credential_encryptor)
+    registry.release(adapter)
+
+    assert adapter.credentials == {"api_key": "test_api_key"}
+    assert registry.stats()["borrowed"] == 0
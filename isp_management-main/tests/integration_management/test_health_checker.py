@@ -0,0 +1,162 @@
+"""
+Tests for the Integration Management Module's health checker.
+
+This module tests the IntegrationHealthChecker class with adapters whose
+connection tests sleep instead of calling partner APIs.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import time
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from sqlalchemy.orm import Session
+
+from modules.integration_management.models.integration import (
+    Integration, IntegrationActivity, IntegrationType, ActivityType
+)
+from modules.integration_management.services.adapter_registry import AdapterRegistry, adapter_registry
+from modules.integration_management.services.health_checker import IntegrationHealthChecker
+from modules.integration_management.utils.adapters import IntegrationAdapter
+
+
+class SleepingAdapter(IntegrationAdapter):
+    """Adapter whose connection test takes a configured time."""
+
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def _get_credentials(self):
+        return {}
+
+    def test_connection(self):
+        with self.lock:
+            SleepingAdapter.running += 1
+            SleepingAdapter.max_running = max(SleepingAdapter.max_running, SleepingAdapter.running)
+        try:
+            time.sleep(self.configuration["delay"])
+        finally:
+            with self.lock:
+                SleepingAdapter.running -= 1
+        return self.configuration.get("success", True), None
+
+    def get_service_status(self):
+        return {}
+
+
+def make_integration(integration_id, delay, health_status="healthy", **configuration):
+    return Integration(
+        id=integration_id,
+        name=f"Integration {integration_id}",
+        type=IntegrationType.PAYMENT_GATEWAY,
+        configuration={"delay": delay, **configuration},
+        health_status=health_status
+    )
+
+
+@pytest.fixture
+def db_session():
+    """Create a mock database session for testing."""
+    return MagicMock(spec=Session)
+
+
+@pytest.fixture(autouse=True)
+def sleeping_adapters():
+    """Use sleeping adapters for all integrations."""
+    SleepingAdapter.running = SleepingAdapter.max_running = 0
+    adapter_registry.clear()
+    with patch.object(
+        IntegrationAdapter, "get_adapter_for_integration",
+        side_effect=lambda integration, encryptor: SleepingAdapter(integration, encryptor)
+    ):
+        yield
+    adapter_registry.clear()
+
+
+def test_probes_run_concurrently(db_session):
+    """Test that a sweep takes about as long as its slowest probe."""
+    checker = IntegrationHealthChecker(db_session, credential_encryptor=MagicMock(), concurrency=8)
+    integrations = [make_integration(i, 0.2) for i in range(8)]
+
+    start = time.perf_counter()
+    results = checker.check_integrations(integrations)
+
+    assert time.perf_counter() - start < 0.8
+    assert [result.health_status for result in results] == ["healthy"] * 8
+    db_session.commit.assert_called_once()
+
+
+def test_concurrency_is_bounded(db_session):
+    """Test that no more probes than the concurrency limit run at once."""
+    checker = IntegrationHealthChecker(db_session, credential_encryptor=MagicMock(), concurrency=2)
+    checker.check_integrations([make_integration(i, 0.05) for i in range(6)])
+
+    assert SleepingAdapter.max_running == 2
+
+
+def test_hung_probe_times_out(db_session):
+    """Test that a probe is abandoned at its adapter's deadline."""
+    checker = IntegrationHealthChecker(db_session, credential_encryptor=MagicMock(), concurrency=4)
+    integrations = [
+        make_integration(1, 0.05),
+        make_integration(2, 2.0, health_check_timeout=0.2),
+        make_integration(3, 0.05, success=False)
+    ]
+
+    start = time.perf_counter()
+    results = checker.check_integrations(integrations)
+
+    assert time.perf_counter() - start < 1.0
+    assert [result.health_status for result in results] == ["healthy", "failing", "failing"]
+    assert results[1].timed_out
+    assert "timed out" in results[1].message
+    assert integrations[1].health_status == "failing"
+
+
+def test_transitions_are_recorded(db_session):
+    """Test that only changes of health status are recorded as activities."""
+    checker = IntegrationHealthChecker(db_session, credential_encryptor=MagicMock(), degraded_seconds=0.1)
+    integrations = [
+        make_integration(1, 0.0, health_status="healthy"),
+        make_integration(2, 0.0, health_status="failing"),
+        make_integration(3, 0.2, health_status="healthy")
+    ]
+
+    results = checker.check_integrations(integrations)
+    summary = IntegrationHealthChecker.summarize(results)
+
+    activities = [call.args[0] for call in db_session.add.call_args_list]
+    assert all(isinstance(activity, IntegrationActivity) for activity in activities)
+    assert all(activity.activity_type == ActivityType.STATUS_CHANGED for activity in activities)
+    assert sorted(activity.integration_id for activity in activities) == [2, 3]
+    assert summary["transitions"] == 2
+    assert summary["degraded"] == 1
+    assert integrations[2].health_status == "degraded"
+
+
+def test_abandoned_probe_keeps_its_adapter(db_session):
+    """Test that an adapter is only released once its probe's thread finishes."""
+    registry = AdapterRegistry()
+    checker = IntegrationHealthChecker(db_session, credential_encryptor=MagicMock())
+    integrations = [make_integration(1, 0.5, health_check_timeout=0.05), make_integration(2, 0.0)]
+
+    with patch("modules.integration_management.services.health_checker.adapter_registry", registry):
+        checker.check_integrations(integrations)
+        registry.clear()
+
+        # The hung probe's thread still holds its evicted adapter
+        assert registry.stats()["borrowed"] == registry.stats()["retired"] == 1
+
+        deadline = time.monotonic() + 2
+        while registry.stats()["borrowed"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    assert registry.stats()["borrowed"] == registry.stats()["retired"] == 0
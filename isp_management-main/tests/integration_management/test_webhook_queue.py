@@ -0,0 +1,166 @@
+"""
+Tests for the Integration Management Module's webhook event queue.
+
+This module tests the WebhookEventQueue class against a SQLite database,
+which claims events with the conditional update fallback.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = str(Path(__file__).parent.parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from modules.integration_management.models.integration import WebhookEvent, ActivityStatus
+from modules.integration_management.services.integration_service import IntegrationService
+from modules.integration_management.services.webhook_queue import WebhookEventQueue
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Create a session factory for a database holding only the webhook events."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"timeout": 30})
+    WebhookEvent.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def add_events(session_factory):
+    """Insert pending webhook events, returning their IDs."""
+    def add(count):
+        db = session_factory()
+        events = [
+            WebhookEvent(endpoint_id=1, event_type="payment.succeeded", payload={"type": "payment.succeeded"},
+                         status=ActivityStatus.PENDING, processing_attempts=0,
+                         created_at=datetime.utcnow() + timedelta(microseconds=i))
+            for i in range(count)
+        ]
+        db.add_all(events)
+        db.commit()
+        ids = [event.id for event in events]
+        db.close()
+        return ids
+    return add
+
+
+def get_event(session_factory, event_id):
+    db = session_factory()
+    event = db.get(WebhookEvent, event_id)
+    db.close()
+    return event
+
+
+def test_claims_are_disjoint(session_factory, add_events):
+    """Test that claimed events cannot be claimed again."""
+    ids = add_events(5)
+    queue = WebhookEventQueue(session_factory=session_factory)
+    db = session_factory()
+
+    first_token, first = queue.claim(db, 3)
+    second_token, second = queue.claim(db, 3)
+    _, third = queue.claim(db, 3)
+    db.close()
+
+    assert first == ids[:3]
+    assert second == ids[3:]
+    assert third == []
+    assert first_token != second_token
+    event = get_event(session_factory, ids[0])
+    assert event.status == ActivityStatus.PROCESSING
+    assert event.claimed_by == first_token
+    assert event.processing_attempts == 1
+
+
+def test_expired_leases_are_reclaimed(session_factory, add_events):
+    """Test that events of a crashed worker return to the queue."""
+    ids = add_events(2)
+    queue = WebhookEventQueue(session_factory=session_factory, lease_seconds=-1, max_attempts=1)
+    db = session_factory()
+    queue.claim(db, 2)
+
+    # Second event still has attempts left
+    db.query(WebhookEvent).filter(WebhookEvent.id == ids[1]).update({"processing_attempts": 0})
+    db.commit()
+
+    assert queue.expire_leases(db) == 2
+    db.close()
+    assert get_event(session_factory, ids[0]).status == ActivityStatus.FAILURE
+    assert get_event(session_factory, ids[1]).status == ActivityStatus.PENDING
+
+
+def test_drain_dispatches_and_retries(session_factory, add_events):
+    """Test that draining processes every event, scheduling failures for retry."""
+    ids = add_events(10)
+    queue = WebhookEventQueue(session_factory=session_factory, batch_size=3, concurrency=4, retry_delay_seconds=60)
+
+    def dispatch(service, event):
+        if event.id == ids[0]:
+            raise ValueError("Adapter unavailable")
+        return {"handled": True}
+
+    with patch("modules.integration_management.services.integration_service.CredentialEncryptor"), \
+            patch.object(IntegrationService, "dispatch_webhook_event", autospec=True, side_effect=dispatch) as mock:
+        stats = queue.drain()
+
+    assert mock.call_count == 10
+    assert stats["claimed"] == 10
+    assert stats["succeeded"] == 9
+    assert stats["retried"] == 1
+
+    failed = get_event(session_factory, ids[0])
+    assert failed.status == ActivityStatus.PENDING
+    assert failed.error_message == "Adapter unavailable"
+    assert failed.lease_expires_at > datetime.utcnow()
+    assert get_event(session_factory, ids[1]).status == ActivityStatus.SUCCESS
+
+    # The failed event is not retried before its delay has passed
+    assert queue.drain()["claimed"] == 0
+
+
+def test_lost_lease_is_not_completed(session_factory, add_events):
+    """Test that a worker whose lease was taken over does not complete the event."""
+    ids = add_events(1)
+    queue = WebhookEventQueue(session_factory=session_factory)
+    db = session_factory()
+    token, _ = queue.claim(db, 1)
+
+    assert queue.complete(db, ids[0], "other-worker") is False
+    assert queue.complete(db, ids[0], token) is True
+    db.commit()
+    db.close()
+    assert get_event(session_factory, ids[0]).status == ActivityStatus.SUCCESS
+
+
+def test_handler_writes_are_committed_with_completion(session_factory, add_events):
+    """Test that database writes of a handler are kept only if the event is completed."""
+    ids = add_events(2)
+    queue = WebhookEventQueue(session_factory=session_factory)
+
+    def dispatch(service, event):
+        # Handlers write through the session of the service
+        service.db.add(WebhookEvent(endpoint_id=2, event_type=f"handled.{event.id}", payload={},
+                                    status=ActivityStatus.SUCCESS, processing_attempts=0))
+        return {"handled": True}
+
+    db = session_factory()
+    token, _ = queue.claim(db, 2)
+    db.close()
+
+    with patch("modules.integration_management.services.integration_service.CredentialEncryptor"), \
+            patch.object(IntegrationService, "dispatch_webhook_event", autospec=True, side_effect=dispatch):
+        assert queue.process(ids[0], token) == "succeeded"
+        assert queue.process(ids[1], "other-worker") == "lost"
+
+    db = session_factory()
+    handled = [event.event_type for event in db.query(WebhookEvent).filter(WebhookEvent.endpoint_id == 2)]
+    db.close()
+    assert handled == [f"handled.{ids[0]}"]
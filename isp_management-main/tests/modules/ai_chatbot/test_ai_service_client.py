@@ -0,0 +1,127 @@
+"""
+Tests for the AI Chatbot Integration Module's AIServiceClient and AIClientRegistry.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from unittest.mock import MagicMock
+from fastapi import HTTPException
+
+from modules.ai_chatbot.schemas.chatbot import AIModelRequest
+from modules.ai_chatbot.services.ai_service_client import AIClientRegistry, AIServiceClient
+
+
+@pytest.fixture
+def service_config():
+    """Mock AI service configuration."""
+    config = MagicMock()
+    config.service_name = "openai"
+    config.service_url = "https://ai.example.com/v1/query"
+    config.api_key = "key"
+    config.model_name = None
+    config.config_params = None
+    return config
+
+
+def make_client(handler, **kwargs):
+    registry = AIClientRegistry(transport=httpx.MockTransport(handler), **kwargs)
+    return AIServiceClient(MagicMock(), registry=registry)
+
+
+def make_request(query, tenant_id=1):
+    return AIModelRequest(query=query, tenant_id=tenant_id, user_id=1, context={"turn": 1})
+
+
+@pytest.mark.asyncio
+async def test_requests_are_limited_per_tenant(service_config):
+    """Test that a tenant cannot have more requests in flight than allowed."""
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"intent": "faq", "confidence": 0.9, "response": "ok"})
+
+    client = make_client(handler, tenant_concurrency=2)
+    await asyncio.gather(*(
+        client.process_query(make_request(f"question {i}"), service_config=service_config) for i in range(6)
+    ))
+
+    assert in_flight["peak"] == 2
+    assert len(client.registry._clients[asyncio.get_running_loop()]) == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_failures(service_config):
+    """Test that a failing AI service is no longer called once its circuit is open."""
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = make_client(handler, failure_threshold=2, recovery_time=60)
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await client.process_query(make_request("question"), service_config=service_config)
+        assert exc_info.value.status_code == 502
+
+    with pytest.raises(HTTPException) as exc_info:
+        await client.process_query(make_request("question"), service_config=service_config)
+
+    assert exc_info.value.status_code == 503
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_stays_closed_when_failures_are_not_consecutive(service_config):
+    """Test that a success resets the failures counted against the circuit."""
+    responses = iter([503, 200, 503, 200, 503])
+
+    async def handler(request):
+        return httpx.Response(next(responses), json={"intent": "faq", "response": "ok"})
+
+    client = make_client(handler, failure_threshold=2, recovery_time=60)
+    for expected in [502, None, 502, None, 502]:
+        if expected is None:
+            await client.process_query(make_request("question"), service_config=service_config)
+            continue
+        with pytest.raises(HTTPException) as exc_info:
+            await client.process_query(make_request("question"), service_config=service_config)
+        assert exc_info.value.status_code == expected
+
+    assert client.registry.circuit_breaker.is_service_available(
+        client.registry.get_endpoint_key(service_config.service_url)
+    )
+    assert client.registry.circuit_breaker.redis is None
+
+
+@pytest.mark.asyncio
+async def test_stream_query(service_config):
+    """Test that streamed server-sent events are parsed into chunks."""
+    async def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=(
+            b'data: {"response": "Your bill "}\n\n'
+            b'data: {"response": "is due on the 5th"}\n\n'
+            b'data: {"intent": "billing_due_date", "confidence": 0.9}\n\n'
+            b'data: [DONE]\n\n'
+        ))
+
+    client = make_client(handler)
+    chunks = [chunk async for chunk in client.stream_query(make_request("when is my bill due"), service_config=service_config)]
+
+    assert "".join(chunk.get("response", "") for chunk in chunks) == "Your bill is due on the 5th"
+    assert chunks[-1]["intent"] == "billing_due_date"
@@ -0,0 +1,70 @@
+"""
+Tests for the AI Chatbot Integration Module's ChatbotCache.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from modules.ai_chatbot.models.chatbot import AIServiceConfig
+from modules.ai_chatbot.schemas.chatbot import AIModelRequest, AIModelResponse
+from modules.ai_chatbot.utils.cache import ChatbotCache, normalize_query
+
+
+@pytest.fixture
+def cache():
+    """Create a cache keeping responses in memory."""
+    return ChatbotCache(redis=None)
+
+
+def make_request(query, tenant_id=1, context=None):
+    return AIModelRequest(query=query, tenant_id=tenant_id, user_id=1, context=context)
+
+
+def make_response(intent="billing_due_date", confidence=0.95):
+    return AIModelResponse(intent=intent, confidence=confidence, response="Your bill is due on the 5th")
+
+
+def test_normalize_query():
+    """Test that case, punctuation and whitespace do not change the cache key."""
+    assert normalize_query("  What is my   balance due date?? ") == "what is my balance due date"
+
+
+def test_service_config_is_cached_per_tenant(cache):
+    """Test that configurations are cached per tenant and dropped on invalidation."""
+    config = AIServiceConfig(id=1, tenant_id=1, service_name="openai", service_url="https://ai.example.com",
+                             api_key="key", is_active=True, config_params={"parameters": {"temperature": 0}})
+
+    cached = cache.set_service_config(1, None, config)
+
+    assert cached is not config
+    assert cache.get_service_config(1, None) is cached
+    assert cache.get_service_config(2, None) is None
+
+    cache.invalidate_tenant(1)
+    assert cache.get_service_config(1, None) is None
+
+
+def test_response_is_cached_per_tenant(cache):
+    """Test that responses are shared by equivalent queries of the same tenant only."""
+    assert cache.set_response(make_request("What is my balance due date?"), "openai", make_response())
+
+    cached = cache.get_response(make_request("what is my balance due date"), "openai")
+    assert cached.intent == "billing_due_date"
+    assert cache.get_response(make_request("what is my balance due date", tenant_id=2), "openai") is None
+
+    cache.invalidate_tenant(1)
+    assert cache.get_response(make_request("what is my balance due date"), "openai") is None
+
+
+def test_uncacheable_responses(cache):
+    """Test that uncertain, unknown and context-dependent responses are not cached."""
+    assert not cache.set_response(make_request("hello"), "openai", make_response(intent="unknown"))
+    assert not cache.set_response(make_request("hello"), "openai", make_response(confidence=0.3))
+    assert not cache.set_response(make_request("hello", context={"invoice_id": 7}), "openai", make_response())
+    assert cache.get_response(make_request("hello"), "openai") is None
@@ -0,0 +1,183 @@
+"""
+Tests for the accounts receivable aging service of the Billing module.
+
+The report and its snapshot are tested on copies of the invoice, payment
+and balance tables in an in-memory database. Invoices and payments are
+flushed through stand-in mapped classes, since the listener recognizes
+them by their tables.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from modules.billing.services import ar_aging_service
+from modules.billing.services.ar_aging_service import ARAgingService, setup_ar_aging_snapshot
+
+NOW = datetime(2024, 6, 30, 12, 0)
+
+metadata = MetaData()
+Table("users", metadata, Column("id", Integer, primary_key=True))
+INVOICES = ar_aging_service.invoice_table.to_metadata(metadata)
+PAYMENTS = ar_aging_service.payment_table.to_metadata(metadata)
+BALANCES = ar_aging_service.balance_table.to_metadata(metadata)
+
+Base = declarative_base(metadata=metadata)
+
+
+class InvoiceRecord(Base):
+    __table__ = INVOICES
+
+
+class PaymentRecord(Base):
+    __table__ = PAYMENTS
+
+
+@pytest.fixture
+def session_factory():
+    """Create an in-memory database whose sessions keep the snapshot."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    setup_ar_aging_snapshot(factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_invoice(db, due_date, amount="100.00", status="unpaid"):
+    invoice = InvoiceRecord(
+        user_id=1, invoice_number=f"INV-{len(db.execute(select(INVOICES.c.id)).all()) + 1}", subtotal=Decimal(amount),
+        amount=Decimal(amount), status=status, due_date=due_date
+    )
+    db.add(invoice)
+    db.flush()
+    return invoice
+
+
+def pay(db, invoice, amount, status="completed"):
+    reference = f"PAY-{len(db.execute(select(PAYMENTS.c.id)).all()) + 1}"
+    payment = PaymentRecord(
+        invoice_id=invoice.id, user_id=1, amount=Decimal(amount), status=status,
+        payment_method="cash", payment_reference=reference
+    )
+    db.add(payment)
+    db.flush()
+    return payment
+
+
+def snapshot_rows(db):
+    return {
+        row.due_date: (Decimal(row.outstanding_amount), row.invoice_count)
+        for row in db.execute(select(BALANCES)).all()
+        if row.invoice_count
+    }
+
+
+def bucket_counts(report):
+    return {name: bucket["count"] for name, bucket in report["buckets"].items()}
+
+
+def test_invoices_are_bucketed_by_half_open_ranges(db):
+    add_invoice(db, NOW - timedelta(days=30))
+    add_invoice(db, NOW - timedelta(days=30, seconds=1))
+    add_invoice(db, NOW - timedelta(days=60))
+    add_invoice(db, NOW - timedelta(days=90))
+    add_invoice(db, NOW - timedelta(days=90, seconds=1))
+    add_invoice(db, NOW + timedelta(days=1))
+    db.commit()
+
+    report = ARAgingService(db).get_aging(use_snapshot=False, as_of=NOW)
+
+    assert bucket_counts(report) == {"current": 1, "30_60_days": 2, "60_90_days": 1, "over_90_days": 1}
+    assert report["total_outstanding"] == 500.0
+
+
+def test_outstanding_amount_counts_completed_payments_only(db):
+    partly_paid = add_invoice(db, NOW - timedelta(days=5))
+    pay(db, partly_paid, "30.00")
+    pay(db, partly_paid, "50.00", status="pending")
+    fully_paid = add_invoice(db, NOW - timedelta(days=5))
+    pay(db, fully_paid, "100.00")
+    add_invoice(db, NOW - timedelta(days=5), status="paid")
+    db.commit()
+
+    report = ARAgingService(db).get_aging(use_snapshot=False, as_of=NOW)
+
+    assert report["buckets"]["current"] == {"amount": 70.0, "count": 1}
+    assert report["total_outstanding"] == 70.0
+
+
+def test_flushes_apply_balance_deltas(db):
+    due = datetime(2024, 5, 1)
+    later = datetime(2024, 5, 20)
+    first = add_invoice(db, due)
+    second = add_invoice(db, due, amount="40.00")
+    db.commit()
+    assert snapshot_rows(db) == {date(2024, 5, 1): (Decimal("140.00"), 2)}
+
+    # A completed payment reduces the balance of its invoice's due date
+    pay(db, first, "25.00")
+    db.commit()
+    assert snapshot_rows(db) == {date(2024, 5, 1): (Decimal("115.00"), 2)}
+
+    # Paying the rest removes the invoice from the balance
+    payment = pay(db, second, "10.00", status="pending")
+    payment.status = "completed"
+    payment.amount = Decimal("40.00")
+    db.commit()
+    assert snapshot_rows(db) == {date(2024, 5, 1): (Decimal("75.00"), 1)}
+
+    # Moving the due date moves the balance
+    first.due_date = later
+    db.commit()
+    assert snapshot_rows(db) == {date(2024, 5, 20): (Decimal("75.00"), 1)}
+
+    # Deleting the payment restores the outstanding amount
+    db.delete(db.execute(select(PaymentRecord).where(PaymentRecord.invoice_id == first.id)).scalar_one())
+    db.commit()
+    assert snapshot_rows(db) == {date(2024, 5, 20): (Decimal("100.00"), 1)}
+
+    db.delete(first)
+    db.commit()
+    assert snapshot_rows(db) == {}
+
+
+def test_rolled_back_flush_leaves_snapshot_unchanged(db):
+    invoice = add_invoice(db, datetime(2024, 5, 1))
+    db.commit()
+
+    pay(db, invoice, "60.00")
+    db.rollback()
+
+    assert snapshot_rows(db) == {date(2024, 5, 1): (Decimal("100.00"), 1)}
+
+
+def test_snapshot_report_matches_live_report(db):
+    for days, amount in [(1, "10.00"), (31, "20.00"), (45, "30.00"), (75, "40.00"), (200, "50.00")]:
+        invoice = add_invoice(db, datetime(2024, 6, 30) - timedelta(days=days), amount=amount)
+        pay(db, invoice, "5.00")
+    db.commit()
+
+    service = ARAgingService(db)
+    live = service.get_aging(use_snapshot=False, as_of=NOW)
+    maintained = service.get_aging(use_snapshot=True, as_of=NOW)
+    assert maintained == live
+
+    rows = snapshot_rows(db)
+    assert service.rebuild_snapshot() == 5
+    assert snapshot_rows(db) == rows
+    assert service.get_aging(use_snapshot=True, as_of=NOW) == live
@@ -0,0 +1,311 @@
+"""
+Tests for the billing run service of the Billing module.
+
+Runs are tested on the billing run, profile and subscription tables in an
+in-memory database, with the billing of a single profile stubbed out.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, event, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from modules.billing.models import BillingRunStatus
+from modules.billing.services import billing_run_service
+from modules.billing.services.billing_run_service import BillingRunService, get_idempotency_key
+
+
+@pytest.fixture
+def db():
+    """Create an in-memory database with copies of the billing run tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite only supports savepoints when it leaves transactions to SQLAlchemy
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    metadata = MetaData()
+    for name in ("users", "service_plans", "discounts", "payment_methods", "invoices"):
+        Table(name, metadata, Column("id", Integer, primary_key=True))
+    for table in (RUNS, CHUNKS, CHARGES, PROFILES, SUBSCRIPTIONS):
+        table.to_metadata(metadata)
+    metadata.create_all(engine)
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+RUNS = billing_run_service.runs_table
+CHUNKS = billing_run_service.chunks_table
+CHARGES = billing_run_service.charges_table
+PROFILES = billing_run_service.profiles_table
+SUBSCRIPTIONS = billing_run_service.subscriptions_table
+
+NOW = datetime(2024, 3, 1, 12, 0)
+
+
+def add_profiles(db, count, next_billing_date=NOW - timedelta(days=1), **subscription_overrides):
+    """Add profiles with their subscriptions, returning the profile IDs."""
+    first_id = (db.execute(select(func.max(PROFILES.c.id))).scalar() or 0) + 1
+    ids = list(range(first_id, first_id + count))
+    for profile_id in ids:
+        db.execute(insert(SUBSCRIPTIONS).values(
+            id=profile_id,
+            user_id=profile_id,
+            plan_id=1,
+            status=subscription_overrides.get("status", "active"),
+            subscription_period="monthly",
+            start_date=NOW - timedelta(days=60),
+            auto_renew=subscription_overrides.get("auto_renew", True),
+            price=10,
+            created_at=NOW,
+            updated_at=NOW,
+        ))
+        db.execute(insert(PROFILES).values(
+            id=profile_id,
+            subscription_id=profile_id,
+            next_billing_date=next_billing_date,
+            is_active=True,
+            billing_failures=0,
+            created_at=NOW,
+            updated_at=NOW,
+        ))
+    db.commit()
+    return ids
+
+
+def make_service(db, advance=True, fail_profiles=(), **kwargs):
+    """Create a service whose profiles are billed by a stub."""
+    service = BillingRunService(db, **kwargs)
+
+    def bill_profile(profile_id, now, commit=True):
+        if profile_id in fail_profiles:
+            raise RuntimeError(f"cannot bill {profile_id}")
+        if advance:
+            db.execute(
+                update(PROFILES)
+                .where(PROFILES.c.id == profile_id)
+                .values(next_billing_date=PROFILES.c.next_billing_date + timedelta(days=30))
+            )
+        return {"profile_id": profile_id, "invoice_id": 1000 + profile_id}
+
+    service.subscription_service = MagicMock()
+    service.subscription_service.bill_profile.side_effect = bill_profile
+    return service
+
+
+def billed_profile_ids(service):
+    return [call.args[0] for call in service.subscription_service.bill_profile.call_args_list]
+
+
+def test_start_run_partitions_due_profiles_into_chunks(db):
+    add_profiles(db, 7)
+    add_profiles(db, 2, next_billing_date=NOW + timedelta(days=5))
+    service = make_service(db, chunk_size=3)
+
+    run_id = service.start_run(NOW)
+
+    chunks = db.execute(select(CHUNKS).order_by(CHUNKS.c.chunk_index)).all()
+    assert [(c.first_profile_id, c.last_profile_id, c.profile_count) for c in chunks] == [
+        (1, 3, 3), (4, 6, 3), (7, 7, 1)
+    ]
+    progress = service.get_run_progress(run_id)
+    assert progress["status"] == BillingRunStatus.RUNNING
+    assert progress["total_profiles"] == 7
+    assert progress["total_chunks"] == 3
+
+
+def test_due_profiles_require_active_auto_renewing_subscription(db):
+    due = add_profiles(db, 2)
+    add_profiles(db, 1, status="cancelled")
+    add_profiles(db, 1, auto_renew=False)
+    service = make_service(db)
+
+    run_id = service.start_run(NOW)
+
+    assert service.get_run_progress(run_id)["total_profiles"] == len(due)
+
+
+def test_start_run_without_due_profiles_completes(db):
+    service = make_service(db)
+
+    run_id = service.start_run(NOW)
+
+    assert service.get_run_progress(run_id)["status"] == BillingRunStatus.COMPLETED
+    assert service.get_pending_chunk_ids(run_id) == []
+
+
+def test_process_chunks_bills_and_checkpoints_run(db):
+    add_profiles(db, 5)
+    service = make_service(db, chunk_size=2)
+    run_id = service.start_run(NOW)
+
+    for chunk_id in service.get_pending_chunk_ids(run_id):
+        result = service.process_chunk(chunk_id)
+        assert result["status"] == "completed"
+
+    assert billed_profile_ids(service) == [1, 2, 3, 4, 5]
+    progress = service.get_run_progress(run_id)
+    assert progress["status"] == BillingRunStatus.COMPLETED
+    assert progress["completed_chunks"] == 3
+    assert progress["invoiced"] == 5
+    charges = db.execute(select(CHARGES.c.profile_id, CHARGES.c.invoice_id).order_by(CHARGES.c.profile_id)).all()
+    assert [tuple(charge) for charge in charges] == [(i, 1000 + i) for i in range(1, 6)]
+    assert service.get_pending_chunk_ids(run_id) == []
+
+
+def test_completed_chunk_is_not_claimed_again(db):
+    add_profiles(db, 2)
+    service = make_service(db)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    service.process_chunk(chunk_id)
+
+    assert service.process_chunk(chunk_id)["status"] == "skipped"
+    assert len(billed_profile_ids(service)) == 2
+
+
+def test_retried_chunk_does_not_bill_charged_profiles_again(db):
+    add_profiles(db, 3)
+    service = make_service(db, advance=False)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    service.process_chunk(chunk_id)
+
+    # The worker committed but its checkpoint was lost, so the chunk runs again
+    db.execute(update(CHUNKS).where(CHUNKS.c.id == chunk_id).values(status=BillingRunStatus.PENDING))
+    db.commit()
+    result = service.process_chunk(chunk_id)
+
+    assert result["skipped"] == 3
+    assert {r["reason"] for r in result["results"]} == {"already billed"}
+    assert billed_profile_ids(service) == [1, 2, 3]
+    assert db.execute(select(func.count()).select_from(CHARGES)).scalar() == 3
+
+
+def test_failed_profile_does_not_fail_chunk(db):
+    add_profiles(db, 3)
+    service = make_service(db, fail_profiles={2})
+    run_id = service.start_run(NOW)
+
+    result = service.process_chunk(service.get_pending_chunk_ids(run_id)[0])
+
+    assert result["status"] == "completed"
+    assert (result["invoiced"], result["failed"]) == (2, 1)
+    failed = [r for r in result["results"] if r["status"] == "failed"]
+    assert failed == [{"profile_id": 2, "error": "cannot bill 2", "status": "failed"}]
+    # The failed profile's charge was rolled back with its savepoint
+    assert db.execute(select(CHARGES.c.profile_id).order_by(CHARGES.c.profile_id)).scalars().all() == [1, 3]
+
+
+def test_failed_chunk_is_retried_until_out_of_attempts(db):
+    add_profiles(db, 2)
+    service = make_service(db, max_attempts=2)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    service._bill_profile = MagicMock(side_effect=RuntimeError("database went away"))
+
+    with pytest.raises(RuntimeError):
+        service.process_chunk(chunk_id)
+    chunk = db.execute(select(CHUNKS).where(CHUNKS.c.id == chunk_id)).one()
+    assert (chunk.status, chunk.attempts) == (BillingRunStatus.FAILED, 1)
+    assert service.get_pending_chunk_ids(run_id) == [chunk_id]
+    assert service.get_run_progress(run_id)["status"] == BillingRunStatus.RUNNING
+
+    with pytest.raises(RuntimeError):
+        service.process_chunk(chunk_id)
+    assert service.get_pending_chunk_ids(run_id) == []
+    progress = service.get_run_progress(run_id)
+    assert progress["status"] == BillingRunStatus.FAILED
+    assert "after 2 attempts" in progress["error_message"]
+
+
+def test_resume_run_retries_failed_chunks(db):
+    add_profiles(db, 2)
+    service = make_service(db, max_attempts=1)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    bill_profile = service._bill_profile
+    service._bill_profile = MagicMock(side_effect=RuntimeError("database went away"))
+    with pytest.raises(RuntimeError):
+        service.process_chunk(chunk_id)
+    assert service.get_run_progress(run_id)["status"] == BillingRunStatus.FAILED
+
+    service._bill_profile = bill_profile
+    service.resume_run(run_id)
+    assert service.process_chunk(chunk_id)["status"] == "completed"
+
+    assert service.get_run_progress(run_id)["status"] == BillingRunStatus.COMPLETED
+    assert billed_profile_ids(service) == [1, 2]
+
+
+def test_expired_lease_is_claimed_again(db):
+    add_profiles(db, 1)
+    service = make_service(db)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    assert service.claim_chunk(chunk_id) == 1
+    assert service.claim_chunk(chunk_id) is None
+
+    db.execute(update(CHUNKS).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    assert service.claim_chunk(chunk_id) == 2
+
+
+def test_expired_lease_without_attempts_left_fails_run(db):
+    add_profiles(db, 1)
+    service = make_service(db, max_attempts=1)
+    run_id = service.start_run(NOW)
+    chunk_id = service.get_pending_chunk_ids(run_id)[0]
+    assert service.claim_chunk(chunk_id) == 1
+    db.execute(update(CHUNKS).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+    assert service.claim_chunk(chunk_id) is None
+    assert service.get_pending_chunk_ids(run_id) == []
+    assert service.fail_abandoned_chunks(run_id) == 1
+    assert service.get_run_progress(run_id)["status"] == BillingRunStatus.FAILED
+
+
+def test_start_run_does_not_resume_failed_run(db):
+    add_profiles(db, 1)
+    service = make_service(db, max_attempts=1)
+    failed_run_id = service.start_run(NOW)
+    bill_profile = service._bill_profile
+    service._bill_profile = MagicMock(side_effect=RuntimeError("database went away"))
+    with pytest.raises(RuntimeError):
+        service.process_chunk(service.get_pending_chunk_ids(failed_run_id)[0])
+    service._bill_profile = bill_profile
+
+    # A profile that fell due after the failed run
+    add_profiles(db, 1, next_billing_date=NOW + timedelta(days=1))
+    run_id = service.start_run(NOW + timedelta(days=1))
+
+    assert run_id != failed_run_id
+    assert service.get_run_progress(failed_run_id)["status"] == BillingRunStatus.FAILED
+    assert service.get_run_progress(run_id)["total_profiles"] == 2
+    for chunk_id in service.get_pending_chunk_ids(run_id):
+        service.process_chunk(chunk_id)
+    assert billed_profile_ids(service) == [1, 2]
+    assert service.get_unfinished_run_ids() == []
+
+
+def test_idempotency_key_identifies_profile_and_period():
+    period_start = datetime(2024, 3, 1)
+
+    assert get_idempotency_key(7, period_start) == "recurring:7:2024-03-01T00:00:00"
+    assert get_idempotency_key(7, period_start) != get_idempotency_key(7, period_start + timedelta(days=30))
@@ -0,0 +1,270 @@
+"""
+Tests for the columnar transformation engine of the Business Intelligence module.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from modules.business_intelligence.utils.columnar import (
+    ColumnarTransformEngine,
+    CompiledConditions,
+    push_down_sql,
+)
+
+COLUMNS = ["id", "customer_id", "plan", "amount", "status"]
+
+
+@pytest.fixture
+def engine():
+    """Create a columnar transformation engine."""
+    return ColumnarTransformEngine()
+
+
+@pytest.fixture
+def rows():
+    """Sample invoice rows."""
+    return [
+        {"id": 1, "customer_id": 10, "plan": "fiber-100", "amount": 50.0, "status": "paid"},
+        {"id": 2, "customer_id": 11, "plan": "fiber-500", "amount": 90.0, "status": "overdue"},
+        {"id": 3, "customer_id": 10, "plan": "fiber-100", "amount": 50.0, "status": "paid"},
+        {"id": 4, "customer_id": 12, "plan": "dsl-20", "amount": 20.0, "status": None},
+    ]
+
+
+class TestColumnarTransformEngine:
+    """Tests for the ColumnarTransformEngine class."""
+
+    def test_filter_with_parameters(self, engine, rows):
+        """Test filtering with compiled conditions and parameter references."""
+        result = engine.apply(rows, [{
+            "type": "filter",
+            "conditions": [
+                {"field": "amount", "operator": "gte", "value": ":min_amount"},
+                {"field": "plan", "operator": "starts_with", "value": "fiber"},
+            ],
+        }], parameters={"min_amount": 60})
+
+        assert [row["id"] for row in result] == [2]
+
+    def test_string_operators_ignore_non_strings(self, rows):
+        """Test that string operators never match missing or non-string values."""
+        import pandas as pd
+
+        conditions = CompiledConditions([{"field": "status", "operator": "contains", "value": "a"}])
+        mask = conditions.mask(pd.DataFrame.from_records(rows))
+        assert list(mask) == [True, False, True, False]
+
+    def test_sort_and_limit(self, engine, rows):
+        """Test stable sorting followed by a limit."""
+        result = engine.apply(rows, [
+            {"type": "sort", "sort_by": "amount", "reverse": True},
+            {"type": "limit", "limit": 3},
+        ])
+
+        assert [row["id"] for row in result] == [2, 1, 3]
+
+    def test_group_returns_lists_per_key(self, engine, rows):
+        """Test that a trailing group step returns lists keyed by group value."""
+        result = engine.apply(rows, [{"type": "group", "group_by": "customer_id"}])
+
+        assert set(result.keys()) == {10, 11, 12}
+        assert [row["id"] for row in result[10]] == [1, 3]
+
+    def test_group_then_aggregate(self, engine, rows):
+        """Test aggregating the groups produced by a group step."""
+        result = engine.apply(rows, [
+            {"type": "group", "group_by": "plan"},
+            {"type": "aggregate", "aggregations": [
+                {"field": "amount", "function": "sum", "alias": "revenue"},
+                {"function": "count", "alias": "invoices"},
+            ]},
+        ])
+
+        by_plan = {row["plan"]: row for row in result}
+        assert by_plan["fiber-100"]["revenue"] == 100.0
+        assert by_plan["fiber-100"]["invoices"] == 2
+        assert by_plan["dsl-20"]["invoices"] == 1
+
+    def test_aggregate_without_groups(self, engine, rows):
+        """Test aggregating the whole dataset into a single row."""
+        result = engine.apply(rows, [{"type": "aggregate", "aggregations": [
+            {"field": "amount", "function": "avg", "alias": "average"},
+            {"field": "customer_id", "function": "count_distinct", "alias": "customers"},
+        ]}])
+
+        assert result == [{"average": 52.5, "customers": 3}]
+
+    def test_join_with_other_dataset(self, engine, rows):
+        """Test joining with the result of another query."""
+        customers = [{"customer_id": 10, "name": "Acme"}, {"customer_id": 11, "name": "Globex"}]
+        result = engine.apply(rows, [
+            {"type": "join", "source": "customers", "on": "customer_id", "how": "left"},
+            {"type": "map", "mappings": {"invoice": "id", "customer": "name"}},
+        ], datasets={"customers": customers})
+
+        assert result == [
+            {"invoice": 1, "customer": "Acme"},
+            {"invoice": 2, "customer": "Globex"},
+            {"invoice": 3, "customer": "Acme"},
+            {"invoice": 4, "customer": None},
+        ]
+
+    def test_flatten_grouped(self, engine, rows):
+        """Test flattening grouped data back to rows tagged with their group."""
+        result = engine.apply(rows, [
+            {"type": "group", "group_by": "status"},
+            {"type": "flatten"},
+        ])
+
+        assert len(result) == 4
+        assert all(row["_group"] == row["status"] for row in result)
+
+    def test_non_tabular_data_is_returned_unchanged(self, engine):
+        """Test that non-tabular data passes through."""
+        data = {"hits": {"total": 3}}
+        assert engine.apply(data, [{"type": "limit", "limit": 1}]) is data
+
+
+class TestSQLPushDown:
+    """Tests for pushing transformations into SQL queries."""
+
+    @staticmethod
+    def compile(statement, dialect=sqlite.dialect()):
+        return str(statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True}))
+
+    def test_pushes_leading_filter_sort_limit(self):
+        """Test that leading filter, sort and limit steps are pushed into SQL."""
+        transformations = [
+            {"type": "filter", "conditions": [{"field": "amount", "operator": "gt", "value": ":min"}]},
+            {"type": "sort", "sort_by": "amount", "reverse": True},
+            {"type": "limit", "limit": 2},
+            {"type": "map", "mappings": {"total": "amount"}},
+        ]
+        statement, remaining = push_down_sql("SELECT * FROM invoices;", transformations, {"min": 10}, COLUMNS)
+
+        sql = self.compile(statement)
+        assert "FROM (SELECT * FROM invoices) AS _bi_source" in sql
+        assert "WHERE _bi_source.amount > ?" in sql
+        assert "ORDER BY CASE WHEN (_bi_source.amount IS NULL)" in sql
+        assert "_bi_source.amount DESC" in sql
+        assert list(statement.compile().params.values())[0] == 10
+        assert remaining == transformations[3:]
+
+    def test_sql_is_rendered_for_dialect(self):
+        """Test that identifiers and clauses are rendered for each database."""
+        transformations = [
+            {"type": "filter", "conditions": [{"field": "userName", "operator": "in", "value": ["a", "b"]}]},
+            {"type": "sort", "sort_by": "userName", "reverse": False},
+            {"type": "limit", "limit": 5},
+        ]
+        statement, remaining = push_down_sql("SELECT * FROM users", transformations, columns=["id", "userName"])
+
+        postgres_sql = self.compile(statement, postgresql.dialect())
+        mysql_sql = self.compile(statement, mysql.dialect())
+        assert remaining == []
+        # Mixed-case identifiers are quoted, so they are not folded to lower case
+        assert '_bi_source."userName" IN' in postgres_sql
+        assert "_bi_source.`userName` IN" in mysql_sql
+        for sql in (postgres_sql, mysql_sql):
+            assert "NULLS" not in sql
+            assert "ESCAPE" not in sql
+            assert "LIMIT" in sql
+
+    def test_string_matching_is_left_to_engine(self):
+        """Test that contains, starts_with and ends_with filters are not pushed down."""
+        transformations = [
+            {"type": "sort", "sort_by": "id", "reverse": False},
+            {"type": "filter", "conditions": [{"field": "plan", "operator": "contains", "value": "Fiber"}]},
+        ]
+        statement, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=COLUMNS)
+
+        assert "LIKE" not in self.compile(statement)
+        assert remaining == transformations[1:]
+
+    def test_stops_at_filter_after_limit(self):
+        """Test that a filter following a limit is left to the engine."""
+        transformations = [
+            {"type": "limit", "limit": 5},
+            {"type": "filter", "conditions": [{"field": "amount", "operator": "eq", "value": 1}]},
+        ]
+        _, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=COLUMNS)
+
+        assert remaining == transformations[1:]
+
+    def test_rejects_unknown_identifiers(self):
+        """Test that conditions on names the query does not return are not pushed down."""
+        transformations = [{"type": "filter", "conditions": [
+            {"field": "amount; DROP TABLE invoices", "operator": "eq", "value": 1},
+        ]}]
+        statement, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=COLUMNS)
+
+        assert self.compile(statement) == "SELECT * FROM invoices"
+        assert remaining == transformations
+
+    def test_pushed_query_matches_engine(self, engine, rows):
+        """Test that the pushed-down query returns the same rows as the engine."""
+        rows = rows + [
+            {"id": 8, "customer_id": 12, "plan": "fiber-500", "amount": None, "status": "overdue"},
+            {"id": 9, "customer_id": None, "plan": "Fiber-100", "amount": None, "status": "paid"},
+        ]
+        database = create_engine("sqlite://")
+        with database.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE invoices (id INTEGER, "customerId" INTEGER, plan TEXT, amount REAL, status TEXT)'
+            ))
+            connection.execute(text(
+                "INSERT INTO invoices VALUES (:id, :customer_id, :plan, :amount, :status)"
+            ), rows)
+        rows = [{**row, "customerId": row.pop("customer_id")} for row in rows]
+        transformations = [
+            {"type": "filter", "conditions": [{"field": "status", "operator": "in", "value": ["paid", "overdue"]}]},
+            {"type": "sort", "sort_by": "customerId", "reverse": True},
+            {"type": "sort", "sort_by": "amount", "reverse": False},
+            {"type": "filter", "conditions": [{"field": "plan", "operator": "contains", "value": "fiber"}]},
+        ]
+        columns = ["id", "customerId", "plan", "amount", "status"]
+
+        statement, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=columns)
+        with database.connect() as connection:
+            fetched = [dict(row) for row in connection.execute(statement).mappings()]
+        pushed = [row["id"] for row in engine.apply(fetched, remaining)]
+        expected = [row["id"] for row in engine.apply(rows, transformations)]
+
+        # The string filter stays case-sensitive in the engine
+        assert remaining == transformations[3:]
+        assert 9 not in pushed
+        assert pushed[-1] == 8
+        assert pushed == expected
+
+    def test_steps_on_unknown_columns_are_not_pushed(self):
+        """Test that filters and sorts on columns the query may not return are left to the engine."""
+        transformations = [
+            {"type": "sort", "sort_by": "region", "reverse": False},
+            {"type": "limit", "limit": 2},
+        ]
+
+        statement, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=COLUMNS)
+        assert self.compile(statement) == "SELECT * FROM invoices"
+        assert remaining == transformations
+
+        # Without the columns of the query only limits are pushed down
+        filters = [{"type": "filter", "conditions": [{"field": "amount", "operator": "gt", "value": 1}]}]
+        _, remaining = push_down_sql("SELECT * FROM invoices", filters)
+        assert remaining == filters
+
+        statement, remaining = push_down_sql("SELECT * FROM invoices", [{"type": "limit", "limit": 3}])
+        assert remaining == []
+        assert "LIMIT" in self.compile(statement, postgresql.dialect())
+
+    def test_empty_limit_is_not_pushed(self, engine, rows):
+        """Test that a zero limit, which the engine ignores, does not limit the query."""
+        transformations = [{"type": "limit", "limit": 0}, {"type": "sort", "sort_by": "id", "reverse": True}]
+
+        statement, remaining = push_down_sql("SELECT * FROM invoices", transformations, columns=COLUMNS)
+
+        sql = self.compile(statement)
+        assert "LIMIT" not in sql
+        assert "_bi_source.id DESC" in sql
+        assert remaining == []
+        assert len(engine.apply(rows, transformations)) == len(rows)
@@ -0,0 +1,157 @@
+"""
+Tests for the data source connection registry of the Business Intelligence module.
+"""
+
+import asyncio
+import gc
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from modules.business_intelligence.utils.connection_registry import DataSourceConnectionRegistry
+
+
+def make_source(source_id, **details):
+    """Create a data source stand-in."""
+    return SimpleNamespace(id=source_id, connection_details=details)
+
+
+@pytest.fixture
+def registry():
+    """Create a registry and close it after the test."""
+    registry = DataSourceConnectionRegistry(max_sources=2, fetch_workers=4)
+    yield registry
+    asyncio.run(registry.close())
+
+
+class TestDataSourceConnectionRegistry:
+    """Tests for the DataSourceConnectionRegistry class."""
+
+    def test_engine_is_reused_per_data_source(self, registry, tmp_path):
+        """Test that repeated runs share one engine."""
+        source = make_source(1, connection_string=f"sqlite:///{tmp_path / 'a.db'}")
+
+        engine = registry.get_engine(source)
+        assert registry.get_engine(source) is engine
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+    def test_changed_connection_details_replace_engine(self, registry, tmp_path):
+        """Test that editing a data source replaces its engine."""
+        source = make_source(1, connection_string=f"sqlite:///{tmp_path / 'a.db'}")
+        engine = registry.get_engine(source)
+
+        source.connection_details = {"connection_string": f"sqlite:///{tmp_path / 'b.db'}"}
+        replaced = registry.get_engine(source)
+
+        assert replaced is not engine
+        assert str(replaced.url).endswith("b.db")
+
+    def test_least_recently_used_engine_is_evicted(self, registry, tmp_path):
+        """Test that the number of cached engines is bounded."""
+        sources = [make_source(i, connection_string=f"sqlite:///{tmp_path / f'{i}.db'}") for i in range(3)]
+        first = registry.get_engine(sources[0])
+        registry.get_engine(sources[1])
+        registry.get_engine(sources[2])
+
+        assert registry.get_engine(sources[0]) is not first
+
+    def test_missing_connection_string(self, registry):
+        """Test that a data source without a connection string is rejected."""
+        with pytest.raises(ValueError):
+            registry.get_engine(make_source(1))
+
+    def test_clients_are_cached_and_invalidated(self, registry):
+        """Test that clients are created once until the data source is invalidated."""
+        source = make_source(7, host="redis")
+        created = []
+
+        def factory():
+            created.append(object())
+            return created[-1]
+
+        client = registry.get_client("redis", source, factory)
+        assert registry.get_client("redis", source, factory) is client
+
+        registry.invalidate(7)
+        assert registry.get_client("redis", source, factory) is not client
+        assert len(created) == 2
+
+    def test_http_session_is_pooled_per_loop(self, registry):
+        """Test that API sources share a bounded session within an event loop."""
+        source = make_source(3, pool_size=4, pool_size_per_host=2)
+
+        async def get_sessions():
+            first = registry.get_http_session(source)
+            second = registry.get_http_session(source)
+            return first, second
+
+        first, second = asyncio.run(get_sessions())
+        assert first is second
+        assert first.connector.limit == 4
+        assert first.connector.limit_per_host == 2
+
+    def test_http_sessions_are_not_shared_between_loops(self, registry):
+        """Test that a new event loop never gets the session of a finished one."""
+        source = make_source(3)
+
+        async def get_session():
+            return registry.get_http_session(source)
+
+        first = asyncio.run(get_session())
+        second = asyncio.run(get_session())
+        assert second is not first
+
+        # The finished loop and its session are dropped
+        del first
+        gc.collect()
+        assert len(registry._sessions) == 1
+
+    def test_loop_sessions_are_closed(self, registry):
+        """Test that a loop's sessions are closed before the loop ends."""
+        source = make_source(3)
+
+        async def run():
+            session = registry.get_http_session(source)
+            await registry.close_loop_sessions()
+            return session
+
+        assert asyncio.run(run()).closed
+
+    def test_replaced_and_evicted_clients_are_closed(self, registry):
+        """Test that clients dropped from the cache are closed."""
+        closed = []
+
+        class Client:
+            def close(self):
+                closed.append(self)
+
+        source = make_source(1, host="a")
+        client = registry.get_client("redis", source, Client)
+        source.connection_details = {"host": "b"}
+        registry.get_client("redis", source, Client)
+        assert closed == [client]
+
+        registry.get_client("redis", make_source(2), Client)
+        registry.get_client("redis", make_source(3), Client)
+        assert len(closed) == 2
+
+    def test_blocking_calls_run_concurrently(self, registry):
+        """Test that blocking fetches do not serialize on the event loop."""
+        loop_thread = []
+
+        def slow_fetch():
+            loop_thread.append(threading.current_thread().name)
+            time.sleep(0.2)
+            return True
+
+        async def fetch_all():
+            return await asyncio.gather(*[registry.run_blocking(slow_fetch) for _ in range(4)])
+
+        started = time.perf_counter()
+        assert asyncio.run(fetch_all()) == [True] * 4
+        assert time.perf_counter() - started < 0.6
+        assert all(name.startswith("bi-fetch") for name in loop_thread)
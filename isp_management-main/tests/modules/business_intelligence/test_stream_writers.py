@@ -0,0 +1,138 @@
+"""
+Tests for the streaming report writers of the Business Intelligence module.
+"""
+
+import csv
+import json
+import os
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import create_engine, text
+
+from modules.business_intelligence.models.report import ReportFormat
+from modules.business_intelligence.utils import stream_writers
+from modules.business_intelligence.utils.stream_writers import (
+    StreamingReportPipeline,
+    supports_streaming,
+)
+
+COLUMNS = ["id", "customer", "amount"]
+
+
+def chunked(rows, size):
+    """Split rows into chunks of the given size."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+@pytest.fixture
+def rows():
+    """Sample invoice rows as tuples."""
+    return [(i, f"customer-{i % 7}", round(i * 1.5, 2)) for i in range(1, 26)]
+
+
+@pytest.fixture
+def outputs():
+    """Collect output files and remove them after the test."""
+    paths = []
+    yield paths
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class TestStreamingReportPipeline:
+    """Tests for the StreamingReportPipeline class."""
+
+    def test_single_pass_writes_every_format(self, rows, outputs):
+        """Test that each chunk is written to all formats in one pass."""
+        consumed = []
+
+        def chunks():
+            for chunk in chunked(rows, 10):
+                consumed.append(len(chunk))
+                yield chunk
+
+        pipeline = StreamingReportPipeline(
+            [ReportFormat.CSV, ReportFormat.JSONL, ReportFormat.EXCEL],
+            {"column_mappings": {"amount": "Amount"}},
+        )
+        files = dict(pipeline.run(COLUMNS, chunks()))
+        outputs.extend(files.values())
+
+        assert consumed == [10, 10, 5]
+        assert pipeline.rows_written == 25
+
+        with open(files[ReportFormat.CSV], newline="") as f:
+            csv_rows = list(csv.reader(f))
+        assert csv_rows[0] == ["id", "customer", "Amount"]
+        assert len(csv_rows) == 26
+
+        with open(files[ReportFormat.JSONL]) as f:
+            json_rows = [json.loads(line) for line in f]
+        assert json_rows[0] == {"id": 1, "customer": "customer-1", "Amount": 1.5}
+        assert len(json_rows) == 25
+
+        sheet = load_workbook(files[ReportFormat.EXCEL], read_only=True).active
+        excel_rows = list(sheet.iter_rows(values_only=True))
+        assert excel_rows[0] == ("id", "customer", "Amount")
+        assert excel_rows[-1] == (25, "customer-4", 37.5)
+
+    def test_excel_rolls_over_to_new_sheet(self, rows, outputs, monkeypatch):
+        """Test that a new sheet is started when the row limit is reached."""
+        monkeypatch.setattr(stream_writers, "EXCEL_MAX_ROWS", 11)
+
+        pipeline = StreamingReportPipeline(["excel"], {"sheets": [{"name": "Invoices"}]})
+        path = dict(pipeline.run(COLUMNS, chunked(rows, 4)))[ReportFormat.EXCEL]
+        outputs.append(path)
+
+        workbook = load_workbook(path, read_only=True)
+        assert workbook.sheetnames == ["Invoices", "Invoices (2)", "Invoices (3)"]
+        assert sum(len(list(workbook[name].iter_rows())) - 1 for name in workbook.sheetnames) == 25
+
+    def test_failure_removes_partial_outputs(self, rows):
+        """Test that partial files are discarded when the stream fails."""
+        pipeline = StreamingReportPipeline([ReportFormat.CSV, ReportFormat.JSONL])
+
+        def failing_chunks():
+            yield rows[:5]
+            raise RuntimeError("cursor lost")
+
+        with pytest.raises(RuntimeError):
+            pipeline.run(COLUMNS, failing_chunks())
+
+        for writer in pipeline.writers.values():
+            assert not os.path.exists(writer.output_path)
+
+    def test_rejects_non_streamable_formats(self):
+        """Test that formats without a streaming writer are rejected."""
+        assert supports_streaming(["csv", "jsonl", "excel"])
+        assert not supports_streaming(["csv", "pdf"])
+        assert not supports_streaming([])
+        assert not supports_streaming(["csv", "docx"])
+
+        with pytest.raises(ValueError):
+            StreamingReportPipeline([ReportFormat.PDF])
+
+    def test_streams_from_server_side_cursor(self, tmp_path, outputs):
+        """Test writing the partitions of a streaming SQL result."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'report.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE invoices (id INTEGER, customer TEXT, amount REAL)"))
+            conn.execute(
+                text("INSERT INTO invoices VALUES (:id, :customer, :amount)"),
+                [{"id": i, "customer": f"c{i}", "amount": float(i)} for i in range(1000)],
+            )
+
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=128).execute(
+                text("SELECT id, customer, amount FROM invoices ORDER BY id")
+            )
+            pipeline = StreamingReportPipeline([ReportFormat.CSV])
+            path = dict(pipeline.run(list(result.keys()), result.partitions(128)))[ReportFormat.CSV]
+            outputs.append(path)
+
+        with open(path, newline="") as f:
+            assert sum(1 for _ in f) == 1001
+        engine.dispose()
@@ -0,0 +1,222 @@
+"""
+Tests for campaign fan-out in the Communications module.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend_core.models import Customer, User
+from modules.communications.campaigns import (
+    CONTACT_COLUMNS, CampaignFanout, attach_recipients, deliver_campaign, recipient_contacts, recipient_ids
+)
+from modules.communications.external_services import (
+    EmailService, ExternalServiceFactory, SMSService, ThroughputLimiter, provider_pool
+)
+from modules.communications.models import ExternalService, notification_recipients
+
+USERS = User.__table__
+CUSTOMERS = Customer.__table__
+
+EMAIL_CONFIG = {
+    "api_key": "key",
+    "api_url": "https://mail.example.com/send",
+    "from_email": "noreply@example.com",
+    "from_name": "ISP",
+    "batch_size": 3,
+}
+
+
+@pytest.fixture
+def db():
+    """Create an in-memory database with users and notification recipients."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for table in (USERS, CUSTOMERS, notification_recipients, ExternalService.__table__):
+        table.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(insert(USERS), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+         "hashed_password": "x", "is_active": i != 4}
+        for i in range(1, 8)
+    ])
+    session.execute(insert(CUSTOMERS), [
+        {"id": i, "user_id": i, "full_name": f"User {i}", "email": f"user{i}@example.com",
+         "phone": f"+1555000000{i}" if i != 6 else None}
+        for i in range(1, 8)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def attached_ids(db, notification_id=1):
+    """Return the users linked to a notification."""
+    return sorted(db.execute(
+        select(notification_recipients.c.user_id)
+        .where(notification_recipients.c.notification_id == notification_id)
+    ).scalars())
+
+
+class TestRecipients:
+    """Tests for set-based recipient resolution."""
+
+    def test_attach_skips_unknown_and_duplicate_users(self, db):
+        """Test that only existing users are attached, once each."""
+        attached = attach_recipients(
+            db, notification_recipients, "notification_id", 1, [3, 1, 99, 3, 2, 5, 100], chunk_size=2
+        )
+        db.commit()
+
+        assert attached == [3, 1, 2, 5]
+        assert attached_ids(db) == [1, 2, 3, 5]
+
+    def test_contacts_of_active_recipients(self, db):
+        """Test that inactive users are not contacted."""
+        attach_recipients(db, notification_recipients, "notification_id", 1, [1, 4, 6])
+        db.commit()
+
+        contacts = recipient_contacts(db, notification_recipients, "notification_id", 1)
+
+        assert sorted(contacts) == ["user1@example.com", "user6@example.com"]
+
+    def test_sms_contacts_are_customer_phone_numbers(self, db):
+        """Test that SMS recipients are reached on their customer record's phone number."""
+        attach_recipients(db, notification_recipients, "notification_id", 1, [1, 4, 6, 7])
+        db.commit()
+
+        contacts = recipient_contacts(db, notification_recipients, "notification_id", 1, CONTACT_COLUMNS["sms"])
+
+        assert sorted(contacts) == ["+15550000001", "+15550000007"]
+
+    def test_recipient_ids_are_read_from_association(self, db):
+        """Test that recipient IDs are read without loading the users."""
+        attach_recipients(db, notification_recipients, "notification_id", 1, [5, 2, 3])
+        attach_recipients(db, notification_recipients, "notification_id", 2, [1])
+        db.commit()
+
+        assert recipient_ids(db, notification_recipients, "notification_id", 1) == [2, 3, 5]
+
+
+class TestCampaignFanout:
+    """Tests for the CampaignFanout class."""
+
+    def test_delivers_in_provider_batches(self):
+        """Test that recipients are sent in batches with progress reports."""
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(202, json={"accepted": True})
+
+        client = EmailService(EMAIL_CONFIG, transport=httpx.MockTransport(handler))
+        recipients = [f"user{i}@example.com" for i in range(7)]
+        reports = []
+
+        progress = asyncio.run(CampaignFanout(
+            concurrency=2, on_progress=lambda p: reports.append(p.processed)
+        ).deliver(client, recipients, "Hello", subject="Outage"))
+
+        assert sorted(len(r["personalizations"]) for r in requests) == [1, 3, 3]
+        assert all(r["subject"] == "Outage" for r in requests)
+        assert progress.as_dict()["sent"] == 7
+        assert progress.batches == 3
+        assert progress.processed == 7
+        assert len(reports) == 3 and max(reports) == 7
+
+    def test_failed_batches_do_not_stop_campaign(self):
+        """Test that rejected batches and recipients are counted as failed."""
+        def handler(request):
+            to = json.loads(request.content)["to"]
+            if "+3" in to:
+                return httpx.Response(503, text="busy")
+            return httpx.Response(200, json={"failed": to[:1]})
+
+        client = SMSService(
+            {"api_key": "k", "api_url": "https://sms.example.com", "sender_id": "ISP", "batch_size": 2},
+            transport=httpx.MockTransport(handler),
+        )
+
+        progress = asyncio.run(CampaignFanout().deliver(client, ["+1", "+2", "+3", "+4", "+5"], "Hi"))
+
+        assert (progress.sent, progress.failed) == (1, 4)
+        assert sorted(progress.failed_recipients) == ["+1", "+3", "+4", "+5"]
+
+    def test_deliver_campaign_uses_active_service(self, db, monkeypatch):
+        """Test delivery of a notification through the configured email service."""
+        db.execute(insert(ExternalService.__table__).values(
+            name="mail", service_type="email", config=EMAIL_CONFIG, is_active=True, created_by=1
+        ))
+        attach_recipients(db, notification_recipients, "notification_id", 1, [1, 2, 3, 4])
+        db.commit()
+
+        sent = []
+
+        def handler(request):
+            sent.extend(p["to"][0]["email"] for p in json.loads(request.content)["personalizations"])
+            return httpx.Response(200, json={})
+
+        monkeypatch.setattr(
+            ExternalServiceFactory, "create_client",
+            staticmethod(lambda service_type, config: EmailService(config, httpx.MockTransport(handler)))
+        )
+        progress = asyncio.run(deliver_campaign(
+            db, "email", notification_recipients, "notification_id", 1, "Body", subject="Title"
+        ))
+
+        assert progress.sent == 3
+        assert sorted(sent) == ["user1@example.com", "user2@example.com", "user3@example.com"]
+        assert asyncio.run(deliver_campaign(
+            db, "sms", notification_recipients, "notification_id", 1, "Body"
+        )) is None
+
+
+class TestThroughputLimiter:
+    """Tests for the ThroughputLimiter class."""
+
+    def test_batches_are_paced_to_rate(self):
+        """Test that messages beyond the burst wait for refills."""
+        now = [0.0]
+        limiter = ThroughputLimiter(rate=100, clock=lambda: now[0])
+
+        assert limiter.reserve(100) == 0.0
+        assert limiter.reserve(50) == pytest.approx(0.5)
+
+        now[0] = 2.0
+        assert limiter.reserve(100) == 0.0
+
+    def test_pooled_client_is_shared(self):
+        """Test that sends to one provider share an HTTP client."""
+        async def clients():
+            return provider_pool.get_client("EmailService:x"), provider_pool.get_client("EmailService:x")
+
+        first, second = asyncio.run(clients())
+        assert first is second
+
+    def test_pooled_clients_are_not_shared_between_loops(self):
+        """Test that a new event loop never gets the client of a finished one."""
+        async def client():
+            return provider_pool.get_client("EmailService:y")
+
+        first = asyncio.run(client())
+        second = asyncio.run(client())
+
+        assert second is not first
+        assert not any(loop.is_closed() for loop in provider_pool._clients.keys())
+
+    def test_pooled_clients_are_closed_with_their_loop(self):
+        """Test that aclose() closes the running loop's clients."""
+        async def run():
+            client = provider_pool.get_client("EmailService:z")
+            await provider_pool.aclose()
+            return client
+
+        assert asyncio.run(run()).is_closed
@@ -0,0 +1,118 @@
+"""
+Tests for the compiled template cache of the Communications module.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from modules.communications.models import Template
+from modules.communications.services.template_service import TemplateService
+from modules.communications.template_renderer import TemplateRenderer, TemplateSource
+
+UPDATED = datetime(2024, 1, 1, 12, 0)
+
+
+def make_source(template_id=1, updated_at=UPDATED, body="Dear {{ name }}, you owe {{ amount }}."):
+    """Create a template source."""
+    return TemplateSource(template_id, updated_at, "Invoice for {{ name }}", body)
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    """Create a renderer with a private bytecode cache."""
+    renderer = TemplateRenderer(cache_size=2, bytecode_cache_dir=str(tmp_path), workers=2, parallel_threshold=4)
+    yield renderer
+    renderer.shutdown()
+
+
+class TestTemplateRenderer:
+    """Tests for the TemplateRenderer class."""
+
+    def test_compiled_template_is_reused(self, renderer):
+        """Test that repeated renders compile the template once."""
+        first = renderer.render(make_source(), {"name": "Ada", "amount": 10})
+        second = renderer.render(make_source(), {"name": "Bob", "amount": 20})
+
+        assert first == {"subject": "Invoice for Ada", "body": "Dear Ada, you owe 10."}
+        assert second["body"] == "Dear Bob, you owe 20."
+        assert renderer.cache_info() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_updated_template_is_recompiled(self, renderer):
+        """Test that a newer updated_at never serves the old compilation."""
+        renderer.render(make_source(), {"name": "Ada", "amount": 1})
+        edited = make_source(updated_at=UPDATED + timedelta(minutes=1), body="Hi {{ name }}")
+
+        assert renderer.render(edited, {"name": "Ada"})["body"] == "Hi Ada"
+
+    def test_invalidate_and_lru_eviction(self, renderer):
+        """Test that invalidated and least recently used templates are dropped."""
+        for template_id in (1, 2, 3):
+            renderer.get_compiled(make_source(template_id))
+        assert renderer.cache_info()["size"] == 2
+
+        renderer.invalidate(3)
+        assert renderer.cache_info()["size"] == 1
+
+        renderer.get_compiled(make_source(1))
+        assert renderer.cache_info()["misses"] == 4
+
+    def test_bytecode_is_shared_between_renderers(self, renderer, tmp_path, monkeypatch):
+        """Test that another process can skip compilation through the bytecode cache."""
+        renderer.get_compiled(make_source())
+        other = TemplateRenderer(bytecode_cache_dir=str(tmp_path))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("template was compiled again")
+
+        monkeypatch.setattr(other.environment, "compile", fail)
+        assert other.render(make_source(), {"name": "Ada", "amount": 3})["body"] == "Dear Ada, you owe 3."
+
+    def test_batch_render_in_process_pool(self, renderer):
+        """Test that a large batch is rendered in order by worker processes."""
+        contexts = [{"name": f"user{i}", "amount": i} for i in range(25)]
+
+        rendered = asyncio.run(renderer.render_batch(make_source(), contexts, chunk_size=4))
+
+        assert [r["body"] for r in rendered] == [f"Dear user{i}, you owe {i}." for i in range(25)]
+
+
+class TestTemplateServiceRendering:
+    """Tests for rendering stored templates."""
+
+    @pytest.fixture
+    def db(self):
+        """Create an in-memory database with the templates table."""
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Template.__table__.create(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.execute(insert(Template.__table__).values(
+            id=1, name="invoice", subject="Invoice {{ number }}", body="Total: {{ total }}",
+            template_type="email", created_by=1, updated_at=UPDATED,
+        ))
+        session.commit()
+        yield session
+        session.close()
+
+    def test_render_stored_template(self, db):
+        """Test rendering single and batched contexts."""
+        rendered = asyncio.run(TemplateService.render_template(db, 1, {"number": 7, "total": "9.99"}))
+        batch = asyncio.run(TemplateService.render_templates(db, 1, [{"number": n, "total": n} for n in range(3)]))
+
+        assert rendered == {"subject": "Invoice 7", "body": "Total: 9.99"}
+        assert [r["subject"] for r in batch] == ["Invoice 0", "Invoice 1", "Invoice 2"]
+
+    def test_missing_template(self, db):
+        """Test that rendering an unknown template is rejected."""
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(TemplateService.render_template(db, 99, {}))
+        assert exc.value.status_code == 404
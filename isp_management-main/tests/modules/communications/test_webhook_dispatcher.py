@@ -0,0 +1,271 @@
+"""
+Tests for the webhook dispatcher of the Communications module.
+"""
+
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from modules.communications.models import Webhook, WebhookDeliveryStatus, WebhookLog, WebhookOutbox
+from modules.communications.webhook_dispatcher import (
+    WEBHOOK_CLAIM_LEASE_SECONDS, WebhookDispatcher, backoff_delay
+)
+
+
+@pytest.fixture
+def db():
+    """Create an in-memory database with the webhook tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for table in (Webhook.__table__, WebhookLog.__table__, WebhookOutbox.__table__):
+        table.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+WEBHOOKS = Webhook.__table__
+OUTBOX = WebhookOutbox.__table__
+LOGS = WebhookLog.__table__
+
+
+def add_webhook(db, url="https://hooks.example.com/a", **overrides):
+    """Create an active webhook."""
+    values = {
+        "name": "hook",
+        "url": url,
+        "events": ["message.created"],
+        "is_active": True,
+        "batch_delivery": False,
+        "created_by": 1,
+        **overrides,
+    }
+    webhook_id = db.execute(insert(WEBHOOKS).values(**values)).inserted_primary_key[0]
+    db.commit()
+    return db.execute(select(WEBHOOKS).where(WEBHOOKS.c.id == webhook_id)).one()
+
+
+def make_dispatcher(handler, **options):
+    """Create a dispatcher that sends requests to a handler."""
+    return WebhookDispatcher(http2=False, transport=httpx.MockTransport(handler), **options)
+
+
+def statuses(db):
+    """Return the status of every outbox entry."""
+    return list(db.execute(select(OUTBOX.c.status).order_by(OUTBOX.c.id)).scalars())
+
+
+def count_logs(db, *conditions):
+    """Count delivery logs matching the conditions."""
+    return db.execute(select(func.count()).select_from(LOGS).where(*conditions)).scalar()
+
+
+def set_next_attempt(db, when):
+    """Move the next attempt of every outbox entry."""
+    db.execute(update(OUTBOX).values(next_attempt_at=when))
+    db.commit()
+
+
+class TestWebhookDispatcher:
+    """Tests for the WebhookDispatcher class."""
+
+    def test_delivers_outbox_and_bulk_logs(self, db):
+        """Test that due events are delivered and logged."""
+        received = []
+
+        def handler(request):
+            received.append((request.headers["X-ISP-Event"], json.loads(request.content)))
+            return httpx.Response(200, text="ok")
+
+        first = add_webhook(db, secret="s3cret")
+        second = add_webhook(db, url="https://other.example.com/hook")
+        dispatcher = make_dispatcher(handler)
+        dispatcher.enqueue(db, [first, second], "message.created", {"message_id": 1})
+        db.commit()
+
+        stats = asyncio.run(dispatcher.dispatch_pending(db))
+
+        assert stats == {"delivered": 2, "retried": 0, "failed": 0}
+        assert [event for event, _ in received] == ["message.created"] * 2
+        assert received[0][1]["data"] == {"message_id": 1}
+        assert statuses(db) == [WebhookDeliveryStatus.DELIVERED] * 2
+        assert count_logs(db, LOGS.c.success == True) == 2
+
+    def test_batches_events_for_opted_in_webhooks(self, db):
+        """Test that batch-enabled webhooks receive grouped events."""
+        batches = []
+
+        def handler(request):
+            batches.append(json.loads(request.content))
+            return httpx.Response(204)
+
+        webhook = add_webhook(db, batch_delivery=True)
+        dispatcher = make_dispatcher(handler, batch_size=2)
+        for i in range(5):
+            dispatcher.enqueue(db, [webhook], "message.created", {"message_id": i})
+        db.commit()
+
+        asyncio.run(dispatcher.dispatch_pending(db))
+
+        assert [len(batch["events"]) for batch in batches] == [2, 2, 1]
+        assert [e["data"]["message_id"] for batch in batches for e in batch["events"]] == [0, 1, 2, 3, 4]
+        assert statuses(db) == [WebhookDeliveryStatus.DELIVERED] * 5
+        assert count_logs(db) == 3
+
+    def test_failed_delivery_is_retried_then_failed(self, db):
+        """Test backoff scheduling and giving up after the last attempt."""
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(lambda request: httpx.Response(503, text="busy"), max_attempts=2)
+        dispatcher.enqueue(db, [webhook], "message.created", {"message_id": 1})
+        db.commit()
+
+        assert asyncio.run(dispatcher.dispatch_pending(db))["retried"] == 1
+        entry = db.execute(select(OUTBOX)).one()
+        assert entry.status == WebhookDeliveryStatus.PENDING
+        assert entry.attempts == 1
+        assert entry.last_error.startswith("503")
+        assert entry.next_attempt_at >= entry.created_at
+
+        # Not due yet: nothing is claimed
+        set_next_attempt(db, datetime.utcnow() + timedelta(minutes=5))
+        assert asyncio.run(dispatcher.dispatch_pending(db)) == {"delivered": 0, "retried": 0, "failed": 0}
+
+        set_next_attempt(db, datetime.utcnow() - timedelta(seconds=1))
+        assert asyncio.run(dispatcher.dispatch_pending(db))["failed"] == 1
+        assert statuses(db) == [WebhookDeliveryStatus.FAILED]
+        assert count_logs(db, LOGS.c.success == False) == 2
+
+    def test_expired_claim_is_reclaimed(self, db):
+        """Test that entries left by a crashed worker are delivered again."""
+        webhook = add_webhook(db)
+        db.execute(insert(OUTBOX).values(
+            webhook_id=webhook.id,
+            event="message.created",
+            payload={"event": "message.created", "data": {}},
+            status=WebhookDeliveryStatus.DELIVERING,
+            attempts=0,
+            next_attempt_at=datetime.utcnow() - timedelta(seconds=1),
+        ))
+        db.commit()
+
+        dispatcher = make_dispatcher(lambda request: httpx.Response(200))
+        assert asyncio.run(dispatcher.dispatch_pending(db))["delivered"] == 1
+
+    def test_entry_that_never_completes_runs_out_of_attempts(self, db):
+        """Test that an entry whose deliveries never complete is failed after its last attempt."""
+        calls = []
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(lambda request: calls.append(request) or httpx.Response(200), max_attempts=2)
+        dispatcher.enqueue(db, [webhook], "message.created", {})
+        db.commit()
+
+        # Each claim counts as an attempt, even if the worker dies before the delivery completes
+        for attempts in (1, 2):
+            dispatcher._claim(db, 10)
+            assert db.execute(select(OUTBOX.c.attempts)).scalar() == attempts
+            set_next_attempt(db, datetime.utcnow() - timedelta(seconds=1))
+
+        assert asyncio.run(dispatcher.dispatch_pending(db))["failed"] == 1
+        assert statuses(db) == [WebhookDeliveryStatus.FAILED]
+        assert calls == []
+
+    def test_inactive_webhook_entries_fail_without_request(self, db):
+        """Test that events of deactivated webhooks are not sent."""
+        calls = []
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(lambda request: calls.append(request) or httpx.Response(200))
+        dispatcher.enqueue(db, [webhook], "message.created", {})
+        db.execute(update(WEBHOOKS).values(is_active=False))
+        db.commit()
+
+        assert asyncio.run(dispatcher.dispatch_pending(db))["failed"] == 1
+        assert calls == []
+
+    def test_per_host_concurrency_limit(self, db):
+        """Test that concurrent requests to one host are bounded."""
+        in_flight = {"current": 0, "peak": 0}
+
+        async def handler(request):
+            in_flight["current"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+            await asyncio.sleep(0.01)
+            in_flight["current"] -= 1
+            return httpx.Response(200)
+
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(handler, max_connections_per_host=3)
+        for i in range(12):
+            dispatcher.enqueue(db, [webhook], "message.created", {"message_id": i})
+        db.commit()
+
+        assert asyncio.run(dispatcher.dispatch_pending(db))["delivered"] == 12
+        assert in_flight["peak"] == 3
+
+    def test_client_is_closed_after_each_run(self, db):
+        """Test that every dispatch run closes its HTTP client."""
+        class ClosingTransport(httpx.MockTransport):
+            closed = 0
+
+            async def aclose(self):
+                ClosingTransport.closed += 1
+
+        webhook = add_webhook(db)
+        dispatcher = WebhookDispatcher(http2=False, transport=ClosingTransport(lambda request: httpx.Response(200)))
+        dispatcher.enqueue(db, [webhook], "message.created", {})
+        db.commit()
+
+        asyncio.run(dispatcher.dispatch_pending(db))
+        asyncio.run(dispatcher.drain(db))
+
+        assert ClosingTransport.closed == 2
+
+    def test_slow_delivery_times_out(self, db):
+        """Test that a request is bounded by the timeout as a whole."""
+        async def handler(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200)
+
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(handler, timeout=0.05)
+        dispatcher.enqueue(db, [webhook], "message.created", {})
+        db.commit()
+
+        assert asyncio.run(dispatcher.dispatch_pending(db))["retried"] == 1
+        assert db.execute(select(OUTBOX.c.last_error)).scalar().startswith("0: ")
+
+    def test_claim_lease_covers_slowest_delivery(self, db):
+        """Test that claims are leased for as long as delivering them can take."""
+        webhook = add_webhook(db)
+        dispatcher = make_dispatcher(lambda request: httpx.Response(200), max_connections_per_host=10, timeout=10)
+        dispatcher.enqueue(db, [webhook], "message.created", {})
+        db.commit()
+
+        # 500 requests to one host go out 10 at a time, each taking up to 10 seconds
+        assert dispatcher.claim_lease_seconds(500) == 500 + WEBHOOK_CLAIM_LEASE_SECONDS
+
+        before = datetime.utcnow()
+        dispatcher._claim(db, 500)
+        lease_end = db.execute(select(OUTBOX.c.next_attempt_at)).scalar()
+        assert lease_end >= before + timedelta(seconds=500 + WEBHOOK_CLAIM_LEASE_SECONDS)
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    """Test the equal-jitter exponential backoff."""
+    rng = random.Random(7)
+    delays = [backoff_delay(attempt, base=2, cap=60, rng=rng) for attempt in range(1, 10)]
+
+    assert all(
+        min(60, 2 * 2 ** (attempt - 1)) / 2 <= delay <= min(60, 2 * 2 ** (attempt - 1))
+        for attempt, delay in enumerate(delays, 1)
+    )
+    assert len(set(delays)) == len(delays)
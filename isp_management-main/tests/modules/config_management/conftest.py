@@ -26,6 +26,7 @@ from modules.config_management.services.encryption_service import EncryptionServ
 from modules.config_management.services.cache_service import CacheService
 from modules.config_management.services.elasticsearch_service import ConfigurationElasticsearchService
 from modules.config_management.services.configuration_service import ConfigurationService
+from modules.config_management.services.snapshot_service import ConfigurationSnapshotStore
 
 
 @pytest.fixture(scope="session")
@@ -76,11 +77,18 @@ def cache_service():
 
 
 @pytest.fixture
-def configuration_service(db_session, encryption_service, cache_service):
+def snapshot_store():
+    """Provide a private configuration snapshot store for testing."""
+    return ConfigurationSnapshotStore(poll_interval=0)
+
+
+@pytest.fixture
+def configuration_service(db_session, encryption_service, cache_service, snapshot_store):
     """Provide a configuration service for testing."""
     return ConfigurationService(db=db_session, 
                                encryption_service=encryption_service,
-                               cache_service=cache_service)
+                               cache_service=cache_service,
+                               snapshot_store=snapshot_store)
 
 
 @pytest.fixture
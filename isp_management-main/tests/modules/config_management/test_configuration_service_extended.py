@@ -24,6 +24,7 @@ from modules.config_management.models.configuration import (
     ConfigEnvironment, ConfigCategory
 )
 from modules.config_management.services.configuration_service import ConfigurationService
+from modules.config_management.services.elasticsearch_service import ConfigurationElasticsearchService
 
 
 class TestConfigurationServiceExtended:
@@ -506,66 +507,96 @@ class TestConfigurationServiceExtended:
         
         assert excinfo.value.status_code == 400
     
-    @patch('modules.config_management.services.configuration_service.ConfigurationElasticsearchService')
-    def test_sync_configurations_to_elasticsearch(self, mock_es_service, configuration_service, db_session):
-        """Test syncing configurations to Elasticsearch."""
-        # Create a mock ES service instance with all required methods
-        mock_es_instance = MagicMock()
-        mock_es_instance.bulk_index_configurations.return_value = 7
-        mock_es_instance.bulk_index_configuration_history.return_value = 10
-        mock_es_instance.bulk_index_configuration_groups.return_value = 2
+    def test_sync_configurations_to_elasticsearch(self, configuration_service, sample_configurations, db_session):
+        """Test that each sync indexes only the rows changed since the previous one."""
+        es_service = ConfigurationElasticsearchService()
+        indexed = []
+        
+        def stream_index(index, documents, chunk_size=500):
+            for document in documents:
+                indexed.append((index, document["id"]))
+                yield True, document["id"]
+        
+        es_service.stream_index = stream_index
+        configuration_service.es_service = es_service
+        configuration_service.elasticsearch_enabled = True
         
-        # Set up configuration service
-        configuration_service.es_service = mock_es_instance
+        result = configuration_service.sync_configurations_to_elasticsearch(page_size=3, overlap_seconds=0)
+        assert result == {"configurations_indexed": 7, "history_items_indexed": 1, "groups_indexed": 0}
+        assert db_session.query(Configuration).filter(Configuration.elasticsearch_synced == False).count() == 0
+        
+        # Nothing changed, nothing is indexed again
+        indexed.clear()
+        result = configuration_service.sync_configurations_to_elasticsearch(page_size=3, overlap_seconds=0)
+        assert result == {"configurations_indexed": 0, "history_items_indexed": 0, "groups_indexed": 0}
+        
+        # An update indexes the configuration and its history entry only
+        configuration_service.elasticsearch_enabled = False
+        configuration_service.update_configuration("network.timeout", {"value": 45}, "admin")
         configuration_service.elasticsearch_enabled = True
+        result = configuration_service.sync_configurations_to_elasticsearch(page_size=3, overlap_seconds=0)
+        assert result["configurations_indexed"] == 1
+        assert result["history_items_indexed"] == 1
+        assert (es_service.config_index, "net-config-1") in indexed
+        
+        # Test when Elasticsearch is not enabled
+        configuration_service.elasticsearch_enabled = False
+        
+        with pytest.raises(HTTPException) as excinfo:
+            configuration_service.sync_configurations_to_elasticsearch()
+        
+        assert excinfo.value.status_code == 400
+    
+    def test_sync_retries_from_failed_document(self, configuration_service, sample_configurations):
+        """Test that the watermark stops before a document that failed to index."""
+        es_service = ConfigurationElasticsearchService()
+        failing = {"net-config-1"}
+        
+        def stream_index(index, documents, chunk_size=500):
+            for document in documents:
+                yield document["id"] not in failing, document["id"]
+        
+        es_service.stream_index = stream_index
+        configuration_service.es_service = es_service
+        configuration_service.elasticsearch_enabled = True
+        
+        first = configuration_service.sync_configurations_to_elasticsearch(page_size=100, overlap_seconds=0)
+        failing.clear()
+        second = configuration_service.sync_configurations_to_elasticsearch(page_size=100, overlap_seconds=0)
+        
+        # Rows up to the failed one are not indexed again, the rest are retried
+        assert first["configurations_indexed"] == 6
+        assert 1 <= second["configurations_indexed"] < 7
+        third = configuration_service.sync_configurations_to_elasticsearch(page_size=100, overlap_seconds=0)
+        assert third["configurations_indexed"] == 0
+    
+    def test_sync_skips_document_that_keeps_failing(self, configuration_service, sample_configurations,
+                                                    db_session, monkeypatch):
+        """Test that a document failing in every sync is skipped after the maximum attempts."""
+        from modules.config_management.services import configuration_service as service_module
+        monkeypatch.setattr(service_module, "CONFIG_ES_SYNC_MAX_ATTEMPTS", 3)
+        es_service = ConfigurationElasticsearchService()
+        indexed = []
+        
+        def stream_index(index, documents, chunk_size=500):
+            for document in documents:
+                if document["id"] == "net-config-1":
+                    yield False, document["id"]
+                else:
+                    indexed.append(document["id"])
+                    yield True, document["id"]
+        
+        es_service.stream_index = stream_index
+        configuration_service.es_service = es_service
+        configuration_service.elasticsearch_enabled = True
+        
+        for _ in range(3):
+            configuration_service.sync_configurations_to_elasticsearch(page_size=100, overlap_seconds=0)
         
-        # Create test data to return from queries
-        test_configs = [MagicMock(), MagicMock()]
-        test_history = [MagicMock(), MagicMock()]
-        test_groups = [MagicMock(), MagicMock()]
-        
-        # Use consecutive patches for the three different query calls
-        with patch.object(db_session, 'query') as mock_config_query:
-            mock_config_query.return_value.filter.return_value.all.return_value = test_configs
-            
-            # We need to patch the second and third calls separately
-            # Save the original query method to restore between patches
-            original_query = db_session.query
-            
-            # After first query is used, replace it for the second query
-            def second_query_patch(*args):
-                # Replace this query method with one that will handle the third query
-                db_session.query = MagicMock()
-                db_session.query.return_value.filter.return_value.all.return_value = test_groups
-                
-                # Return a mock for the second query (history)
-                mock_history_query = MagicMock()
-                mock_history_query.filter.return_value.all.return_value = test_history
-                return mock_history_query
-            
-            # Execute with patched methods
-            db_session.query.side_effect = second_query_patch
-            
-            # Call the method under test
-            result = configuration_service.sync_configurations_to_elasticsearch()
-            
-            # Restore the original query method
-            db_session.query = original_query
-            
-            # Verify the methods were called with correct parameters
-            mock_es_instance.bulk_index_configurations.assert_called_once()
-            mock_es_instance.bulk_index_configuration_history.assert_called_once()
-            mock_es_instance.bulk_index_configuration_groups.assert_called_once()
-            
-            # Verify the result has the expected structure
-            assert "configurations_indexed" in result
-            assert "history_items_indexed" in result or "history_entries_indexed" in result
-            assert "groups_indexed" in result
-            
-            # Test when Elasticsearch is not enabled
-            configuration_service.elasticsearch_enabled = False
-            
-            with pytest.raises(HTTPException) as excinfo:
-                configuration_service.sync_configurations_to_elasticsearch()
-            
-            assert excinfo.value.status_code == 400
+        # Every other configuration was indexed once the failed one was skipped
+        indexed.clear()
+        result = configuration_service.sync_configurations_to_elasticsearch(page_size=100, overlap_seconds=0)
+        assert result["configurations_indexed"] == 0
+        assert "net-config-1" not in indexed
+        unsynced = db_session.query(Configuration).filter(Configuration.elasticsearch_synced == False).all()
+        assert [configuration.id for configuration in unsynced] == ["net-config-1"]
@@ -0,0 +1,84 @@
+"""
+Unit tests for the Configuration Management Module's snapshot service.
+
+This module tests the ConfigurationSnapshotStore class, which keeps
+pre-decrypted configuration values of each environment in memory.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from modules.config_management.models.configuration import Configuration, ConfigEnvironment, ConfigCategory
+from modules.config_management.services.snapshot_service import ConfigurationSnapshotStore
+
+
+class FakeRedis:
+    """Records published invalidations."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class TestConfigurationSnapshotStore:
+    """Tests for the ConfigurationSnapshotStore class."""
+
+    def test_environment_values_override_all(self, configuration_service, sample_configurations):
+        """Test that a snapshot holds active values, preferring the environment's own."""
+        snapshot = configuration_service.get_configuration_snapshot(ConfigEnvironment.PRODUCTION)
+
+        assert snapshot.get("system.debug_mode") is False
+        assert snapshot.get("system.max_connections") == 1000
+        assert snapshot.get("system.legacy_mode", "missing") == "missing"
+        with pytest.raises(TypeError):
+            snapshot.values["system.max_connections"] = 1
+
+    def test_values_are_decrypted_once(self, configuration_service, encryption_service):
+        """Test that encrypted values are decrypted when the snapshot is built only."""
+        configuration_service.create_configuration({
+            "key": "integration.secret",
+            "value": {"token": "abc"},
+            "category": ConfigCategory.INTEGRATION,
+            "is_encrypted": True
+        }, "admin")
+
+        with patch.object(encryption_service, "decrypt", wraps=encryption_service.decrypt) as decrypt:
+            values = [configuration_service.get_configuration_value("integration.secret") for _ in range(5)]
+
+        assert values == [{"token": "abc"}] * 5
+        assert decrypt.call_count == 1
+
+    def test_changes_by_other_workers_are_polled(self, configuration_service, sample_configurations, db_session):
+        """Test that a snapshot is rebuilt when the configuration version changes."""
+        assert configuration_service.get_configuration_value("network.timeout") == 30
+        snapshot = configuration_service.get_configuration_snapshot()
+
+        # Another worker updates the row without touching this process's store
+        config = db_session.get(Configuration, "net-config-1")
+        config.value = 60
+        config.updated_at = datetime.utcnow()
+        db_session.commit()
+
+        assert configuration_service.get_configuration_value("network.timeout") == 60
+        assert configuration_service.get_configuration_snapshot() is not snapshot
+
+    def test_writes_invalidate_and_publish(self, db_session, sample_configurations):
+        """Test that changes drop local snapshots and are announced to other workers."""
+        redis_client = FakeRedis()
+        store = ConfigurationSnapshotStore(poll_interval=3600, redis_client=redis_client)
+        store._listener = object()  # No subscription in tests
+
+        development = store.get(db_session, ConfigEnvironment.DEVELOPMENT)
+        production = store.get(db_session, ConfigEnvironment.PRODUCTION)
+        assert store.get(db_session, ConfigEnvironment.PRODUCTION) is production
+
+        store.invalidate(ConfigEnvironment.PRODUCTION)
+        assert store.get(db_session, ConfigEnvironment.DEVELOPMENT) is development
+        assert store.get(db_session, ConfigEnvironment.PRODUCTION) is not production
+
+        store.invalidate(ConfigEnvironment.ALL)
+        assert store.get(db_session, ConfigEnvironment.DEVELOPMENT) is not development
+        assert [message for _, message in redis_client.published] == ["production", "*"]
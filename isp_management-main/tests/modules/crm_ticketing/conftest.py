@@ -0,0 +1,91 @@
+"""
+Test configuration for the CRM & Ticketing module.
+
+The package's __init__ modules import the API router and the customer
+management module. The services are tested without them, so the packages
+are registered without running their __init__ modules.
+
+The SLA service imports the monitoring services, which need matplotlib and
+psutil, and SLA metric schemas the schemas package does not define. Where
+those cannot be imported, stand-ins are registered so the service can be
+tested.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine
+from sqlalchemy.exc import NoReferencedTableError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+project_root = Path(__file__).parent.parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+for package in ("modules.crm_ticketing", "modules.crm_ticketing.services"):
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [str(project_root.joinpath(*package.split(".")))]
+        sys.modules[package] = module
+
+try:
+    import modules.monitoring.services  # noqa: F401
+except ImportError:
+    monitoring_services = types.ModuleType("modules.monitoring.services")
+    monitoring_services.LoggingService = type("LoggingService", (), {"__init__": lambda self, db: None})
+    sys.modules["modules.monitoring.services"] = monitoring_services
+
+try:
+    from modules.crm_ticketing.schemas.sla import SLACreate, SLAUpdate, SLAMetricCreate, SLAMetricUpdate  # noqa: F401
+except Exception:
+    # The schemas package also fails to import under pydantic 2
+    for package in ("modules.crm_ticketing.schemas", "modules.crm_ticketing.schemas.sla"):
+        sys.modules.pop(package, None)
+    sla_schemas = types.ModuleType("modules.crm_ticketing.schemas.sla")
+    for name in ("SLACreate", "SLAUpdate", "SLAMetricCreate", "SLAMetricUpdate"):
+        setattr(sla_schemas, name, type(name, (BaseModel,), {}))
+    schemas = types.ModuleType("modules.crm_ticketing.schemas")
+    schemas.__path__ = [str(project_root.joinpath("modules", "crm_ticketing", "schemas"))]
+    schemas.sla = sla_schemas
+    sys.modules["modules.crm_ticketing.schemas"] = schemas
+    sys.modules["modules.crm_ticketing.schemas.sla"] = sla_schemas
+
+
+def create_tables(engine, *tables):
+    """
+    Create copies of tables in a database, with stand-ins for the tables they reference.
+
+    Args:
+        engine: Engine of the database
+        *tables: Tables to create
+
+    Returns:
+        The copies of the tables, in order
+    """
+    metadata = MetaData()
+    copies = [table.to_metadata(metadata) for table in tables]
+    while True:
+        try:
+            metadata.create_all(engine)
+            return copies
+        except NoReferencedTableError as e:
+            Table(e.table_name, metadata, Column("id", Integer, primary_key=True))
+
+
+@pytest.fixture
+def engine():
+    """Create an in-memory database shared by the sessions of a test."""
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Create a session factory bound to the test database."""
+    return sessionmaker(bind=engine)
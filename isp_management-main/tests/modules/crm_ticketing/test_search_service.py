@@ -0,0 +1,221 @@
+"""
+Tests for the ticket search service of the CRM & Ticketing module.
+"""
+
+import struct
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql
+
+from modules.crm_ticketing.models import Ticket, TicketSearchDocument
+from modules.crm_ticketing.services import search_service
+from modules.crm_ticketing.services.search_service import (
+    SearchService, build_prefix_query, decode_cursor, encode_cursor
+)
+
+from .conftest import create_tables
+
+TICKETS = Ticket.__table__
+DOCUMENTS = TicketSearchDocument.__table__
+
+
+@pytest.fixture(autouse=True)
+def index_state():
+    """Start every test with an unchecked search index."""
+    search_service._index_state.reset()
+    yield search_service._index_state
+    search_service._index_state.reset()
+
+
+@pytest.fixture
+def db(engine, session_factory):
+    """Create a database with the ticket and search document tables."""
+    create_tables(engine, TICKETS, DOCUMENTS)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_tickets(db, count, subject="Router down"):
+    now = datetime(2024, 3, 1)
+    first_id = len(db.execute(select(TICKETS.c.id)).all()) + 1
+    ids = list(range(first_id, first_id + count))
+    db.execute(insert(TICKETS), [
+        {
+            "id": ticket_id,
+            "ticket_number": f"TKT-20240301-{ticket_id:04d}",
+            "customer_id": 1,
+            "subject": subject,
+            "description": "No connectivity",
+            "status": "NEW",
+            "priority": "MEDIUM",
+            "ticket_type": "TECHNICAL",
+            "source": "EMAIL",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for ticket_id in ids
+    ])
+    db.commit()
+    return ids
+
+
+def add_documents(db, ticket_ids):
+    db.execute(insert(DOCUMENTS), [
+        {"ticket_id": ticket_id, "document": "'router':1A", "updated_at": datetime(2024, 3, 1)}
+        for ticket_id in ticket_ids
+    ])
+    db.commit()
+
+
+def postgresql_service():
+    """Create a service on a mocked PostgreSQL session, recording its statements."""
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    return SearchService(db)
+
+
+def compile_postgresql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_build_prefix_query():
+    assert build_prefix_query("Router  DOW!") == "router:* & dow:*"
+    assert build_prefix_query("' & | !") is None
+
+
+def test_cursor_round_trips_real_rank_exactly():
+    # ts_rank_cd ranks are reals; the cursor must hold the same value
+    rank = struct.unpack("f", struct.pack("f", 0.1))[0]
+
+    assert decode_cursor(encode_cursor(rank, 42)) == (rank, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not a cursor")
+
+    assert exc_info.value.status_code == 400
+
+
+def test_ranked_matches_compare_ranks_as_doubles(index_state):
+    index_state.ready = True
+    service = postgresql_service()
+
+    matches = service.match_query("router")
+    sql = compile_postgresql(select(matches.c.id).where(service.after_cursor(matches, encode_cursor(0.1, 7))))
+
+    assert "CAST(ts_rank_cd(crm_ticket_search.document" in sql
+    assert sql.count("AS DOUBLE PRECISION)") == 2
+
+
+def test_search_uses_substring_match_until_index_is_complete(db, monkeypatch):
+    add_tickets(db, 2)
+    service = SearchService(db)
+    monkeypatch.setattr(SearchService, "is_postgresql", True)
+
+    assert not service.use_index
+    assert "LIKE" in str(service.match_condition("router").compile())
+
+
+def test_keyset_pages_visit_every_match_once(db):
+    ids = add_tickets(db, 7)
+    add_tickets(db, 2, subject="Billing question")
+    service = SearchService(db)
+
+    seen = []
+    cursor = None
+    while True:
+        matches = service.match_query("router")
+        page = select(matches.c.id, matches.c.rank)
+        if cursor:
+            page = page.where(service.after_cursor(matches, cursor))
+        rows = db.execute(page.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(3)).all()
+        if not rows:
+            break
+        seen.extend(row.id for row in rows)
+        cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_index_is_complete_once_every_ticket_has_a_document(db, index_state, monkeypatch):
+    ids = add_tickets(db, 3)
+    add_documents(db, ids[:2])
+    service = SearchService(db)
+
+    assert not service.is_index_complete()
+
+    # Not checked again within the check interval
+    add_documents(db, ids[2:])
+    assert not service.is_index_complete()
+
+    monkeypatch.setattr(search_service, "TICKET_SEARCH_INDEX_CHECK_SECONDS", 0)
+    assert service.is_index_complete()
+    assert index_state.ready
+
+
+def test_rebuild_index_backfills_missing_documents(db, monkeypatch):
+    ids = add_tickets(db, 5)
+    add_documents(db, [ids[1], ids[3]])
+    service = SearchService(db)
+    monkeypatch.setattr(SearchService, "is_postgresql", True)
+    indexed_batches = []
+
+    def index_tickets(ticket_ids):
+        indexed_batches.append(ticket_ids)
+        add_documents(db, ticket_ids)
+
+    service.index_tickets = index_tickets
+
+    assert service.rebuild_index(batch_size=2) == 3
+    assert indexed_batches == [[ids[0], ids[2]], [ids[4]]]
+    assert service.is_index_complete()
+    assert service.rebuild_index(batch_size=2) == 0
+
+
+def test_index_tickets_upserts_documents():
+    service = postgresql_service()
+
+    service.index_tickets([1, 2])
+
+    sql = compile_postgresql(service.db.execute.call_args.args[0])
+    assert sql.startswith("INSERT INTO crm_ticket_search (ticket_id, document, updated_at) SELECT")
+    assert "ON CONFLICT (ticket_id) DO UPDATE SET document = excluded.document" in sql
+    assert "string_agg(crm_ticket_comments.content" in sql
+
+
+def test_index_comment_appends_to_document():
+    service = postgresql_service()
+    service.db.execute.return_value.rowcount = 1
+
+    service.index_comment(1, "Rebooted the router")
+
+    sql = compile_postgresql(service.db.execute.call_args.args[0])
+    assert sql.startswith("UPDATE crm_ticket_search SET document=(crm_ticket_search.document ||")
+    assert service.db.execute.call_count == 1
+
+
+def test_index_comment_indexes_ticket_without_document():
+    service = postgresql_service()
+    service.db.execute.return_value.rowcount = 0
+
+    service.index_comment(1, "Rebooted the router")
+
+    assert service.db.execute.call_count == 2
+    assert compile_postgresql(service.db.execute.call_args.args[0]).startswith("INSERT INTO crm_ticket_search")
+
+
+def test_index_is_not_maintained_on_other_databases():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "sqlite"
+    service = SearchService(db)
+
+    service.index_tickets([1])
+    service.index_comment(1, "text")
+
+    db.execute.assert_not_called()
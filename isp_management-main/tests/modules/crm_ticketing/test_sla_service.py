@@ -0,0 +1,230 @@
+"""
+Tests for the SLA performance metrics of the CRM & Ticketing module.
+
+Performance read from the SLA daily summary and live ticket aggregates is
+compared against a per-ticket computation over the same tickets.
+"""
+
+import random
+from datetime import datetime, time, timedelta
+
+import pytest
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import registry
+
+from modules.crm_ticketing.models import SLADailySummary, SLASummaryState, Ticket
+from modules.crm_ticketing.models import ticket as ticket_models
+from modules.crm_ticketing.models.common import TicketPriority, TicketStatus
+
+from .conftest import create_tables
+
+from modules.crm_ticketing.services import sla_service
+
+SLAService = sla_service.SLAService
+
+TICKETS = Ticket.__table__
+SUMMARY = SLADailySummary.__table__
+STATE = SLASummaryState.__table__
+
+RESOLVED_STATUSES = (TicketStatus.RESOLVED, TicketStatus.CLOSED)
+
+
+def stand_in(table):
+    """Map a class of its own to a table, apart from the application's models."""
+    return type(f"StandIn_{table.name}", (registry().generate_base(),), {"__table__": table})
+
+
+@pytest.fixture
+def db(engine, session_factory, monkeypatch):
+    """
+    Create a database with the ticket and SLA summary tables.
+
+    The service's models are replaced with classes mapped to copies of their
+    tables, as the application's models cannot all be configured without
+    the modules this test leaves out.
+    """
+    tickets, _, state = create_tables(engine, TICKETS, SUMMARY, STATE)
+    monkeypatch.setattr(ticket_models, "Ticket", stand_in(tickets))
+    monkeypatch.setattr(sla_service, "SLASummaryState", stand_in(state))
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def now():
+    return datetime.utcnow()
+
+
+def add_tickets(db, now, days=10, per_day=6, seed=7):
+    """Add tickets spread over the past days, with a mix of SLA outcomes."""
+    rng = random.Random(seed)
+    start = datetime.combine(now.date() - timedelta(days=days), time.min)
+    # Tickets created on the boundaries between days, including today's
+    boundaries = [datetime.combine(now.date() - timedelta(days=offset), time.min) for offset in range(days)]
+    rows = []
+    while len(rows) < days * per_day:
+        if boundaries:
+            created_at = boundaries.pop()
+        else:
+            created_at = start + timedelta(minutes=rng.randrange(0, days * 24 * 60))
+        if created_at >= now:
+            continue
+        status = rng.choice([TicketStatus.NEW, TicketStatus.IN_PROGRESS, TicketStatus.RESOLVED, TicketStatus.CLOSED])
+        responded = rng.random() < 0.8
+        resolution_date = created_at + timedelta(hours=rng.uniform(1, 72))
+        rows.append({
+            "ticket_number": f"TKT-{len(rows) + 1:05d}",
+            "customer_id": 1,
+            "subject": "Router down",
+            "description": "No connectivity",
+            "status": status,
+            "priority": rng.choice(list(TicketPriority)),
+            "ticket_type": "TECHNICAL",
+            "source": "EMAIL",
+            "sla_id": rng.choice([1, 2]),
+            "first_response_target": created_at + timedelta(hours=4),
+            "first_response_at": created_at + timedelta(hours=rng.uniform(0.5, 8)) if responded else None,
+            "resolution_target": created_at + timedelta(hours=24),
+            "resolved_at": resolution_date if status == TicketStatus.RESOLVED else None,
+            "closed_at": resolution_date if status == TicketStatus.CLOSED else None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    db.execute(insert(TICKETS), rows)
+    db.commit()
+
+
+def per_ticket_performance(db, start_date, end_date, sla_id=None):
+    """Compute SLA performance ticket by ticket."""
+    query = select(TICKETS).where(TICKETS.c.created_at >= start_date, TICKETS.c.created_at <= end_date)
+    if sla_id:
+        query = query.where(TICKETS.c.sla_id == sla_id)
+    tickets = db.execute(query).all()
+
+    def performance(tickets, resolved_key):
+        response_times = [
+            (ticket.first_response_at - ticket.created_at).total_seconds() / 3600
+            for ticket in tickets if ticket.first_response_at
+        ]
+        resolved = [ticket for ticket in tickets if ticket.status in RESOLVED_STATUSES]
+        resolution_times = [
+            ((ticket.resolved_at or ticket.closed_at) - ticket.created_at).total_seconds() / 3600
+            for ticket in resolved if ticket.resolved_at or ticket.closed_at
+        ]
+        first_response_breached = sum(
+            1 for ticket in tickets
+            if ticket.first_response_at and ticket.first_response_target
+            and ticket.first_response_at > ticket.first_response_target
+        )
+        resolution_breached = sum(
+            1 for ticket in resolved
+            if (ticket.resolved_at or ticket.closed_at) and ticket.resolution_target
+            and (ticket.resolved_at or ticket.closed_at) > ticket.resolution_target
+        )
+        compliance = 0
+        if resolved:
+            breaches = first_response_breached + resolution_breached
+            compliance = round(100 - breaches / (len(tickets) + len(resolved)) * 100, 2)
+        return {
+            resolved_key: len(resolved),
+            "first_response_breached": first_response_breached,
+            "resolution_breached": resolution_breached,
+            "sla_compliance_percentage": compliance,
+            "average_first_response_time": sum(response_times) / len(response_times) if response_times else None,
+            "average_resolution_time": sum(resolution_times) / len(resolution_times) if resolution_times else None,
+        }
+
+    return {
+        "total_tickets": len(tickets),
+        **performance(tickets, "resolved_tickets"),
+        "by_priority": {
+            priority.value: {
+                "total": len([ticket for ticket in tickets if ticket.priority == priority]),
+                **performance([ticket for ticket in tickets if ticket.priority == priority], "resolved"),
+            }
+            for priority in TicketPriority
+        }
+    }
+
+
+def assert_same_performance(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            assert_same_performance(actual[key], value)
+        elif isinstance(value, float):
+            assert actual[key] == pytest.approx(value, abs=1e-4), key
+        else:
+            assert actual[key] == value, key
+
+
+def test_summary_and_live_tickets_match_per_ticket_computation(db, now):
+    add_tickets(db, now)
+    service = SLAService(db)
+    first_day = db.execute(select(TICKETS.c.created_at).order_by(TICKETS.c.created_at)).scalar().date()
+
+    assert service.refresh_sla_summary() == (now.date() - first_day).days
+    assert db.execute(select(STATE.c.summarized_through)).scalar() == now.date()
+
+    periods = [
+        # Partial days at both edges, ending after the summarized days
+        (now - timedelta(days=7, hours=5), now),
+        # Whole days only, all of them summarized
+        (datetime.combine(now.date() - timedelta(days=8), time.min),
+         datetime.combine(now.date() - timedelta(days=2), time.min)),
+        # Starting in the last summarized day and ending today
+        (now - timedelta(hours=30), now + timedelta(hours=1)),
+    ]
+    for start_date, end_date in periods:
+        for sla_id in (None, 2):
+            assert_same_performance(
+                service.calculate_sla_performance(start_date, end_date, sla_id),
+                per_ticket_performance(db, start_date, end_date, sla_id)
+            )
+
+
+def test_performance_without_summary_reads_tickets(db, now):
+    add_tickets(db, now, days=3)
+    service = SLAService(db)
+    start_date = now - timedelta(days=3)
+
+    assert_same_performance(
+        service.calculate_sla_performance(start_date, now),
+        per_ticket_performance(db, start_date, now)
+    )
+
+
+def test_incremental_refresh_picks_up_updated_tickets(db, now):
+    add_tickets(db, now)
+    day_start = datetime.combine(now.date() - timedelta(days=4), time.min)
+    db.execute(insert(TICKETS).values(
+        ticket_number="TKT-OPEN", customer_id=1, subject="Slow speeds", description="Evenings only",
+        status=TicketStatus.OPEN, priority=TicketPriority.LOW, ticket_type="TECHNICAL", source="PHONE",
+        created_at=day_start + timedelta(hours=10), updated_at=day_start + timedelta(hours=10)
+    ))
+    db.commit()
+    service = SLAService(db)
+    service.refresh_sla_summary()
+
+    # Resolve the open tickets of an already summarized day, late
+    db.execute(
+        update(TICKETS)
+        .where(
+            TICKETS.c.created_at >= day_start,
+            TICKETS.c.created_at < day_start + timedelta(days=1),
+            TICKETS.c.status.notin_(RESOLVED_STATUSES)
+        )
+        .values(status=TicketStatus.RESOLVED, resolved_at=now, updated_at=datetime.utcnow())
+    )
+    db.commit()
+    start_date = datetime.combine(now.date() - timedelta(days=6), time.min)
+    end_date = datetime.combine(now.date() - timedelta(days=1), time.min)
+    expected = per_ticket_performance(db, start_date, end_date)
+
+    # The summary lags the update until the next refresh
+    assert service.calculate_sla_performance(start_date, end_date)["resolved_tickets"] < expected["resolved_tickets"]
+
+    # Only the changed day is rebuilt
+    assert service.refresh_sla_summary() == 1
+    assert_same_performance(service.calculate_sla_performance(start_date, end_date), expected)
@@ -0,0 +1,127 @@
+"""
+Tests for the ticket number allocation of the CRM & Ticketing module.
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from modules.crm_ticketing.models import Ticket, TicketNumberCounter
+from modules.crm_ticketing.services.ticket_number_service import TicketNumberAllocator
+
+from .conftest import create_tables
+
+TICKETS = Ticket.__table__
+COUNTERS = TicketNumberCounter.__table__
+
+
+class Clock:
+    """Clock whose time is set by the test."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(engine, session_factory):
+    """Create a database with the ticket and counter tables."""
+    create_tables(engine, TICKETS, COUNTERS)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def counter(db, day):
+    return db.execute(select(COUNTERS.c.last_value).where(COUNTERS.c.day == day)).scalar()
+
+
+def test_numbers_are_sequential_across_blocks(db):
+    allocator = TicketNumberAllocator(block_size=3, clock=Clock(datetime(2024, 3, 1, 9)))
+
+    numbers = [allocator.allocate(db) for _ in range(7)]
+
+    assert numbers == [f"TKT-20240301-{value:04d}" for value in range(1, 8)]
+    # Three blocks were reserved
+    assert counter(db, "20240301") == 9
+
+
+def test_numbering_restarts_each_day(db):
+    clock = Clock(datetime(2024, 3, 1, 23, 59))
+    allocator = TicketNumberAllocator(block_size=5, clock=clock)
+
+    assert allocator.allocate(db) == "TKT-20240301-0001"
+    clock.now = datetime(2024, 3, 2, 0, 1)
+
+    assert allocator.allocate(db) == "TKT-20240302-0001"
+    assert counter(db, "20240302") == 5
+
+
+def test_counter_created_mid_day_continues_after_existing_tickets(db):
+    now = datetime(2024, 3, 1, 14)
+    db.execute(insert(TICKETS), [
+        {
+            "ticket_number": ticket_number,
+            "customer_id": 1,
+            "subject": "Router down",
+            "description": "No connectivity",
+            "status": "NEW",
+            "priority": "MEDIUM",
+            "ticket_type": "TECHNICAL",
+            "source": "EMAIL",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for ticket_number in ("TKT-20240301-0009", "TKT-20240301-0041", "TKT-20240229-0077")
+    ])
+    db.commit()
+
+    allocator = TicketNumberAllocator(block_size=10, clock=Clock(now))
+
+    assert allocator.allocate(db) == "TKT-20240301-0042"
+    assert counter(db, "20240301") == 51
+
+
+def test_allocators_share_the_daily_counter(db):
+    clock = Clock(datetime(2024, 3, 1, 9))
+    first = TicketNumberAllocator(block_size=3, clock=clock)
+    second = TicketNumberAllocator(block_size=3, clock=clock)
+
+    assert first.allocate(db) == "TKT-20240301-0001"
+    assert second.allocate(db) == "TKT-20240301-0004"
+    assert first.allocate(db) == "TKT-20240301-0002"
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tickets.db'}", connect_args={"timeout": 30})
+    create_tables(engine, TICKETS, COUNTERS)
+    Session = sessionmaker(bind=engine)
+    clock = Clock(datetime(2024, 3, 1, 9))
+    # Two processes, each with its own allocator shared by two threads
+    allocators = [TicketNumberAllocator(block_size=5, clock=clock) for _ in range(2)]
+    numbers = []
+    lock = threading.Lock()
+
+    def create_tickets(allocator):
+        db = Session()
+        try:
+            allocated = [allocator.allocate(db) for _ in range(20)]
+        finally:
+            db.close()
+        with lock:
+            numbers.extend(allocated)
+
+    threads = [threading.Thread(target=create_tickets, args=(allocators[i % 2],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    assert len(numbers) == 80
+    assert len(set(numbers)) == 80
@@ -0,0 +1,96 @@
+"""
+Test configuration for the File Manager module.
+
+The package's __init__ modules import the API router, which needs the
+application's dependencies. The services are tested without it, so the
+packages are registered without running their __init__ modules.
+"""
+
+import sys
+import types
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import MetaData, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+project_root = Path(__file__).parent.parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+for package in ("modules.file_manager", "modules.file_manager.services", "modules.file_manager.api"):
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [str(project_root.joinpath(*package.split(".")))]
+        sys.modules[package] = module
+
+
+@pytest.fixture
+def engine():
+    """Create an in-memory database shared by the sessions of a test."""
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+@pytest.fixture
+def db(engine):
+    """Create a session on a database with the file blob table."""
+    from modules.file_manager.models.file import FileBlob
+
+    FileBlob.__table__.to_metadata(MetaData()).metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Create a storage service on a temporary local directory."""
+    from modules.file_manager.services.storage_service import StorageService
+
+    return StorageService(local_storage_path=str(tmp_path))
+
+
+@pytest.fixture
+def blob_service(db, storage):
+    """Create a blob service on the test database and storage."""
+    from modules.file_manager.services.blob_service import BlobService
+
+    return BlobService(db, storage)
+
+
+@pytest.fixture
+def service_for(storage, blob_service, monkeypatch):
+    """Create a file service whose queries for a file return it."""
+    from modules.file_manager.services import file_service
+
+    monkeypatch.setattr(file_service, "StorageService", lambda: storage)
+
+    def create(db_file):
+        service = file_service.FileService(MagicMock())
+        service.db.query.return_value.filter.return_value.first.return_value = db_file
+        service.blob_service = blob_service
+        service._check_file_permission = lambda *args: True
+        service._log_file_access = lambda **kwargs: None
+        return service
+
+    return create
+
+
+@pytest.fixture
+def export_service(db, engine, storage, monkeypatch):
+    """Create a financial export service exporting a fixed CSV to the test storage."""
+    from modules.billing.models import FinancialExport
+    from modules.billing.services.export_service import FinancialExportService
+    from modules.file_manager.models.file import StorageBackend
+
+    FinancialExport.__table__.to_metadata(MetaData()).metadata.create_all(engine)
+    export_service = FinancialExportService(db)
+    monkeypatch.setattr(export_service, "iter_export", lambda *args: iter(["id,amount\n", "1,10.00\n"]))
+    monkeypatch.setattr(storage, "get_preferred_storage_backend", lambda: StorageBackend.LOCAL)
+    monkeypatch.setattr(storage, "get_download_url", lambda *args: "/files/export")
+    return export_service
@@ -0,0 +1,229 @@
+"""
+Tests for the deduplicated, reference-counted blob storage of the File Manager module.
+"""
+
+import asyncio
+import io
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import UploadFile
+from sqlalchemy import column, insert, select, update
+
+from modules.file_manager.models.file import FileBlob, StorageBackend
+from modules.file_manager.schemas.file import FileVersionCreate
+from modules.file_manager.services import file_service
+
+BLOBS = FileBlob.__table__
+LOCAL = StorageBackend.LOCAL
+
+
+def upload(content, filename="report.txt"):
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+def store(blob_service, content, references=1):
+    stored = asyncio.run(blob_service.store(upload(content), LOCAL, references))
+    blob_service.db.commit()
+    return stored
+
+
+def get_blob(db, storage_path):
+    return db.execute(select(BLOBS).where(BLOBS.c.storage_path == storage_path)).one()
+
+
+def staged_files(storage):
+    staging_dir = os.path.join(storage.local_storage_path, "staging")
+    return os.listdir(staging_dir) if os.path.isdir(staging_dir) else []
+
+
+def test_identical_content_is_stored_once(db, storage, blob_service):
+    first = store(blob_service, b"invoice 1001")
+    second = store(blob_service, b"invoice 1001")
+
+    assert not first.deduplicated
+    assert second.deduplicated
+    assert second.storage_path == first.storage_path
+    assert get_blob(db, first.storage_path).ref_count == 2
+    assert os.path.exists(os.path.join(storage.local_storage_path, first.storage_path))
+    # The staged copy of the duplicate was discarded
+    assert staged_files(storage) == []
+
+
+def test_different_content_is_stored_separately(db, blob_service):
+    first = store(blob_service, b"invoice 1001")
+    second = store(blob_service, b"invoice 1002", references=2)
+
+    assert not second.deduplicated
+    assert second.storage_path != first.storage_path
+    assert get_blob(db, second.storage_path).ref_count == 2
+    assert len(db.execute(select(BLOBS)).all()) == 2
+
+
+def test_concurrent_upload_of_same_content_adds_a_reference(db, storage, blob_service, monkeypatch):
+    commit_staged_file = storage.commit_staged_file
+
+    async def commit_after_concurrent_upload(staged, file):
+        storage_path = await commit_staged_file(staged, file)
+        # Another upload of the same content created the blob in the meantime
+        db.execute(insert(BLOBS).values(
+            storage_backend=LOCAL, checksum=staged.checksum, storage_path=storage_path,
+            size_bytes=staged.size_bytes, ref_count=1
+        ))
+        return storage_path
+
+    monkeypatch.setattr(storage, "commit_staged_file", commit_after_concurrent_upload)
+
+    stored = store(blob_service, b"invoice 1001")
+
+    assert not stored.deduplicated
+    assert len(db.execute(select(BLOBS)).all()) == 1
+    assert get_blob(db, stored.storage_path).ref_count == 2
+
+
+def test_releasing_last_reference_orphans_blob(db, blob_service):
+    stored = store(blob_service, b"invoice 1001", references=2)
+
+    assert blob_service.release_references(LOCAL, [stored.storage_path]) == []
+    blob = get_blob(db, stored.storage_path)
+    assert blob.ref_count == 1
+    assert blob.orphaned_at is None
+
+    # Files stored before deduplication are left to the caller
+    unmanaged = blob_service.release_references(LOCAL, [stored.storage_path, "files/legacy.pdf"])
+    blob = get_blob(db, stored.storage_path)
+    assert unmanaged == ["files/legacy.pdf"]
+    assert blob.ref_count == 0
+    assert blob.orphaned_at is not None
+
+
+def test_upload_of_orphaned_content_revives_blob(db, blob_service):
+    stored = store(blob_service, b"invoice 1001")
+    blob_service.release_references(LOCAL, [stored.storage_path])
+
+    assert store(blob_service, b"invoice 1001").deduplicated
+    blob = get_blob(db, stored.storage_path)
+    assert blob.ref_count == 1
+    assert blob.orphaned_at is None
+
+
+def test_garbage_collection_waits_for_grace_period(db, storage, blob_service):
+    orphaned = store(blob_service, b"invoice 1001")
+    referenced = store(blob_service, b"invoice 1002")
+    blob_service.release_references(LOCAL, [orphaned.storage_path])
+    db.commit()
+
+    assert asyncio.run(blob_service.collect_garbage(grace_period=3600))["blobs"] == 0
+    assert os.path.exists(os.path.join(storage.local_storage_path, orphaned.storage_path))
+
+    db.execute(update(BLOBS).where(BLOBS.c.ref_count == 0).values(
+        orphaned_at=datetime.utcnow() - timedelta(hours=2)
+    ))
+    stats = asyncio.run(blob_service.collect_garbage(grace_period=3600))
+
+    assert stats == {"blobs": 1, "bytes": len(b"invoice 1001"), "failed": 0}
+    assert [blob.storage_path for blob in db.execute(select(BLOBS)).all()] == [referenced.storage_path]
+    assert not os.path.exists(os.path.join(storage.local_storage_path, orphaned.storage_path))
+    assert os.path.exists(os.path.join(storage.local_storage_path, referenced.storage_path))
+
+
+def test_garbage_collection_keeps_blob_it_could_not_delete(db, storage, blob_service, monkeypatch):
+    stored = store(blob_service, b"invoice 1001")
+    blob_service.release_references(LOCAL, [stored.storage_path])
+    db.execute(update(BLOBS).values(orphaned_at=datetime.utcnow() - timedelta(hours=2)))
+
+    async def delete_file(storage_backend, storage_path):
+        return False
+
+    monkeypatch.setattr(storage, "delete_file", delete_file)
+
+    assert asyncio.run(blob_service.collect_garbage(grace_period=3600))["failed"] == 1
+    assert get_blob(db, stored.storage_path).ref_count == 0
+
+
+class StubVersion(SimpleNamespace):
+    """Stand-in for FileVersion, whose mapper needs the application's user model."""
+    file_id = column("file_id")
+    version_number = column("version_number")
+
+
+def test_new_version_releases_previous_content_of_file(db, blob_service, service_for, monkeypatch):
+    monkeypatch.setattr(file_service, "FileVersion", StubVersion)
+    # Referenced by the file and its first version
+    previous = store(blob_service, b"version 1", references=2)
+    db_file = SimpleNamespace(id=1, storage_backend=LOCAL, storage_path=previous.storage_path)
+    service = service_for(db_file)
+    service.db.query.return_value.filter.return_value.order_by.return_value.first.return_value = (
+        SimpleNamespace(version_number=1)
+    )
+
+    asyncio.run(service.update_file_content(
+        1, upload(b"version 2"), FileVersionCreate(change_summary="Corrected totals"), user_id=7
+    ))
+
+    assert get_blob(db, previous.storage_path).ref_count == 1
+    assert get_blob(db, db_file.storage_path).ref_count == 2
+    assert db_file.storage_path != previous.storage_path
+
+
+def test_deleting_file_releases_its_content_and_versions(db, blob_service, service_for):
+    current = store(blob_service, b"version 2", references=2)
+    previous = store(blob_service, b"version 1")
+    db_file = SimpleNamespace(
+        id=1, storage_backend=LOCAL, storage_path=current.storage_path,
+        versions=[SimpleNamespace(storage_path=previous.storage_path),
+                  SimpleNamespace(storage_path=current.storage_path)]
+    )
+    service = service_for(db_file)
+
+    assert asyncio.run(service.delete_file(1, user_id=7))
+
+    assert get_blob(db, current.storage_path).ref_count == 0
+    assert get_blob(db, previous.storage_path).ref_count == 0
+    service.db.delete.assert_called_once_with(db_file)
+
+
+def export(export_service, storage):
+    return export_service.export_to_storage(
+        datetime(2024, 1, 1), datetime(2024, 1, 31), "payments", storage_service=storage
+    )
+
+
+def test_financial_export_holds_a_reference(db, storage, blob_service, export_service):
+    stored = store(blob_service, b"id,amount\n1,10.00\n")
+    blob_service.release_references(LOCAL, [stored.storage_path])
+
+    result = export(export_service, storage)
+
+    # The export revives the orphaned blob with the same content instead of sharing it unreferenced
+    assert result["storage_path"] == stored.storage_path
+    blob = get_blob(db, stored.storage_path)
+    assert blob.ref_count == 1
+    assert blob.orphaned_at is None
+
+
+def test_expired_financial_export_releases_its_reference(db, storage, export_service):
+    from modules.billing.services.export_service import export_table
+
+    first = export(export_service, storage)
+    second = export(export_service, storage)
+    assert get_blob(db, first["storage_path"]).ref_count == 2
+
+    # Nothing has expired yet
+    assert export_service.release_expired_exports(storage) == 0
+
+    db.execute(update(export_table).where(export_table.c.id == 1).values(expires_at=datetime.utcnow()))
+    db.commit()
+
+    assert export_service.release_expired_exports(storage) == 1
+    assert get_blob(db, second["storage_path"]).ref_count == 1
+    assert db.execute(select(export_table.c.id)).scalars().all() == [2]
+
+    db.execute(update(export_table).values(expires_at=datetime.utcnow()))
+    db.commit()
+
+    assert export_service.release_expired_exports(storage) == 1
+    blob = get_blob(db, second["storage_path"])
+    assert blob.ref_count == 0
+    assert blob.orphaned_at is not None
@@ -0,0 +1,164 @@
+"""
+Tests for full and partial file downloads of the File Manager module.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from modules.file_manager.api.responses import ZERO_COPY_SEND, FileDownloadResponse
+from modules.file_manager.models.file import StorageBackend
+
+CONTENT = bytes(range(256)) * 4
+CHECKSUM = "5f1c2b"
+ETAG = f'"{CHECKSUM}"'
+
+
+@pytest.fixture
+def add_file(storage):
+    """Write a file to local storage and return its database record."""
+    def add(content=CONTENT):
+        storage_path = "files/report.bin"
+        full_path = os.path.join(storage.local_storage_path, storage_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as file:
+            file.write(content)
+        return SimpleNamespace(
+            id=1, uuid="0b6d", original_filename="report.bin", mime_type="application/octet-stream",
+            checksum=CHECKSUM, size_bytes=len(content), storage_backend=StorageBackend.LOCAL,
+            storage_path=storage_path
+        )
+
+    return add
+
+
+@pytest.fixture
+def client(service_for, add_file):
+    """Create a client for a download endpoint serving the file returned by add_file."""
+    def create(content=CONTENT):
+        service = service_for(add_file(content))
+        app = FastAPI()
+
+        @app.get("/files/{file_id}/download")
+        async def download_file(file_id: int, request: Request):
+            download = await service.download_file(
+                file_id=file_id,
+                user_id=7,
+                range_header=request.headers.get("range"),
+                if_range=request.headers.get("if-range")
+            )
+            return FileDownloadResponse(download)
+
+        return TestClient(app)
+
+    return create
+
+
+def test_whole_file_is_sent_without_range(client):
+    response = client().get("/files/1/download")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == ETAG
+    assert "content-range" not in response.headers
+
+
+def test_range_is_sent_as_partial_content(client):
+    response = client().get("/files/1/download", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-length"] == "100"
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+
+def test_suffix_range_is_sent_as_partial_content(client):
+    response = client().get("/files/1/download", headers={"Range": "bytes=-24"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[-24:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(CONTENT)}"
+
+
+def test_range_is_sent_if_file_is_unchanged(client):
+    response = client().get("/files/1/download", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+
+def test_whole_file_is_sent_if_file_has_changed(client):
+    response = client().get("/files/1/download", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_unsupported_range_sends_whole_file(client):
+    response = client().get("/files/1/download", headers={"Range": "bytes=0-9,20-29"})
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_range_past_end_of_file_is_not_satisfiable(client):
+    response = client().get("/files/1/download", headers={"Range": f"bytes={len(CONTENT)}-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_empty_file_is_sent(client):
+    response = client(b"").get("/files/1/download")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == "0"
+
+
+def test_range_of_empty_file_is_not_satisfiable(client):
+    response = client(b"").get("/files/1/download", headers={"Range": "bytes=0-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
+
+
+def send_with_zero_copy(response):
+    """Run a response on a server supporting zero-copy send, recording what it sends."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == ZERO_COPY_SEND:
+            message = {**message, "file": message["file"].name}
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "extensions": {ZERO_COPY_SEND: {}}}
+    asyncio.run(response(scope, receive, send))
+    return messages
+
+
+def test_local_range_is_sent_with_zero_copy(service_for, add_file, storage):
+    db_file = add_file()
+    service = service_for(db_file)
+    download = asyncio.run(service.download_file(1, user_id=7, range_header="bytes=100-199"))
+
+    start, body = send_with_zero_copy(FileDownloadResponse(download))
+
+    assert start["status"] == 206
+    assert (b"content-range", f"bytes 100-199/{len(CONTENT)}".encode()) in start["headers"]
+    assert body == {
+        "type": ZERO_COPY_SEND,
+        "file": os.path.join(storage.local_storage_path, db_file.storage_path),
+        "offset": 100,
+        "count": 100,
+        "more_body": False,
+    }
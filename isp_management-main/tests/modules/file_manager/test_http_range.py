@@ -0,0 +1,58 @@
+"""
+Tests for the Range header parsing of the File Manager module.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from modules.file_manager.utils.http_range import parse_range_header
+
+
+@pytest.mark.parametrize("range_header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-199", (100, 199)),
+    # The last byte is clamped to the end of the file
+    ("bytes=900-5000", (900, 999)),
+    # Open-ended range
+    ("bytes=500-", (500, 999)),
+    # Suffix ranges: the last N bytes
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    (" Bytes = 10 - 19", (10, 19)),
+])
+def test_single_range_is_parsed(range_header, expected):
+    assert parse_range_header(range_header, 1000) == expected
+
+
+@pytest.mark.parametrize("range_header", [
+    None,
+    "",
+    # Several ranges are sent as the whole file
+    "bytes=0-99,200-299",
+    "items=0-9",
+    "bytes=abc",
+    "bytes=a-b",
+    "bytes=-",
+    "bytes=10",
+    "bytes=1-2-3",
+    # Last byte before the first is invalid syntax, not unsatisfiable
+    "bytes=200-100",
+])
+def test_unsupported_or_invalid_range_is_ignored(range_header):
+    assert parse_range_header(range_header, 1000) is None
+
+
+@pytest.mark.parametrize("range_header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-1999", 1000),
+    ("bytes=-0", 1000),
+    # No range of an empty file can be satisfied
+    ("bytes=0-", 0),
+    ("bytes=-10", 0),
+])
+def test_range_past_end_of_file_is_not_satisfiable(range_header, size):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range_header(range_header, size)
+
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": f"bytes */{size}"}
@@ -0,0 +1,469 @@
+"""
+Tests for the workflow engine of the Service Activation Module.
+
+The module's models package shadows its models module, so the engine is
+imported against stand-in models: plain objects whose class attributes are
+columns, enough to build the engine's statements, and a session answering
+them from the objects of the test.
+"""
+
+import asyncio
+import enum
+import sys
+import types
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import column, table
+from sqlalchemy.sql import Insert
+
+project_root = Path(__file__).parent.parent.parent.parent.absolute()
+sys.path.insert(0, str(project_root))
+
+from backend_core.exceptions import ExternalServiceException, WorkflowException
+
+
+class ActivationStatus(enum.Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    ROLLBACK_IN_PROGRESS = "rollback_in_progress"
+    ROLLBACK_COMPLETED = "rollback_completed"
+    ROLLBACK_FAILED = "rollback_failed"
+
+
+class StepStatus(enum.Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    ROLLBACK_IN_PROGRESS = "rollback_in_progress"
+    ROLLBACK_COMPLETED = "rollback_completed"
+    ROLLBACK_FAILED = "rollback_failed"
+
+
+class StubModel(types.SimpleNamespace):
+    """Stand-in for a model, selectable through its table."""
+    __table__ = None
+
+    @classmethod
+    def __clause_element__(cls):
+        return cls.__table__
+
+
+def stub_model(name, table_name, *column_names):
+    columns = {column_name: column(column_name) for column_name in column_names}
+    return type(name, (StubModel,), {"__table__": table(table_name, *columns.values()), **columns})
+
+
+ServiceActivation = stub_model("ServiceActivation", "service_activations", "id")
+ActivationStep = stub_model(
+    "ActivationStep", "activation_steps", "id", "activation_id", "step_order", "is_rollback_step"
+)
+ActivationLog = stub_model(
+    "ActivationLog", "activation_logs", "activation_id", "step_id", "timestamp", "level", "message", "details"
+)
+
+models = types.ModuleType("modules.service_activation.models")
+models.__dict__.update(
+    ServiceActivation=ServiceActivation, ActivationStep=ActivationStep, ActivationLog=ActivationLog,
+    ActivationStatus=ActivationStatus, StepStatus=StepStatus
+)
+# The package's __init__ imports the API router, which needs the application
+package = types.ModuleType("modules.service_activation")
+package.__path__ = [str(project_root / "modules" / "service_activation")]
+
+with patch.dict(sys.modules, {"modules.service_activation": package, "modules.service_activation.models": models}):
+    from modules.service_activation import workflow_engine
+
+ActivationLogWriter = workflow_engine.ActivationLogWriter
+RetryPolicy = workflow_engine.RetryPolicy
+WorkflowEngine = workflow_engine.WorkflowEngine
+
+NO_DELAY = RetryPolicy(base_delay=0)
+
+
+class StubSession:
+    """Session answering the engine's queries from an activation and its steps."""
+
+    def __init__(self, activation=None, steps=()):
+        self.activation = activation
+        self.steps = list(steps)
+        self.logs = []
+        self.inserts = 0
+        self.commit = AsyncMock()
+
+    async def execute(self, statement, parameters=None):
+        if isinstance(statement, Insert):
+            self.inserts += 1
+            self.logs.extend(parameters)
+            return MagicMock()
+        result = MagicMock()
+        if statement.get_final_froms()[0].name == "service_activations":
+            result.scalars.return_value.first.return_value = self.activation
+        else:
+            steps = sorted(self.steps, key=lambda step: step.step_order)
+            result.scalars.return_value.all.return_value = steps
+        return result
+
+
+def make_step(step_id, name, dependencies=None, depends_on_step_id=None, max_retries=3,
+              status=StepStatus.PENDING):
+    return ActivationStep(
+        id=step_id, activation_id=1, step_name=name, step_order=step_id, status=status,
+        dependencies=dependencies, depends_on_step_id=depends_on_step_id,
+        retry_count=0, max_retries=max_retries, error_message=None,
+        started_at=None, completed_at=None
+    )
+
+
+def make_engine(steps, retry_policy=NO_DELAY):
+    activation = ServiceActivation(
+        id=1, customer_id=10, service_id=20, status=ActivationStatus.PENDING,
+        prerequisites_checked=True, payment_verified=True, metadata={"plan": "fiber"},
+        updated_at=None, completed_at=None
+    )
+    return WorkflowEngine(StubSession(activation, steps), retry_policy=retry_policy)
+
+
+class Recorder:
+    """Step and rollback handlers recording their calls."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.events = []
+
+    async def run(self, step, metadata):
+        self.events.append(("start", step.step_name))
+        # Let concurrently started steps begin before this one ends
+        await asyncio.sleep(0)
+        self.events.append(("end", step.step_name))
+        return step.step_name not in self.failing
+
+    async def rollback(self, step, metadata):
+        self.events.append(("rollback", step.step_name))
+        return True
+
+    def register(self, engine, steps):
+        for step in steps:
+            engine.register_step_handler(step.step_name, self.run)
+            engine.register_rollback_handler(step.step_name, self.rollback)
+
+    def index(self, event, name):
+        return self.events.index((event, name))
+
+
+def test_dependencies_are_resolved_by_name():
+    steps = [
+        make_step(1, "provision", dependencies=[]),
+        make_step(2, "configure_router", dependencies=["provision"]),
+        make_step(3, "notify", dependencies=["provision", "configure_router"]),
+    ]
+
+    assert make_engine(steps)._build_dependency_graph(steps) == {1: set(), 2: {1}, 3: {1, 2}}
+
+
+def test_steps_without_declared_dependencies_stay_sequential():
+    steps = [
+        make_step(1, "provision"),
+        make_step(2, "configure_router"),
+        make_step(3, "notify", depends_on_step_id=1),
+    ]
+
+    assert make_engine(steps)._build_dependency_graph(steps) == {1: set(), 2: {1}, 3: {1}}
+
+
+def test_unknown_dependency_is_rejected():
+    steps = [make_step(1, "provision", dependencies=["reserve_ip"])]
+
+    with pytest.raises(WorkflowException, match="unknown steps: reserve_ip"):
+        make_engine(steps)._build_dependency_graph(steps)
+
+
+def test_cyclic_dependencies_are_rejected():
+    steps = [
+        make_step(1, "provision", dependencies=[]),
+        make_step(2, "configure_router", dependencies=["provision", "notify"]),
+        make_step(3, "notify", dependencies=["configure_router"]),
+    ]
+
+    with pytest.raises(WorkflowException, match="cyclic dependencies: configure_router, notify"):
+        make_engine(steps)._build_dependency_graph(steps)
+
+
+def test_cyclic_workflow_fails_without_running_steps():
+    steps = [make_step(1, "provision", dependencies=["notify"]), make_step(2, "notify", dependencies=["provision"])]
+    engine = make_engine(steps)
+    recorder = Recorder()
+    recorder.register(engine, steps)
+
+    assert not asyncio.run(engine.execute_workflow(1))
+    assert recorder.events == []
+    assert engine.session.activation.status == ActivationStatus.FAILED
+
+
+def test_independent_branches_run_concurrently():
+    # provision -> (configure_router, assign_ip) -> notify
+    steps = [
+        make_step(1, "provision", dependencies=[]),
+        make_step(2, "configure_router", dependencies=["provision"]),
+        make_step(3, "assign_ip", dependencies=["provision"]),
+        make_step(4, "notify", dependencies=["configure_router", "assign_ip"]),
+    ]
+    engine = make_engine(steps)
+    recorder = Recorder()
+    recorder.register(engine, steps)
+
+    assert asyncio.run(engine.execute_workflow(1))
+
+    # Both branches started before either ended
+    assert recorder.index("start", "assign_ip") < recorder.index("end", "configure_router")
+    assert recorder.index("start", "configure_router") < recorder.index("end", "assign_ip")
+    # Steps start after the steps they depend on ended
+    assert recorder.index("end", "provision") < recorder.index("start", "configure_router")
+    assert recorder.index("start", "notify") > max(
+        recorder.index("end", "configure_router"), recorder.index("end", "assign_ip")
+    )
+    assert all(step.status == StepStatus.COMPLETED for step in steps)
+    assert engine.session.activation.status == ActivationStatus.COMPLETED
+
+
+def test_completed_steps_are_not_run_again():
+    steps = [
+        make_step(1, "provision", dependencies=[], status=StepStatus.COMPLETED),
+        make_step(2, "notify", dependencies=["provision"]),
+    ]
+    engine = make_engine(steps)
+    recorder = Recorder()
+    recorder.register(engine, steps)
+
+    assert asyncio.run(engine.execute_workflow(1))
+    assert recorder.events == [("start", "notify"), ("end", "notify")]
+
+
+def test_graph_stops_starting_nodes_after_a_failure():
+    engine = make_engine([])
+    started = []
+
+    async def run(node):
+        started.append(node)
+        await asyncio.sleep(0.01 if node == 2 else 0)
+        return node != 1
+
+    # 1 and 2 are ready; 3 waits for 2 and 4 waits for 1
+    failed = asyncio.run(engine._run_graph(
+        {1: set(), 2: set(), 3: {2}, 4: {1}}, run, order=lambda node: node, stop_on_failure=True
+    ))
+
+    # The running node was awaited, but no other node was started
+    assert failed == {1}
+    assert started == [1, 2]
+
+
+def test_graph_continues_past_failures_without_stop_on_failure():
+    engine = make_engine([])
+    started = []
+
+    async def run(node):
+        started.append(node)
+        if node == 2:
+            raise RuntimeError("unreachable")
+        return node != 1
+
+    failed = asyncio.run(engine._run_graph(
+        {1: set(), 2: set(), 3: {1, 2}}, run, order=lambda node: -node, stop_on_failure=False
+    ))
+
+    assert failed == {1, 2}
+    # Ready nodes start in the given order
+    assert started == [2, 1, 3]
+
+
+def test_failed_branch_rolls_back_completed_steps_in_reverse_order():
+    # provision -> configure_router -> enable_qos
+    #           -> assign_ip (fails)
+    steps = [
+        make_step(1, "provision", dependencies=[]),
+        make_step(2, "configure_router", dependencies=["provision"]),
+        make_step(3, "assign_ip", dependencies=["provision"], max_retries=0),
+        make_step(4, "enable_qos", dependencies=["configure_router"]),
+    ]
+    engine = make_engine(steps)
+    recorder = Recorder(failing={"assign_ip"})
+    recorder.register(engine, steps)
+
+    assert not asyncio.run(engine.execute_workflow(1))
+
+    rollbacks = [name for event, name in recorder.events if event == "rollback"]
+    # Steps already running when the branch failed completed and are rolled
+    # back too; every step is rolled back after the steps depending on it
+    assert sorted(rollbacks) == ["configure_router", "provision"]
+    assert rollbacks[-1] == "provision"
+    assert "enable_qos" not in [name for _, name in recorder.events]
+    assert steps[2].status == StepStatus.FAILED
+    assert steps[0].status == steps[1].status == StepStatus.ROLLBACK_COMPLETED
+    assert steps[3].status == StepStatus.PENDING
+    assert engine.session.activation.status == ActivationStatus.ROLLBACK_COMPLETED
+
+
+def test_rollback_continues_past_failed_rollback():
+    steps = [
+        make_step(1, "provision", dependencies=[]),
+        make_step(2, "configure_router", dependencies=["provision"]),
+        make_step(3, "notify", dependencies=["configure_router"]),
+    ]
+    engine = make_engine(steps)
+    recorder = Recorder(failing={"notify"})
+    recorder.register(engine, steps)
+
+    async def failing_rollback(step, metadata):
+        raise ConnectionError("router unreachable")
+
+    engine.register_rollback_handler("configure_router", failing_rollback)
+
+    assert not asyncio.run(engine.execute_workflow(1))
+
+    assert ("rollback", "provision") in recorder.events
+    assert steps[1].status == StepStatus.ROLLBACK_FAILED
+    assert steps[0].status == StepStatus.ROLLBACK_COMPLETED
+    assert engine.session.activation.status == ActivationStatus.ROLLBACK_FAILED
+
+
+def run_step(step, handler, retry_policy=NO_DELAY):
+    engine = make_engine([step], retry_policy)
+    engine.register_step_handler(step.step_name, handler)
+    success = asyncio.run(engine._execute_step(step, {}))
+    return engine, success
+
+
+def flaky_handler(failures, error=ExternalServiceException("RADIUS timeout")):
+    calls = []
+
+    async def handler(step, metadata):
+        calls.append(step.retry_count)
+        if len(calls) <= failures:
+            if error:
+                raise error
+            return False
+        return True
+
+    return handler, calls
+
+
+def test_retryable_errors_are_retried_until_success():
+    handler, calls = flaky_handler(2)
+    step = make_step(1, "provision")
+
+    _, success = run_step(step, handler)
+
+    assert success
+    assert calls == [0, 1, 2]
+    assert step.status == StepStatus.COMPLETED
+
+
+def test_step_fails_after_its_retries():
+    handler, calls = flaky_handler(10, error=None)
+    step = make_step(1, "provision", max_retries=2)
+
+    _, success = run_step(step, handler)
+
+    assert not success
+    assert len(calls) == 3
+    assert step.status == StepStatus.FAILED
+    assert step.error_message == "Step failed after maximum retry attempts"
+
+
+def test_other_errors_fail_the_step_immediately():
+    handler, calls = flaky_handler(1, error=ValueError("invalid VLAN"))
+    step = make_step(1, "provision")
+
+    _, success = run_step(step, handler)
+
+    assert not success
+    assert len(calls) == 1
+    assert step.error_message == "invalid VLAN"
+
+
+def test_step_policy_overrides_engine_policy():
+    handler, calls = flaky_handler(10)
+    step = make_step(1, "provision", max_retries=5)
+    engine = make_engine([step])
+    engine.register_step_handler(step.step_name, handler, retry_policy=RetryPolicy(max_attempts=2, base_delay=0))
+
+    assert not asyncio.run(engine._execute_step(step, {}))
+    assert len(calls) == 2
+
+
+def test_retries_wait_for_backoff_delays(monkeypatch):
+    handler, _ = flaky_handler(3)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(workflow_engine.asyncio, "sleep", sleep)
+    monkeypatch.setattr(workflow_engine.random, "uniform", lambda low, high: high)
+
+    run_step(make_step(1, "provision"), handler, RetryPolicy(base_delay=1, max_delay=3))
+
+    assert delays == [1, 2, 3]
+
+
+@pytest.mark.parametrize("failures", [1, 5, 50])
+def test_commits_and_log_writes_do_not_grow_with_retries(failures):
+    handler, _ = flaky_handler(failures)
+    step = make_step(1, "provision", max_retries=failures)
+
+    engine, success = run_step(step, handler)
+
+    assert success
+    # One commit when the step starts and one when it ends
+    assert engine.session.commit.await_count == 2
+    assert engine.session.inserts == 2
+    assert len(engine.session.logs) == failures + 2
+
+
+def test_retry_policy_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(workflow_engine.random, "uniform", lambda low, high: (low, high))
+    policy = RetryPolicy(base_delay=0.5, max_delay=5, multiplier=3)
+
+    assert [policy.get_delay(retry) for retry in range(1, 5)] == [(0, 0.5), (0, 1.5), (0, 4.5), (0, 5)]
+
+
+def test_retry_policy_limits_attempts():
+    step = make_step(1, "provision", max_retries=3)
+
+    assert RetryPolicy().get_max_retries(step) == 3
+    assert RetryPolicy(max_attempts=2).get_max_retries(step) == 1
+    assert RetryPolicy(max_attempts=10).get_max_retries(step) == 3
+
+
+def test_retry_policy_retryable_errors():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(None)
+    assert policy.is_retryable(ExternalServiceException("RADIUS timeout"))
+    assert policy.is_retryable(asyncio.TimeoutError())
+    assert not policy.is_retryable(ValueError("invalid VLAN"))
+
+
+def test_log_writer_inserts_entries_in_one_statement():
+    session = StubSession()
+    writer = ActivationLogWriter()
+    writer.add(1, "INFO", "Starting")
+    writer.add(1, "WARNING", "Retrying", step_id=3, details={"exception": "timeout"})
+
+    assert asyncio.run(writer.flush(session)) == 2
+
+    assert session.inserts == 1
+    assert [(log["step_id"], log["level"], log["message"], log["details"]) for log in session.logs] == [
+        (None, "INFO", "Starting", None),
+        (3, "WARNING", "Retrying", {"exception": "timeout"}),
+    ]
+    assert len(writer) == 0
+    assert asyncio.run(writer.flush(session)) == 0
+    assert session.inserts == 1